@@ -19,20 +19,29 @@ sys.path.insert(0, str(project_root))
 
 from src.ai_advisor import AIAdvisor
 from src.bear_researcher import BearResearcher
+from src.candle_store import CandleStore
 from src.config import (
     AI_ADVISOR_ENABLED,
     AI_ANALYSIS_DIR,
     BEAR_RESEARCHER_ENABLED,
+    CANDLE_STORE_ENABLED,
     DEFAULT_INSTRUMENTS,
     MAIN_TIMEFRAME,
+    MULTI_PAIR_RUNNER,
+    PIPELINE_TRACE_ENABLED,
+    SCHEDULER_MODE,
     SLACK_ALERTS_WEBHOOK_URL,
     SLACK_ENABLED,
     TELEGRAM_ENABLED,
     TELEGRAM_BOT_TOKEN,
     TELEGRAM_CHAT_ID,
 )
+from src.db_writer import close_all_writers
+from src.latency import format_perf_report
 from src.mt5_client import Mt5Client
 from src.notifier_group import NotifierGroup
+from src.orchestrator import TickSnapshotBroker, TradingOrchestrator
+from src.pipeline_trace import PipelineTraceWriter
 from src.position_manager import PositionManager
 from src.risk_manager import RiskManager
 from src.signal_coordinator import SignalCoordinator
@@ -110,6 +119,14 @@ def main():
     parser.add_argument(
         "--interval", type=int, default=60, help="チェック間隔（秒、デフォルト: 60）"
     )
+    parser.add_argument(
+        "--scheduler", choices=["interval", "bar_close"], default=SCHEDULER_MODE,
+        help=f"スケジューラ方式（デフォルト: {SCHEDULER_MODE}）"
+    )
+    parser.add_argument(
+        "--runner", choices=["orchestrator", "threads"], default=MULTI_PAIR_RUNNER,
+        help=f"マルチペアの実行方式（デフォルト: {MULTI_PAIR_RUNNER}）"
+    )
     parser.add_argument(
         "--dry-run", action="store_true", help="接続テストのみ（取引しない）"
     )
@@ -132,10 +149,13 @@ def main():
     logger.info(f"通貨ペア: {instruments} ({len(instruments)}ペア)")
     logger.info(f"時間足: {args.granularity}")
     logger.info(f"チェック間隔: {args.interval}秒")
+    logger.info(f"スケジューラ: {args.scheduler}")
+    logger.info(f"マルチペア実行方式: {args.runner}")
     logger.info(f"ドライラン: {args.dry_run}")
 
     # MT5接続
-    with Mt5Client() as broker:
+    candle_store = CandleStore() if CANDLE_STORE_ENABLED else None
+    with Mt5Client(candle_store=candle_store) as broker:
         account = broker.get_account_summary()
         logger.info(f"口座接続成功: {account}")
 
@@ -163,15 +183,21 @@ def main():
             logger.info("ドライラン完了。取引は行いません。")
             return
 
+        # オーケストレーター方式ではポジション・口座照会を tick 単位で共有する
+        orchestrated = len(instruments) > 1 and args.runner == "orchestrator"
+        shared_broker = TickSnapshotBroker(broker) if orchestrated else broker
+
         # 共有コンポーネント初期化
         db_path = data_dir / "fx_trading.db"
         risk_manager = RiskManager(
             account_balance=account["balance"],
-            broker_client=broker,
+            broker_client=shared_broker,
             db_path=db_path,
         )
+        # 再起動しても日次・週次・月次の損失と連敗数を引き継ぐ
+        risk_manager.load_loss_ledger(db_path)
         position_manager = PositionManager(
-            broker_client=broker,
+            broker_client=shared_broker,
             risk_manager=risk_manager,
             db_path=db_path,
         )
@@ -207,6 +233,9 @@ def main():
         if coordinator:
             logger.info("SignalCoordinator（クロスペア相関判断）を有効化しました")
 
+        # 構造化パイプライン trace（全ペア共有、書き込みは専用スレッド）
+        trace_writer = PipelineTraceWriter() if PIPELINE_TRACE_ENABLED else None
+
         # 各通貨ペアのTradingLoopを生成
         loops: list[TradingLoop] = []
         for instrument in instruments:
@@ -218,30 +247,46 @@ def main():
                 instrument, type(strategy).__name__,
             )
             loop = TradingLoop(
-                broker_client=broker,
+                broker_client=shared_broker,
                 position_manager=position_manager,
                 risk_manager=risk_manager,
                 strategy=strategy,
                 instrument=instrument,
                 granularity=args.granularity,
                 check_interval_sec=args.interval,
+                scheduler_mode=args.scheduler,
                 notifier=notifier_group,
                 ai_advisor=ai_advisor,
                 bear_researcher=bear,
                 signal_coordinator=coordinator,
+                trace_writer=trace_writer,
             )
             loops.append(loop)
 
+        # Telegram /perf: ペア別ステージ・レイテンシ（p50/p95/max）
+        if notifier:
+            notifier.register_command_handler(
+                "perf",
+                lambda _chat_id: format_perf_report(lp.latency for lp in loops),
+            )
+
         pairs_str = ", ".join(instruments)
         startup_detail = (
             f"通貨ペア: {pairs_str} ({len(instruments)}ペア) | "
-            f"時間足: {args.granularity} | 間隔: {args.interval}秒"
+            f"時間足: {args.granularity} | 間隔: {args.interval}秒 | "
+            f"スケジューラ: {args.scheduler}"
         )
         notifier_group.notify_bot_status("起動", startup_detail)
 
+        orchestrator = (
+            TradingOrchestrator(loops, broker=shared_broker) if orchestrated else None
+        )
+
         # SIGTERMで全ループを安全に停止（タスクスケジューラのkill対応）
         def _shutdown_handler(signum, frame):
             logger.info("シグナル %s 受信: 全ループに停止要求", signum)
+            if orchestrator:
+                orchestrator.stop()
             for lp in loops:
                 lp.stop()
 
@@ -252,6 +297,9 @@ def main():
             if len(loops) == 1:
                 # 単一ペア: メインスレッドでそのまま実行
                 loops[0].start()
+            elif orchestrator:
+                # マルチペア: 1本のスケジューラで全ペアを実行
+                orchestrator.start()
             else:
                 # マルチペア: スレッドで並行実行
                 threads: list[threading.Thread] = []
@@ -282,6 +330,9 @@ def main():
             notifier_group.notify_bot_status("停止")
             if notifier:
                 notifier.stop()  # Telegramスレッドのクリーンアップ
+            close_all_writers()  # キュー上のDB書き込みを書き切る
+            if trace_writer:
+                trace_writer.close()  # バッファ上のパイプライン trace を書き切る
 
 
 if __name__ == "__main__":
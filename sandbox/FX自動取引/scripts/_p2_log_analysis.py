@@ -3,23 +3,26 @@
 P2-D: GBP_JPY スリッページ実態（シグナル → 発注 → 約定 のタイムスタンプ追跡）
 P2-E: AIAdvisor の通過/拒否率と取引結果の集計
 
-入力: data/trading_prod_snapshot.log[.1]
+入力: data/trading_prod_snapshot.log[.1]（src/log_index.py で索引化し、未取り込み分だけ解析）
 DB:   data/fx_trading_prod_snapshot.db (実取引のPL照合用)
 
 出力:
   docs/gbp_jpy_slippage_analysis.md
   docs/ai_advisor_effectiveness.md
 """
-import re
 import sqlite3
 import sys
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 
 import pandas as pd
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.log_index import LogIndex
+
 LOG_FILES = [
     ROOT / "data" / "trading_prod_snapshot.log.1",  # 古い順
     ROOT / "data" / "trading_prod_snapshot.log",
@@ -28,49 +31,22 @@ DB_PATH = ROOT / "data" / "fx_trading_prod_snapshot.db"
 OUT_SLIP = ROOT / "docs" / "gbp_jpy_slippage_analysis.md"
 OUT_AI = ROOT / "docs" / "ai_advisor_effectiveness.md"
 
-# 正規表現
-RE_LINE = re.compile(
-    r"^(?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) \[(?P<level>\w+)\] (?P<logger>[\w.]+): (?P<msg>.*)$"
-)
-RE_AI = re.compile(
-    r"\[(?P<pair>[A-Z_]+)\]\s+AIフィルター: (?P<verdict>CONFIRM|CONTRADICT|NEUTRAL|REJECT)\s+\(direction=(?P<dir>\w+), confidence=(?P<conf>[\d.]+)\)"
-)
-RE_AI_NOPAIR = re.compile(  # 古い形式（ペア名なし）
-    r"AIフィルター: (?P<verdict>CONFIRM|CONTRADICT|NEUTRAL|REJECT)\s+\(direction=(?P<dir>\w+), confidence=(?P<conf>[\d.]+)\)"
-)
-RE_SIGNAL = re.compile(
-    r"\[(?P<pair>[A-Z_]+)\]\s+シグナル実行: (?P<dir>BUY|SELL)"
-)
-RE_OPEN = re.compile(
-    r"ポジションオープン.*trade_id=(?P<tid>\d+).*instrument=(?P<pair>[A-Z_]+)"
-)
-RE_AI_REJECT_LOG = re.compile(
-    r"AIフィルター: REJECT.*\)\。シグナルを見送り"
-)
-RE_FILL = re.compile(r"成行注文.*instrument=(?P<pair>[A-Z_]+).*price=(?P<price>[\d.]+)")
-RE_BAR_CLOSE = re.compile(r"\[(?P<pair>[A-Z_]+)\].*close=(?P<close>[\d.]+)")
-
-
-def parse_ts(ts_str: str) -> datetime:
-    return datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S,%f")
-
-
-def stream_lines():
-    for log in LOG_FILES:
-        if not log.exists():
-            continue
-        with open(log, encoding="utf-8", errors="replace") as f:
-            for raw in f:
-                m = RE_LINE.match(raw.rstrip("\n"))
-                if m:
-                    yield m.group("ts"), m.group("logger"), m.group("msg")
+# 取り込み済みの行は再解析しない（スナップショット用の索引。本番の data/log_index.db とは分ける）
+INDEX_PATH = ROOT / "data" / "log_index_prod_snapshot.db"
+
 
+def open_index() -> LogIndex:
+    """LOG_FILES の未取り込み部分だけを索引に追加して返す。"""
+    index = LogIndex(INDEX_PATH)
+    index.ingest(LOG_FILES)
+    return index
 
-def analyze_ai() -> dict:
+
+def analyze_ai(index: LogIndex) -> dict:
     """AIアドバイザー判定の集計。
 
-    各 AIフィルター ログの直後に「シグナル実行」or「シグナルを見送り」が来る。
-    REJECT は見送り、それ以外は実行 → ペア・方向・倍率を記録。
+    ペア名の無い旧形式の判定は、索引が直前の [PAIR] タグから推定したペアで数える。
+    REJECT は見送りとして機会損失候補に記録する。
     """
     counts = defaultdict(lambda: defaultdict(int))   # pair -> verdict -> n
     counts_total = defaultdict(int)                   # verdict -> n (全ペア)
@@ -78,38 +54,16 @@ def analyze_ai() -> dict:
     confidence_by_verdict = defaultdict(list)         # verdict -> [conf]
     rejected_with_pair = []  # (ts, pair, direction, conf) 機会損失候補
 
-    last_ai = None
-    last_pair_seen = None
-    for ts, logger, msg in stream_lines():
-        # ペア検出（先行ログから [PAIR] 抽出）
-        bracket = re.search(r"\[([A-Z_]+)\]", msg)
-        if bracket:
-            last_pair_seen = bracket.group(1)
-
-        m = RE_AI.search(msg)
-        if not m:
-            m = RE_AI_NOPAIR.search(msg)
-            if m:
-                # ペア名は直近の bracket から推測
-                pair_inferred = last_pair_seen or "UNKNOWN"
-                verdict = m.group("verdict")
-                direction = m.group("dir")
-                conf = float(m.group("conf"))
-            else:
-                continue
-        else:
-            pair_inferred = m.group("pair")
-            verdict = m.group("verdict")
-            direction = m.group("dir")
-            conf = float(m.group("conf"))
-
-        counts[pair_inferred][verdict] += 1
-        counts_total[verdict] += 1
-        direction_split[verdict][direction] += 1
-        confidence_by_verdict[verdict].append(conf)
+    ai_events = index.events(kinds=["ai"])
+    for ts, ev in zip(ai_events.index, ai_events.itertuples(index=False)):
+        pair_inferred = ev.pair or "UNKNOWN"
+        counts[pair_inferred][ev.verdict] += 1
+        counts_total[ev.verdict] += 1
+        direction_split[ev.verdict][ev.direction] += 1
+        confidence_by_verdict[ev.verdict].append(ev.confidence)
 
-        if verdict == "REJECT":
-            rejected_with_pair.append((ts, pair_inferred, direction, conf))
+        if ev.verdict == "REJECT":
+            rejected_with_pair.append((ts.isoformat(), pair_inferred, ev.direction, ev.confidence))
 
     return {
         "counts_per_pair": dict(counts),
@@ -120,7 +74,7 @@ def analyze_ai() -> dict:
     }
 
 
-def analyze_gbp_jpy_slippage() -> dict:
+def analyze_gbp_jpy_slippage(index: LogIndex) -> dict:
     """GBP_JPY のシグナル → 約定 までの所要時間 + 価格変化追跡。
 
     BollingerReversal は logger=src.strategy.bollinger_reversal で:
@@ -132,55 +86,28 @@ def analyze_gbp_jpy_slippage() -> dict:
     """
     events = []
     pending_signal = None    # 直近未消費の BB シグナル
-    last_pair_in_loop = None  # 直近の [PAIR] タグから現在処理中のペアを推定
-
-    for ts, logger, msg in stream_lines():
-        # [PAIR] タグ更新
-        pm = re.search(r"\[([A-Z_]+)\]", msg)
-        if pm:
-            last_pair_in_loop = pm.group(1)
-
-        # BB シグナル検出
-        sig_match = re.search(
-            r"BB(?:逆張り|平均回帰)?(?:買い|売り)シグナル: close=(?P<close>[\d.]+)",
-            msg,
-        )
-        if sig_match and logger.startswith("src.strategy.bollinger"):
-            # 直近の trading_loop の [PAIR] が GBP_JPY なら採用
-            if last_pair_in_loop == "GBP_JPY":
+
+    # BB シグナル（[PAIR] タグなし → 索引が直前の trading_loop の [PAIR] から推定）と約定
+    log_events = index.events(kinds=["bar_close", "fill"], pair="GBP_JPY")
+    for ts, ev in zip(log_events.index, log_events.itertuples(index=False)):
+        if ev.kind == "bar_close":
+            if ev.logger.startswith("src.strategy.bollinger"):
                 pending_signal = {
-                    "signal_ts": parse_ts(ts),
-                    "signal_close": float(sig_match.group("close")),
-                    "direction": "BUY" if "買い" in msg else "SELL",
+                    "signal_ts": ts.to_pydatetime(),
+                    "signal_close": ev.price,
+                    "direction": ev.direction,
                 }
             continue
 
-        # 約定 (instrument=GBP_JPY)
-        fill_m = re.search(
-            r"ポジションオープン成功: trade_id=(\d+), instrument=GBP_JPY, units=(-?\d+), price=(\d+\.\d+)",
-            msg,
-        )
-        if fill_m and pending_signal is not None:
-            ev = {
+        if pending_signal is not None:
+            events.append({
                 **pending_signal,
-                "trade_id": fill_m.group(1),
-                "units": int(fill_m.group(2)),
-                "fill_price": float(fill_m.group(3)),
-                "fill_ts": parse_ts(ts),
-            }
-            events.append(ev)
+                "trade_id": ev.trade_id,
+                "units": int(ev.units),
+                "fill_price": ev.price,
+                "fill_ts": ts.to_pydatetime(),
+            })
             pending_signal = None
-            continue
-
-        # シグナル後に HOLD / 見送り / スキップ → リセット
-        if pending_signal is not None and (
-            "見送り" in msg or "スキップ" in msg or "HOLD" in msg or "REJECT" in msg
-        ):
-            # 同 pair で見送り判定が出た場合のみクリア
-            if last_pair_in_loop == "GBP_JPY":
-                # ただし「同一通貨ペア」スキップは BB シグナルの結果ではなく fill のスキップ
-                if "ポジションオープン成功" not in msg:
-                    pass  # シグナル候補は維持（次のシグナルで上書きされる）
 
     # DB から実 open_price を補完
     if DB_PATH.exists():
@@ -393,15 +320,20 @@ def write_slip_report(slip: dict):
 
 
 def main() -> int:
+    print("Step 0: ログ索引を更新中…")
+    index = open_index()
+    print(f"  → 索引イベント数 {index.count()}")
+
     print("Step 1: AI 解析中…")
-    ai = analyze_ai()
+    ai = analyze_ai(index)
     print(f"  → 総評価数 {sum(ai['counts_total'].values())}")
     write_ai_report(ai)
 
     print("Step 2: GBP_JPY スリッページ解析中…")
-    slip = analyze_gbp_jpy_slippage()
+    slip = analyze_gbp_jpy_slippage(index)
     print(f"  → events {slip['events_total']}, fill完了 {slip['n']}")
     write_slip_report(slip)
+    index.close()
 
     print("\nDone")
     return 0
@@ -15,6 +15,7 @@ import io
 import json
 import logging
 import sys
+from functools import partial
 from pathlib import Path
 
 if hasattr(sys.stdout, "buffer"):
@@ -28,6 +29,7 @@ ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
 
 from src.backtester import BacktestEngine, calculate_spread  # noqa: E402
+from src.param_sweep import ParameterSweep  # noqa: E402
 
 # Gate スクリプトから戦略クラスを再利用（dual definitionを避ける）
 import importlib.util  # noqa: E402
@@ -77,6 +79,11 @@ PROD_RECORD = {
 # 本番期間（trades テーブルの opened_at min/max）
 PROD_PERIOD = ("2026-04-21", "2026-05-04")
 
+# 期間×戦略グリッドのワーカープロセス数
+SWEEP_WORKERS = 4
+# グリッドの完了トライアル（中断後の再実行で再利用。データ・評価関数が変われば使わない）
+SWEEP_CHECKPOINT_DIR = ROOT / "data" / "sweep_checkpoints"
+
 
 # ============================================================
 # 単一バックテスト
@@ -100,6 +107,34 @@ def run_one(df_bt: pd.DataFrame, klass, spread: float) -> dict:
     }
 
 
+def grid_trial(pair: str, adx_thr: float, df_full: pd.DataFrame, params: dict) -> dict:
+    """ParameterSweep 用の評価関数: 1つの (戦略, 期間) セルを実行する"""
+    start = pd.Timestamp(params["start"], tz="UTC")
+    end = pd.Timestamp(params["end"] + " 23:59:59", tz="UTC")
+    df_period = df_full.loc[start:end]
+    if len(df_period) < 500:
+        return {"pf": None, "trades": 0, "skipped": True}
+
+    df_bt = BacktestEngine.prepare_data(df_period)
+    price = float(df_bt["Close"].iloc[-1])
+    spread = calculate_spread(pair, price, pip_spread=None)
+
+    strat_class = dict(STRATEGIES)[params["strategy"]]
+    klass = type(f"P_{pair}_{params['strategy']}_{params['period']}",
+                 (strat_class,), {"adx_threshold": adx_thr})
+    return run_one(df_bt, klass, spread)
+
+
+def _cell_from_row(row: dict) -> dict:
+    """結果テーブルの1行を grid_table のセル形式（欠損は None）に戻す"""
+    cell = {k: (None if pd.isna(v) else v) for k, v in row.items() if not k.startswith("p_")}
+    if not cell.get("skipped"):
+        cell.pop("skipped", None)
+    if cell.get("trades") is not None:
+        cell["trades"] = int(cell["trades"])
+    return cell
+
+
 def fmt_cell(r: dict) -> str:
     pf = f"{r['pf']:.2f}" if r['pf'] else "  - "
     n = r['trades'] or 0
@@ -126,34 +161,28 @@ def main():
             print(f"⚠ {pair}: {csv_name} 未存在、スキップ")
             continue
         df_full = load_mt5_csv(csv_path)
-        grid_table[pair] = {}
-
-        for strat_label, strat_class in STRATEGIES:
-            grid_table[pair][strat_label] = {}
-
-            for period_label, start_str, end_str in PERIODS:
-                # tz aware
-                start = pd.Timestamp(start_str, tz="UTC")
-                end = pd.Timestamp(end_str + " 23:59:59", tz="UTC")
-                df_period = df_full.loc[start:end]
-                if len(df_period) < 500:
-                    grid_table[pair][strat_label][period_label] = {
-                        "pf": None, "trades": 0, "skipped": True,
-                    }
-                    continue
-
-                df_bt = BacktestEngine.prepare_data(df_period)
-                price = float(df_bt["Close"].iloc[-1])
-                spread = calculate_spread(pair, price, pip_spread=None)
-
-                klass = type(f"P_{pair}_{strat_label}_{period_label}",
-                             (strat_class,), {"adx_threshold": adx_thr})
-                r = run_one(df_bt, klass, spread)
-                grid_table[pair][strat_label][period_label] = r
-                rows.append({
-                    "pair": pair, "strategy": strat_label, "period": period_label,
-                    **r,
-                })
+        grid_table[pair] = {strat_label: {} for strat_label, _ in STRATEGIES}
+
+        trials = [
+            {"strategy": strat_label, "period": period_label, "start": start_str, "end": end_str}
+            for strat_label, _ in STRATEGIES
+            for period_label, start_str, end_str in PERIODS
+        ]
+        sweep = ParameterSweep(
+            partial(grid_trial, pair, adx_thr), n_workers=SWEEP_WORKERS,
+            checkpoint_path=SWEEP_CHECKPOINT_DIR / f"phase1c_grid_{pair}.jsonl",
+        )
+        table = sweep.run(df_full, trials)
+
+        for trial, row in zip(trials, table.to_dict("records")):
+            r = _cell_from_row(row)
+            grid_table[pair][trial["strategy"]][trial["period"]] = r
+            if r.get("skipped"):
+                continue
+            rows.append({
+                "pair": pair, "strategy": trial["strategy"], "period": trial["period"],
+                **r,
+            })
 
     # 表出力
     print()
@@ -261,7 +261,8 @@ STRATEGIES = [
 
 
 def run_one(df_bt, klass, spread):
-    engine = BacktestEngine(db_path=":memory:")
+    # ファイルDB を使い、同じ戦略・データ区間の再実行は backtest_cache から返す
+    engine = BacktestEngine()
     try:
         full = engine.run(df_bt, klass, spread=spread)
     except Exception as e:
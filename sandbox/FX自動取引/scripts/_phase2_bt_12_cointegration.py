@@ -1,7 +1,7 @@
 """Phase 2 BT: 候補 #12 Cointegration Pairs Trading
 
 仕様:
-- 2 通貨ペアの cointegration 検定 (Engle-Granger, statsmodels.tsa.stattools.coint)
+- 2 通貨ペアの cointegration 検定 (Engle-Granger, src/cointegration.py)
 - z-score 反転で取引 (entry |z|>=2.0, exit |z|<=0.5, stop |z|>=4.0)
 - 6 ヶ月ローリングで cointegration 再評価 (p<0.05 維持できないペアは取引停止)
 - ペア候補: EUR_USD/GBP_USD, AUD_USD/NZD_USD, USD_CHF/USD_CAD など (EUR_CHF 除外)
@@ -19,6 +19,7 @@
 - data/_phase2_bt_12_cointegration_pairs.csv (p値マトリックス)
 """
 from __future__ import annotations
+import itertools
 import sys
 from pathlib import Path
 from dataclasses import dataclass, field
@@ -30,9 +31,10 @@ sys.path.insert(0, str(ROOT))
 
 import numpy as np
 import pandas as pd
-from statsmodels.tsa.stattools import coint, adfuller
-from statsmodels.regression.linear_model import OLS
-from statsmodels.tools.tools import add_constant
+
+from src.cointegration import CointegrationScan, cached_scan, engle_granger
+from src.config import COINT_SCAN_CACHE_DIR
+from src.meta_labeling import FeatureCache
 
 # =================================================================
 # 定数
@@ -65,6 +67,7 @@ MAX_HOLD_DAYS = 30  # 時間ストップ (D1 で 30 バー)
 # WFA / ローリング
 COINT_TEST_WINDOW_DAYS = 180  # 6 ヶ月 (D1 で 180 バー)
 COINT_REEVAL_INTERVAL_DAYS = 7  # 週次再評価
+COINT_SCAN_WORKERS = 4  # 全組ローリング検定の並列プロセス数 (初回のみ、以降はキャッシュ)
 WFA_TRAIN_DAYS = 365  # 12 ヶ月学習
 WFA_TEST_DAYS = 180  # 6 ヶ月運用 (3ヶ月は短すぎて trade=0 続出)
 
@@ -187,9 +190,7 @@ def load_pair_data() -> dict[str, pd.DataFrame]:
 
 def estimate_hedge_ratio(y: pd.Series, x: pd.Series) -> float:
     """OLS で hedge ratio (β) 推定: y = α + β*x"""
-    X = add_constant(x.values)
-    model = OLS(y.values, X).fit()
-    return float(model.params[1])
+    return float(np.polyfit(x.values, y.values, 1)[0])
 
 
 def coint_test(y: pd.Series, x: pd.Series) -> dict:
@@ -197,12 +198,25 @@ def coint_test(y: pd.Series, x: pd.Series) -> dict:
 
     Returns: {'pvalue', 'tstat', 'beta'}
     """
-    try:
-        tstat, pval, _ = coint(y.values, x.values, trend="c")
-        beta = estimate_hedge_ratio(y, x)
-        return {"pvalue": float(pval), "tstat": float(tstat), "beta": beta}
-    except Exception as e:
-        return {"pvalue": np.nan, "tstat": np.nan, "beta": np.nan, "error": str(e)}
+    res = engle_granger(y.values, x.values)
+    if np.isnan(res.pvalue):
+        return {"pvalue": np.nan, "tstat": np.nan, "beta": np.nan, "error": "検定できない系列 (定数・短すぎる)"}
+    return {"pvalue": res.pvalue, "tstat": res.tstat, "beta": res.beta}
+
+
+# 全組 × 全日のローリング検定結果 (終値・ウィンドウごとにメモリ / data/coint_scans にキャッシュ)
+_SCAN_CACHE = FeatureCache(cache_dir=COINT_SCAN_CACHE_DIR)
+
+
+def rolling_coint_scan(data: dict[str, pd.DataFrame], coint_window_days: int) -> CointegrationScan:
+    """全 INSTRUMENTS の (y, x) 全順列について、各日を終端とする coint_window_days の検定結果"""
+    closes = pd.DataFrame({inst: data[inst]["close"] for inst in INSTRUMENTS})
+    return cached_scan(
+        closes, pd.Timedelta(days=coint_window_days),
+        pairs=list(itertools.permutations(INSTRUMENTS, 2)),
+        n_workers=COINT_SCAN_WORKERS,
+        cache=_SCAN_CACHE,
+    )
 
 
 def cointegration_matrix(data: dict[str, pd.DataFrame], window_start: pd.Timestamp,
@@ -347,6 +361,8 @@ def simulate(data: dict[str, pd.DataFrame], pairs_to_trade: list[tuple[str, str]
 
     last_reeval_idx = -reeval_every_days  # 即時初回評価
     bar_count = 0
+    # 各日を終端とする検定結果は全日分を1回だけ事前計算しておく（ループ内で引かない）
+    scan = rolling_coint_scan(data, coint_window_days)
     debug_stats = {"active_pair_bars": 0, "z_attempts": 0, "z_over_entry": 0, "active_pair_count_max": 0,
                    "entry_block_force_close": 0, "entry_block_halt": 0, "entry_block_full": 0,
                    "entry_block_inactive": 0, "entry_block_dup": 0, "entry_block_no_data": 0}
@@ -356,25 +372,22 @@ def simulate(data: dict[str, pd.DataFrame], pairs_to_trade: list[tuple[str, str]
 
         # ----- 共和分再評価 -----
         if i - last_reeval_idx >= reeval_every_days:
-            window_end = ts
             window_start = ts - pd.Timedelta(days=coint_window_days)
             # データ範囲外: スキップ (まだ十分な過去データがない)
             if window_start < base_idx[0]:
                 last_reeval_idx = i
                 equity_history.append({"timestamp": ts, "equity": capital_jpy, "open_positions": len(open_positions)})
                 continue
+            # [window_start, ts] の検定結果は事前計算済みの scan から引く
             for pair_a, pair_b in pairs_to_trade:
-                sa = data[pair_a].loc[window_start:window_end, "close"]
-                sb = data[pair_b].loc[window_start:window_end, "close"]
-                if len(sa) < 30:
+                if scan.nobs.at[ts, (pair_a, pair_b)] < 30:
                     continue
-                res = coint_test(sa, sb)
-                pval = res["pvalue"]
+                pval = scan.pvalue.at[ts, (pair_a, pair_b)]
                 pair_state[(pair_a, pair_b)]["pvalue"] = pval
                 pair_state[(pair_a, pair_b)]["last_eval"] = ts
                 if not np.isnan(pval) and pval < coint_pval_threshold:
                     pair_state[(pair_a, pair_b)]["is_active"] = True
-                    pair_state[(pair_a, pair_b)]["beta"] = res["beta"]
+                    pair_state[(pair_a, pair_b)]["beta"] = scan.beta.at[ts, (pair_a, pair_b)]
                 else:
                     pair_state[(pair_a, pair_b)]["is_active"] = False
             last_reeval_idx = i
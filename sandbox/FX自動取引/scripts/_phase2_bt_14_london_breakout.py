@@ -6,7 +6,7 @@
 - フィルタ: MACD (12,26,9) histogram 同方向 + RSI(14) 中央線同方向
 - ATR(14) ベースの SL/TP (SL = ATR×1.5、TP = ATR×3.0)
 - NY セッションクローズ (UTC 21:00) で強制 close
-- ニュースフィルタ: NFP 第1金曜 UTC13:30 / FOMC / BoE / ECB の直前1時間 〜 1時間後を回避
+- ニュースフィルタ: NFP 第1金曜 UTC13:30 / FOMC / BoE / ECB の直前1時間 〜 1時間後を回避 (src.session_breakout.news_blackout_mask)
 - 月次 Optuna 最適化 (G0-B 自己改善メカニズム)
 - Walk-Forward: 6ヶ月学習 / 1ヶ月運用 windows
 
@@ -17,6 +17,7 @@ from __future__ import annotations
 
 import sys
 from dataclasses import dataclass, asdict
+from functools import partial
 from pathlib import Path
 from typing import Optional
 
@@ -25,6 +26,10 @@ import pandas as pd
 
 ROOT = Path(__file__).resolve().parents[1]
 DATA = ROOT / "data"
+sys.path.insert(0, str(ROOT))
+
+from src.param_sweep import ParameterSweep, one_at_a_time  # noqa: E402
+from src.session_breakout import news_blackout_mask, simulate_session_breakout  # noqa: E402
 
 # ----------------------------------------
 # 共通設定
@@ -57,6 +62,14 @@ DEFAULT_PARAMS = {
     "macd_signal": 9,
 }
 
+# prepare_features の結果を左右するパラメータ（この組が同じなら特徴量を共有できる）
+FEATURE_KEYS = ("atr_period", "rsi_period", "macd_fast", "macd_slow", "macd_signal")
+
+# 感度分析のワーカープロセス数
+SWEEP_WORKERS = 4
+# 感度分析の完了トライアル（中断後の再実行で再利用。データ・評価関数が変われば使わない）
+SWEEP_CHECKPOINT_DIR = ROOT / "data" / "sweep_checkpoints"
+
 
 # ----------------------------------------
 # インジケータ
@@ -91,37 +104,6 @@ def calc_macd(close: pd.Series, fast: int, slow: int, signal: int) -> pd.Series:
     return hist
 
 
-# ----------------------------------------
-# ニュースフィルタ
-# ----------------------------------------
-def is_news_blackout(dt: pd.Timestamp) -> bool:
-    """高インパクトイベント前後 1時間を回避。
-    - NFP: 毎月第1金曜 UTC 13:30 → 12:30-14:30 を回避
-    - FOMC: 第3水曜 UTC 18:00 → 17:00-19:00 (近似)
-    - ECB: 第1木曜 UTC 12:45 → 11:45-13:45
-    - BoE: 第1木曜 UTC 12:00 → 11:00-13:00
-    完全な経済カレンダー連携でないが、保守的な近似。
-    """
-    if dt.tzinfo is None:
-        dt = dt.tz_localize("UTC")
-    weekday = dt.weekday()  # 月=0
-    day = dt.day
-    hour = dt.hour
-    # 第1金曜 NFP (1-7日の金曜)
-    if weekday == 4 and 1 <= day <= 7:
-        if 12 <= hour <= 14:
-            return True
-    # 第1木曜 ECB/BoE
-    if weekday == 3 and 1 <= day <= 7:
-        if 11 <= hour <= 14:
-            return True
-    # 第3水曜 FOMC (15-21日の水曜)
-    if weekday == 2 and 15 <= day <= 21:
-        if 17 <= hour <= 19:
-            return True
-    return False
-
-
 # ----------------------------------------
 # データロード
 # ----------------------------------------
@@ -170,8 +152,13 @@ class Trade:
 def run_bt_single_pair(pair: str, df_full: pd.DataFrame, params: dict,
                        date_start: Optional[pd.Timestamp] = None,
                        date_end: Optional[pd.Timestamp] = None,
-                       news_filter: bool = True) -> list[Trade]:
-    """単一ペア・単一パラメータでのバックテスト実行"""
+                       news_filter: bool = True,
+                       features_ready: bool = False) -> list[Trade]:
+    """単一ペア・単一パラメータでのバックテスト実行
+
+    features_ready=True の場合、df_full は prepare_features 済みとして扱い再計算しない
+    （スイープで同じ特徴量を複数トライアルに使い回す用）。
+    """
     cfg = PAIR_CONFIG[pair]
     pip = cfg["pip"]
     spread = cfg["spread_pips"] * pip
@@ -185,139 +172,57 @@ def run_bt_single_pair(pair: str, df_full: pd.DataFrame, params: dict,
     if len(df) < 50:
         return []
 
-    df = prepare_features(df, params)
-
-    trades: list[Trade] = []
-    # 日ごとに処理
-    for date, day_df in df.groupby(df.index.date):
-        if len(day_df) < 10:
-            continue
-        # アジアレンジ (asia_start_h ~ asia_end_h-1)
-        asia = day_df[(day_df["hour"] >= params["asia_start_h"]) & (day_df["hour"] < params["asia_end_h"])]
-        if len(asia) < 3:
-            continue
-        asia_high = asia["high"].max()
-        asia_low = asia["low"].min()
-        range_size = asia_high - asia_low
-        # range が極端に小さい/大きい場合スキップ (極小 = ノイズ、極大 = 既にトレンド)
-        atr_at_break_start = asia["atr"].iloc[-1]
-        if pd.isna(atr_at_break_start) or atr_at_break_start <= 0:
-            continue
-        if range_size < 0.3 * atr_at_break_start or range_size > 5.0 * atr_at_break_start:
-            continue
-
-        # ブレイク判定窓 (break_start_h ~ break_end_h-1)
-        break_window = day_df[(day_df["hour"] >= params["break_start_h"]) & (day_df["hour"] < params["break_end_h"])]
-        if len(break_window) == 0:
-            continue
-
-        buf = params["buffer_pips"] * pip
-        position: Optional[Trade] = None
-
-        for ts, row in break_window.iterrows():
-            if news_filter and is_news_blackout(ts):
-                continue
-            if pd.isna(row["atr"]) or pd.isna(row["macd_hist"]) or pd.isna(row["rsi"]):
-                continue
-
-            high = row["high"]
-            low = row["low"]
-            close = row["close"]
-            atr_v = row["atr"]
-
-            # long ブレイク
-            if high > asia_high + buf:
-                if row["macd_hist"] > 0 and row["rsi"] > params["rsi_threshold"]:
-                    entry = asia_high + buf + slip  # スリッページ込みエントリー
-                    sl = entry - params["atr_sl_mult"] * atr_v
-                    tp = entry + params["atr_tp_mult"] * atr_v
-                    position = Trade(
-                        pair=pair, entry_time=ts, exit_time=ts, direction="long",
-                        entry_price=entry, exit_price=entry, sl=sl, tp=tp,
-                        asia_high=asia_high, asia_low=asia_low, range_size=range_size,
-                        atr=atr_v, pips=0, pnl_jpy=0, outcome="OPEN", holding_bars=0,
-                    )
-                    break
-            # short ブレイク
-            elif low < asia_low - buf:
-                if row["macd_hist"] < 0 and row["rsi"] < params["rsi_threshold"]:
-                    entry = asia_low - buf - slip
-                    sl = entry + params["atr_sl_mult"] * atr_v
-                    tp = entry - params["atr_tp_mult"] * atr_v
-                    position = Trade(
-                        pair=pair, entry_time=ts, exit_time=ts, direction="short",
-                        entry_price=entry, exit_price=entry, sl=sl, tp=tp,
-                        asia_high=asia_high, asia_low=asia_low, range_size=range_size,
-                        atr=atr_v, pips=0, pnl_jpy=0, outcome="OPEN", holding_bars=0,
-                    )
-                    break
-
-        if position is None:
-            continue
-
-        # 強制 close まで保有
-        manage_window = day_df[(day_df.index > position.entry_time) & (day_df["hour"] < params["force_close_h"])]
-        closed = False
-        for ts, row in manage_window.iterrows():
-            hi, lo = row["high"], row["low"]
-            position.holding_bars += 1
-            if position.direction == "long":
-                if lo <= position.sl:
-                    position.exit_time = ts
-                    position.exit_price = position.sl
-                    position.outcome = "SL"
-                    closed = True
-                    break
-                if hi >= position.tp:
-                    position.exit_time = ts
-                    position.exit_price = position.tp
-                    position.outcome = "TP"
-                    closed = True
-                    break
-            else:
-                if hi >= position.sl:
-                    position.exit_time = ts
-                    position.exit_price = position.sl
-                    position.outcome = "SL"
-                    closed = True
-                    break
-                if lo <= position.tp:
-                    position.exit_time = ts
-                    position.exit_price = position.tp
-                    position.outcome = "TP"
-                    closed = True
-                    break
-
-        if not closed:
-            # 強制 close (NY セッション後半)
-            close_window = day_df[(day_df["hour"] >= params["force_close_h"])]
-            if len(close_window) > 0:
-                cl_row = close_window.iloc[0]
-                position.exit_time = close_window.index[0]
-                position.exit_price = cl_row["open"]
-                position.outcome = "FORCE_CLOSE"
-                position.holding_bars += 1
-            else:
-                # その日のデータが無ければ最後の bar で close
-                last_row = day_df.iloc[-1]
-                position.exit_time = day_df.index[-1]
-                position.exit_price = last_row["close"]
-                position.outcome = "EOD_CLOSE"
-
-        # PnL 計算 (スプレッドはエントリーで往復片側、エグジットでスリッページ)
-        dirn = 1 if position.direction == "long" else -1
-        gross_diff = (position.exit_price - position.entry_price) * dirn
-        # コスト: スプレッド (往復) + 決済スリッページ
-        cost = spread + slip
-        net_diff = gross_diff - cost
-        position.pips = net_diff / pip
-        if cfg["jpy_quote"]:
-            position.pnl_jpy = net_diff * UNITS
-        else:
-            position.pnl_jpy = net_diff * UNITS * USD_JPY_FIXED
-        trades.append(position)
-
-    return trades
+    if not features_ready:
+        df = prepare_features(df, params)
+
+    # 日ごとのレンジ・ブレイク足・SL/TP 到達を全期間の配列演算で一括判定
+    atr = df["atr"].to_numpy(dtype=float)
+    rsi = df["rsi"].to_numpy(dtype=float)
+    macd_hist = df["macd_hist"].to_numpy(dtype=float)
+    tradable = ~(np.isnan(atr) | np.isnan(rsi) | np.isnan(macd_hist))
+    if news_filter:
+        tradable &= ~news_blackout_mask(df.index)
+    result = simulate_session_breakout(
+        df, atr,
+        long_ok=(macd_hist > 0) & (rsi > params["rsi_threshold"]),
+        short_ok=(macd_hist < 0) & (rsi < params["rsi_threshold"]),
+        tradable=tradable,
+        range_start_h=params["asia_start_h"], range_end_h=params["asia_end_h"],
+        break_start_h=params["break_start_h"], break_end_h=params["break_end_h"],
+        force_close_h=params["force_close_h"],
+        buffer=params["buffer_pips"] * pip, entry_slippage=slip,
+        sl_atr_mult=params["atr_sl_mult"], tp_atr_mult=params["atr_tp_mult"],
+    )
+
+    # PnL 計算 (スプレッドはエントリーで往復片側、エグジットでスリッページ)
+    # コスト: スプレッド (往復) + 決済スリッページ
+    cost = spread + slip
+    net_diff = (result.exit_price - result.entry_price) * result.direction - cost
+    pips = net_diff / pip
+    pnl_jpy = net_diff * UNITS if cfg["jpy_quote"] else net_diff * UNITS * USD_JPY_FIXED
+
+    index = df.index
+    return [
+        Trade(
+            pair=pair,
+            entry_time=index[result.entry_idx[k]],
+            exit_time=index[result.exit_idx[k]],
+            direction="long" if result.direction[k] == 1 else "short",
+            entry_price=float(result.entry_price[k]),
+            exit_price=float(result.exit_price[k]),
+            sl=float(result.sl[k]),
+            tp=float(result.tp[k]),
+            asia_high=float(result.range_high[k]),
+            asia_low=float(result.range_low[k]),
+            range_size=float(result.range_high[k] - result.range_low[k]),
+            atr=float(result.atr[k]),
+            pips=float(pips[k]),
+            pnl_jpy=float(pnl_jpy[k]),
+            outcome=str(result.outcome[k]),
+            holding_bars=int(result.holding_bars[k]),
+        )
+        for k in range(len(result))
+    ]
 
 
 # ----------------------------------------
@@ -442,6 +347,10 @@ def optuna_optimize(pair: str, df: pd.DataFrame, train_start: pd.Timestamp, trai
     import optuna
     optuna.logging.set_verbosity(optuna.logging.WARNING)
 
+    # 最適化対象に特徴量パラメータは含まれないため、学習期間の特徴量は1回だけ計算する
+    df_train = df[(df.index >= train_start) & (df.index < train_end)]
+    df_train = prepare_features(df_train, DEFAULT_PARAMS)
+
     def objective(trial):
         p = DEFAULT_PARAMS.copy()
         p["asia_end_h"] = trial.suggest_int("asia_end_h", 6, 9)
@@ -452,7 +361,7 @@ def optuna_optimize(pair: str, df: pd.DataFrame, train_start: pd.Timestamp, trai
         p["atr_tp_mult"] = trial.suggest_float("atr_tp_mult", 1.5, 4.0)
         p["rsi_threshold"] = trial.suggest_float("rsi_threshold", 45.0, 55.0)
 
-        trades = run_bt_single_pair(pair, df, p, train_start, train_end)
+        trades = run_bt_single_pair(pair, df_train, p, features_ready=True)
         if len(trades) < 5:
             return -10.0
         st = stats_from_trades(trades)
@@ -569,23 +478,24 @@ def stress_test(pair: str, df: pd.DataFrame, params: dict) -> list[dict]:
 # ----------------------------------------
 # パラメータ感度
 # ----------------------------------------
-def sensitivity_analysis(pair: str, df: pd.DataFrame, base_params: dict) -> pd.DataFrame:
+def _sweep_trial(pair: str, df: pd.DataFrame, params: dict) -> dict:
+    """ParameterSweep 用の評価関数（df は prepare_features 済み）"""
+    st = stats_from_trades(run_bt_single_pair(pair, df, params, features_ready=True))
+    return {k: st[k] for k in ("n", "pf", "sharpe", "total_pnl", "max_dd_pct")}
+
+
+def sensitivity_analysis(pair: str, df: pd.DataFrame, base_params: dict,
+                         n_workers: int = SWEEP_WORKERS) -> pd.DataFrame:
     """主要パラメータを ±20% 変動させ PF/Sharpe の安定性を評価"""
-    results = []
     targets = ["buffer_pips", "atr_sl_mult", "atr_tp_mult", "rsi_threshold"]
-    for k in targets:
-        for delta_pct in [-20, -10, 0, 10, 20]:
-            p = base_params.copy()
-            base_v = base_params[k]
-            p[k] = base_v * (1 + delta_pct / 100)
-            trades = run_bt_single_pair(pair, df, p)
-            st = stats_from_trades(trades)
-            results.append({
-                "param": k, "delta_pct": delta_pct, "value": p[k],
-                "n": st["n"], "pf": st["pf"], "sharpe": st["sharpe"],
-                "total_pnl": st["total_pnl"], "max_dd_pct": st["max_dd_pct"],
-            })
-    return pd.DataFrame(results)
+    trials = one_at_a_time(base_params, targets, deltas_pct=[-20, -10, 0, 10, 20])
+    sweep = ParameterSweep(partial(_sweep_trial, pair), features=prepare_features,
+                           feature_keys=FEATURE_KEYS, n_workers=n_workers,
+                           checkpoint_path=SWEEP_CHECKPOINT_DIR / f"bt14_sensitivity_{pair}.jsonl")
+    table = sweep.run(df, trials)
+    table["value"] = [t[t["_target"]] for t in trials]
+    table = table.rename(columns={"target": "param"})
+    return table[["param", "delta_pct", "value", "n", "pf", "sharpe", "total_pnl", "max_dd_pct"]]
 
 
 # ----------------------------------------
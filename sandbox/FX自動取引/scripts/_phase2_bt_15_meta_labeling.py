@@ -43,6 +43,14 @@ from sklearn.metrics import roc_auc_score, accuracy_score
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
+from src.meta_labeling import (  # noqa: E402
+    META_FEATURE_COLUMNS,
+    FeatureCache,
+    build_meta_features,
+    triple_barrier_labels,
+)
+from src.param_sweep import ParameterSweep, grid  # noqa: E402
+
 # ----------------------------------------------------------------------
 # 設定
 # ----------------------------------------------------------------------
@@ -217,7 +225,7 @@ def triple_barrier_label(
     sl_mult: float = TB_SL_MULT,
     max_hold: int = TB_MAX_HOLD,
 ) -> tuple[int, int, float]:
-    """1イベントの Triple-Barrier ラベル。
+    """1イベントの Triple-Barrier ラベル (src.meta_labeling.triple_barrier_labels の1件版)。
 
     Returns:
         (label, exit_offset, raw_return_pips_no_cost)
@@ -225,68 +233,29 @@ def triple_barrier_label(
             exit_offset: イベントから何本後に手仕舞ったか
             raw_return_pips_no_cost: コスト除外の生リターン (pips)
     """
-    if event_idx + 1 >= len(df):
-        return (0, 0, 0.0)
-    entry = df["open"].iloc[event_idx + 1]  # 次足 open でエントリー
-    if side == 1:
-        upper = entry + tp_mult * atr_val
-        lower = entry - sl_mult * atr_val
-    else:
-        upper = entry + sl_mult * atr_val
-        lower = entry - tp_mult * atr_val
-
-    end = min(event_idx + 1 + max_hold, len(df) - 1)
-    for j in range(event_idx + 1, end + 1):
-        hi = df["high"].iloc[j]
-        lo = df["low"].iloc[j]
-        if side == 1:
-            if lo <= lower:
-                return (0, j - event_idx, (lower - entry))
-            if hi >= upper:
-                return (1, j - event_idx, (upper - entry))
-        else:
-            if hi >= upper:
-                return (0, j - event_idx, (entry - upper))
-            if lo <= lower:
-                return (1, j - event_idx, (entry - lower))
-    # max_hold 到達 → 終値で時間切れ手仕舞い
-    exit_price = df["close"].iloc[end]
-    raw = (exit_price - entry) if side == 1 else (entry - exit_price)
-    label = 1 if raw > 0 else 0
-    return (label, end - event_idx, raw)
+    result = triple_barrier_labels(
+        df, np.array([event_idx]), np.array([side]), np.array([atr_val]),
+        tp_mult=tp_mult, sl_mult=sl_mult, max_hold=max_hold,
+    )
+    return (int(result.label[0]), int(result.exit_offset[0]), float(result.raw_return[0]))
 
 
 # ----------------------------------------------------------------------
 # 特徴量生成 (Secondary の入力)
 # ----------------------------------------------------------------------
+_FEATURE_CACHE = FeatureCache()
+
+
 def build_features(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    out["rsi"] = rsi(out["close"], PRIMARY_RSI_LEN)
-    out["adx"] = adx(out["high"], out["low"], out["close"], PRIMARY_ADX_LEN)
-    out["atr"] = atr(out["high"], out["low"], out["close"], ATR_LEN)
-    out["atr_over_price"] = out["atr"] / out["close"]
-    vol_col = "volume" if "volume" in out.columns else "tick_volume"
-    if vol_col in out.columns:
-        out["mfi"] = mfi_like(out["high"], out["low"], out["close"], out[vol_col], n=14)
-    else:
-        out["mfi"] = 50.0
-    out["vol20_std"] = out["close"].pct_change().rolling(20, min_periods=5).std()
-    out["sma_gap"] = (sma(out["close"], PRIMARY_MA_SHORT) - sma(out["close"], PRIMARY_MA_LONG)) / out["close"]
-    out["sma_gap_abs"] = out["sma_gap"].abs()
-    for k in range(1, 6):
-        out[f"ret_lag_{k}"] = out["close"].pct_change(k)
-    # 時間情報 (UTC)
-    out["hour"] = out.index.hour
-    out["dow"] = out.index.dayofweek
-    return out
+    """特徴量列を追加する。同じデータセットなら data/meta_features のキャッシュを使う。"""
+    return _FEATURE_CACHE.get_or_build(
+        df, build_meta_features,
+        rsi_period=PRIMARY_RSI_LEN, adx_period=PRIMARY_ADX_LEN, atr_period=ATR_LEN,
+        ma_short=PRIMARY_MA_SHORT, ma_long=PRIMARY_MA_LONG,
+    )
 
 
-FEATURE_COLS = [
-    "rsi", "adx", "atr_over_price", "mfi",
-    "vol20_std", "sma_gap", "sma_gap_abs",
-    "ret_lag_1", "ret_lag_2", "ret_lag_3", "ret_lag_4", "ret_lag_5",
-    "hour", "dow",
-]
+FEATURE_COLS = list(META_FEATURE_COLUMNS)
 
 
 # ----------------------------------------------------------------------
@@ -341,26 +310,13 @@ def run_walk_forward(
     df = build_features(df)
     df = primary_signals(df)
 
-    # Triple-Barrier ラベル (全 Primary 発火点について事前計算)
-    events = df.index[df["primary_side"] != 0]
-    label_rows = []
-    for ts in events:
-        i = df.index.get_loc(ts)
-        side = int(df["primary_side"].iloc[i])
-        atr_val = df["atr"].iloc[i]
-        if pd.isna(atr_val) or atr_val <= 0:
-            continue
-        label, exit_off, raw_pips = triple_barrier_label(df, i, side, atr_val)
-        label_rows.append({
-            "ts": ts,
-            "idx": i,
-            "side": side,
-            "atr": float(atr_val),
-            "label": label,
-            "exit_offset": exit_off,
-            "raw_diff": float(raw_pips),
-        })
-    labels = pd.DataFrame(label_rows).set_index("ts")
+    # Triple-Barrier ラベル (全 Primary 発火点について一括計算)
+    side_arr = df["primary_side"].to_numpy()
+    atr_arr = df["atr"].to_numpy(dtype=float)
+    event_idx = np.flatnonzero((side_arr != 0) & (atr_arr > 0))
+    barriers = triple_barrier_labels(df, event_idx, side_arr[event_idx], atr_arr[event_idx])
+    labels = barriers.to_frame(df.index)
+    labels["atr"] = atr_arr[event_idx]
     # 特徴量を join
     feats = df[FEATURE_COLS].copy()
     feats["primary_side"] = df["primary_side"]
@@ -370,7 +326,7 @@ def run_walk_forward(
     start = df.index.min()
     end = df.index.max()
     windows: list[WfaWindow] = []
-    all_trades: list[dict] = []
+    trade_frames: list[pd.DataFrame] = []
 
     cursor = start + pd.DateOffset(months=WFA_TRAIN_MONTHS)
     while cursor + pd.DateOffset(months=WFA_TEST_MONTHS) <= end:
@@ -408,8 +364,6 @@ def run_walk_forward(
         rf.fit(X_train, y_train)
 
         # OOS predict
-        safe_fires = 0
-        accepted_in_window = []
         rf_proba_all = []
         rf_pred_all = []
         if len(test_labels) > 0:
@@ -430,89 +384,44 @@ def run_walk_forward(
             oos_acc = float("nan")
 
         # トレード生成: proba >= SAFE_MODE_THRESH なら採用
+        # (手仕舞い価格・結果はラベル計算時のバリア判定をそのまま使う)
         pip = PIP_SIZE[instrument]
         spread_pip = SPREAD_PIPS[instrument]
-        for k, (ts, row) in enumerate(test_labels.iterrows()):
-            p = rf_proba_all[k] if k < len(rf_proba_all) else 0.0
-            if p < SAFE_MODE_THRESH:
-                safe_fires += 1
-                continue
-            # 採用 → トレード成立として PnL 計算
-            i = int(row["idx"])
-            if i + 1 >= len(df):
-                continue
-            side = int(row["side"])
-            entry_price = df["open"].iloc[i + 1]
-            atr_val = row["atr"]
-            upper = entry_price + (TB_TP_MULT if side == 1 else TB_SL_MULT) * atr_val
-            lower = entry_price - (TB_SL_MULT if side == 1 else TB_TP_MULT) * atr_val
-
-            exit_price = None
-            outcome = "TIME"
-            end_j = min(i + 1 + TB_MAX_HOLD, len(df) - 1)
-            for j in range(i + 1, end_j + 1):
-                hi = df["high"].iloc[j]
-                lo = df["low"].iloc[j]
-                if side == 1:
-                    if lo <= lower:
-                        exit_price = lower
-                        outcome = "SL"
-                        break
-                    if hi >= upper:
-                        exit_price = upper
-                        outcome = "TP"
-                        break
-                else:
-                    if hi >= upper:
-                        exit_price = upper
-                        outcome = "SL"
-                        break
-                    if lo <= lower:
-                        exit_price = lower
-                        outcome = "TP"
-                        break
-            if exit_price is None:
-                exit_price = df["close"].iloc[end_j]
-                outcome = "TIME"
-                exit_ts = df.index[end_j]
-                exit_idx = end_j
-            else:
-                # 上で break した j を捕捉できないので再走 (簡素化のため別実装)
-                # 厳密には j を保持すべきだが、コスト計算には影響しない (exit_price のみで決定)
-                exit_ts = df.index[min(i + 1 + TB_MAX_HOLD, len(df) - 1)]
-                exit_idx = end_j
-
-            raw_diff = (exit_price - entry_price) if side == 1 else (entry_price - exit_price)
-            pips = raw_diff / pip
-            # コスト控除: スプレッド (往復) + スリッページ (片道 ×2 = entry/exit)
-            pips_after = pips - spread_pip - 2.0 * SLIPPAGE_PIPS
-            # JPY 換算 (lot 0.01 = 1000 units 基準)
-            #   USD/JPY: 1pip = 0.01 JPY、1000 * 0.01 = 10 JPY/pip
-            #   EUR/USD: 1pip = 0.0001 USD = 1000 * 0.0001 USD = 0.1 USD/pip ≒ 15.6 JPY/pip (USD/JPY≒156)
-            if instrument == "EUR_USD":
-                pnl_jpy = pips_after * 0.1 * 156.0  # 0.1 USD/pip × 156 JPY/USD
-            else:
-                pnl_jpy = pips_after * pip * UNITS  # USD/JPY: 10 JPY/pip
-            trade = {
-                "instrument": instrument,
-                "entry_ts": df.index[i + 1],
-                "exit_ts": exit_ts,
-                "side": "long" if side == 1 else "short",
-                "entry": float(entry_price),
-                "exit": float(exit_price),
-                "atr": float(atr_val),
-                "rf_proba": float(p),
-                "outcome": outcome,
-                "pips": float(pips_after),
-                "pnl_jpy": float(pnl_jpy),
-                "window_test_start": test_start,
-                "window_test_end": test_end,
-            }
-            all_trades.append(trade)
-            accepted_in_window.append(trade)
+        candidates = test_labels.assign(rf_proba=np.asarray(rf_proba_all, dtype=float))
+        accept = candidates["rf_proba"] >= SAFE_MODE_THRESH
+        safe_fires = int((~accept).sum())
+        accepted = candidates[accept & (candidates["idx"] + 1 < len(df))]
+
+        pips = accepted["raw_diff"].to_numpy() / pip
+        # コスト控除: スプレッド (往復) + スリッページ (片道 ×2 = entry/exit)
+        pips_after = pips - spread_pip - 2.0 * SLIPPAGE_PIPS
+        # JPY 換算 (lot 0.01 = 1000 units 基準)
+        #   USD/JPY: 1pip = 0.01 JPY、1000 * 0.01 = 10 JPY/pip
+        #   EUR/USD: 1pip = 0.0001 USD = 1000 * 0.0001 USD = 0.1 USD/pip ≒ 15.6 JPY/pip (USD/JPY≒156)
+        if instrument == "EUR_USD":
+            pnl_jpy = pips_after * 0.1 * 156.0  # 0.1 USD/pip × 156 JPY/USD
+        else:
+            pnl_jpy = pips_after * pip * UNITS  # USD/JPY: 10 JPY/pip
+        # exit_ts は従来どおり時間バリアの足 (TP/SL の足ではない。月次集計の互換のため)
+        win_trades = pd.DataFrame({
+            "instrument": instrument,
+            "entry_ts": df.index[accepted["idx"].to_numpy() + 1],
+            "exit_ts": df.index[accepted["window_end"].to_numpy()],
+            "side": np.where(accepted["side"].to_numpy() == 1, "long", "short"),
+            "entry": accepted["entry_price"].to_numpy(dtype=float),
+            "exit": accepted["exit_price"].to_numpy(dtype=float),
+            "atr": accepted["atr"].to_numpy(dtype=float),
+            "rf_proba": accepted["rf_proba"].to_numpy(dtype=float),
+            "outcome": accepted["outcome"].to_numpy(),
+            "pips": pips_after,
+            "pnl_jpy": pnl_jpy,
+            "window_test_start": test_start,
+            "window_test_end": test_end,
+        })
+        if len(win_trades) > 0:
+            trade_frames.append(win_trades)
 
         # window サマリ
-        win_trades = pd.DataFrame(accepted_in_window) if accepted_in_window else pd.DataFrame()
         if len(win_trades) >= 2:
             wins = win_trades[win_trades["pips"] > 0]
             losses = win_trades[win_trades["pips"] <= 0]
@@ -544,7 +453,7 @@ def run_walk_forward(
             test_end=test_end,
             n_primary_events_train=int(len(train_labels)),
             n_primary_events_test=int(len(test_labels)),
-            n_secondary_accepted_test=int(len(accepted_in_window)),
+            n_secondary_accepted_test=int(len(win_trades)),
             rf_oos_auc=float(oos_auc) if not np.isnan(oos_auc) else float("nan"),
             rf_oos_acc=float(oos_acc) if not np.isnan(oos_acc) else float("nan"),
             safe_mode_fires=int(safe_fires),
@@ -557,7 +466,7 @@ def run_walk_forward(
 
         cursor += pd.DateOffset(months=WFA_TEST_MONTHS)
 
-    trades_df = pd.DataFrame(all_trades)
+    trades_df = pd.concat(trade_frames, ignore_index=True) if trade_frames else pd.DataFrame()
     # メタ統計
     meta = {
         "instrument": instrument,
@@ -632,26 +541,28 @@ def simulate_risk_kills(trades_df: pd.DataFrame, equity_init: float = INITIAL_EQ
 # ----------------------------------------------------------------------
 # パラメータ感度: SAFE_MODE_THRESH を ±20% 動かして PF を再計算
 # ----------------------------------------------------------------------
+def _threshold_trial(trades_df: pd.DataFrame, params: dict) -> dict:
+    """ParameterSweep 用の評価関数: Safe Mode 閾値で採用したトレードの成績"""
+    kept = trades_df[trades_df["rf_proba"] >= params["threshold"]]
+    if len(kept) < 2:
+        return {"trades": len(kept), "pf": 0.0, "pnl_jpy": float(kept["pnl_jpy"].sum()) if len(kept) else 0.0}
+    gw = kept[kept["pips"] > 0]["pips"].sum()
+    gl = -kept[kept["pips"] <= 0]["pips"].sum()
+    pf = gw / gl if gl > 0 else float("inf")
+    return {
+        "trades": int(len(kept)),
+        "pf": float(pf),
+        "pnl_jpy": float(kept["pnl_jpy"].sum()),
+    }
+
+
 def parameter_sensitivity(trades_df: pd.DataFrame) -> pd.DataFrame:
     if len(trades_df) == 0:
         return pd.DataFrame()
     base = SAFE_MODE_THRESH
-    rows = []
-    for thr in [base * 0.8, base * 0.9, base, base * 1.1, base * 1.2]:
-        kept = trades_df[trades_df["rf_proba"] >= thr]
-        if len(kept) < 2:
-            rows.append({"threshold": thr, "trades": len(kept), "pf": 0.0, "pnl_jpy": float(kept["pnl_jpy"].sum()) if len(kept) else 0.0})
-            continue
-        gw = kept[kept["pips"] > 0]["pips"].sum()
-        gl = -kept[kept["pips"] <= 0]["pips"].sum()
-        pf = gw / gl if gl > 0 else float("inf")
-        rows.append({
-            "threshold": float(thr),
-            "trades": int(len(kept)),
-            "pf": float(pf),
-            "pnl_jpy": float(kept["pnl_jpy"].sum()),
-        })
-    return pd.DataFrame(rows)
+    thresholds = [float(base * m) for m in (0.8, 0.9, 1.0, 1.1, 1.2)]
+    table = ParameterSweep(_threshold_trial).run(trades_df, grid({"threshold": thresholds}))
+    return table.rename(columns={"p_threshold": "threshold"})
 
 
 # ----------------------------------------------------------------------
@@ -42,6 +42,7 @@ ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
 
 from src.backtester import BacktestEngine, calculate_spread  # noqa: E402
+from src.candle_store import load_csv_via_store  # noqa: E402
 
 logging.basicConfig(
     level=logging.WARNING,
@@ -109,9 +110,11 @@ class RsiPullbackADXBT(Strategy):
 # データ読込
 # ============================================================
 def load_mt5_csv(path: Path) -> pd.DataFrame:
-    """MT5 export CSV を OHLCV DataFrame として読み込む。"""
-    df = pd.read_csv(path, parse_dates=["datetime"])
-    df = df.set_index("datetime").sort_index()
+    """MT5 export CSV を OHLCV DataFrame として読み込む。
+
+    初回のみCSVをパースしてローソク足ストアに取り込み、以降はストアから読む。
+    """
+    df = load_csv_via_store(path).copy()
     expected = {"open", "high", "low", "close", "volume"}
     missing = expected - set(df.columns)
     if missing:
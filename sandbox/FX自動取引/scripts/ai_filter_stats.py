@@ -1,7 +1,8 @@
 """AIフィルタ判定の統計と実トレードとの突合
 
 入力:
-- data/trading.log (UTF-8) からAIフィルタ判定とシグナル/発注を抽出
+- data/trading.log* (UTF-8) からAIフィルタ判定とシグナル/発注を抽出
+  （src/log_index.py の索引 data/log_index.db に未取り込み分だけ追加して参照）
 - MT5 history_deals で実PLを照合
 
 出力:
@@ -15,35 +16,18 @@ try:
 except Exception:
     pass
 
-import re
 from collections import defaultdict
 from datetime import datetime, timedelta
 from pathlib import Path
 
-LOG_PATH = Path(__file__).resolve().parent.parent / "data" / "trading.log"
-
-# 正規表現パターン
-RE_SIGNAL = re.compile(
-    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ "
-    r".*?(押し目買いシグナル|戻り売りシグナル|BB逆張り売りシグナル|BB逆張り買いシグナル)"
-)
-RE_CONVICTION = re.compile(
-    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ .*?"
-    r"\[(\w+)\] conviction score: (\d+)/10"
-)
-RE_AI_FILTER = re.compile(
-    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ .*?"
-    r"AIフィルター: (CONFIRM|CONTRADICT|NEUTRAL|REJECT) "
-    r"\(direction=(\w+), confidence=([\d\.]+)\)(?: → 倍率([\d\.]+))?"
-)
-RE_OPEN = re.compile(
-    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ .*?"
-    r"ポジションオープン成功: trade_id=(\d+), instrument=(\w+), units=(-?\d+)"
-)
-RE_BEAR = re.compile(
-    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ .*?"
-    r"Bear Researcher警告: severity=([\d\.]+)"
-)
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.log_index import LogIndex, log_files
+
+LOG_PATH = ROOT / "data" / "trading.log"
 
 
 def parse_log():
@@ -51,60 +35,44 @@ def parse_log():
         print(f"ログファイル未発見: {LOG_PATH}")
         return
 
+    # ローテート済みを含め、前回以降に追記された行だけを索引へ取り込む
+    with LogIndex() as index:
+        index.ingest(log_files(LOG_PATH.parent))
+        log_events = index.events(kinds=["ai", "bear", "fill", "conviction"])
+
     ai_counts = defaultdict(int)
     bear_count = 0
     open_events: list[dict] = []
-    recent_ai: dict | None = None  # 直近AI判定（ペア別に保持すべきだが現状簡易）
     recent_ai_by_pair: dict[str, dict] = {}
     recent_conv_by_pair: dict[str, dict] = {}
 
-    with LOG_PATH.open("r", encoding="utf-8", errors="replace") as f:
-        for line in f:
-            m = RE_CONVICTION.search(line)
-            if m:
-                ts, pair, score = m.group(1), m.group(2), int(m.group(3))
-                recent_conv_by_pair[pair] = {"ts": ts, "score": score}
-                continue
-
-            m = RE_AI_FILTER.search(line)
-            if m:
-                ts, verdict, direction, conf = m.group(1), m.group(2), m.group(3), float(m.group(4))
-                mult = float(m.group(5)) if m.group(5) else None
-                ai_counts[verdict] += 1
-                # 直近のconvictionとペアで紐付けたいが、判定ログにpair名がないので
-                # 「直前のconvictionログのペア」を仮定（現状のログ仕様）
-                last_conv = None
-                for p, conv in recent_conv_by_pair.items():
-                    if last_conv is None or conv["ts"] > last_conv["ts"]:
-                        last_conv = conv
-                        last_pair = p
-                recent_ai_by_pair[last_pair if last_conv else "?"] = {
-                    "ts": ts, "verdict": verdict,
-                    "direction": direction, "confidence": conf,
-                    "multiplier": mult,
-                }
-                continue
-
-            m = RE_BEAR.search(line)
-            if m:
-                bear_count += 1
-                continue
-
-            m = RE_OPEN.search(line)
-            if m:
-                ts, trade_id, pair, units = m.group(1), m.group(2), m.group(3), int(m.group(4))
-                side = "BUY" if units > 0 else "SELL"
-                # 直近のAI判定（同pair）と紐付け
-                ai = recent_ai_by_pair.get(pair)
-                conv = recent_conv_by_pair.get(pair)
-                open_events.append({
-                    "ts": ts, "trade_id": trade_id, "pair": pair,
-                    "side": side, "units": units,
-                    "ai_verdict": ai["verdict"] if ai else "N/A",
-                    "ai_direction": ai["direction"] if ai else "",
-                    "ai_multiplier": ai["multiplier"] if ai else None,
-                    "conviction": conv["score"] if conv else None,
-                })
+    for ts, ev in zip(log_events.index, log_events.itertuples(index=False)):
+        ts = ts.strftime("%Y-%m-%d %H:%M:%S")
+        if ev.kind == "conviction":
+            recent_conv_by_pair[ev.pair] = {"ts": ts, "score": int(ev.score)}
+        elif ev.kind == "ai":
+            ai_counts[ev.verdict] += 1
+            # 判定ログの [PAIR] タグ（旧形式は直前のタグから推定）で紐付け
+            recent_ai_by_pair[ev.pair or "?"] = {
+                "ts": ts, "verdict": ev.verdict,
+                "direction": ev.direction, "confidence": ev.confidence,
+                "multiplier": None if pd.isna(ev.multiplier) else ev.multiplier,
+            }
+        elif ev.kind == "bear":
+            bear_count += 1
+        else:
+            # 直近のAI判定（同pair）と紐付け
+            units = int(ev.units)
+            ai = recent_ai_by_pair.get(ev.pair)
+            conv = recent_conv_by_pair.get(ev.pair)
+            open_events.append({
+                "ts": ts, "trade_id": ev.trade_id, "pair": ev.pair,
+                "side": "BUY" if units > 0 else "SELL", "units": units,
+                "ai_verdict": ai["verdict"] if ai else "N/A",
+                "ai_direction": ai["direction"] if ai else "",
+                "ai_multiplier": ai["multiplier"] if ai else None,
+                "conviction": conv["score"] if conv else None,
+            })
 
     print("=== AIフィルタ判定統計 ===")
     total = sum(ai_counts.values())
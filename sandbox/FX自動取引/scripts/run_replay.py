@@ -0,0 +1,68 @@
+"""ヒストリカル・リプレイ実行
+
+ライブの TradingLoop.run_once() を MT5 エクスポートCSVで足ごとに再生し、
+トレード結果・パイプライン trace・スループット（run_once 回数/秒）を出力する。
+
+使い方:
+    python scripts/run_replay.py data/USD_JPY_M15.csv data/EUR_USD_M15.csv \
+        --granularity M15 --trace data/replay_trace.csv
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.candle_store import load_csv_via_store
+from src.replay import ReplayHarness
+from src.strategy.bollinger_reversal import BollingerReversal
+from src.strategy.mtf_pullback import MTFPullback
+
+# main.py の INSTRUMENT_STRATEGY_MAP に対応
+# （main.py は MetaTrader5 を import するため、MT5 の無い環境でも動くよう複製）
+PAIR_STRATEGY = {
+    "EUR_USD": MTFPullback,
+    "USD_JPY": MTFPullback,
+    "GBP_JPY": BollingerReversal,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TradingLoop のヒストリカル・リプレイ")
+    parser.add_argument("csv", nargs="+", help="通貨ペアごとのOHLCV CSV（ファイル名からペア・時間足を推定）")
+    parser.add_argument("--granularity", default="M15")
+    parser.add_argument("--instruments", nargs="*", default=None,
+                        help="売買対象ペア（省略時はCSVの全ペア。その他は換算レート用）")
+    parser.add_argument("--start", default=None, help="開始日時（UTC, 例: 2024-01-01）")
+    parser.add_argument("--end", default=None, help="終了日時（UTC）")
+    parser.add_argument("--trace", default=None, help="パイプライン trace の出力CSV")
+    parser.add_argument("--trades", default=None, help="トレード一覧の出力CSV")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    history = {}
+    for path in args.csv:
+        df = load_csv_via_store(path, granularity=args.granularity)
+        instrument = "_".join(Path(path).stem.split("_")[:2])
+        history[instrument] = df
+    instruments = args.instruments or list(history)
+    strategies = {
+        instrument: PAIR_STRATEGY.get(instrument, MTFPullback)() for instrument in instruments
+    }
+
+    harness = ReplayHarness(history, strategies, granularity=args.granularity)
+    result = harness.run(start=args.start, end=args.end, trace_path=args.trace)
+
+    if args.trades:
+        result.trades.to_csv(args.trades, index=False)
+
+    print(f"run_once: {result.bars} 回 / {result.elapsed_sec:.1f} 秒 "
+          f"({result.bars_per_sec:.0f} 回/秒)")
+    print(f"トレード: {len(result.trades)} 件, 最終残高: {result.final_balance:,.0f} 円")
+    if not result.trace.empty:
+        print(result.trace["decision"].value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
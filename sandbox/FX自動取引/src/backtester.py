@@ -11,24 +11,39 @@ Backtesting.py をラップし、戦略のバックテスト・検証を実行
 SPEC.md F8 / doc 04 セクション6 準拠。
 """
 
+import ast
+import functools
+import hashlib
+import inspect
 import json
+import linecache
 import logging
+import pickle
 import sqlite3
-from datetime import datetime, timezone
+import sysconfig
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Optional
 
+import backtesting
 import numpy as np
 import pandas as pd
 import pandas_ta as ta
 from backtesting import Backtest, Strategy
 
+from src.candle_store import CandleStore
 from src.config import (
     ADX_PERIOD,
     ADX_THRESHOLD,
     ATR_MULTIPLIER,
     ATR_PERIOD,
+    BACKTEST_CACHE_ENABLED,
+    BACKTEST_CACHE_MAX_AGE_DAYS,
+    BACKTEST_CACHE_MAX_ENTRIES,
+    BACKTEST_CACHE_VERSION,
     DB_PATH,
+    DB_WRITER_FLUSH_TIMEOUT_SEC,
     MA_LONG_PERIOD,
     MA_SHORT_PERIOD,
     MIN_RISK_REWARD,
@@ -36,6 +51,7 @@ from src.config import (
     RSI_OVERSOLD,
     RSI_PERIOD,
 )
+from src.db_writer import get_writer
 
 logger = logging.getLogger(__name__)
 
@@ -247,6 +263,269 @@ def calculate_spread(
     return (pip_value * pip_spread) / price
 
 
+# ------------------------------------------------------------------
+# 結果キャッシュのキー生成
+# ------------------------------------------------------------------
+
+_PARAM_TYPES = (bool, int, float, str, tuple, list, type(None))
+
+
+def _hash_frame(data: pd.DataFrame) -> str:
+    """データ区間（インデックス・全列の値）のハッシュ"""
+    digest = hashlib.sha256(",".join(map(str, data.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# ライブラリ（標準ライブラリ・site-packages）のコードはバージョンでキーに含めるため、
+# ソースの依存関係はプロジェクト側のコードだけ辿る
+_LIBRARY_PATHS = tuple(
+    str(Path(path).resolve())
+    for key, path in sysconfig.get_paths().items()
+    if key in ("stdlib", "platstdlib", "purelib", "platlib")
+)
+
+_CONSTANT_TYPES = _PARAM_TYPES + (dict, set, frozenset)
+
+
+def _is_project_code(obj: Any) -> bool:
+    """obj がライブラリ外（プロジェクト・スクリプト・テスト）で定義されているか"""
+    module = inspect.getmodule(obj)
+    path = getattr(module, "__file__", None)
+    if path is None:
+        return False
+    return not str(Path(path).resolve()).startswith(_LIBRARY_PATHS)
+
+
+@functools.lru_cache(maxsize=256)
+def _class_sources_in_file(path: str) -> dict[str, str]:
+    """
+    ファイル中のクラス定義のソース（qualname → ソース）。
+
+    inspect.getsource(クラス) は呼ぶたびにファイル全体を構文解析するため、
+    ファイルごとに1回だけ解析する。
+    """
+    text = "".join(linecache.getlines(path))
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return {}
+    sources: dict[str, str] = {}
+
+    def visit(node: ast.AST, prefix: str) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                qualname = prefix + child.name
+                sources.setdefault(qualname, ast.get_source_segment(text, child) or qualname)
+                visit(child, qualname + ".")
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                visit(child, f"{prefix}{child.name}.<locals>.")
+            else:
+                visit(child, prefix)
+
+    visit(tree, "")
+    return sources
+
+
+@functools.lru_cache(maxsize=4096)
+def _code_source(path: str, code: Any) -> Optional[str]:
+    """関数のソース（取れなければ None）"""
+    try:
+        return inspect.getsource(code)
+    except (OSError, TypeError):
+        return None
+
+
+def _definition_source(obj: Any) -> Optional[str]:
+    """クラス・関数の定義のソース。type() で動的生成したクラス等は None。"""
+    if inspect.isclass(obj):
+        try:
+            path = inspect.getsourcefile(obj)
+        except TypeError:
+            return None
+        return _class_sources_in_file(path).get(obj.__qualname__) if path else None
+    return _code_source(obj.__code__.co_filename, obj.__code__)
+
+
+def _code_names(code: Any) -> set[str]:
+    """コードオブジェクト（内側の関数・内包表記を含む）が参照するグローバル名・属性名"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _constant_repr(value: Any) -> Optional[str]:
+    """キーに含められる定数の表現（集合は順序に依らない形）。対象外なら None。"""
+    if not isinstance(value, _CONSTANT_TYPES):
+        return None
+    if isinstance(value, (set, frozenset)):
+        return repr(sorted(map(repr, value)))
+    return repr(value)
+
+
+def _collect_sources(obj: Any, found: dict[str, str]) -> None:
+    """
+    クラス・関数のソースと、そこから参照しているプロジェクト側の
+    クラス・関数・定数を推移的に found（名前 → ソース）へ集める。
+
+    モジュール全体ではなく実際に参照している定義だけを対象にするため、
+    同じファイルの別の戦略やレポート整形の変更ではキーが変わらない。
+    """
+    if inspect.isclass(obj):
+        for klass in obj.__mro__:
+            if klass is object or not _is_project_code(klass):
+                continue
+            key = f"{klass.__module__}.{klass.__qualname__}"
+            if key in found:
+                continue
+            found[key] = _definition_source(klass) or key   # type() で動的生成したクラスは名前のみ
+            for attr in vars(klass).values():
+                if isinstance(attr, (staticmethod, classmethod)):
+                    attr = attr.__func__
+                if isinstance(attr, property):
+                    for accessor in (attr.fget, attr.fset, attr.fdel):
+                        if accessor is not None:
+                            _collect_sources(accessor, found)
+                elif inspect.isfunction(attr) or inspect.isclass(attr):
+                    _collect_sources(attr, found)
+        return
+
+    if not inspect.isfunction(obj) or not _is_project_code(obj):
+        return
+    key = f"{obj.__module__}.{obj.__qualname__}"
+    if key in found:
+        return
+    found[key] = _definition_source(obj) or key
+
+    names = _code_names(obj.__code__)
+    refs = {
+        name: obj.__globals__[name]
+        for name in names
+        if name in obj.__globals__ and not name.startswith("__")
+    }
+    for name, cell in zip(obj.__code__.co_freevars, obj.__closure__ or ()):
+        try:
+            refs[name] = cell.cell_contents
+        except ValueError:                  # 未束縛のセル
+            continue
+
+    for name, value in sorted(refs.items()):
+        if inspect.ismodule(value):
+            # `module.func` 形式の参照は、参照している属性名だけ辿る
+            if not _is_project_code(value):
+                continue
+            for attr_name in sorted(names):
+                attr = getattr(value, attr_name, None)
+                if inspect.isfunction(attr) or inspect.isclass(attr):
+                    _collect_sources(attr, found)
+                elif (text := _constant_repr(attr)) is not None:
+                    found[f"{value.__name__}.{attr_name}"] = text
+        elif inspect.isfunction(value) or inspect.isclass(value):
+            _collect_sources(value, found)
+        elif (text := _constant_repr(value)) is not None:
+            found[f"{obj.__module__}.{name}"] = text
+
+
+def _source_hash(obj: Any) -> str:
+    """_collect_sources() で集めたソース一式のハッシュ"""
+    found: dict[str, str] = {}
+    _collect_sources(obj, found)
+    digest = hashlib.sha256()
+    for key in sorted(found):
+        digest.update(f"{key}\n{found[key]}\n".encode())
+    return digest.hexdigest()
+
+
+def _strategy_fingerprint(strategy_class: type[Strategy]) -> dict[str, Any]:
+    """
+    戦略のソースとパラメータを、キャッシュキーに含められる形で返す。
+
+    ソースは戦略クラスと継承元の定義、およびそこから参照している
+    関数・クラス・モジュール定数を推移的に辿ったものを対象にする。
+    type() で動的生成したクラスはソースを取れないため、パラメータ
+    （クラス属性）で区別する。
+    """
+    params = {}
+    for name in dir(strategy_class):
+        if name.startswith("_"):
+            continue
+        value = getattr(strategy_class, name)
+        if isinstance(value, _PARAM_TYPES):
+            params[name] = value
+
+    return {
+        "source": _source_hash(strategy_class),
+        "params": params,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _backend_fingerprint(engine_class: type) -> str:
+    """
+    バックテストエンジン（継承元を含む）と、そこから参照している関数の
+    ソースのハッシュを返す。
+
+    ベクトル化バックエンドの simulate() 等、エンジンクラスの外にある
+    モジュール関数の変更もキーに反映させる。
+    """
+    return _source_hash(engine_class)
+
+
+# ------------------------------------------------------------------
+# 並列ウォークフォワード用ワーカー
+# ------------------------------------------------------------------
+
+# ワーカープロセスごとに1回だけ受け取る読み取り専用データとエンジン
+_worker_data: Optional[pd.DataFrame] = None
+_worker_engine: Optional["BacktestEngine"] = None
+
+
+def _portable_strategy(
+    strategy_class: type[Strategy],
+) -> tuple[type[Strategy], Optional[str], Optional[dict[str, Any]]]:
+    """
+    戦略クラスをワーカーへ渡せる形にする。
+
+    スクリプトで type() により動的生成したパラメータ違いのクラスは
+    pickle できないため、(基底クラス, クラス名, クラス属性) に分解する。
+    """
+    try:
+        pickle.dumps(strategy_class)
+        return strategy_class, None, None
+    except (pickle.PicklingError, AttributeError, TypeError):
+        params = {
+            k: v for k, v in vars(strategy_class).items() if not k.startswith("_")
+        }
+        return strategy_class.__bases__[0], strategy_class.__name__, params
+
+
+def _init_walk_forward_worker(
+    engine_class: type["BacktestEngine"], data: pd.DataFrame
+) -> None:
+    """ワーカー初期化: 価格データとインメモリDBのエンジンを保持する。"""
+    global _worker_data, _worker_engine
+    _worker_data = data
+    _worker_engine = engine_class(db_path=":memory:")
+
+
+def _run_walk_forward_window(
+    strategy_spec: tuple[type[Strategy], Optional[str], Optional[dict[str, Any]]],
+    is_end: int,
+    oos_end: int,
+    kwargs: dict[str, Any],
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """ワーカー側で1ウィンドウ分の IS/OOS バックテストを実行する。"""
+    base, name, params = strategy_spec
+    strategy_class = type(name, (base,), params) if name else base
+    result_is = _worker_engine.run(_worker_data.iloc[:is_end], strategy_class, **kwargs)
+    result_oos = _worker_engine.run(
+        _worker_data.iloc[is_end:oos_end], strategy_class, **kwargs
+    )
+    return result_is, result_oos
+
+
 # ------------------------------------------------------------------
 # バックテストエンジン
 # ------------------------------------------------------------------
@@ -260,14 +539,22 @@ class BacktestEngine:
     - In-Sample / Out-of-Sample 分割テスト
     - ウォークフォワード分析（WFE算出）
     - バックテスト結果の SQLite 永続化
+    - 同一条件の run() 結果のキャッシュ（backtest_cache テーブル）
     """
 
-    def __init__(self, db_path: Path | str | None = None) -> None:
+    def __init__(
+        self,
+        db_path: Path | str | None = None,
+        use_cache: bool = BACKTEST_CACHE_ENABLED,
+    ) -> None:
         """
         Args:
             db_path: SQLite データベースのパス。省略時は config.DB_PATH。
                      ":memory:" でインメモリDB（テスト用）。
+            use_cache: run() の結果キャッシュを使うか（run() 引数で個別に上書き可）
         """
+        self._use_cache = use_cache
+        self._cache_entries: int | None = None   # _cache_put() が数えるエントリ数
         self._db_path = db_path if db_path is not None else DB_PATH
         self._is_memory = str(self._db_path) == ":memory:"
 
@@ -324,10 +611,21 @@ class BacktestEngine:
             params_json TEXT,
             metrics_json TEXT
         );
+        CREATE TABLE IF NOT EXISTS backtest_cache (
+            cache_key TEXT PRIMARY KEY,
+            strategy_name TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            last_used_at TEXT NOT NULL,
+            metrics_json TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_backtest_cache_last_used
+            ON backtest_cache (last_used_at);
+        CREATE INDEX IF NOT EXISTS idx_backtest_cache_created
+            ON backtest_cache (created_at);
         """
         conn = self._get_connection()
         try:
-            conn.execute(create_sql)
+            conn.executescript(create_sql)
             conn.commit()
         except sqlite3.Error as e:
             raise BacktestError(f"DBの初期化に失敗しました: {e}") from e
@@ -378,6 +676,41 @@ class BacktestEngine:
 
         return df_out
 
+    @staticmethod
+    def load_from_store(
+        instrument: str,
+        granularity: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        store: Optional[CandleStore] = None,
+    ) -> pd.DataFrame:
+        """
+        ローソク足ストアから Backtesting.py 用のデータを読み込む。
+
+        ライブの Mt5Client が追記しているストアをそのまま読む。
+        価格列は memmap を共有し、列名変更（Open等）でもコピーは発生しない。
+
+        Args:
+            instrument: 通貨ペア（例: "USD_JPY"）
+            granularity: 時間足（例: "M15"）
+            start: 開始日時（含む）
+            end: 終了日時（含む）
+            store: 読み込むストア（省略時は config.CANDLE_STORE_DIR）
+
+        Returns:
+            大文字カラム名の OHLCV DataFrame
+
+        Raises:
+            BacktestError: 該当期間のデータが無い場合
+        """
+        store = store or CandleStore()
+        df = store.read(instrument, granularity, start=start, end=end)
+        if df.empty:
+            raise BacktestError(
+                f"ローソク足ストアにデータがありません: {instrument} {granularity}"
+            )
+        return df.rename(columns=str.capitalize)
+
     # ------------------------------------------------------------------
     # バックテスト実行
     # ------------------------------------------------------------------
@@ -393,10 +726,14 @@ class BacktestEngine:
         fill_rate: Optional[float] = None,
         instrument: Optional[str] = None,
         auto_spread: bool = False,
+        use_cache: Optional[bool] = None,
     ) -> dict[str, Any]:
         """
         単一バックテストを実行する。
 
+        データ区間・戦略（ソースとパラメータ）・実行条件が一致する結果が
+        backtest_cache にあれば、再計算せずにそのメトリクスを返す。
+
         Args:
             data: OHLCV DataFrame（大文字カラム名、prepare_data()済み）
             strategy_class: Backtesting.py Strategy サブクラス
@@ -408,6 +745,7 @@ class BacktestEngine:
             instrument: 通貨ペア（例: "USD_JPY"）。auto_spread使用時に必要
             auto_spread: Trueの場合、instrumentから自動でspreadを計算する。
                          手動でspreadが指定されている場合（spread != 0.0）は手動値を優先
+            use_cache: 結果キャッシュを使うか。None ならエンジンの設定に従う
 
         Returns:
             バックテスト結果dict
@@ -430,6 +768,55 @@ class BacktestEngine:
                 f"（現在 {len(data)} 本）"
             )
 
+        run_params = {
+            "cash": cash, "spread": spread, "commission": commission, "margin": margin,
+        }
+        cache_key = None
+        result = None
+        if self._use_cache if use_cache is None else use_cache:
+            cache_key = self._cache_key(data, strategy_class, run_params)
+            result = self._cache_get(cache_key)
+            if result is not None:
+                logger.info("バックテスト結果キャッシュにヒット: %s", strategy_class.__name__)
+
+        if result is None:
+            result = self._run_backend(data, strategy_class, **run_params)
+            if cache_key is not None:
+                self._cache_put(cache_key, strategy_class.__name__, result)
+
+        # M3: fill_rate 自動適用
+        if fill_rate is not None:
+            result = apply_fill_rate_adjustment(result, fill_rate)
+
+        logger.info(
+            "バックテスト完了: SR=%.2f, DD=%.2f%%, WR=%.1f%%, PF=%.2f, Trades=%d",
+            result.get("sharpe_ratio") or 0,
+            result.get("max_drawdown") or 0,
+            result.get("win_rate") or 0,
+            result.get("profit_factor") or 0,
+            result.get("total_trades") or 0,
+        )
+
+        return result
+
+    def _run_backend(
+        self,
+        data: pd.DataFrame,
+        strategy_class: type[Strategy],
+        cash: float,
+        spread: float,
+        commission: float,
+        margin: float,
+    ) -> dict[str, Any]:
+        """
+        バックテスト本体を実行してメトリクスdictを返す。
+
+        既定は Backtesting.py（exclusive_orders=True）。
+        VectorBacktestEngine はここだけを差し替える。
+
+        Raises:
+            BacktestError: バックテスト実行に失敗した場合
+        """
         try:
             bt = Backtest(
                 data,
@@ -444,22 +831,153 @@ class BacktestEngine:
         except Exception as e:
             raise BacktestError(f"バックテストの実行に失敗しました: {e}") from e
 
-        result = self._extract_metrics(stats)
+        return self._extract_metrics(stats)
 
-        # M3: fill_rate 自動適用
-        if fill_rate is not None:
-            result = apply_fill_rate_adjustment(result, fill_rate)
+    # ------------------------------------------------------------------
+    # 結果キャッシュ
+    # ------------------------------------------------------------------
 
-        logger.info(
-            "バックテスト完了: SR=%.2f, DD=%.2f%%, WR=%.1f%%, PF=%.2f, Trades=%d",
-            result.get("sharpe_ratio") or 0,
-            result.get("max_drawdown") or 0,
-            result.get("win_rate") or 0,
-            result.get("profit_factor") or 0,
-            result.get("total_trades") or 0,
-        )
+    def _cache_key(
+        self,
+        data: pd.DataFrame,
+        strategy_class: type[Strategy],
+        run_params: dict[str, Any],
+    ) -> str:
+        """データ区間・戦略・実行条件・バックエンドから内容アドレスのキーを作る。"""
+        payload = {
+            "version": BACKTEST_CACHE_VERSION,
+            "backend": type(self).__name__,
+            "backend_source": _backend_fingerprint(type(self)),
+            "libraries": {"pandas_ta": ta.version, "backtesting": backtesting.__version__},
+            "data": _hash_frame(data),
+            "strategy": _strategy_fingerprint(strategy_class),
+            "run": run_params,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=repr).encode()
+        return hashlib.sha256(encoded).hexdigest()
 
-        return result
+    def _cache_get(self, cache_key: str) -> Optional[dict[str, Any]]:
+        """キャッシュ済みメトリクスを返す（無ければ None）。DBエラーはミス扱い。"""
+        conn = self._get_connection()
+        try:
+            row = conn.execute(
+                "SELECT metrics_json FROM backtest_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE backtest_cache SET last_used_at = ? WHERE cache_key = ?",
+                (datetime.now(timezone.utc).isoformat(), cache_key),
+            )
+            conn.commit()
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning("バックテスト結果キャッシュの読み込みに失敗: %s", e)
+            return None
+        finally:
+            self._close_connection(conn)
+
+    def _cache_put(self, cache_key: str, strategy_name: str, result: dict[str, Any]) -> None:
+        """
+        メトリクスをキャッシュに保存する。
+
+        期限切れ（BACKTEST_CACHE_MAX_AGE_DAYS 超）のエントリは保存のたびに
+        created_at の索引で削除する。件数上限による削除は全件の並べ替えに
+        なるため、件数をエンジン内で数えておき BACKTEST_CACHE_MAX_ENTRIES を
+        超えたときだけ行う（件数は最初の保存時と削除後に DB から数え直す。
+        別プロセスが同じ DB に書いた分はそのとき反映される）。
+        """
+        now = datetime.now(timezone.utc)
+        cutoff = (now - timedelta(days=BACKTEST_CACHE_MAX_AGE_DAYS)).isoformat()
+        conn = self._get_connection()
+        try:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO backtest_cache
+                    (cache_key, strategy_name, created_at, last_used_at, metrics_json)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (cache_key, strategy_name, now.isoformat(), now.isoformat(), json.dumps(result)),
+            )
+            expired = conn.execute(
+                "DELETE FROM backtest_cache WHERE created_at < ?", (cutoff,)
+            ).rowcount
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("バックテスト結果キャッシュの保存に失敗: %s", e)
+            return
+        finally:
+            self._close_connection(conn)
+
+        if self._cache_entries is None:
+            self._cache_entries = self._count_cache()
+        else:
+            self._cache_entries += 1 - expired
+        if self._cache_entries > BACKTEST_CACHE_MAX_ENTRIES:
+            self.evict_cache(max_entries=BACKTEST_CACHE_MAX_ENTRIES)
+            self._cache_entries = self._count_cache()
+
+    def _count_cache(self) -> int:
+        """キャッシュのエントリ数（DBエラー時は 0）"""
+        conn = self._get_connection()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM backtest_cache").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.warning("バックテスト結果キャッシュの件数取得に失敗: %s", e)
+            return 0
+        finally:
+            self._close_connection(conn)
+
+    def evict_cache(
+        self,
+        max_age_days: int = BACKTEST_CACHE_MAX_AGE_DAYS,
+        max_entries: int = BACKTEST_CACHE_MAX_ENTRIES,
+    ) -> int:
+        """
+        期限切れ・上限超過のキャッシュエントリを削除する。
+
+        Args:
+            max_age_days: 作成からこの日数を超えたエントリを削除
+            max_entries: 残す最大件数（最終利用が新しい順）
+
+        Returns:
+            削除した件数
+        """
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).isoformat()
+        conn = self._get_connection()
+        try:
+            deleted = conn.execute(
+                "DELETE FROM backtest_cache WHERE created_at < ?", (cutoff,)
+            ).rowcount
+            deleted += conn.execute(
+                """
+                DELETE FROM backtest_cache WHERE cache_key IN (
+                    SELECT cache_key FROM backtest_cache
+                    ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (max_entries,),
+            ).rowcount
+            conn.commit()
+            return deleted
+        except sqlite3.Error as e:
+            logger.warning("バックテスト結果キャッシュの削除に失敗: %s", e)
+            return 0
+        finally:
+            self._close_connection(conn)
+
+    def clear_cache(self) -> None:
+        """結果キャッシュを全削除する。"""
+        conn = self._get_connection()
+        try:
+            conn.execute("DELETE FROM backtest_cache")
+            conn.commit()
+            self._cache_entries = 0
+        except sqlite3.Error as e:
+            raise BacktestError(f"キャッシュの削除に失敗しました: {e}") from e
+        finally:
+            self._close_connection(conn)
 
     def run_in_out_sample(
         self,
@@ -523,6 +1041,7 @@ class BacktestEngine:
         strategy_class: type[Strategy],
         n_windows: int = 5,
         auto_adjust: bool = True,
+        n_workers: int = 1,
         **kwargs,
     ) -> dict[str, Any]:
         """
@@ -531,11 +1050,17 @@ class BacktestEngine:
         データを(n_windows+1)等分し、拡張ウィンドウでIS/OOSテストを繰り返す。
         WFE = mean(OOS_SR / IS_SR)。
 
+        n_workers > 1 の場合はウィンドウをプロセスプールで並列実行する。
+        価格データはワーカー起動時に1回だけ渡してワーカー内で使い回し、
+        結果はウィンドウ順に集計する。ワーカーはインメモリDBを使うため、
+        backtest_results への保存は呼び出し元（親プロセス）の save_result() で行う。
+
         Args:
             data: OHLCV DataFrame（大文字カラム名）
             strategy_class: Strategy サブクラス
             n_windows: ウィンドウ数（デフォルト5）
             auto_adjust: Trueの場合、データ量に応じてn_windowsを自動縮小する
+            n_workers: 並列プロセス数（1 = 逐次実行）
             **kwargs: run() に渡すパラメータ
 
         Returns:
@@ -570,24 +1095,34 @@ class BacktestEngine:
                 f"（現在 {segment_size} 本、全体 {total_bars} 本、{n_windows} ウィンドウ）"
             )
 
+        bounds = [
+            ((i + 1) * segment_size, min((i + 2) * segment_size, total_bars))
+            for i in range(n_windows)
+        ]
+        if n_workers > 1:
+            window_pairs = self._run_windows_parallel(
+                data, strategy_class, bounds, n_workers, kwargs,
+            )
+        else:
+            window_pairs = (
+                (
+                    self.run(data.iloc[:is_end], strategy_class, **kwargs),
+                    self.run(data.iloc[is_end:oos_end], strategy_class, **kwargs),
+                )
+                for is_end, oos_end in bounds
+            )
+
         windows_results = []
         wfe_list = []
 
-        for i in range(n_windows):
-            is_end = (i + 1) * segment_size
-            oos_end = min((i + 2) * segment_size, total_bars)
-
-            data_is = data.iloc[:is_end]
-            data_oos = data.iloc[is_end:oos_end]
-
+        for i, ((is_end, oos_end), (result_is, result_oos)) in enumerate(
+            zip(bounds, window_pairs)
+        ):
             logger.info(
                 "ウィンドウ %d/%d: IS=%d本, OOS=%d本",
-                i + 1, n_windows, len(data_is), len(data_oos),
+                i + 1, n_windows, is_end, oos_end - is_end,
             )
 
-            result_is = self.run(data_is, strategy_class, **kwargs)
-            result_oos = self.run(data_oos, strategy_class, **kwargs)
-
             wfe = self._calculate_wfe(
                 result_is.get("sharpe_ratio"),
                 result_oos.get("sharpe_ratio"),
@@ -614,6 +1149,43 @@ class BacktestEngine:
             "wfe_mean": wfe_mean,
         }
 
+    def _run_windows_parallel(
+        self,
+        data: pd.DataFrame,
+        strategy_class: type[Strategy],
+        bounds: list[tuple[int, int]],
+        n_workers: int,
+        kwargs: dict[str, Any],
+    ) -> list[tuple[dict[str, Any], dict[str, Any]]]:
+        """
+        ウォークフォワードの各ウィンドウをプロセスプールで実行する。
+
+        Returns:
+            ウィンドウ順の (IS結果, OOS結果) リスト
+
+        Raises:
+            BacktestError: いずれかのウィンドウの実行に失敗した場合
+        """
+        spec = _portable_strategy(strategy_class)
+        workers = min(n_workers, len(bounds))
+        logger.info("ウォークフォワードを %d プロセスで並列実行します", workers)
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_walk_forward_worker,
+                initargs=(type(self), data),
+            ) as pool:
+                futures = [
+                    pool.submit(_run_walk_forward_window, spec, is_end, oos_end, kwargs)
+                    for is_end, oos_end in bounds
+                ]
+                return [f.result() for f in futures]
+        except BacktestError:
+            raise
+        except Exception as e:
+            raise BacktestError(f"並列ウォークフォワードに失敗しました: {e}") from e
+
     # ------------------------------------------------------------------
     # メトリクス抽出
     # ------------------------------------------------------------------
@@ -674,12 +1246,19 @@ class BacktestEngine:
         """
         バックテスト結果を SQLite に保存する。
 
+        ファイルDBへの書き込みは共有の書き込みスレッド（db_writer）経由で行い、
+        他の書き込みとまとめてコミットされるまで待つ。
+
         Args:
             result: run() / run_in_out_sample() / run_walk_forward() の戻り値
             instrument: 通貨ペア
             granularity: 時間足
             strategy_name: 戦略名
             run_type: "single" / "walk_forward"
+
+        Raises:
+            BacktestError: 保存に失敗した場合（書き込みスレッドでの失敗・
+                DB_WRITER_FLUSH_TIMEOUT_SEC 内にコミットされない場合を含む）
         """
         insert_sql = """
         INSERT INTO backtest_results
@@ -711,13 +1290,22 @@ class BacktestEngine:
         metrics_json = json.dumps(result, default=str)
         params_json = json.dumps({})
 
+        params = (instrument, granularity, strategy_name, run_type, run_at,
+                  sr, dd, wr, pf, trades, wfe, ret, params_json, metrics_json)
+
+        if self._persistent_conn is None:
+            # ファイルDBは共有の書き込みスレッドへ（スイープ並列時の "database is locked" 回避）。
+            # 従来どおり失敗を BacktestError で返すため、コミットまで待って確認する
+            self._save_via_writer(insert_sql, params, run_at)
+            logger.info(
+                "バックテスト結果を保存: %s/%s/%s/%s",
+                instrument, granularity, strategy_name, run_type,
+            )
+            return
+
         conn = self._get_connection()
         try:
-            conn.execute(
-                insert_sql,
-                (instrument, granularity, strategy_name, run_type, run_at,
-                 sr, dd, wr, pf, trades, wfe, ret, params_json, metrics_json),
-            )
+            conn.execute(insert_sql, params)
             conn.commit()
             logger.info(
                 "バックテスト結果を保存: %s/%s/%s/%s",
@@ -728,6 +1316,38 @@ class BacktestEngine:
         finally:
             self._close_connection(conn)
 
+    def _save_via_writer(self, insert_sql: str, params: tuple, run_at: str) -> None:
+        """書き込みスレッドで INSERT し、コミットを確認する（失敗は BacktestError）。"""
+        outcome: dict[str, Any] = {}
+
+        def insert(conn: sqlite3.Connection) -> None:
+            try:
+                outcome["rowid"] = conn.execute(insert_sql, params).lastrowid
+            except Exception as e:
+                outcome["error"] = e
+                raise
+
+        writer = get_writer(self._db_path)
+        writer.call(insert, error_message="バックテスト結果の保存に失敗")
+        if not writer.flush(DB_WRITER_FLUSH_TIMEOUT_SEC):
+            raise BacktestError(
+                f"結果の保存が{DB_WRITER_FLUSH_TIMEOUT_SEC}秒以内に完了しませんでした"
+            )
+        if "error" in outcome:
+            raise BacktestError(f"結果の保存に失敗しました: {outcome['error']}") from outcome["error"]
+
+        # 同じバッチのコミット失敗（ロールバック）でも行は残らない
+        try:
+            with writer.reader() as conn:
+                saved = conn.execute(
+                    "SELECT 1 FROM backtest_results WHERE id = ? AND run_at = ?",
+                    (outcome.get("rowid"), run_at),
+                ).fetchone()
+        except sqlite3.Error as e:
+            raise BacktestError(f"結果の保存確認に失敗しました: {e}") from e
+        if saved is None:
+            raise BacktestError("結果の保存に失敗しました: コミットされませんでした")
+
     def load_results(
         self,
         instrument: str,
@@ -754,14 +1374,21 @@ class BacktestEngine:
         ORDER BY run_at DESC
         """
 
-        conn = self._get_connection()
         try:
-            cursor = conn.execute(query_sql, (instrument, granularity, strategy_name))
-            rows = cursor.fetchall()
+            if self._persistent_conn is not None:
+                rows = self._persistent_conn.execute(
+                    query_sql, (instrument, granularity, strategy_name)
+                ).fetchall()
+            else:
+                # キュー上の save_result を書き切ってから読む
+                writer = get_writer(self._db_path)
+                writer.flush(DB_WRITER_FLUSH_TIMEOUT_SEC)
+                with writer.reader() as conn:
+                    rows = conn.execute(
+                        query_sql, (instrument, granularity, strategy_name)
+                    ).fetchall()
         except sqlite3.Error as e:
             raise BacktestError(f"結果の読み込みに失敗しました: {e}") from e
-        finally:
-            self._close_connection(conn)
 
         columns = [
             "id", "instrument", "granularity", "strategy_name", "run_type",
@@ -0,0 +1,299 @@
+"""
+FX自動取引システム — 上位足アグリゲータ
+
+取引足（M15 等）の価格データから H1/H4/D1 等の上位足を組み立て、
+上位足ごとの指標キャッシュ（compute_indicators() と同じキー）を提供する。
+
+- BarAggregator: TradingLoop 用。確定した取引足だけを差分で畳み込み、
+  上位足の確定足を保持する（取得窓の300本より前の上位足も残る）
+- aggregate_bars(): バックテスト・分析用。全行を一括で集約する
+- 上位足の境界は bar_clock と同じく UTC 00:00 + offset_sec（BAR_ALIGN_OFFSET_SEC）で揃える
+- どちらも最終行は形成中の上位足（取引足の形成中の足を含む）で、
+  同じデータに対して同じ OHLCV を返す（ライブとバックテストで上位足がずれない）
+
+使い方:
+    aggregator = BarAggregator("M15")
+    aggregator.update(data)                 # 毎イテレーション
+    h4 = aggregator.frame("H4")             # 上位足の OHLCV
+    h4_indicators = aggregator.indicators("H4")
+"""
+
+import logging
+from collections import deque
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.bar_clock import granularity_seconds
+from src.config import (
+    BAR_ALIGN_OFFSET_SEC,
+    MTF_AGGREGATOR_HISTORY,
+    MTF_AGGREGATOR_TIMEFRAMES,
+)
+from src.indicator_stream import IndicatorStream
+
+logger = logging.getLogger(__name__)
+
+_PRICE_COLUMNS: tuple[str, ...] = ("open", "high", "low", "close")
+# 合計する出来高系の列（存在するものだけ）
+_VOLUME_COLUMNS: tuple[str, ...] = ("volume", "tick_volume", "real_volume")
+
+
+def higher_timeframes(
+    base_granularity: str, candidates: Sequence[str] = MTF_AGGREGATOR_TIMEFRAMES
+) -> list[str]:
+    """candidates のうち、取引足から組み立てられる上位足（長く、かつ整数倍）を返す。"""
+    base = granularity_seconds(base_granularity)
+    return [
+        tf for tf in candidates
+        if granularity_seconds(tf) > base and granularity_seconds(tf) % base == 0
+    ]
+
+
+def _epoch_seconds(index: pd.DatetimeIndex) -> np.ndarray:
+    """DatetimeIndex を UNIX秒に変換する（naive は UTC とみなす）。"""
+    return index.as_unit("s").asi8
+
+
+def _bucket_starts(epoch: np.ndarray, length: int, offset_sec: int) -> np.ndarray:
+    return (epoch - offset_sec) // length * length + offset_sec
+
+
+def _to_index(epoch: np.ndarray, like: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """UNIX秒を like と同じタイムゾーン・名前の DatetimeIndex にする。"""
+    index = pd.to_datetime(np.asarray(epoch, dtype="int64"), unit="s", utc=True)
+    if like.tz is None:
+        index = index.tz_localize(None)
+    elif str(like.tz) != "UTC":
+        index = index.tz_convert(like.tz)
+    return pd.DatetimeIndex(index, name=like.name)
+
+
+def aggregate_bars(
+    data: pd.DataFrame,
+    granularity: str,
+    offset_sec: int = BAR_ALIGN_OFFSET_SEC,
+) -> pd.DataFrame:
+    """
+    取引足の全行を上位足に集約する（バックテスト・分析用）。
+
+    Args:
+        data: DatetimeIndex を持つ時系列順の OHLCV DataFrame
+        granularity: 集約先のタイムフレーム（"H4" 等）
+        offset_sec: 足境界のUTCからのずれ（秒）
+
+    Returns:
+        上位足の OHLCV DataFrame（index は各上位足の開始時刻）
+
+    Raises:
+        ValueError: data が DatetimeIndex を持たない場合
+    """
+    if not isinstance(data.index, pd.DatetimeIndex):
+        raise ValueError("上位足の集約には DatetimeIndex が必要です")
+    volume_columns = [c for c in _VOLUME_COLUMNS if c in data.columns]
+    columns = list(_PRICE_COLUMNS) + volume_columns
+    if len(data) == 0:
+        return pd.DataFrame(columns=columns, index=data.index[:0], dtype=float)
+
+    length = granularity_seconds(granularity)
+    buckets = _bucket_starts(_epoch_seconds(data.index), length, offset_sec)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:] - 1, len(buckets) - 1]
+
+    out = {
+        "open": data["open"].to_numpy(dtype=float)[starts],
+        "high": np.maximum.reduceat(data["high"].to_numpy(dtype=float), starts),
+        "low": np.minimum.reduceat(data["low"].to_numpy(dtype=float), starts),
+        "close": data["close"].to_numpy(dtype=float)[ends],
+    }
+    for col in volume_columns:
+        out[col] = np.add.reduceat(data[col].to_numpy(dtype=float), starts)
+    return pd.DataFrame(out, index=_to_index(buckets[starts], data.index))[columns]
+
+
+class _TimeframeState:
+    """上位足1つ分の状態（確定足 + 組み立て中の足）"""
+
+    __slots__ = ("length", "closed", "building")
+
+    def __init__(self, length: int, history: int) -> None:
+        self.length = length
+        # 各要素: [開始時刻, open, high, low, close, 出来高...]
+        self.closed: deque[list[float]] = deque(maxlen=history)
+        self.building: Optional[list[float]] = None
+
+    def fold(self, bucket: int, row: tuple, bar_end: int) -> None:
+        """確定した取引足1本を畳み込む。bar_end は取引足の終了時刻。"""
+        if self.building is not None and self.building[0] != bucket:
+            # 取引足が欠けたまま次の上位足に進んだ（週末・休場など）
+            self.closed.append(self.building)
+            self.building = None
+        if self.building is None:
+            self.building = [bucket, *row]
+        else:
+            _merge(self.building, row)
+        if bar_end >= bucket + self.length:
+            self.closed.append(self.building)
+            self.building = None
+
+
+def _merge(bar: list[float], row: tuple) -> None:
+    """[開始時刻, o, h, l, c, 出来高...] に取引足 (o, h, l, c, 出来高...) を足し込む。"""
+    bar[2] = max(bar[2], row[1])
+    bar[3] = min(bar[3], row[2])
+    bar[4] = row[3]
+    for k in range(4, len(row)):
+        bar[k + 1] += row[k]
+
+
+class BarAggregator:
+    """
+    通貨ペア1つ分の上位足アグリゲータ。
+
+    TradingLoop がインスタンスを1つ保持し、毎イテレーションの価格データ
+    （最終行は形成中の足）を update() に渡す。前回までに畳み込んだ最終確定足より
+    新しい確定足だけを処理するため、1イテレーションあたりの追加コストは新しい足の本数分。
+    上位足の指標は indicators() を呼んだ上位足だけ、update() ごとに1回計算する。
+    """
+
+    def __init__(
+        self,
+        base_granularity: str,
+        timeframes: Sequence[str] = MTF_AGGREGATOR_TIMEFRAMES,
+        offset_sec: int = BAR_ALIGN_OFFSET_SEC,
+        history: int = MTF_AGGREGATOR_HISTORY,
+    ) -> None:
+        """
+        Args:
+            base_granularity: 取引足のタイムフレーム（"M15" 等）
+            timeframes: 組み立てる上位足
+            offset_sec: 足境界のUTCからのずれ（秒）
+            history: 上位足ごとに保持する確定足の本数
+
+        Raises:
+            ValueError: 取引足から組み立てられない上位足が含まれる場合
+        """
+        invalid = set(timeframes) - set(higher_timeframes(base_granularity, timeframes))
+        if invalid:
+            raise ValueError(
+                f"{base_granularity} から組み立てられない上位足: {sorted(invalid)}"
+            )
+        self._base_granularity = base_granularity
+        self._base_length = granularity_seconds(base_granularity)
+        self._timeframes = tuple(timeframes)
+        self._offset_sec = offset_sec
+        self._history = history
+        self.reset()
+
+    def reset(self) -> None:
+        """状態を破棄する（次回 update() で取得窓全体から組み立て直す）。"""
+        self._states = {
+            tf: _TimeframeState(granularity_seconds(tf), self._history)
+            for tf in self._timeframes
+        }
+        self._streams = {tf: IndicatorStream() for tf in self._timeframes}
+        self._indicator_cache: dict[str, dict] = {}
+        self._last_closed_ts: Optional[int] = None
+        self._forming: Optional[tuple[int, tuple]] = None
+        self._volume_columns: Optional[tuple[str, ...]] = None
+        self._index_like: Optional[pd.DatetimeIndex] = None
+
+    @property
+    def timeframes(self) -> tuple[str, ...]:
+        return self._timeframes
+
+    # ------------------------------------------------------------------
+    # 公開API
+    # ------------------------------------------------------------------
+
+    def update(self, data: pd.DataFrame) -> int:
+        """
+        最新の価格データで上位足を更新する。
+
+        Args:
+            data: DatetimeIndex を持つ取引足の OHLCV DataFrame（最終行は形成中の足）
+
+        Returns:
+            新しく畳み込んだ確定足の本数
+
+        Raises:
+            ValueError: data が DatetimeIndex を持たない場合
+        """
+        if not isinstance(data.index, pd.DatetimeIndex):
+            raise ValueError("上位足の集約には DatetimeIndex が必要です")
+        if len(data) == 0:
+            return 0
+
+        volume_columns = tuple(c for c in _VOLUME_COLUMNS if c in data.columns)
+        if volume_columns != self._volume_columns:
+            self.reset()
+            self._volume_columns = volume_columns
+        self._index_like = data.index[:0]
+
+        epoch = _epoch_seconds(data.index)
+        columns = [data[c].to_numpy(dtype=float) for c in _PRICE_COLUMNS + volume_columns]
+        last_closed = len(data) - 2
+        start = 0
+        if self._last_closed_ts is not None:
+            start = int(np.searchsorted(epoch[: last_closed + 1], self._last_closed_ts, side="right"))
+
+        for pos in range(start, last_closed + 1):
+            ts = int(epoch[pos])
+            row = tuple(float(col[pos]) for col in columns)
+            for state in self._states.values():
+                bucket = (ts - self._offset_sec) // state.length * state.length + self._offset_sec
+                state.fold(bucket, row, ts + self._base_length)
+            self._last_closed_ts = ts
+
+        self._forming = (int(epoch[-1]), tuple(float(col[-1]) for col in columns))
+        self._indicator_cache.clear()
+        return max(0, last_closed + 1 - start)
+
+    def frame(self, timeframe: str) -> pd.DataFrame:
+        """
+        上位足の OHLCV DataFrame を返す（最終行は形成中の上位足）。
+
+        Raises:
+            KeyError: 組み立てていない上位足の場合
+        """
+        state = self._states[timeframe]
+        rows = [list(bar) for bar in state.closed]
+        building = list(state.building) if state.building is not None else None
+
+        if self._forming is not None:
+            ts, row = self._forming
+            bucket = (ts - self._offset_sec) // state.length * state.length + self._offset_sec
+            if building is not None and building[0] == bucket:
+                _merge(building, row)
+            else:
+                if building is not None:
+                    rows.append(building)
+                building = [bucket, *row]
+        if building is not None:
+            rows.append(building)
+
+        columns = list(_PRICE_COLUMNS) + list(self._volume_columns or ())
+        like = self._index_like if self._index_like is not None else pd.DatetimeIndex([], tz="UTC")
+        if not rows:
+            return pd.DataFrame(columns=columns, index=like, dtype=float)
+        values = np.asarray(rows, dtype=float)
+        return pd.DataFrame(
+            values[:, 1:], columns=columns,
+            index=_to_index(values[:, 0].astype("int64"), like),
+        )
+
+    def indicators(self, timeframe: str) -> dict:
+        """
+        上位足の指標キャッシュ（compute_indicators() と同じキー）を返す。
+
+        上位足ごとに IndicatorStream で差分更新し、同じ update() の間は結果を使い回す。
+
+        Raises:
+            KeyError: 組み立てていない上位足の場合
+        """
+        cached = self._indicator_cache.get(timeframe)
+        if cached is None:
+            cached = self._streams[timeframe].update(self.frame(timeframe))
+            self._indicator_cache[timeframe] = cached
+        return cached
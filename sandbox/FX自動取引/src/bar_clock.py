@@ -0,0 +1,79 @@
+"""
+FX自動取引システム — 足確定クロック
+
+タイムフレーム文字列（"M15", "H1" 等）から足の長さと次の確定時刻を求め、
+価格データから「新しい足が出現したか」を判定するためのキーを作る。
+TradingLoop の足確定駆動スケジューラ（SCHEDULER_MODE="bar_close"）で使用する。
+"""
+
+import math
+from typing import Hashable, Optional
+
+import pandas as pd
+
+# タイムフレーム → 足の長さ（秒）
+GRANULARITY_SECONDS: dict[str, int] = {
+    "M1": 60,
+    "M5": 300,
+    "M15": 900,
+    "M30": 1800,
+    "H1": 3600,
+    "H4": 14400,
+    "D1": 86400,
+}
+
+
+def granularity_seconds(granularity: str) -> int:
+    """タイムフレームの足の長さを秒で返す。
+
+    Raises:
+        ValueError: 未対応のタイムフレームの場合
+    """
+    try:
+        return GRANULARITY_SECONDS[granularity]
+    except KeyError:
+        raise ValueError(
+            f"未対応のタイムフレーム: {granularity} "
+            f"（対応: {', '.join(GRANULARITY_SECONDS)}）"
+        ) from None
+
+
+def next_bar_close(now_ts: float, granularity: str, offset_sec: int = 0) -> float:
+    """now_ts より後で最初に来る足の確定時刻（UNIX秒）を返す。
+
+    足の境界は UNIX エポック（UTC 00:00）+ offset_sec を基準に揃える。
+    M15/H1 はブローカーのサーバー時刻が整数時間ずれていても境界は一致するが、
+    H4/D1 はサーバーのタイムゾーンに依存するため offset_sec で補正する。
+
+    Args:
+        now_ts: 現在時刻（UNIX秒）
+        granularity: タイムフレーム
+        offset_sec: 足境界のUTCからのずれ（秒）
+
+    Returns:
+        次の足確定時刻（UNIX秒）。now_ts がちょうど境界なら次の境界。
+    """
+    length = granularity_seconds(granularity)
+    periods = math.floor((now_ts - offset_sec) / length) + 1
+    return periods * length + offset_sec
+
+
+def last_closed_bar_key(data: Optional[pd.DataFrame]) -> Optional[Hashable]:
+    """最終確定足（最終行の1つ前）を識別するキーを返す。
+
+    DatetimeIndex を持つデータは形成中の足の時刻、持たないデータは
+    最終確定足の OHLC を使う（確定済みの足は値が変わらないため）。
+    新しい足が出現するとキーが変わる。
+
+    Returns:
+        比較用のキー。データが2行未満なら None。
+    """
+    if data is None or len(data) < 2:
+        return None
+    if isinstance(data.index, pd.DatetimeIndex):
+        return data.index[-1]
+    row = data.iloc[-2]
+    return tuple(
+        float(row[col]) for col in ("open", "high", "low", "close")
+        if col in data.columns
+    )
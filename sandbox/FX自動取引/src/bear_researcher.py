@@ -10,9 +10,11 @@ Phase 3 追加。
 """
 
 import logging
+import math
 from dataclasses import dataclass, field
-from typing import Any, Optional
+from typing import Any, Optional, Sequence
 
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 
@@ -27,6 +29,7 @@ from src.config import (
     REGIME_BBW_SQUEEZE_RATIO,
     RSI_PERIOD,
 )
+from src.indicator_cache import min_input_rows
 from src.strategy.base import Signal
 
 logger = logging.getLogger(__name__)
@@ -42,6 +45,28 @@ class BearVerdict:
     reasoning: str = ""                  # 判定理由（日本語）
 
 
+@dataclass
+class BearBatchVerdict:
+    """
+    verify_batch の結果（signal_indices と同じ並びの配列）
+
+    i 番目の要素は data.iloc[:signal_indices[i] + 1] を verify() に渡した結果と一致する。
+    """
+
+    signal_indices: np.ndarray
+    severity: np.ndarray
+    penalty_multiplier: np.ndarray
+    fired: dict[str, np.ndarray]     # チェックID（_RISK_WEIGHTS のキー）→ 発火したか
+
+    def __len__(self) -> int:
+        return len(self.signal_indices)
+
+    @property
+    def risk_count(self) -> np.ndarray:
+        """各シグナルで発火したチェック数"""
+        return sum(flags.astype(int) for flags in self.fired.values())
+
+
 # 監査P1-#4: チェック項目の重み付け（合計 1.0）
 # 旧実装は等価カウント (severity = len(risks) / 5) で「上位足矛盾(重大)」と
 # 「MFI 中立帯(軽微)」が同じ 0.2 寄与だった。ここでは「シグナル方向と直接
@@ -80,6 +105,7 @@ class BearResearcher:
         signal: Signal,
         regime: Optional[Any] = None,
         indicators: dict | None = None,
+        htf_indicators: dict | None = None,
     ) -> BearVerdict:
         """
         シグナルに対する反対論拠を検証する。
@@ -89,6 +115,8 @@ class BearResearcher:
             signal: BUY/SELL/HOLDシグナル
             regime: RegimeInfoオブジェクト（オプション）
             indicators: IndicatorCache辞書（キャッシュがあればpandas_ta計算をスキップ）
+            htf_indicators: 上位足の指標キャッシュ（BarAggregator.indicators()）。
+                            MA長期が算出済みなら上位足矛盾をこちらで判定する
 
         Returns:
             BearVerdict: 検証結果
@@ -133,7 +161,9 @@ class BearResearcher:
             risk_factors.append(sr_risk)
             fired_checks.append("support_resistance")
 
-        htf_risk = self._check_higher_timeframe(data, is_buy, indicators=indicators)
+        htf_risk = self._check_higher_timeframe(
+            data, is_buy, indicators=indicators, htf_indicators=htf_indicators,
+        )
         if htf_risk:
             risk_factors.append(htf_risk)
             fired_checks.append("higher_timeframe")
@@ -182,6 +212,181 @@ class BearResearcher:
             reasoning=reasoning,
         )
 
+    def verify_batch(
+        self,
+        data: pd.DataFrame,
+        signal_indices: Sequence[int],
+        signals: Signal | Sequence[Signal],
+    ) -> BearBatchVerdict:
+        """
+        複数シグナルの反対論拠をまとめて検証する（バックテスト・分析用）。
+
+        RSI・ATR・MA長期・MFI・BBW は全期間で1回だけ計算する。ダイバージェンスの
+        ピーク/トラフ候補も全期間で1回だけ検出し、各シグナルでは窓内の候補に
+        find_peaks(distance=...) と同じ間引きだけを行う。ログは件数の集計のみ出す。
+
+        Args:
+            data: OHLCV形式のDataFrame
+            signal_indices: シグナルが出た足の位置（data の行番号）
+            signals: 各シグナルの方向（1つだけ渡すと全件に適用）
+
+        Returns:
+            BearBatchVerdict: signal_indices と同じ並びの severity / penalty 配列
+        """
+        idx = np.asarray(signal_indices, dtype=int)
+        n = len(idx)
+        if isinstance(signals, Signal):
+            signals = [signals] * n
+        if len(signals) != n:
+            raise ValueError(
+                f"signals の件数（{len(signals)}）が signal_indices（{n}）と一致しません"
+            )
+        is_buy = np.array([s == Signal.BUY for s in signals], dtype=bool)
+        is_hold = np.array([s == Signal.HOLD for s in signals], dtype=bool)
+
+        close = data["close"].to_numpy(dtype=float)
+        high = data["high"].to_numpy(dtype=float)
+        low = data["low"].to_numpy(dtype=float)
+
+        # verify() と同じ: データ不足・HOLD は検証しない（リスク0）
+        min_rows = max(MA_LONG_PERIOD, 20) + 5
+        rows = idx + 1
+        active = (rows >= min_rows) & ~is_hold
+        fired = {name: np.zeros(n, dtype=bool) for name in _RISK_WEIGHTS}
+
+        def computable(indicator) -> np.ndarray:
+            # verify() は data.iloc[:i+1] に適用した pandas_ta が None なら判定しない
+            return active & (rows >= min_input_rows(indicator, data))
+
+        # --- ダイバージェンス ---
+        rsi_series = ta.rsi(data["close"], length=RSI_PERIOD)
+        if rsi_series is not None:
+            rsi = rsi_series.to_numpy(dtype=float)
+            fired["divergence"] = computable(
+                lambda d: ta.rsi(d["close"], length=RSI_PERIOD)
+            ) & self._divergence_batch(close, rsi, idx, is_buy)
+
+        # --- サポレジ接近（直近20本の高値/安値、ATR基準） ---
+        lookback = 20
+        atr_series = ta.atr(data["high"], data["low"], data["close"], length=ATR_PERIOD)
+        if atr_series is not None:
+            atr = atr_series.to_numpy(dtype=float)[idx]
+            resistance = pd.Series(high).rolling(lookback).max().to_numpy()[idx]
+            support = pd.Series(low).rolling(lookback).min().to_numpy()[idx]
+            price = close[idx]
+            threshold = atr * BEAR_SR_ATR_MULTIPLIER
+            distance = np.where(is_buy, resistance - price, price - support)
+            with np.errstate(invalid="ignore"):
+                near = (0 <= distance) & (distance <= threshold)
+            fired["support_resistance"] = computable(
+                lambda d: ta.atr(d["high"], d["low"], d["close"], length=ATR_PERIOD)
+            ) & near & np.isfinite(atr) & (atr != 0)
+
+        # --- 上位足矛盾（MA長期の傾き） ---
+        ma_long = ta.sma(data["close"], length=MA_LONG_PERIOD)
+        if ma_long is not None:
+            ma = ma_long.to_numpy(dtype=float)
+            slope = ma[idx] - np.where(idx >= 1, ma[np.maximum(idx - 1, 0)], np.nan)
+            with np.errstate(invalid="ignore"):
+                against = np.where(is_buy, slope < 0, slope > 0)
+            fired["higher_timeframe"] = computable(
+                lambda d: ta.sma(d["close"], length=MA_LONG_PERIOD)
+            ) & against
+
+        # --- ボリューム不支持（MFI中立帯） ---
+        if "volume" in data.columns:
+            mfi_series = ta.mfi(
+                data["high"], data["low"], data["close"], data["volume"],
+                length=MFI_PERIOD,
+            )
+            if mfi_series is not None:
+                mfi = mfi_series.to_numpy(dtype=float)[idx]
+                with np.errstate(invalid="ignore"):
+                    in_band = (40 <= mfi) & (mfi <= 60)
+                fired["volume_confirmation"] = computable(
+                    lambda d: ta.mfi(
+                        d["high"], d["low"], d["close"], d["volume"], length=MFI_PERIOD,
+                    )
+                ) & in_band
+
+        # --- BBスクイーズ（現在BBW / それまでのBBW平均） ---
+        bbands = ta.bbands(data["close"], length=20, std=2.0)
+        if bbands is not None:
+            bbw_cols = ["BBB_20_2.0"] if "BBB_20_2.0" in bbands.columns else [
+                c for c in bbands.columns if c.startswith("BBB_")
+            ]
+            if bbw_cols:
+                bbw = bbands[bbw_cols[0]]
+                mean_bbw = bbw.expanding(min_periods=2).mean().to_numpy()[idx]
+                current_bbw = bbw.ffill().to_numpy()[idx]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    ratio = current_bbw / mean_bbw
+                    squeeze = (ratio < REGIME_BBW_SQUEEZE_RATIO) & (mean_bbw != 0)
+                fired["bb_squeeze"] = computable(
+                    lambda d: ta.bbands(d["close"], length=20, std=2.0)
+                ) & squeeze
+
+        severity = np.zeros(n)
+        for name, weight in _RISK_WEIGHTS.items():
+            severity += np.where(fired[name], weight, 0.0)
+        severity = np.clip(severity, 0.0, 1.0)
+        penalty = np.maximum(BEAR_MAX_PENALTY, 1.0 - severity * 0.5)
+
+        logger.info(
+            "Bear Researcher（一括）: %d件, リスク検出 %d件, 平均severity %.2f",
+            n, int((severity > 0).sum()), float(severity.mean()) if n else 0.0,
+        )
+        return BearBatchVerdict(
+            signal_indices=idx,
+            severity=severity,
+            penalty_multiplier=penalty,
+            fired=fired,
+        )
+
+    @staticmethod
+    def _divergence_batch(
+        close: np.ndarray, rsi: np.ndarray, idx: np.ndarray, is_buy: np.ndarray,
+    ) -> np.ndarray:
+        """
+        _check_divergence の一括版。
+
+        全期間の極大/極小候補（プラトー端付き）を1回だけ求め、各シグナルの窓
+        [i-window+1, i] の内側に収まる候補だけを対象に find_peaks と同じ
+        距離間引きを行う。結果は窓ごとに find_peaks を呼んだ場合と一致する。
+        """
+        from scipy.signal import find_peaks  # local import: scipy は既に依存
+
+        lookback = BEAR_DIVERGENCE_LOOKBACK
+        window = max(lookback * 3, 30)
+        valid_count = np.concatenate(
+            ([0], np.cumsum(~(np.isnan(close) | np.isnan(rsi))))
+        )
+
+        def candidates(x: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+            peaks, props = find_peaks(x, plateau_size=1)
+            return peaks, props["left_edges"], props["right_edges"]
+
+        # (価格, RSI) × (ピーク, トラフ)
+        tables = {
+            True: (candidates(close), candidates(rsi), close, rsi),
+            False: (candidates(-close), candidates(-rsi), -close, -rsi),
+        }
+
+        result = np.zeros(len(idx), dtype=bool)
+        for k, (i, buy) in enumerate(zip(idx, is_buy)):
+            start = i - window + 1
+            if start < 0 or valid_count[i + 1] - valid_count[start] < 10:
+                continue
+            cand_p, cand_r, x_p, x_r = tables[bool(buy)]
+            last_p = _last_two_peaks(cand_p, x_p, start, i, lookback)
+            last_r = _last_two_peaks(cand_r, x_r, start, i, lookback)
+            if last_p is None or last_r is None:
+                continue
+            (p_prev, p_last), (r_prev, r_last) = last_p, last_r
+            # BUY: 価格高値↑ かつ RSI高値↓ / SELL: 符号反転した系列で同じ比較
+            result[k] = x_p[p_last] > x_p[p_prev] and x_r[r_last] < x_r[r_prev]
+        return result
+
     # ================================================================
     # チェック項目の実装
     # ================================================================
@@ -309,11 +514,27 @@ class BearResearcher:
         return None
 
     def _check_higher_timeframe(
-        self, data: pd.DataFrame, is_buy: bool, indicators: dict | None = None
+        self,
+        data: pd.DataFrame,
+        is_buy: bool,
+        indicators: dict | None = None,
+        htf_indicators: dict | None = None,
     ) -> Optional[str]:
         """
         上位足矛盾: MA長期（50期間）の傾きがシグナル方向と逆か。
+
+        上位足の指標キャッシュがあり MA長期が算出済み（直近2本が非NaN）なら上位足の
+        MA長期で、無ければ取引足の MA長期で判定する。
         """
+        htf_ma = htf_indicators.get("ma_long") if htf_indicators is not None else None
+        if htf_ma is not None and len(htf_ma) >= 2 and not htf_ma.iloc[-2:].isna().any():
+            slope = float(htf_ma.iloc[-1] - htf_ma.iloc[-2])
+            if is_buy and slope < 0:
+                return f"上位足MA{MA_LONG_PERIOD}が下降中（傾き{slope:.6f}）に買いシグナル"
+            elif not is_buy and slope > 0:
+                return f"上位足MA{MA_LONG_PERIOD}が上昇中（傾き{slope:.6f}）に売りシグナル"
+            return None
+
         # キャッシュからMA長期を取得（あればpandas_ta計算をスキップ）
         if indicators is not None and indicators.get("ma_long") is not None:
             ma_long = indicators["ma_long"]
@@ -408,3 +629,44 @@ class BearResearcher:
             )
 
         return None
+
+
+def _last_two_peaks(
+    candidates: tuple[np.ndarray, np.ndarray, np.ndarray],
+    x: np.ndarray,
+    start: int,
+    end: int,
+    distance: int,
+) -> Optional[tuple[int, int]]:
+    """
+    x[start:end + 1] に find_peaks(distance=distance) をかけた場合の直近2ピーク（全体の位置）。
+
+    候補は全期間の極大（プラトー端付き）で、窓の端に接するプラトーは窓内では
+    ピークにならないため除く。距離間引きは scipy と同じく高い順に近傍を落とす。
+    """
+    peaks, left_edges, right_edges = candidates
+    lo = np.searchsorted(peaks, start, side="left")
+    hi = np.searchsorted(peaks, end, side="right")
+    inside = (left_edges[lo:hi] > start) & (right_edges[lo:hi] < end)
+    selected = peaks[lo:hi][inside]
+    if len(selected) < 2:
+        return None
+
+    keep = np.ones(len(selected), dtype=bool)
+    distance_ = math.ceil(distance)
+    order = np.argsort(x[selected])
+    for j in order[::-1]:
+        if not keep[j]:
+            continue
+        k = j - 1
+        while k >= 0 and selected[j] - selected[k] < distance_:
+            keep[k] = False
+            k -= 1
+        k = j + 1
+        while k < len(selected) and selected[k] - selected[j] < distance_:
+            keep[k] = False
+            k += 1
+    kept = selected[keep]
+    if len(kept) < 2:
+        return None
+    return int(kept[-2]), int(kept[-1])
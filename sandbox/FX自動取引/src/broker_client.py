@@ -5,11 +5,14 @@ FX自動取引システム — ブローカー抽象化インターフェース
 doc 04 セクション3.1 BrokerClient最小メソッドセット準拠。
 """
 
+import logging
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Iterable, Optional
 
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
 
 class BrokerClient(ABC):
     """
@@ -165,3 +168,32 @@ class BrokerClient(ABC):
             取得失敗または未対応の場合は None。
         """
         return None
+
+    def get_closed_deals(self, trade_ids: Iterable[str]) -> dict[str, dict]:
+        """
+        複数の決済済みポジションの決済情報をまとめて取得する。
+
+        sync_with_broker で見つかった決済済みポジションを1回の呼び出しで
+        復元するために使用する。デフォルト実装は get_closed_deal() を
+        1件ずつ呼ぶ（個別の取得失敗は警告してスキップ）。
+        MT5Client は取引履歴を1回だけ取得して索引から引く実装で上書きする。
+
+        Args:
+            trade_ids: ポジションIDの並び
+
+        Returns:
+            {trade_id: get_closed_deal() と同じ形式のdict}。
+            取得できなかった trade_id は含まない。
+        """
+        deals: dict[str, dict] = {}
+        for trade_id in trade_ids:
+            try:
+                deal = self.get_closed_deal(trade_id)
+            except Exception as e:
+                logger.warning(
+                    "決済履歴の取得に失敗: trade_id=%s, error=%s", trade_id, e,
+                )
+                continue
+            if deal is not None:
+                deals[trade_id] = deal
+        return deals
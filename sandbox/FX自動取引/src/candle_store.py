@@ -0,0 +1,383 @@
+"""
+FX自動取引システム — ローソク足ストア
+
+(通貨ペア, タイムフレーム) ごとに確定足を列指向のバイナリファイルへ
+追記保存し、numpy.memmap でゼロコピー読み出しする。
+
+- ライブ: Mt5Client.get_prices が前回保存以降の足だけを MT5 から取得して追記
+- バックテスト: 同じストアを read() / read_arrays() で読み、CSV再パースを不要にする
+
+ディレクトリ構成:
+    data/candles/{instrument}_{granularity}/
+        time.i8     足の開始時刻（UNIX秒, int64）
+        open.f8 / high.f8 / low.f8 / close.f8 / volume.f8   （float64）
+
+追記は値の列 → time 列の順に書き込むため、time 列の行数が確定行数になる。
+書き込み途中で中断して値の列だけ長くなった場合は、次回追記時に切り詰める。
+
+時刻は MT5 が返す値（ブローカーのサーバー時刻ベースのUNIX秒）をそのまま保持し、
+DataFrame では UTC の DatetimeIndex として扱う（既存CSVの datetime 列と同じ基準）。
+"""
+
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import CANDLE_STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS: tuple[str, ...] = ("open", "high", "low", "close", "volume")
+
+_TIME_FILE = "time.i8"
+_TIME_DTYPE = np.dtype("<i8")
+_VALUE_DTYPE = np.dtype("<f8")
+
+
+class CandleStoreError(Exception):
+    """ローソク足ストア固有のエラー"""
+
+
+TimeLike = Union[str, pd.Timestamp, None]
+
+
+class CandleStore:
+    """追記専用・列指向・memmap 読み出しのローソク足ストア。
+
+    同一プロセス内はキーごとのロックで追記を直列化する。
+    別プロセス（バックテスト）からの読み出しは time 列の行数までしか
+    参照しないため、ライブ側の追記中でも整合した範囲を読める。
+    """
+
+    def __init__(self, root: Union[str, Path] = CANDLE_STORE_DIR) -> None:
+        """
+        Args:
+            root: ストアのルートディレクトリ（存在しなければ作成）
+        """
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    @property
+    def root(self) -> Path:
+        """ストアのルートディレクトリ"""
+        return self._root
+
+    # ------------------------------------------------------------------
+    # 書き込み
+    # ------------------------------------------------------------------
+
+    def append(self, instrument: str, granularity: str, data: pd.DataFrame) -> int:
+        """確定足を追記する。保存済みの最終時刻より新しい行だけを書き込む。
+
+        Args:
+            instrument: 通貨ペア（例: "USD_JPY"）
+            granularity: 時間足（例: "M15"）
+            data: DatetimeIndex と open/high/low/close/volume 列を持つDataFrame
+
+        Returns:
+            追記した行数
+
+        Raises:
+            CandleStoreError: DatetimeIndex や必須列が無い場合
+        """
+        times, values = _to_columns(data)
+        with self._lock(instrument, granularity):
+            path = self._path(instrument, granularity)
+            path.mkdir(parents=True, exist_ok=True)
+            committed = self._repair(path)
+
+            if committed > 0:
+                last = int(self._time_memmap(path, committed)[-1])
+                mask = times > last
+                times = times[mask]
+                values = {col: arr[mask] for col, arr in values.items()}
+            if len(times) == 0:
+                return 0
+            if np.any(np.diff(times) <= 0):
+                order = np.argsort(times, kind="stable")
+                times = times[order]
+                keep = np.concatenate(([True], np.diff(times) > 0))
+                times = times[keep]
+                values = {col: arr[order][keep] for col, arr in values.items()}
+
+            for col in PRICE_COLUMNS:
+                _append_bytes(path / f"{col}.f8", values[col].astype(_VALUE_DTYPE))
+            _append_bytes(path / _TIME_FILE, times.astype(_TIME_DTYPE))
+            return len(times)
+
+    def write(self, instrument: str, granularity: str, data: pd.DataFrame) -> int:
+        """ストアの内容を data で置き換える（既存データより古い足を取り込む場合用）。
+
+        一時ディレクトリに書いてから差し替えるため、途中で失敗しても
+        既存データは壊れない。
+
+        Returns:
+            書き込んだ行数
+        """
+        times, values = _to_columns(data)
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        keep = np.concatenate(([True], np.diff(times) > 0))[: len(times)]
+        times = times[keep]
+
+        with self._lock(instrument, granularity):
+            path = self._path(instrument, granularity)
+            tmp = path.with_name(path.name + ".tmp")
+            if tmp.exists():
+                shutil.rmtree(tmp)
+            tmp.mkdir(parents=True)
+            for col in PRICE_COLUMNS:
+                values[col][order][keep].astype(_VALUE_DTYPE).tofile(tmp / f"{col}.f8")
+            times.astype(_TIME_DTYPE).tofile(tmp / _TIME_FILE)
+            if path.exists():
+                old = path.with_name(path.name + ".old")
+                if old.exists():
+                    shutil.rmtree(old)
+                os.replace(path, old)
+                os.replace(tmp, path)
+                shutil.rmtree(old)
+            else:
+                os.replace(tmp, path)
+            return len(times)
+
+    # ------------------------------------------------------------------
+    # 読み出し
+    # ------------------------------------------------------------------
+
+    def row_count(self, instrument: str, granularity: str) -> int:
+        """保存済みの確定足の本数"""
+        time_file = self._path(instrument, granularity) / _TIME_FILE
+        if not time_file.exists():
+            return 0
+        return time_file.stat().st_size // _TIME_DTYPE.itemsize
+
+    def last_time(self, instrument: str, granularity: str) -> Optional[pd.Timestamp]:
+        """保存済みの最終確定足の時刻（未保存なら None）"""
+        n = self.row_count(instrument, granularity)
+        if n == 0:
+            return None
+        path = self._path(instrument, granularity)
+        return pd.Timestamp(int(self._time_memmap(path, n)[-1]), unit="s", tz="UTC")
+
+    def read_arrays(
+        self,
+        instrument: str,
+        granularity: str,
+        start: TimeLike = None,
+        end: TimeLike = None,
+        count: Optional[int] = None,
+    ) -> dict[str, np.ndarray]:
+        """列ごとの読み取り専用 memmap ビューを返す（ゼロコピー）。
+
+        Args:
+            start: この時刻以降（含む）
+            end: この時刻以前（含む）
+            count: 指定時は範囲の末尾 count 本に絞る
+
+        Returns:
+            {"time": int64秒, "open": ..., "volume": ...}
+        """
+        path = self._path(instrument, granularity)
+        n = self.row_count(instrument, granularity)
+        if n == 0:
+            empty = {"time": np.empty(0, dtype=_TIME_DTYPE)}
+            empty.update({col: np.empty(0, dtype=_VALUE_DTYPE) for col in PRICE_COLUMNS})
+            return empty
+
+        times = self._time_memmap(path, n)
+        lo, hi = 0, n
+        if start is not None:
+            lo = int(np.searchsorted(times, _to_epoch(start), side="left"))
+        if end is not None:
+            hi = int(np.searchsorted(times, _to_epoch(end), side="right"))
+        if count is not None:
+            lo = max(lo, hi - count)
+        lo = min(lo, hi)
+
+        arrays = {"time": times[lo:hi]}
+        for col in PRICE_COLUMNS:
+            arrays[col] = np.memmap(
+                path / f"{col}.f8", dtype=_VALUE_DTYPE, mode="r", shape=(n,)
+            )[lo:hi]
+        return arrays
+
+    def read(
+        self,
+        instrument: str,
+        granularity: str,
+        start: TimeLike = None,
+        end: TimeLike = None,
+        count: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """OHLCV DataFrame（UTC DatetimeIndex）として読み出す。
+
+        価格列は memmap を共有する（コピーしない）。読み取り専用のため、
+        加工する場合は呼び出し側で copy() すること。
+        """
+        arrays = self.read_arrays(instrument, granularity, start, end, count)
+        index = pd.DatetimeIndex(
+            pd.to_datetime(np.asarray(arrays["time"]), unit="s", utc=True),
+            name="datetime",
+        )
+        return pd.DataFrame(
+            {col: arrays[col] for col in PRICE_COLUMNS}, index=index, copy=False
+        )
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+
+    def _path(self, instrument: str, granularity: str) -> Path:
+        return self._root / f"{instrument}_{granularity}"
+
+    def _lock(self, instrument: str, granularity: str) -> threading.Lock:
+        key = f"{instrument}_{granularity}"
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    @staticmethod
+    def _time_memmap(path: Path, n: int) -> np.ndarray:
+        return np.memmap(path / _TIME_FILE, dtype=_TIME_DTYPE, mode="r", shape=(n,))
+
+    @staticmethod
+    def _repair(path: Path) -> int:
+        """中断された追記の残骸を切り詰め、確定行数を返す。"""
+        time_file = path / _TIME_FILE
+        committed = (
+            time_file.stat().st_size // _TIME_DTYPE.itemsize if time_file.exists() else 0
+        )
+        expected = {
+            path / _TIME_FILE: committed * _TIME_DTYPE.itemsize,
+            **{path / f"{col}.f8": committed * _VALUE_DTYPE.itemsize for col in PRICE_COLUMNS},
+        }
+        for file, size in expected.items():
+            if file.exists() and file.stat().st_size != size:
+                if file.stat().st_size < size:
+                    raise CandleStoreError(f"列ファイルが不足しています: {file}")
+                logger.warning("ローソク足ストア: 中断された追記を切り詰め: %s", file)
+                with open(file, "r+b") as f:
+                    f.truncate(size)
+        return committed
+
+
+def _append_bytes(file: Path, arr: np.ndarray) -> None:
+    with open(file, "ab") as f:
+        f.write(arr.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _to_epoch(value: Union[str, pd.Timestamp]) -> int:
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.timestamp())
+
+
+def _to_columns(data: pd.DataFrame) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """DataFrame を (UNIX秒の配列, 列ごとのfloat配列) に分解する。"""
+    if not isinstance(data.index, pd.DatetimeIndex):
+        raise CandleStoreError("ローソク足ストアには DatetimeIndex が必要です")
+    missing = set(PRICE_COLUMNS) - set(data.columns)
+    if missing:
+        raise CandleStoreError(f"必須カラム欠落: {sorted(missing)}")
+    index = data.index
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    times = index.as_unit("s").asi8.astype(_TIME_DTYPE)
+    values = {col: data[col].to_numpy(dtype=_VALUE_DTYPE) for col in PRICE_COLUMNS}
+    return times, values
+
+
+def parse_mt5_csv_name(csv_path: Union[str, Path]) -> tuple[str, str]:
+    """MT5エクスポートCSV名（mt5_USD_JPY_M15_2y.csv）から (通貨ペア, 時間足) を得る。
+
+    Raises:
+        ValueError: 命名規則に合わない場合
+    """
+    parts = Path(csv_path).stem.split("_")
+    if len(parts) < 4 or parts[0] != "mt5":
+        raise ValueError(f"MT5エクスポートCSVの命名規則に合いません: {csv_path}")
+    return f"{parts[1]}_{parts[2]}", parts[3]
+
+
+def load_csv_via_store(
+    csv_path: Union[str, Path],
+    instrument: Optional[str] = None,
+    granularity: Optional[str] = None,
+    store: Optional[CandleStore] = None,
+) -> pd.DataFrame:
+    """MT5 エクスポートCSVの期間をストアから読み出す（初回のみCSVを取り込む）。
+
+    ストアが CSV の期間を覆っていない場合に限り CSV をパースして取り込み、
+    以降はストアの memmap から同じ期間を返す。取り込んだCSVの更新時刻・サイズを
+    期間ファイルに記録し、同じ名前で再エクスポート・延長された場合は取り込み直す
+    （重なる足はCSVの値で置き換える）。
+
+    Args:
+        csv_path: datetime 列と open/high/low/close/volume 列を持つCSV
+        instrument: 通貨ペア（省略時はCSV名から推定）
+        granularity: 時間足（省略時はCSV名から推定）
+
+    Returns:
+        CSVと同じ期間の OHLCV DataFrame（UTC DatetimeIndex）
+    """
+    store = store or CandleStore()
+    csv_path = Path(csv_path)
+    if instrument is None or granularity is None:
+        instrument, granularity = parse_mt5_csv_name(csv_path)
+    span_file = store.root / f"{instrument}_{granularity}.{csv_path.stem}.span"
+    stat = csv_path.stat()
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+
+    reimport = False
+    if span_file.exists():
+        fields = [int(x) for x in span_file.read_text().split()]
+        first, last = fields[:2]
+        if tuple(fields[2:]) != fingerprint:
+            # CSV が取り込み後に書き換わった（旧形式の期間ファイルも含む）
+            reimport = True
+        else:
+            arrays = store.read_arrays(instrument, granularity)
+            times = arrays["time"]
+            if len(times) and times[0] <= first and times[-1] >= last:
+                return store.read(
+                    instrument, granularity,
+                    start=pd.Timestamp(first, unit="s", tz="UTC"),
+                    end=pd.Timestamp(last, unit="s", tz="UTC"),
+                )
+
+    df = pd.read_csv(csv_path, parse_dates=["datetime"])
+    df["datetime"] = pd.to_datetime(df["datetime"], utc=True)
+    df = df.set_index("datetime").sort_index().dropna()
+    if df.empty:
+        return df
+
+    times, _ = _to_columns(df)
+    stored_first = store.read_arrays(instrument, granularity)["time"][:1]
+    if reimport and len(stored_first):
+        # 再エクスポート → CSV の値で重なる足を置き換えて書き直す
+        merged = pd.concat([store.read(instrument, granularity), df[list(PRICE_COLUMNS)]])
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        store.write(instrument, granularity, merged)
+    elif len(stored_first) and int(stored_first[0]) > int(times[0]):
+        # CSV の方が古い足を含む → 既存データと結合して書き直す
+        merged = pd.concat([df[list(PRICE_COLUMNS)], store.read(instrument, granularity)])
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        store.write(instrument, granularity, merged)
+    else:
+        store.append(instrument, granularity, df)
+    span_file.write_text(f"{int(times[0])} {int(times[-1])} {fingerprint[0]} {fingerprint[1]}")
+
+    return store.read(instrument, granularity, start=df.index[0], end=df.index[-1])
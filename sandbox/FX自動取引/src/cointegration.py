@@ -0,0 +1,402 @@
+"""
+FX自動取引システム — 共和分スキャナ（ペア分析）
+
+通貨ペアの組ごとに Engle-Granger 共和分検定（定数項あり）をローリングで行い、
+評価時刻 × 組の p値・ヘッジ比率（β）行列を作る。statsmodels の
+coint(y, x, trend="c")（残差 ADF は autolag="aic"）と同じ手順を NumPy だけで行う。
+
+- ヘッジ回帰（y = α + βx）は累積和から全ウィンドウ分の回帰和を差分で求める
+  （ウィンドウごとに OLS を組み直さない）
+- 残差 ADF のラグ選択は、最大ラグの説明変数行列を1回 QR 分解し、
+  全ラグ候補の残差平方和を入れ子の部分和で求める（ラグ数分の再推定をしない）
+- p値は MacKinnon (1994) の近似（N=2, 定数項あり）
+- 組ごとの計算はプロセスプールに分配する（n_workers=1 なら逐次）
+- 結果は to_frame() で1つの DataFrame にでき、FeatureCache でディスクにキャッシュできる
+
+使い方:
+    scan = scan_cointegration(closes, window=pd.Timedelta(days=180), n_workers=4)
+    scan.pvalue.at[ts, ("EUR_USD", "GBP_USD")]
+
+    # 同じ終値・パラメータなら2回目以降はキャッシュから読む
+    scan = cached_scan(closes, window=pd.Timedelta(days=180), n_workers=4)
+"""
+
+import functools
+import itertools
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import COINT_MIN_OBS, COINT_SCAN_CACHE_DIR
+from src.meta_labeling import FeatureCache
+
+logger = logging.getLogger(__name__)
+
+Pair = tuple[str, str]
+
+# MacKinnon (1994) の近似係数（系列数 N=2、定数項あり）。statsmodels.tsa.adfvalues と同じ値
+_TAU_MAX = 0.92
+_TAU_MIN = -18.86
+_TAU_STAR = -2.62
+_TAU_SMALLP = (2.92, 1.5012, 0.039796)
+_TAU_LARGEP = (2.1945, 0.64695, -0.29198, -0.042377)
+
+# ヘッジ回帰の決定係数がこれ以上なら完全共線とみなし ADF 統計量を -inf にする（statsmodels と同じ）
+_COLLINEAR_R2 = 1 - 100 * math.sqrt(np.finfo(float).eps)
+
+_FIELDS: tuple[str, ...] = ("pvalue", "tstat", "beta", "alpha", "resid_std", "nobs")
+
+
+# ------------------------------------------------------------------
+# 検定
+# ------------------------------------------------------------------
+
+
+def mackinnon_pvalue(tstat: float) -> float:
+    """Engle-Granger（2系列・定数項あり）の ADF 統計量に対する MacKinnon 近似 p値"""
+    if tstat > _TAU_MAX:
+        return 1.0
+    if tstat < _TAU_MIN:
+        return 0.0
+    coef = _TAU_SMALLP if tstat <= _TAU_STAR else _TAU_LARGEP
+    z = sum(c * tstat ** k for k, c in enumerate(coef))
+    return 0.5 * math.erfc(-z / math.sqrt(2.0))
+
+
+def _lagged_design(x: np.ndarray, xdiff: np.ndarray, lags: int) -> tuple[np.ndarray, np.ndarray]:
+    """ADF 回帰の (説明変数行列, 被説明変数)。列は [1期前の水準, Δx の1..lags期ラグ]。"""
+    nobs = len(xdiff) - lags
+    design = np.empty((nobs, lags + 1))
+    design[:, 0] = x[-nobs - 1:-1]
+    for k in range(1, lags + 1):
+        design[:, k] = xdiff[lags - k:len(xdiff) - k]
+    return design, xdiff[-nobs:]
+
+
+def adf_tstat(x: np.ndarray) -> float:
+    """
+    定数項なし ADF 統計量（ラグは AIC で選択）。
+
+    statsmodels の adfuller(x, autolag="aic", regression="n") の統計量と一致する。
+
+    Raises:
+        ValueError: x が定数、または短すぎてラグを取れない場合
+    """
+    x = np.asarray(x, dtype=float)
+    if x.max() == x.min():
+        raise ValueError("系列が定数のため ADF 検定できません")
+    nobs = len(x)
+    maxlag = min(nobs // 2 - 1, int(math.ceil(12.0 * (nobs / 100.0) ** 0.25)))
+    if maxlag < 0:
+        raise ValueError(f"ADF 検定には短すぎる系列です: {nobs}")
+    xdiff = np.diff(x)
+
+    # 全ラグ候補を同じ標本で比べる: 最大ラグの行列を1回 QR 分解し、先頭 k 列の残差平方和を得る
+    design, target = _lagged_design(x, xdiff, maxlag)
+    q, _ = np.linalg.qr(design)
+    projected = q.T @ target
+    ssr_full = float(np.sum((target - q @ projected) ** 2))
+    tail = np.cumsum((projected ** 2)[::-1])[::-1]          # tail[k] = Σ_{j>=k} projected_j²
+    ssr = ssr_full + np.r_[tail[1:], 0.0]                   # 先頭 k+1 列で回帰した残差平方和
+    n = len(target)
+    columns = np.arange(1, maxlag + 2)
+    with np.errstate(divide="ignore"):
+        aic = n * np.log(ssr / n) + 2 * columns
+    best = int(np.argmin(aic))                              # 同値なら小さいラグ（statsmodels と同じ）
+
+    design, target = _lagged_design(x, xdiff, best)
+    q, r = np.linalg.qr(design)
+    coef = np.linalg.solve(r, q.T @ target)
+    resid = target - design @ coef
+    dof = len(target) - design.shape[1]
+    r_inv = np.linalg.inv(r)
+    se = math.sqrt(float(resid @ resid) / dof * float(r_inv[0] @ r_inv[0]))
+    return float(coef[0] / se)
+
+
+@dataclass
+class EngleGrangerResult:
+    """1ウィンドウ分の Engle-Granger 検定結果"""
+
+    pvalue: float
+    tstat: float
+    beta: float        # ヘッジ比率（y = α + βx）
+    alpha: float
+    resid_std: float   # ヘッジ回帰の残差標準偏差（自由度 n-2）
+    nobs: int
+
+
+def _residual_test(y: np.ndarray, x: np.ndarray, alpha: float, beta: float, r2: float) -> float:
+    """ヘッジ回帰の残差に ADF をかけた統計量（完全共線なら -inf）"""
+    if r2 >= _COLLINEAR_R2:
+        return -math.inf
+    return adf_tstat(y - (alpha + beta * x))
+
+
+def engle_granger(y: np.ndarray, x: np.ndarray) -> EngleGrangerResult:
+    """
+    y と x の Engle-Granger 共和分検定（定数項あり）。
+
+    検定できない場合（定数系列・短すぎる系列）は p値・統計量が NaN の結果を返す。
+    """
+    y = np.asarray(y, dtype=float)
+    x = np.asarray(x, dtype=float)
+    starts, ends = np.array([0]), np.array([len(y)])
+    return _scan_windows(y, x, starts, ends, min_obs=3)[0]
+
+
+# ------------------------------------------------------------------
+# ローリング
+# ------------------------------------------------------------------
+
+
+def _rolling_regression(
+    y: np.ndarray, x: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    各ウィンドウ [starts, ends) の y = α + βx の (α, β, 残差平方和, 決定係数)。
+
+    累積和の差分で回帰和を求める。桁落ちを抑えるため先頭値からの差で計算する。
+    """
+    x0, y0 = x[0], y[0]
+    xc, yc = x - x0, y - y0
+
+    def window_sum(values: np.ndarray) -> np.ndarray:
+        prefix = np.r_[0.0, np.cumsum(values)]
+        return prefix[ends] - prefix[starts]
+
+    n = (ends - starts).astype(float)
+    sx, sy = window_sum(xc), window_sum(yc)
+    sxx = window_sum(xc * xc) - sx * sx / n
+    sxy = window_sum(xc * yc) - sx * sy / n
+    syy = window_sum(yc * yc) - sy * sy / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = sxy / sxx
+        alpha = y0 + sy / n - beta * (x0 + sx / n)
+        ssr = np.maximum(syy - beta * sxy, 0.0)
+        r2 = 1.0 - ssr / syy
+    return alpha, beta, ssr, r2
+
+
+def _scan_windows(
+    y: np.ndarray, x: np.ndarray, starts: np.ndarray, ends: np.ndarray, min_obs: int,
+) -> list[EngleGrangerResult]:
+    """各ウィンドウの Engle-Granger 検定。min_obs 本未満のウィンドウは NaN。"""
+    alpha, beta, ssr, r2 = _rolling_regression(y, x, starts, ends)
+    results = []
+    for k, (start, end) in enumerate(zip(starts, ends)):
+        nobs = int(end - start)
+        if nobs < min_obs or not np.isfinite(beta[k]):
+            results.append(EngleGrangerResult(np.nan, np.nan, np.nan, np.nan, np.nan, nobs))
+            continue
+        resid_std = math.sqrt(ssr[k] / (nobs - 2)) if nobs > 2 else np.nan
+        try:
+            tstat = _residual_test(y[start:end], x[start:end], alpha[k], beta[k], r2[k])
+        except (ValueError, np.linalg.LinAlgError):
+            results.append(EngleGrangerResult(np.nan, np.nan, np.nan, np.nan, resid_std, nobs))
+            continue
+        results.append(EngleGrangerResult(
+            mackinnon_pvalue(tstat), tstat, float(beta[k]), float(alpha[k]), resid_std, nobs,
+        ))
+    return results
+
+
+def window_bounds(
+    index: pd.DatetimeIndex,
+    window: Union[pd.Timedelta, int],
+    every: int = 1,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    評価行と各ウィンドウの [start, end) 行番号。
+
+    window が Timedelta なら [評価時刻 - window, 評価時刻]（両端含む、.loc のスライスと同じ）、
+    整数なら評価行までの直近 window 行。
+    """
+    evals = np.arange(len(index))[::-1][::every][::-1]
+    ends = evals + 1
+    if isinstance(window, (int, np.integer)):
+        starts = np.maximum(ends - int(window), 0)
+    else:
+        starts = index.searchsorted(index[evals] - pd.Timedelta(window), side="left")
+    return evals, np.asarray(starts), ends
+
+
+# ------------------------------------------------------------------
+# スキャン結果
+# ------------------------------------------------------------------
+
+
+@dataclass
+class CointegrationScan:
+    """
+    scan_cointegration の結果
+
+    各 DataFrame は index = 評価時刻、columns = (pair_a, pair_b) の MultiIndex。
+    pair_a を被説明変数（y）、pair_b を説明変数（x）とする。
+    nobs が min_obs 未満の評価時刻は他の値が NaN。
+    """
+
+    pvalue: pd.DataFrame
+    tstat: pd.DataFrame
+    beta: pd.DataFrame
+    alpha: pd.DataFrame
+    resid_std: pd.DataFrame
+    nobs: pd.DataFrame
+
+    def to_frame(self) -> pd.DataFrame:
+        """(項目, pair_a, pair_b) の3段列を持つ1つの DataFrame にする（キャッシュ保存用）。"""
+        return pd.concat({name: getattr(self, name) for name in _FIELDS}, axis=1)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "CointegrationScan":
+        return cls(**{name: frame[name] for name in _FIELDS})
+
+    @property
+    def pairs(self) -> list[Pair]:
+        return list(self.pvalue.columns)
+
+
+def cointegration_frame(
+    closes: pd.DataFrame,
+    window: Union[pd.Timedelta, int],
+    pairs: Optional[Sequence[Pair]] = None,
+    every: int = 1,
+    min_obs: int = COINT_MIN_OBS,
+    n_workers: int = 1,
+) -> pd.DataFrame:
+    """scan_cointegration(...).to_frame()（FeatureCache の builder 用）"""
+    return scan_cointegration(
+        closes, window, pairs=pairs, every=every, min_obs=min_obs, n_workers=n_workers,
+    ).to_frame()
+
+
+# ------------------------------------------------------------------
+# ワーカー
+# ------------------------------------------------------------------
+
+# ワーカープロセスごとに1回だけ受け取る終値行列とウィンドウ
+_worker_closes: Optional[dict[str, np.ndarray]] = None
+_worker_bounds: Optional[tuple[np.ndarray, np.ndarray, int]] = None
+
+
+def _init_scan_worker(
+    closes: dict[str, np.ndarray], starts: np.ndarray, ends: np.ndarray, min_obs: int,
+) -> None:
+    """ワーカー初期化: 終値とウィンドウを保持する。"""
+    global _worker_closes, _worker_bounds
+    _worker_closes = closes
+    _worker_bounds = (starts, ends, min_obs)
+
+
+def _scan_pair_in_worker(pair: Pair) -> np.ndarray:
+    starts, ends, min_obs = _worker_bounds
+    return _scan_pair(_worker_closes[pair[0]], _worker_closes[pair[1]], starts, ends, min_obs)
+
+
+def _scan_pair(
+    y: np.ndarray, x: np.ndarray, starts: np.ndarray, ends: np.ndarray, min_obs: int,
+) -> np.ndarray:
+    """1組分を (ウィンドウ数, 項目数) の配列で返す（列順は _FIELDS）。"""
+    results = _scan_windows(y, x, starts, ends, min_obs)
+    return np.array([[getattr(r, name) for name in _FIELDS] for r in results], dtype=float)
+
+
+# ------------------------------------------------------------------
+# スキャン本体
+# ------------------------------------------------------------------
+
+
+def scan_cointegration(
+    closes: pd.DataFrame,
+    window: Union[pd.Timedelta, int],
+    pairs: Optional[Sequence[Pair]] = None,
+    every: int = 1,
+    min_obs: int = COINT_MIN_OBS,
+    n_workers: int = 1,
+) -> CointegrationScan:
+    """
+    全組のローリング Engle-Granger 検定を行う。
+
+    Args:
+        closes: 列 = 通貨ペア、index = 共通の時刻（欠損なし）の終値行列
+        window: 検定ウィンドウ（Timedelta なら期間、整数なら本数）
+        pairs: 検定する (y, x) の組。None なら列の全組合せ（列順で前が y）
+        every: 評価する行の間隔（最終行から数える）
+        min_obs: これより短いウィンドウは検定しない
+        n_workers: ワーカープロセス数（1 なら逐次実行）
+
+    Returns:
+        CointegrationScan
+
+    Raises:
+        ValueError: closes に欠損がある、または pairs に closes に無い列がある場合
+    """
+    if closes.isna().any().any():
+        raise ValueError("終値行列に欠損があります（共通の時刻に揃えてください）")
+    if pairs is None:
+        pairs = list(itertools.combinations(closes.columns, 2))
+    pairs = [tuple(p) for p in pairs]
+    missing = {name for pair in pairs for name in pair} - set(closes.columns)
+    if missing:
+        raise ValueError(f"終値行列に無い通貨ペア: {sorted(missing)}")
+    if n_workers < 1:
+        raise ValueError(f"n_workers は1以上が必要です: {n_workers}")
+
+    evals, starts, ends = window_bounds(closes.index, window, every)
+    arrays = {name: closes[name].to_numpy(dtype=float) for name in closes.columns}
+
+    if n_workers == 1 or len(pairs) < 2:
+        per_pair = [_scan_pair(arrays[a], arrays[b], starts, ends, min_obs) for a, b in pairs]
+    else:
+        workers = min(n_workers, len(pairs))
+        logger.info("%d 組 × %d 時点の共和分検定を %d プロセスで実行します", len(pairs), len(evals), workers)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_scan_worker,
+            initargs=(arrays, starts, ends, min_obs),
+        ) as pool:
+            per_pair = list(pool.map(_scan_pair_in_worker, pairs))
+
+    index = closes.index[evals]
+    columns = pd.MultiIndex.from_tuples(pairs, names=["pair_a", "pair_b"])
+    stacked = np.stack(per_pair, axis=2) if per_pair else np.empty((len(evals), len(_FIELDS), 0))
+    frames = {
+        name: pd.DataFrame(stacked[:, k, :], index=index, columns=columns)
+        for k, name in enumerate(_FIELDS)
+    }
+    frames["nobs"] = frames["nobs"].astype(np.int64)
+    return CointegrationScan(**frames)
+
+
+def cached_scan(
+    closes: pd.DataFrame,
+    window: Union[pd.Timedelta, int],
+    pairs: Optional[Sequence[Pair]] = None,
+    every: int = 1,
+    min_obs: int = COINT_MIN_OBS,
+    n_workers: int = 1,
+    cache: Optional[FeatureCache] = None,
+) -> CointegrationScan:
+    """
+    scan_cointegration() の結果を終値の版・パラメータごとにキャッシュして返す。
+
+    Args:
+        cache: 使うキャッシュ（None なら COINT_SCAN_CACHE_DIR に保存する FeatureCache）
+        その他: scan_cointegration() と同じ（n_workers はキャッシュキーに含めない）
+    """
+    if cache is None:
+        cache = FeatureCache(cache_dir=COINT_SCAN_CACHE_DIR)
+    builder = functools.partial(cointegration_frame, n_workers=n_workers)
+    frame = cache.get_or_build(
+        closes, builder,
+        window=window,
+        pairs=None if pairs is None else [tuple(p) for p in pairs],
+        every=every,
+        min_obs=min_obs,
+    )
+    return CointegrationScan.from_frame(frame)
@@ -62,6 +62,10 @@ CORRELATION_GROUPS: dict[str, list[str]] = {
     "USD_GROUP": ["USD_JPY", "EUR_USD", "AUD_USD", "GBP_USD"],
 }
 
+# --- 非JPYペアの pip 値に使う 決済通貨→JPY レート（src/fx_rates.py） ---
+# XXX_JPY のループが取得した価格で更新し、この秒数を超えたら古いとみなしてブローカーから取り直す
+FX_RATE_TTL_SEC: float = 300.0
+
 
 # ============================================================
 # 戦略パラメータ（doc 04 セクション5.1）
@@ -108,6 +112,8 @@ BEAR_SEVERITY_THRESHOLD: float = 0.4     # この値以上でpenalty適用
 BEAR_MAX_PENALTY: float = 0.5            # 最大減点（倍率0.5まで）
 BEAR_DIVERGENCE_LOOKBACK: int = 5        # ダイバージェンス検出の振り返り期間
 BEAR_SR_ATR_MULTIPLIER: float = 1.5      # サポレジ接近判定のATR倍率
+# 上位足矛盾チェックに使う上位足（例: "H4"）。空なら取引足のMA長期で判定（従来どおり）
+BEAR_HTF_GRANULARITY: str = ""
 
 # AIAdvisor（Phase 3 追加）
 # STAGE3(2026-04-21): 本来値に復帰 — これがAIで方針変える本命機能
@@ -131,6 +137,79 @@ DEFAULT_INSTRUMENTS: list[str] = [
 ]
 
 
+# ============================================================
+# パフォーマンス（インクリメンタル計算・スケジューリング）
+# ============================================================
+
+# 指標キャッシュをストリーミングエンジン（src/indicator_stream.py）で
+# 差分更新する（データ窓の先頭が進んだら pandas_ta 全再計算で再シードするため、
+# 値は全再計算と丸め誤差以内で一致）。False で毎イテレーション全再計算に戻す。
+INDICATOR_STREAM_ENABLED: bool = True
+# ストリーミングエンジンが保持する確定足の指標履歴本数（取得本数300本を覆う長さ）
+INDICATOR_STREAM_HISTORY: int = 1000
+
+# TradingLoop のスケジューラ方式
+# - "interval": check_interval_sec ごとに全パイプラインを実行（従来方式）
+# - "bar_close": 足確定時刻に合わせて起床し、新しい足が出たときだけ
+#   シグナルパイプラインを実行。足の途中はポジション同期とスプレッド更新のみ
+SCHEDULER_MODE: str = "bar_close"
+BAR_CLOSE_GRACE_SEC: float = 1.0       # 足確定からデータ取得までの待ち（ブローカー側の足生成待ち）
+BAR_CLOSE_RETRY_SEC: float = 1.0       # 新しい足が未反映のときの再取得間隔
+BAR_CLOSE_MAX_WAIT_SEC: float = 30.0   # 新しい足を待つ上限。超えたら次の足まで軽量tickに戻る
+# 足境界のUTCからのずれ（秒）。H4/D1 をブローカーのサーバー時刻で区切る場合に設定
+# （例: サーバー時刻 UTC+2 なら -7200）。M15/H1 は 0 のままでよい
+BAR_ALIGN_OFFSET_SEC: int = 0
+
+# 取引足から組み立てる上位足（src/bar_aggregator.py）。取引足より長いものだけ使う
+MTF_AGGREGATOR_TIMEFRAMES: tuple[str, ...] = ("H1", "H4", "D1")
+MTF_AGGREGATOR_HISTORY: int = 500      # 上位足ごとに保持する確定足の本数
+
+# マルチペアの実行方式
+# - "orchestrator": 1本のスケジューラで全ペアを回し、ポジション・口座情報の取得を
+#   tick ごとに1回へまとめる（src/orchestrator.py）
+# - "threads": ペアごとに TradingLoop スレッドを起動（従来方式）
+MULTI_PAIR_RUNNER: str = "orchestrator"
+ORCHESTRATOR_MAX_WORKERS: int = 4       # ペア別シグナル処理のワーカースレッド数
+ORCHESTRATOR_COALESCE_SEC: float = 0.5  # 起床予定がこの秒数以内のペアは同じ tick にまとめる
+
+# パイプライン・レイテンシ計測（src/latency.py）
+LATENCY_WINDOW: int = 500                  # ステージごとに保持する直近サンプル数（p50/p95/max の母数）
+LATENCY_LOG_INTERVAL_SEC: float = 3600.0   # ペアごとのレイテンシ・サマリをログ出力する間隔
+
+# バックテスト結果キャッシュ（DB の backtest_cache テーブル）
+# キー = データ区間・戦略ソース・パラメータ・実行条件のハッシュ。一致すれば再計算しない
+BACKTEST_CACHE_ENABLED: bool = True
+BACKTEST_CACHE_MAX_AGE_DAYS: int = 30      # これより古いエントリは削除
+BACKTEST_CACHE_MAX_ENTRIES: int = 20000    # 超えた分は最終利用が古い順に削除
+# キャッシュキーの版数。約定モデル等、戦略外のロジックを変えたら上げて全無効化する
+BACKTEST_CACHE_VERSION: int = 1
+
+# ヒストリカル・リプレイ（src/replay.py: ライブの TradingLoop を過去データで実行）
+REPLAY_WARMUP_BARS: int = 300              # 売買開始前に必要な確定足（get_prices の取得本数）
+# 履歴に {quote}_JPY が無い場合の円換算レート（リプレイ期間の概算値）
+REPLAY_QUOTE_TO_JPY: dict[str, float] = {
+    "USD": 150.0,
+    "EUR": 160.0,
+    "GBP": 190.0,
+    "AUD": 100.0,
+    "NZD": 90.0,
+    "CHF": 170.0,
+    "CAD": 110.0,
+}
+
+# メタラベリング（src/meta_labeling.py: トリプルバリア・ラベルと二次モデルの特徴量）
+TRIPLE_BARRIER_TP_MULT: float = 2.0        # 利確バリア = エントリー ± 倍率 × ATR（シグナル方向）
+TRIPLE_BARRIER_SL_MULT: float = 1.0        # 損切りバリア = エントリー ∓ 倍率 × ATR
+TRIPLE_BARRIER_MAX_HOLD: int = 24          # 時間バリア（エントリー足から数えた本数）
+META_FEATURE_CACHE_DIR: Path = _project_root / "data" / "meta_features"
+# 特徴量キャッシュキーの版数。特徴量の計算式を変えたら上げて全無効化する
+META_FEATURE_CACHE_VERSION: int = 1
+
+# ペア分析（src/cointegration.py: ローリング Engle-Granger 共和分スキャン）
+COINT_MIN_OBS: int = 30                    # これより短いウィンドウは検定しない
+COINT_SCAN_CACHE_DIR: Path = _project_root / "data" / "coint_scans"
+
+
 # ============================================================
 # API設定（CLAUDE.md リトライ・タイムアウト規約準拠）
 # ============================================================
@@ -161,6 +240,14 @@ SPREAD_EMA_ALPHA: float = 0.1
 # 1行サマリの可読性を保つ。40字 = 1ペア trace が概ね 200字以内に収まる目安。
 PIPELINE_TRACE_DETAIL_MAXLEN: int = 40
 
+# 構造化パイプライン trace（src/pipeline_trace.py）: イテレーションごとの判定・スコア・倍率・
+# ステージ別所要時間を日別の列指向ファイルへ追記する。1行サマリログは人が読む用に残す
+PIPELINE_TRACE_ENABLED: bool = True
+PIPELINE_TRACE_DIR: Path = _project_root / "data" / "pipeline_trace"
+PIPELINE_TRACE_FLUSH_SEC: float = 10.0       # 書き込みスレッドのフラッシュ間隔（秒）
+PIPELINE_TRACE_FLUSH_ROWS: int = 512         # この件数たまったら間隔を待たずにフラッシュ
+PIPELINE_TRACE_RETENTION_DAYS: int = 30      # これより古い日のファイルを削除（0以下で無期限）
+
 
 # ============================================================
 # MT5設定（外為ファイネスト用）
@@ -184,6 +271,12 @@ ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
 # トレード事後分析（L1）
 POSTMORTEM_ENABLED: bool = True           # 事後分析の有効/無効
 POSTMORTEM_MODEL_ID: str = AI_MODEL_ID    # 事後分析に使用するモデル（Opus）
+POSTMORTEM_WORKERS: int = 2              # 事後分析のワーカースレッド数（同時API呼び出し数の上限）
+POSTMORTEM_QUEUE_MAX: int = 256           # メモリ上に保持する待ちジョブ数（超過分は DB のキューから後で補充）
+POSTMORTEM_BATCH_SIZE: int = 1            # 1回のAPI呼び出しにまとめるトレード数（1 = まとめない）
+POSTMORTEM_MAX_ATTEMPTS: int = 5          # レート制限で再試行する上限回数
+POSTMORTEM_BACKOFF_BASE_SEC: float = 5.0  # レート制限時の待機（Retry-After が無い場合、連続回数で倍化）
+POSTMORTEM_BACKOFF_MAX_SEC: float = 300.0
 
 # SignalCoordinator（クロスペア相関判定）：60秒ループ中で5秒タイムアウト制約のため
 # レイテンシ優先で Sonnet 4.6 を使用。深い推論は不要な高速判定。
@@ -196,6 +289,25 @@ COORDINATOR_MODEL_ID: str = "claude-sonnet-4-6"
 
 DB_PATH: Path = _project_root / "data" / "fx_trading.db"
 
+# DB 書き込み（src/db_writer.py）: DBファイルごとに1本の書き込みスレッドでまとめてコミット
+DB_WRITER_BATCH_SIZE: int = 256        # 1回のコミットにまとめる最大書き込み件数
+DB_WRITER_BUSY_TIMEOUT_SEC: float = 5.0  # ロック待ちの上限（他プロセスとの競合時）
+DB_WRITER_FLUSH_TIMEOUT_SEC: float = 10.0  # 停止時に未コミット分を書き切るまで待つ上限
+DB_READER_POOL_SIZE: int = 4           # 読み取り用コネクションのプール上限
+
+# ローソク足ストア（src/candle_store.py）: (通貨ペア, 時間足) ごとの列指向バイナリ
+CANDLE_STORE_ENABLED: bool = True
+CANDLE_STORE_DIR: Path = _project_root / "data" / "candles"
+# 差分取得で MT5 に要求する本数。保存済み最終足がこの範囲に含まれなければ全量取得に戻る
+CANDLE_DELTA_FETCH_BARS: int = 32
+
+# 決済履歴（MT5 の deal 履歴）キャッシュ: sync_with_broker の決済済みポジション復元用
+DEAL_HISTORY_LOOKBACK_DAYS: int = 14        # 初回に取得する期間（ポジションはこの期間内に決済される想定）
+DEAL_HISTORY_REFETCH_OVERLAP_SEC: int = 86400  # 差分取得で前回取得時刻から遡る秒数（サーバー時刻のずれ吸収）
+
+# 取引ログのイベント索引（src/log_index.py）: trading.log* から取り込んだシグナル・AI判定・約定など
+LOG_INDEX_DB_PATH: Path = _project_root / "data" / "log_index.db"
+
 
 # ============================================================
 # Telegram Bot 設定
@@ -215,6 +327,17 @@ SLACK_ALERTS_WEBHOOK_URL: str = os.getenv("SLACK_ALERTS_WEBHOOK_URL", "")
 SLACK_ENABLED: bool = bool(SLACK_WEBHOOK_URL)
 
 
+# ============================================================
+# 通知の集約・レート制限
+# ============================================================
+
+NOTIFY_COALESCE_WINDOW_SEC: float = 5.0  # シグナル・エラー通知を1通のまとめに集約する間隔（通知先ごと）
+NOTIFY_RATE_PER_SEC: float = 0.5         # NotifierGroup の通知先ごとの送信レート（トークン補充/秒）
+NOTIFY_BURST: int = 5                    # 同上のバースト上限（トークン容量）
+TELEGRAM_SEND_RATE_PER_SEC: float = 1.0  # Telegram 送信スレッドのレート（同一チャット 1通/秒 の推奨値）
+TELEGRAM_SEND_BURST: int = 3
+
+
 # ============================================================
 # バリデーション
 # ============================================================
@@ -14,8 +14,9 @@ Phase 3 追加。
 
 import logging
 from dataclasses import dataclass, field
-from typing import Any, Optional
+from typing import Any, Optional, Sequence
 
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 
@@ -26,6 +27,7 @@ from src.config import (
     MFI_PERIOD,
     RSI_PERIOD,
 )
+from src.indicator_cache import min_input_rows
 from src.strategy.base import Signal
 
 logger = logging.getLogger(__name__)
@@ -42,6 +44,24 @@ class ConvictionResult:
     should_trade: bool  # スコア >= MIN_CONVICTION_SCORE
 
 
+@dataclass
+class ConvictionBatchResult:
+    """
+    score_batch の結果（signal_indices と同じ並びの配列）
+
+    i 番目の要素は data.iloc[:signal_indices[i] + 1] を score() に渡した結果と一致する。
+    """
+
+    signal_indices: np.ndarray
+    score: np.ndarray                     # int 1-10
+    position_size_multiplier: np.ndarray
+    should_trade: np.ndarray              # bool
+    components: dict[str, np.ndarray]     # "trend" / "adx" / "rsi" / "mfi" / "regime" → 0-2
+
+    def __len__(self) -> int:
+        return len(self.signal_indices)
+
+
 class ConvictionScorer:
     """
     テクニカル指標の合流度合いから確信度スコアを計算する。
@@ -177,6 +197,163 @@ class ConvictionScorer:
             should_trade=should_trade,
         )
 
+    def score_batch(
+        self,
+        data: pd.DataFrame,
+        signal_indices: Sequence[int],
+        signals: Signal | Sequence[Signal],
+        regimes: Optional[Sequence[Any]] = None,
+    ) -> ConvictionBatchResult:
+        """
+        複数シグナルの確信度スコアをまとめて計算する（バックテスト・分析用）。
+
+        MA長期・ADX・RSI・MFI を全期間で1回だけ計算し、各シグナルの足の値で
+        score() と同じ配点を配列演算で行う。ログは件数の集計のみ出す。
+
+        Args:
+            data: OHLCV形式のDataFrame（high, low, close, volume列が必要）
+            signal_indices: シグナルが出た足の位置（data の行番号）
+            signals: 各シグナルの方向（1つだけ渡すと全件に適用）
+            regimes: 各シグナルのレジーム（RegimeInfo / RegimeType / その文字列。
+                     RegimeSeries.regime[signal_indices] をそのまま渡せる）。None なら全件1点
+
+        Returns:
+            ConvictionBatchResult: signal_indices と同じ並びのスコア・倍率配列
+        """
+        idx = np.asarray(signal_indices, dtype=int)
+        n = len(idx)
+        if isinstance(signals, Signal):
+            signals = [signals] * n
+        if len(signals) != n:
+            raise ValueError(
+                f"signals の件数（{len(signals)}）が signal_indices（{n}）と一致しません"
+            )
+        is_buy = np.array([s == Signal.BUY for s in signals], dtype=bool)
+        is_hold = np.array([s == Signal.HOLD for s in signals], dtype=bool)
+        close = data["close"]
+        # pandas_ta は入力が短いと None を返す（score() では計算不能扱い）。
+        # 全期間の系列ではウォームアップ中も値が出るため、data.iloc[:i+1] で
+        # None になる足（min_input_rows で実際の閾値を調べる）は除く
+        rows = idx + 1
+
+        # --- 1. トレンド一致 ---
+        ma_long = ta.sma(close, length=MA_LONG_PERIOD)
+        if ma_long is None:
+            trend = np.zeros(n, dtype=int)
+        else:
+            ma = ma_long.to_numpy(dtype=float)
+            current = ma[idx]
+            prev = np.where(idx >= 1, ma[np.maximum(idx - 1, 0)], np.nan)
+            with np.errstate(invalid="ignore"):
+                slope = current - prev
+                flat = np.abs(current) * self._FLAT_SLOPE_REL
+                aligned = np.where(is_buy, slope > flat, slope < -flat)
+                is_flat = np.abs(slope) <= flat
+            trend = np.select([aligned, is_flat], [2, 1], default=0)
+            trend[np.isnan(slope)] = 0
+            trend[rows < min_input_rows(
+                lambda d: ta.sma(d["close"], length=MA_LONG_PERIOD), data
+            )] = 0
+
+        # --- 2. ADX強度 ---
+        adx_df = ta.adx(data["high"], data["low"], close, length=ADX_PERIOD)
+        adx_col = f"ADX_{ADX_PERIOD}"
+        if adx_df is None or adx_col not in adx_df.columns:
+            adx_score = np.zeros(n, dtype=int)
+        else:
+            adx = adx_df[adx_col].to_numpy(dtype=float)[idx]
+            adx_score = np.select([adx >= 30, adx >= 25], [2, 1], default=0)
+            adx_score[rows < min_input_rows(
+                lambda d: ta.adx(d["high"], d["low"], d["close"], length=ADX_PERIOD), data
+            )] = 0
+
+        # --- 3. RSI位置 ---
+        rsi_series = ta.rsi(close, length=RSI_PERIOD)
+        if rsi_series is None:
+            rsi_score = np.zeros(n, dtype=int)
+        else:
+            rsi = rsi_series.to_numpy(dtype=float)[idx]
+            rsi_score = np.where(
+                is_buy,
+                np.select([(25 <= rsi) & (rsi <= 50), (20 <= rsi) & (rsi <= 60)], [2, 1], 0),
+                np.select([(50 <= rsi) & (rsi <= 75), (40 <= rsi) & (rsi <= 80)], [2, 1], 0),
+            )
+            rsi_score[rows < min_input_rows(
+                lambda d: ta.rsi(d["close"], length=RSI_PERIOD), data
+            )] = 0
+
+        # --- 4. MFI確認（volume列が無い・計算不能の足は1点） ---
+        mfi_series = None
+        if "volume" in data.columns:
+            mfi_series = ta.mfi(
+                data["high"], data["low"], close, data["volume"], length=MFI_PERIOD
+            )
+        if mfi_series is None:
+            mfi_score = np.ones(n, dtype=int)
+        else:
+            mfi = mfi_series.to_numpy(dtype=float)[idx]
+            mfi_score = np.where(
+                is_buy,
+                np.select([mfi < 40, mfi <= 60], [2, 1], 0),
+                np.select([mfi > 60, mfi >= 40], [2, 1], 0),
+            )
+            mfi_rows = min_input_rows(
+                lambda d: ta.mfi(d["high"], d["low"], d["close"], d["volume"], length=MFI_PERIOD),
+                data,
+            )
+            mfi_score[np.isnan(mfi) | (rows < mfi_rows)] = 1
+
+        # --- 5. レジーム ---
+        if regimes is None:
+            regime_score = np.ones(n, dtype=int)
+        else:
+            if len(regimes) != n:
+                raise ValueError(
+                    f"regimes の件数（{len(regimes)}）が signal_indices（{n}）と一致しません"
+                )
+            regime_score = np.array(
+                [
+                    self._score_regime_value(getattr(r, "regime", r))
+                    for r in regimes
+                ],
+                dtype=int,
+            )
+
+        components = {
+            "trend": trend.astype(int),
+            "adx": adx_score.astype(int),
+            "rsi": rsi_score.astype(int),
+            "mfi": mfi_score.astype(int),
+            "regime": regime_score,
+        }
+        score = np.clip(sum(components.values()), 1, 10)
+        multiplier = np.select(
+            [score >= 8, score >= 7, score >= 5, score >= 4],
+            [1.5, 1.0, 0.5, 0.3],
+            default=0.0,
+        )
+        should_trade = score >= MIN_CONVICTION_SCORE
+
+        # HOLD は score() と同じく 1点・倍率0・見送り
+        if is_hold.any():
+            for values in components.values():
+                values[is_hold] = 0
+            score[is_hold] = 1
+            multiplier[is_hold] = 0.0
+            should_trade[is_hold] = False
+
+        logger.info(
+            "確信度スコア（一括）: %d件, TRADE %d件, 平均スコア %.2f",
+            n, int(should_trade.sum()), float(score.mean()) if n else 0.0,
+        )
+        return ConvictionBatchResult(
+            signal_indices=idx,
+            score=score,
+            position_size_multiplier=multiplier,
+            should_trade=should_trade,
+            components=components,
+        )
+
     # 監査P0-#2: 「横ばい」判定の相対閾値（価格スケール非依存）。
     # 旧 1e-8 は USDJPY=156 で相対 6e-9 % 未満を要求しており、float精度的に
     # 実現不可能 → 「横ばい(=1点)」が永遠に出ず、is_buy 分岐が二択化していた。
@@ -333,7 +510,11 @@ class ConvictionScorer:
             return 1
 
         # RegimeInfo.regime 属性を参照
-        regime_value = getattr(regime, "regime", None)
+        return self._score_regime_value(getattr(regime, "regime", None))
+
+    @staticmethod
+    def _score_regime_value(regime_value: Any) -> int:
+        """RegimeType / その value・name 文字列からレジームスコアを返す。"""
         if regime_value is None:
             return 1
 
@@ -0,0 +1,324 @@
+"""
+FX自動取引システム — SQLite 非同期書き込み
+
+trades / kill_switch_log / trade_snapshots / trade_postmortems / backtest_results への
+書き込みを、DBファイルごとに1本の書き込みスレッドへ集約する。
+
+- 呼び出し側（取引スレッド）はキューに積むだけで、fsync を待たない
+- 書き込みスレッドはキューに溜まった分をまとめて1回でコミットする（グループコミット）
+- 書き込みコネクションは1本を使い回すため、sqlite3 のステートメントキャッシュで
+  プリペアド済みの SQL が再利用される
+- WAL モードで開き、読み取り（reader()）は書き込みをブロックしない
+- flush() で積んだ分のコミット完了を待てる。close_all_writers() は停止時に全件書き切る
+
+使い方:
+    writer = get_writer(db_path)
+    writer.execute("UPDATE trades SET ... WHERE trade_id=?", params,
+                   error_message="ポジション決済のDB記録に失敗")
+    with writer.reader() as conn:
+        rows = conn.execute("SELECT ...").fetchall()
+"""
+
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Union
+
+from src.config import (
+    DB_READER_POOL_SIZE,
+    DB_WRITER_BATCH_SIZE,
+    DB_WRITER_BUSY_TIMEOUT_SEC,
+    DB_WRITER_FLUSH_TIMEOUT_SEC,
+)
+
+logger = logging.getLogger(__name__)
+
+# 書き込みスレッドへの停止指示
+_STOP = object()
+
+
+class _Job:
+    """書き込みキューの1要素（SQL 1文、または書き込みコネクションを受け取る関数）"""
+
+    __slots__ = ("sql", "params", "fn", "error_message")
+
+    def __init__(
+        self,
+        sql: Optional[str],
+        params: tuple,
+        fn: Optional[Callable[[sqlite3.Connection], None]],
+        error_message: str,
+    ) -> None:
+        self.sql = sql
+        self.params = params
+        self.fn = fn
+        self.error_message = error_message
+
+    def run(self, conn: sqlite3.Connection) -> None:
+        if self.fn is not None:
+            self.fn(conn)
+        else:
+            conn.execute(self.sql, self.params)
+
+
+class DbWriter:
+    """
+    1つの SQLite ファイルへの書き込みを専用スレッドで直列化する。
+
+    書き込みの失敗は呼び出し元へ返らず、error_message とともに warning ログに残す
+    （従来の同期書き込みでも失敗はログのみで取引は継続していた）。
+    close() 後に積まれた書き込みは呼び出しスレッドで同期的に実行する。
+    """
+
+    def __init__(
+        self,
+        db_path: Union[Path, str],
+        batch_size: int = DB_WRITER_BATCH_SIZE,
+        busy_timeout_sec: float = DB_WRITER_BUSY_TIMEOUT_SEC,
+        reader_pool_size: int = DB_READER_POOL_SIZE,
+    ) -> None:
+        """
+        Args:
+            db_path: SQLite データベースのパス
+            batch_size: 1回のコミットにまとめる最大件数
+            busy_timeout_sec: ロック待ちの上限（秒）
+            reader_pool_size: 読み取りコネクションのプール上限
+
+        Raises:
+            ValueError: batch_size が1未満の場合
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size は1以上である必要があります: {batch_size}")
+        self._db_path = str(db_path)
+        self._batch_size = batch_size
+        self._busy_timeout_sec = busy_timeout_sec
+        self._queue: queue.Queue = queue.Queue()
+        self._readers: queue.LifoQueue = queue.LifoQueue(maxsize=reader_pool_size)
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name=f"db-writer:{Path(self._db_path).name}", daemon=True
+        )
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # 書き込み
+    # ------------------------------------------------------------------
+
+    def execute(
+        self, sql: str, params: tuple = (), error_message: str = "DB書き込みに失敗"
+    ) -> None:
+        """SQL 1文の実行をキューに積む。"""
+        self._submit(_Job(sql, tuple(params), None, error_message))
+
+    def call(
+        self,
+        fn: Callable[[sqlite3.Connection], None],
+        error_message: str = "DB書き込みに失敗",
+    ) -> None:
+        """
+        書き込みスレッドで fn(conn) を実行する。
+
+        lastrowid を使う等、結果に依存する書き込みに使う。
+        fn はキューに積んだ順に、他の書き込みと同じトランザクションで実行される。
+        """
+        self._submit(_Job(None, (), fn, error_message))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        ここまでに積んだ書き込みがコミットされるまで待つ。
+
+        Returns:
+            timeout 内にコミットされれば True
+        """
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = DB_WRITER_FLUSH_TIMEOUT_SEC) -> None:
+        """未コミット分を書き切って書き込みスレッドと読み取りプールを閉じる。"""
+        with self._close_lock:
+            if self._closed:
+                return
+            # 以降の書き込みは同期実行に切り替え、キューに残った分はスレッドが書き切る
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(
+                    "DB書き込みスレッドが %.1f 秒以内に終了しませんでした: %s",
+                    timeout, self._db_path,
+                )
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def pending(self) -> int:
+        """未処理の書き込み件数（概算）"""
+        return self._queue.qsize()
+
+    # ------------------------------------------------------------------
+    # 読み取り
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """プールから読み取りコネクションを借りる（WAL なので書き込みと並行できる）。"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+            try:
+                self._readers.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    # ------------------------------------------------------------------
+    # 内部
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(
+            self._db_path, timeout=self._busy_timeout_sec, check_same_thread=False
+        )
+
+    def _submit(self, job: _Job) -> None:
+        if not self._closed:
+            self._queue.put(job)
+            return
+        # 停止後の書き込み（停止処理と競合した取引スレッド等）は取りこぼさず同期実行
+        with self._sync_lock:
+            conn = self._connect()
+            try:
+                self._commit_batch(conn, [job])
+            finally:
+                conn.close()
+
+    def _run(self) -> None:
+        """書き込みスレッド本体。キューに溜まった分をまとめてコミットする。"""
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error as e:
+            logger.warning("WALモードの設定に失敗: %s (%s)", e, self._db_path)
+
+        stopping = False
+        while not stopping:
+            batch: list[_Job] = []
+            waiters: list[threading.Event] = []
+            item = self._queue.get()
+            while True:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self._batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit_batch(conn, batch)
+            for waiter in waiters:
+                waiter.set()
+
+        # 停止指示より後に積まれた分も書き切る
+        remaining = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not _STOP:
+                remaining.append(item)
+        if remaining:
+            self._commit_batch(conn, remaining)
+        conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: list[_Job]) -> None:
+        """batch を1トランザクションで実行する。失敗した文はログに残して他は確定させる。"""
+        for job in batch:
+            try:
+                job.run(conn)
+            except sqlite3.Error as e:
+                logger.warning("%s: %s", job.error_message, e)
+            except Exception as e:
+                logger.exception("%s: %s", job.error_message, e)
+        try:
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("DBコミットに失敗（%d件）: %s", len(batch), e)
+            conn.rollback()
+
+
+# ----------------------------------------------------------------------
+# DBファイルごとの共有インスタンス
+# ----------------------------------------------------------------------
+
+_writers: dict[str, DbWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def _key(db_path: Union[Path, str]) -> str:
+    if str(db_path) == ":memory:":
+        return ":memory:"
+    return str(Path(db_path).resolve())
+
+
+def get_writer(db_path: Union[Path, str]) -> DbWriter:
+    """
+    db_path の書き込みスレッドを返す（無ければ起動する）。
+
+    同じファイルを指すパスは同じ DbWriter を共有する。
+    close_all_writers() の後に呼ばれた場合は新しく起動する。
+    """
+    key = _key(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer.closed:
+            writer = _writers[key] = DbWriter(db_path)
+        return writer
+
+
+def flush_all_writers(timeout: Optional[float] = None) -> bool:
+    """全 DbWriter の未コミット分を確定させる。全件が timeout 内に終われば True。"""
+    with _writers_lock:
+        writers = list(_writers.values())
+    return all(writer.flush(timeout) for writer in writers)
+
+
+def close_all_writers(timeout: float = DB_WRITER_FLUSH_TIMEOUT_SEC) -> None:
+    """全 DbWriter を書き切ってから閉じる（プロセス停止時に呼ぶ）。"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close(timeout)
+
+
+# スクリプト終了時もキューに残った書き込みを捨てない（デーモンスレッドは終了時に止まるため）
+atexit.register(close_all_writers)
@@ -0,0 +1,117 @@
+"""
+FX自動取引システム — 決済通貨→JPY レートキャッシュ
+
+RiskManager._get_pip_value() が非JPYペア（EUR_USD 等）の pip 値を円換算する際の
+決済通貨→JPY レート（USD→JPY 等）をメモリに保持する。
+
+- XXX_JPY を取引するループが取得済みの価格で更新する（追加のブローカー呼び出しなし）
+- 最終更新から ttl_sec を超えたレートは「古い」とみなし、呼び出し側がブローカーから取り直す
+- 古いレートも捨てずに残し、ブローカー取得失敗時のフォールバックに使う
+- レートの経過秒数を返し、サイジングのログに残す
+"""
+
+import math
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+from src.config import FX_RATE_TTL_SEC
+
+
+class FxRate(NamedTuple):
+    """キャッシュ済みレート"""
+
+    rate: float       # 決済通貨1単位あたりの円
+    age_sec: float    # 最終更新からの経過秒数
+    source: str       # 更新元（"bars": ループの価格 / "broker": 個別取得）
+
+
+def quote_currency_of(instrument: str) -> Optional[str]:
+    """
+    通貨ペアの決済通貨（後半3文字）を返す。
+
+    形式が "XXX_YYY" でなければ None。
+    """
+    parts = instrument.upper().replace(" ", "").split("_")
+    if len(parts) != 2 or len(parts[1]) < 3:
+        return None
+    return parts[1][:3]
+
+
+class FxRateCache:
+    """
+    決済通貨→JPY レートを TTL 付きで保持する。
+
+    複数ペアのループ（スレッド）から更新・参照されるためロックで保護する。
+    """
+
+    def __init__(
+        self,
+        ttl_sec: float = FX_RATE_TTL_SEC,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            ttl_sec: レートを新鮮とみなす秒数
+            clock: 経過時間の計測に使う時計（テスト用に差し替え可能）
+
+        Raises:
+            ValueError: ttl_sec が0以下の場合
+        """
+        if ttl_sec <= 0:
+            raise ValueError(f"ttl_sec は正の値である必要があります: {ttl_sec}")
+        self._ttl_sec = ttl_sec
+        self._clock = clock
+        self._lock = threading.Lock()
+        # {通貨: (レート, 更新時刻, 更新元)}
+        self._rates: dict[str, tuple[float, float, str]] = {}
+
+    def update(self, currency: str, rate: float, source: str = "bars") -> bool:
+        """
+        レートを更新する。0以下・非有限の値は無視する。
+
+        Returns:
+            更新した場合 True
+        """
+        if not (math.isfinite(rate) and rate > 0):
+            return False
+        with self._lock:
+            self._rates[currency.upper()] = (float(rate), self._clock(), source)
+        return True
+
+    def update_from_instrument(self, instrument: str, price: float) -> bool:
+        """
+        XXX_JPY の価格を XXX→JPY レートとして取り込む（それ以外のペアは無視）。
+
+        Returns:
+            更新した場合 True
+        """
+        parts = instrument.upper().split("_")
+        if len(parts) != 2 or parts[1] != "JPY" or len(parts[0]) != 3:
+            return False
+        return self.update(parts[0], price, source="bars")
+
+    def get(self, currency: str) -> Optional[FxRate]:
+        """保持しているレート（古くても返す）。未取得なら None。"""
+        with self._lock:
+            entry = self._rates.get(currency.upper())
+        if entry is None:
+            return None
+        rate, updated_at, source = entry
+        return FxRate(rate, self._clock() - updated_at, source)
+
+    def fresh(self, currency: str) -> Optional[FxRate]:
+        """TTL 内のレートだけを返す。古い・未取得なら None。"""
+        entry = self.get(currency)
+        if entry is None or entry.age_sec > self._ttl_sec:
+            return None
+        return entry
+
+    def snapshot(self) -> dict[str, float]:
+        """{通貨: レート}（古いものを含む）"""
+        with self._lock:
+            return {currency: entry[0] for currency, entry in self._rates.items()}
+
+    @property
+    def ttl_sec(self) -> float:
+        return self._ttl_sec
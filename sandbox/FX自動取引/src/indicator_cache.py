@@ -8,7 +8,7 @@ R1: IndicatorCache（共有指標計算）
 """
 
 import logging
-from typing import Optional
+from typing import Callable, Optional
 
 import pandas as pd
 import pandas_ta as ta
@@ -181,3 +181,26 @@ def compute_indicators(data: pd.DataFrame) -> dict:
         logger.warning("指標キャッシュ: ボリンジャーバンド計算失敗: %s", e)
 
     return cache
+
+
+def min_input_rows(
+    indicator: Callable[[pd.DataFrame], Optional[object]], data: pd.DataFrame
+) -> int:
+    """pandas_ta の指標が値（None 以外）を返す最小の入力本数を求める。
+
+    pandas_ta は入力が短いと None を返し、その閾値はバージョンで異なる。
+    全期間で1回だけ計算する一括処理（score_batch / verify_batch）が、
+    data.iloc[:i+1] に直接適用する1件ずつの処理と同じ足を計算不能扱いに
+    するため、先頭からの部分データに適用して実際の閾値を調べる。
+
+    Args:
+        indicator: DataFrame を受け取り pandas_ta の結果を返す関数
+        data: 一括処理に渡す OHLCV データ
+
+    Returns:
+        最小の本数。len(data) 本でも None なら len(data) + 1
+    """
+    for rows in range(1, len(data) + 1):
+        if indicator(data.iloc[:rows]) is not None:
+            return rows
+    return len(data) + 1
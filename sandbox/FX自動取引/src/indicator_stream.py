@@ -0,0 +1,601 @@
+"""
+FX自動取引システム — ストリーミング指標エンジン
+
+compute_indicators() と同じキーの指標キャッシュを、通貨ペアごとの内部状態
+（RSI/ATR/ADX の Wilder 平滑化、SMA/MFI/BB のローリング窓）から
+確定足1本あたり O(1) で差分更新する。
+
+- 初回・履歴不整合時は compute_indicators() の結果をそのまま返し、
+  同じデータで内部状態を構築する（シード）。
+- 差分計算は pandas_ta 0.4.x の定義（RSI のウォームアップ・BB の ddof・
+  ADXR・ATR の presma シードなど）を再現している。シード時に内部状態から
+  組み立てた値を compute_indicators() と照合し、一致しなければ
+  （インストール済み pandas_ta の定義が異なる）以降は全再計算に切り替える。
+- 以降は新しく確定した足だけを状態に流し込み、形成中の最終足は
+  状態のコピー上で暫定計算する（確定状態は汚さない）。
+- Wilder 平滑化（RSI/ATR/ADX）は pandas_ta ではデータ窓の先頭で毎回
+  シードされる。差分更新はデータ窓の先頭足がシード時と同じ間だけ行い、
+  固定本数のスライド窓で先頭が進んだら再シードする（窓の先頭から持ち越した
+  平滑化状態では atr_ratio や系列の先頭が pandas_ta とずれるため）。
+  ライブの TradingLoop では、同じ足が形成中の間のイテレーションが差分更新、
+  新しい足が確定した最初のイテレーションが全再計算になる。
+- 返却する Series/DataFrame は pandas_ta をデータ窓に直接適用した場合と
+  同じウォームアップ区間（先頭NaN）を持つ。
+
+R1拡張: IndicatorStream（インクリメンタル指標計算）
+"""
+
+import logging
+import math
+import sys
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+
+from src.config import (
+    ADX_PERIOD,
+    ATR_PERIOD,
+    INDICATOR_STREAM_HISTORY,
+    MA_LONG_PERIOD,
+    MA_SHORT_PERIOD,
+    MFI_PERIOD,
+    RSI_PERIOD,
+)
+from src.indicator_cache import compute_indicators
+
+logger = logging.getLogger(__name__)
+
+# compute_indicators() のボリンジャーバンド設定と一致させる
+_BB_LENGTH: int = 20
+_BB_STD: float = 2.0
+# ADXR のシフト量（pandas_ta.adx の adxr_length 既定値）
+_ADXR_LENGTH: int = 2
+
+_EPS: float = sys.float_info.epsilon
+_NAN: float = float("nan")
+
+# 履歴バッファの列順
+_FIELDS: tuple[str, ...] = (
+    "rsi", "atr", "ma_short", "ma_long", "mfi",
+    "adx", "adxr", "dmp", "dmn",
+    "bbl", "bbm", "bbu", "bbb", "bbp",
+)
+_COL = {name: i for i, name in enumerate(_FIELDS)}
+
+# データ窓の先頭から何本がNaNになるか（pandas_ta を窓に直接適用した場合と同じ）
+_WARMUP: dict[str, int] = {
+    "rsi": 1,
+    "atr": ATR_PERIOD - 1,
+    "ma_short": MA_SHORT_PERIOD - 1,
+    "ma_long": MA_LONG_PERIOD - 1,
+    "mfi": MFI_PERIOD,
+    "adx": ADX_PERIOD - 1,
+    "adxr": ADX_PERIOD - 1 + _ADXR_LENGTH,
+    "dmp": ADX_PERIOD - 1,
+    "dmn": ADX_PERIOD - 1,
+    "bbl": _BB_LENGTH - 1,
+    "bbm": _BB_LENGTH - 1,
+    "bbu": _BB_LENGTH - 1,
+    "bbb": _BB_LENGTH - 1,
+    "bbp": _BB_LENGTH - 1,
+}
+
+# pandas_ta の DataFrame 列名プレフィックス → 履歴バッファの列
+_ADX_PREFIXES: tuple[tuple[str, str], ...] = (
+    ("ADXR_", "adxr"), ("ADX_", "adx"), ("DMP_", "dmp"), ("DMN_", "dmn"),
+)
+_BB_PREFIXES: tuple[tuple[str, str], ...] = (
+    ("BBL_", "bbl"), ("BBM_", "bbm"), ("BBU_", "bbu"),
+    ("BBB_", "bbb"), ("BBP_", "bbp"),
+)
+
+# シード時の照合許容誤差（差分計算の丸め誤差は十分小さい。定義の違いは桁で外れる）
+_SEED_CHECK_RTOL: float = 1e-6
+_SEED_CHECK_ATOL: float = 1e-9
+
+# これ未満の本数では pandas_ta 側が None を返す指標があるため全再計算に委ねる
+MIN_STREAM_ROWS: int = max(
+    RSI_PERIOD + 1, ATR_PERIOD + 1, ADX_PERIOD + 1, MFI_PERIOD + 1,
+    MA_SHORT_PERIOD, MA_LONG_PERIOD, _BB_LENGTH,
+) + 1
+
+
+def _div(num: float, den: float) -> float:
+    """numpy と同じ規則の除算（0除算で例外を出さず inf/NaN を返す）。"""
+    if den == 0:
+        if num == 0 or num != num:
+            return _NAN
+        return math.copysign(math.inf, num) * math.copysign(1.0, den)
+    return num / den
+
+
+def _ewm_step(
+    state: tuple[float, float], x: float, alpha: float
+) -> tuple[tuple[float, float], float]:
+    """pandas ``ewm(alpha=alpha, adjust=False).mean()`` の1ステップ。
+
+    state は (weighted, old_wt)。NaN 入力時の重み減衰（ignore_na=False）も
+    pandas の実装に合わせている。
+    """
+    weighted, old_wt = state
+    if weighted == weighted:
+        old_wt *= 1.0 - alpha
+        if x == x:
+            if weighted != x:
+                weighted = (old_wt * weighted + alpha * x) / (old_wt + alpha)
+            old_wt = 1.0
+    elif x == x:
+        weighted = x
+    return (weighted, old_wt), weighted
+
+
+class _StreamState:
+    """1バーずつ更新する指標の内部状態（履歴は持たない）。"""
+
+    __slots__ = (
+        "count", "prev_high", "prev_low", "prev_close", "prev_tp",
+        "rsi_up", "rsi_dn", "atr_warm", "atr_ewm",
+        "adx_atr_warm", "adx_atr_ewm", "dm_pos", "dm_neg", "adx_ewm",
+        "adx_recent", "closes", "mfi_flows",
+    )
+
+    def __init__(self) -> None:
+        init = (_NAN, 1.0)
+        self.count: int = 0
+        self.prev_high: float = _NAN
+        self.prev_low: float = _NAN
+        self.prev_close: float = _NAN
+        self.prev_tp: float = _NAN
+        self.rsi_up = init
+        self.rsi_dn = init
+        self.atr_warm: list[float] = []
+        self.atr_ewm = init
+        self.adx_atr_warm: list[float] = []
+        self.adx_atr_ewm = init
+        self.dm_pos = init
+        self.dm_neg = init
+        self.adx_ewm = init
+        self.adx_recent: list[float] = []
+        self.closes: list[float] = []
+        self.mfi_flows: list[tuple[float, float]] = []
+
+    def copy(self) -> "_StreamState":
+        """形成中の足を暫定計算するための浅いコピーを返す。"""
+        other = _StreamState.__new__(_StreamState)
+        for name in self.__slots__:
+            value = getattr(self, name)
+            setattr(other, name, list(value) if isinstance(value, list) else value)
+        return other
+
+    @staticmethod
+    def _rma_with_presma(
+        warm: list[float], ewm: tuple[float, float], tr: float, i: int, period: int
+    ) -> tuple[tuple[float, float], float]:
+        """pandas_ta.atr（presma=True）: 先頭 period 本の平均をシードに RMA を適用する。"""
+        if i < period:
+            warm.append(tr)
+            if i < period - 1:
+                return ewm, _NAN
+            valid = [v for v in warm if v == v]
+            tr = sum(valid) / len(valid) if valid else _NAN
+        return _ewm_step(ewm, tr, 1.0 / period)
+
+    def push(self, high: float, low: float, close: float, volume: float) -> tuple:
+        """確定足1本を取り込み、_FIELDS 順の指標値タプルを返す。"""
+        i = self.count
+        prev_close = self.prev_close
+
+        # --- RSI（Wilder） ---
+        diff = close - prev_close
+        up = 0.0 if diff < 0 else diff
+        dn = 0.0 if diff > 0 else diff
+        alpha_rsi = 1.0 / RSI_PERIOD
+        self.rsi_up, up_avg = _ewm_step(self.rsi_up, up, alpha_rsi)
+        self.rsi_dn, dn_avg = _ewm_step(self.rsi_dn, dn, alpha_rsi)
+        rsi = 100.0 * _div(up_avg, up_avg + abs(dn_avg))
+
+        # --- True Range / ATR ---
+        hl = abs(high - low)
+        if prev_close == prev_close:
+            tr = max(hl, abs(high - prev_close), abs(prev_close - low))
+        else:
+            tr = hl
+        self.atr_ewm, atr = self._rma_with_presma(
+            self.atr_warm, self.atr_ewm, tr, i, ATR_PERIOD
+        )
+
+        # --- ADX（ATR は先頭TRをNaNにした prenan 版） ---
+        adx_tr = tr if i > 0 else _NAN
+        self.adx_atr_ewm, adx_atr = self._rma_with_presma(
+            self.adx_atr_warm, self.adx_atr_ewm, adx_tr, i, ADX_PERIOD
+        )
+        up_move = high - self.prev_high
+        dn_move = self.prev_low - low
+        if up_move == up_move and dn_move == dn_move:
+            pos = up_move if (up_move > dn_move and up_move > 0) else 0.0
+            neg = dn_move if (dn_move > up_move and dn_move > 0) else 0.0
+            pos = 0.0 if abs(pos) < _EPS else pos
+            neg = 0.0 if abs(neg) < _EPS else neg
+        else:
+            pos = neg = _NAN
+        alpha_adx = 1.0 / ADX_PERIOD
+        self.dm_pos, pos_avg = _ewm_step(self.dm_pos, pos, alpha_adx)
+        self.dm_neg, neg_avg = _ewm_step(self.dm_neg, neg, alpha_adx)
+        k = _div(100.0, adx_atr)
+        dmp = k * pos_avg
+        dmn = k * neg_avg
+        dx = 100.0 * _div(abs(dmp - dmn), dmp + dmn)
+        self.adx_ewm, adx = _ewm_step(self.adx_ewm, dx, alpha_adx)
+        adx_shifted = (
+            self.adx_recent[-_ADXR_LENGTH]
+            if len(self.adx_recent) >= _ADXR_LENGTH else _NAN
+        )
+        adxr = 0.5 * (adx + adx_shifted)
+        self.adx_recent.append(adx)
+        if len(self.adx_recent) > _ADXR_LENGTH:
+            del self.adx_recent[0]
+
+        # --- SMA / ボリンジャーバンド（固定長ローリング窓） ---
+        self.closes.append(close)
+        window_len = max(MA_SHORT_PERIOD, MA_LONG_PERIOD, _BB_LENGTH)
+        if len(self.closes) > window_len:
+            del self.closes[0]
+        ma_short = self._sma(MA_SHORT_PERIOD)
+        ma_long = self._sma(MA_LONG_PERIOD)
+        bbl = bbm = bbu = bbb = bbp = _NAN
+        if len(self.closes) >= _BB_LENGTH:
+            window = self.closes[-_BB_LENGTH:]
+            bbm = math.fsum(window) / _BB_LENGTH
+            var = math.fsum((x - bbm) ** 2 for x in window) / (_BB_LENGTH - 1)
+            std = math.sqrt(var)
+            bbl = bbm - _BB_STD * std
+            bbu = bbm + _BB_STD * std
+            ulr = bbu - bbl
+            bbb = 100.0 * _div(ulr, bbm)
+            bbp = _div(close - bbl, ulr)
+
+        # --- MFI（typical price × volume のローリング和） ---
+        tp = (high + low + close) / 3.0
+        smf = tp * volume * (1.0 if tp > self.prev_tp else -1.0)
+        self.mfi_flows.append((max(smf, 0.0), max(-smf, 0.0)))
+        if len(self.mfi_flows) > MFI_PERIOD:
+            del self.mfi_flows[0]
+        mfi = _NAN
+        if i >= MFI_PERIOD:
+            gain = math.fsum(f[0] for f in self.mfi_flows)
+            loss = math.fsum(f[1] for f in self.mfi_flows)
+            mfi = 100.0 * gain / (gain + loss + _EPS)
+
+        self.prev_high = high
+        self.prev_low = low
+        self.prev_close = close
+        self.prev_tp = tp
+        self.count = i + 1
+
+        return (
+            rsi, atr, ma_short, ma_long, mfi,
+            adx, adxr, dmp, dmn,
+            bbl, bbm, bbu, bbb, bbp,
+        )
+
+    def _sma(self, period: int) -> float:
+        if len(self.closes) < period:
+            return _NAN
+        return math.fsum(self.closes[-period:]) / period
+
+
+class IndicatorStream:
+    """通貨ペア1つ分のストリーミング指標エンジン。
+
+    TradingLoop がインスタンスを1つ保持し、毎イテレーションの価格データを
+    update() に渡す。戻り値は compute_indicators() と同じキーを持つ。
+
+    新規確定足の検出は、DatetimeIndex があれば時刻、無ければ OHLC の一致で
+    前回の最終確定足をデータ窓内に探して行う。見つからない（ギャップ・
+    履歴改訂）場合は全再計算でシードし直す。
+    """
+
+    def __init__(self, history_size: int = INDICATOR_STREAM_HISTORY) -> None:
+        """
+        Args:
+            history_size: 保持する確定足の指標履歴本数
+
+        Raises:
+            ValueError: history_size が MIN_STREAM_ROWS 未満の場合
+        """
+        if history_size < MIN_STREAM_ROWS:
+            raise ValueError(
+                f"history_size は{MIN_STREAM_ROWS}以上である必要があります: "
+                f"{history_size}"
+            )
+        self._history_size = history_size
+        # シード照合で compute_indicators() と一致しなかった（以降は常に全再計算）
+        self._disabled: bool = False
+        self.reset()
+
+    def reset(self) -> None:
+        """内部状態を破棄する（次回 update() で全再計算からシードし直す）。"""
+        self._state: Optional[_StreamState] = None
+        self._hist: Optional[np.ndarray] = None
+        self._hist_len: int = 0
+        self._capacity: int = 0
+        self._anchor: Optional[tuple] = None
+        self._origin: Optional[tuple] = None
+        self._vol_col: Optional[str] = None
+        self._adx_columns: list[tuple[str, str]] = []
+        self._bb_columns: list[tuple[str, str]] = []
+
+    @property
+    def is_seeded(self) -> bool:
+        """内部状態が構築済みか"""
+        return self._state is not None
+
+    @property
+    def is_disabled(self) -> bool:
+        """シード照合の不一致で差分更新を止めているか"""
+        return self._disabled
+
+    # ------------------------------------------------------------------
+    # 公開API
+    # ------------------------------------------------------------------
+
+    def update(self, data: pd.DataFrame) -> dict:
+        """最新の価格データで指標キャッシュを更新して返す。
+
+        Args:
+            data: OHLCV形式のDataFrame（最終行は形成中の足でもよい）
+
+        Returns:
+            compute_indicators() と同じキーの指標キャッシュdict
+        """
+        if self._disabled or data is None or data.empty or len(data) < MIN_STREAM_ROWS:
+            self.reset()
+            return compute_indicators(data)
+
+        try:
+            if self._state is None or self._vol_col != _volume_column(data):
+                return self._seed(data)
+
+            if _row_key(data, 0) != self._origin:
+                # スライド窓で先頭が進んだ: pandas_ta は新しい先頭から平滑化し直す
+                return self._seed(data)
+
+            new_bars = self._count_new_closed_bars(data)
+            if new_bars is None or len(data) > self._capacity:
+                logger.debug(
+                    "指標ストリーム: 前回確定足が見つからないため再シード"
+                )
+                return self._seed(data)
+
+            arrays = _ohlcv_arrays(data, self._vol_col)
+            last_closed = len(data) - 2
+            for pos in range(last_closed - new_bars + 1, last_closed + 1):
+                self._append(self._state.push(*(a[pos] for a in arrays)))
+            if new_bars > 0:
+                self._anchor = _row_key(data, last_closed)
+
+            forming = self._state.copy().push(*(a[-1] for a in arrays))
+            return self._build_cache(data, forming)
+        except Exception as e:
+            logger.warning("指標ストリーム: 差分更新失敗、全再計算に切替: %s", e)
+            self.reset()
+            return compute_indicators(data)
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+
+    def _seed(self, data: pd.DataFrame) -> dict:
+        """全再計算の結果を返しつつ、同じデータで内部状態を構築する。"""
+        self.reset()
+        cache = compute_indicators(data)
+
+        adx_columns = _map_columns(cache.get("adx_df"), _ADX_PREFIXES)
+        bb_columns = _map_columns(cache.get("bbands"), _BB_PREFIXES)
+        if adx_columns is None or bb_columns is None:
+            # 列構成が想定外（pandas_ta のバージョン差など）→ ストリーミング不可
+            return cache
+
+        vol_col = _volume_column(data)
+        state = _StreamState()
+        arrays = _ohlcv_arrays(data, vol_col)
+        self._capacity = max(self._history_size, len(data))
+        self._hist = np.empty((2 * self._capacity, len(_FIELDS)), dtype=float)
+        self._hist_len = 0
+        for pos in range(len(data) - 1):
+            self._append(state.push(*(a[pos] for a in arrays)))
+
+        self._state = state
+        self._vol_col = vol_col
+        self._adx_columns = adx_columns
+        self._bb_columns = bb_columns
+        self._anchor = _row_key(data, len(data) - 2)
+        self._origin = _row_key(data, 0)
+
+        # 内部状態から組み立てた値が全再計算と一致するか照合する
+        forming = state.copy().push(*(a[-1] for a in arrays))
+        mismatch = _first_mismatch(self._build_cache(data, forming), cache)
+        if mismatch is not None:
+            logger.warning(
+                "指標ストリーム: シード照合で %s が全再計算と一致しないため差分更新を停止"
+                "（pandas_ta %s の指標定義が想定と異なる）",
+                mismatch, getattr(ta, "version", "?"),
+            )
+            self.reset()
+            self._disabled = True
+        return cache
+
+    def _append(self, values: tuple) -> None:
+        """確定足の指標値を履歴バッファに追記する（償却 O(1)）。"""
+        if self._hist_len == len(self._hist):
+            keep = self._capacity
+            self._hist[:keep] = self._hist[self._hist_len - keep:self._hist_len]
+            self._hist_len = keep
+        self._hist[self._hist_len] = values
+        self._hist_len += 1
+
+    def _count_new_closed_bars(self, data: pd.DataFrame) -> Optional[int]:
+        """前回の最終確定足以降に確定した足の本数を返す（不整合時は None）。"""
+        if self._anchor is None:
+            return None
+        anchor_time, anchor_values = self._anchor
+        last_closed = len(data) - 2
+
+        if anchor_time is not None and isinstance(data.index, pd.DatetimeIndex):
+            loc = data.index.get_indexer([anchor_time])[0]
+            if loc < 0 or loc > last_closed:
+                return None
+            if _row_key(data, loc)[1] != anchor_values:
+                return None
+            return last_closed - loc
+
+        matches = np.ones(len(data), dtype=bool)
+        for col, value in zip(_KEY_COLUMNS, anchor_values):
+            matches &= data[col].to_numpy(dtype=float) == value
+        candidates = np.flatnonzero(matches[: last_closed + 1])
+        if len(candidates) == 0:
+            return None
+        return last_closed - int(candidates[-1])
+
+    def _build_cache(self, data: pd.DataFrame, forming: tuple) -> dict:
+        """履歴バッファ + 形成中の足から compute_indicators() 互換のdictを組み立てる。"""
+        n = len(data)
+        values = np.empty((n, len(_FIELDS)), dtype=float)
+        values[: n - 1] = self._hist[self._hist_len - (n - 1):self._hist_len]
+        values[n - 1] = forming
+        for name, warmup in _WARMUP.items():
+            values[: min(warmup, n), _COL[name]] = np.nan
+
+        index = data.index
+
+        def series(name: str) -> pd.Series:
+            return pd.Series(values[:, _COL[name]], index=index)
+
+        def frame(columns: list[tuple[str, str]]) -> pd.DataFrame:
+            return pd.DataFrame(
+                {col: values[:, _COL[field]] for col, field in columns},
+                index=index,
+            )
+
+        rsi = series("rsi")
+        atr = series("atr")
+        ma_short = series("ma_short")
+        ma_long = series("ma_long")
+        adx_df = frame(self._adx_columns)
+        bbands = frame(self._bb_columns)
+
+        cache: dict = {
+            "rsi": rsi,
+            "atr": atr,
+            "ma_short": ma_short,
+            "ma_long": ma_long,
+            "mfi": series("mfi") if self._vol_col is not None else None,
+            "adx_df": adx_df,
+            "bbands": bbands,
+            "current_rsi": _last_or_none(values[:, _COL["rsi"]]),
+            "current_adx": _last_or_none(values[:, _COL["adx"]]),
+            "current_atr": _last_or_none(values[:, _COL["atr"]]),
+            "current_mfi": (
+                _last_or_none(values[:, _COL["mfi"]])
+                if self._vol_col is not None else None
+            ),
+            "ma_short_current": _last_or_none(values[:, _COL["ma_short"]]),
+            "ma_long_current": _last_or_none(values[:, _COL["ma_long"]]),
+            "ma_short_prev": _last_or_none(values[: n - 1, _COL["ma_short"]]),
+            "ma_long_prev": _last_or_none(values[: n - 1, _COL["ma_long"]]),
+            "atr_ratio": None,
+            "bbw_ratio": None,
+        }
+
+        # ATR比率（現在ATR / 中央値ATR）
+        valid_atr = values[:, _COL["atr"]]
+        valid_atr = valid_atr[~np.isnan(valid_atr)]
+        if len(valid_atr) >= 2:
+            median_atr = float(np.median(valid_atr))
+            if median_atr != 0:
+                cache["atr_ratio"] = float(valid_atr[-1] / median_atr)
+
+        # BBW比率（現在BBW / 平均BBW）
+        bbw = values[:, _COL["bbb"]]
+        bbw = bbw[~np.isnan(bbw)]
+        if len(bbw) >= 2:
+            mean_bbw = float(bbw.mean())
+            if mean_bbw != 0:
+                cache["bbw_ratio"] = float(bbw[-1]) / mean_bbw
+
+        return cache
+
+
+# 新規確定足の照合に使う列
+_KEY_COLUMNS: tuple[str, ...] = ("high", "low", "close")
+
+
+def _volume_column(data: pd.DataFrame) -> Optional[str]:
+    """compute_indicators() と同じ優先順位で出来高列を選ぶ。"""
+    if "volume" in data.columns:
+        return "volume"
+    if "tick_volume" in data.columns:
+        return "tick_volume"
+    return None
+
+
+def _ohlcv_arrays(data: pd.DataFrame, vol_col: Optional[str]) -> tuple:
+    """push() の引数順（high, low, close, volume）の float 配列を返す。"""
+    high = data["high"].to_numpy(dtype=float)
+    low = data["low"].to_numpy(dtype=float)
+    close = data["close"].to_numpy(dtype=float)
+    if vol_col is not None:
+        volume = data[vol_col].to_numpy(dtype=float)
+    else:
+        volume = np.full(len(data), np.nan)
+    return (
+        high.tolist(), low.tolist(), close.tolist(), volume.tolist(),
+    )
+
+
+def _row_key(data: pd.DataFrame, pos: int) -> tuple:
+    """確定足の照合キー（時刻, (high, low, close)）。"""
+    ts = data.index[pos] if isinstance(data.index, pd.DatetimeIndex) else None
+    values = tuple(float(data[col].iat[pos]) for col in _KEY_COLUMNS)
+    return ts, values
+
+
+def _map_columns(
+    df: Optional[pd.DataFrame], prefixes: tuple[tuple[str, str], ...]
+) -> Optional[list[tuple[str, str]]]:
+    """pandas_ta の列名を履歴バッファの列に対応付ける（未知の列があれば None）。"""
+    if df is None:
+        return None
+    mapping: list[tuple[str, str]] = []
+    for col in df.columns:
+        field = next((f for p, f in prefixes if str(col).startswith(p)), None)
+        if field is None:
+            return None
+        mapping.append((col, field))
+    return mapping
+
+
+def _first_mismatch(actual: dict, expected: dict) -> Optional[str]:
+    """2つの指標キャッシュの Series/DataFrame を比べ、最初に外れたキーを返す。"""
+    for key, exp in expected.items():
+        act = actual.get(key)
+        if not isinstance(exp, (pd.Series, pd.DataFrame)):
+            continue
+        if not isinstance(act, type(exp)) or act.shape != exp.shape:
+            return key
+        if not np.allclose(
+            act.to_numpy(float), exp.to_numpy(float),
+            rtol=_SEED_CHECK_RTOL, atol=_SEED_CHECK_ATOL, equal_nan=True,
+        ):
+            return key
+    return None
+
+
+def _last_or_none(values: np.ndarray) -> Optional[float]:
+    """配列の最終要素を float で返す（空・NaN なら None）。"""
+    if len(values) == 0:
+        return None
+    last = values[-1]
+    return None if np.isnan(last) else float(last)
@@ -0,0 +1,181 @@
+"""
+FX自動取引システム — パイプライン・レイテンシ計測
+
+TradingLoop.run_once() の各ステージ（口座照会・価格取得・指標計算・
+レジーム・戦略・Bear・SignalCoordinator・発注 等）の所要時間を計測し、
+通貨ペアごとに直近 LATENCY_WINDOW 回分のローリング分布（p50/p95/max）を保持する。
+
+- パイプライン trace（TradingLoop.last_pipeline_trace["latency_ms"]）
+- 定期ログサマリ（LATENCY_LOG_INTERVAL_SEC ごと）
+- Telegram /perf コマンド（format_perf_report）
+から参照する。
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from src.config import LATENCY_LOG_INTERVAL_SEC, LATENCY_WINDOW
+
+# run_once 全体の所要時間を記録するステージ名
+TOTAL_STAGE = "total"
+
+
+class LatencyRecorder:
+    """
+    1通貨ペア分のステージ別レイテンシを記録する。
+
+    run_once の先頭で begin_iteration()、末尾で end_iteration() を呼び、
+    その間の各ステージを measure() で囲む。同じステージが1イテレーション内で
+    複数回計測された場合は合算する。
+    Telegram のポーリングスレッドから summary() を読むためロックで保護する。
+    """
+
+    def __init__(
+        self,
+        instrument: str,
+        window: int = LATENCY_WINDOW,
+        log_interval_sec: float = LATENCY_LOG_INTERVAL_SEC,
+    ) -> None:
+        """
+        Args:
+            instrument: 通貨ペア（レポート表示用）
+            window: ステージごとに保持する直近サンプル数
+            log_interval_sec: 定期ログサマリの間隔（秒）
+
+        Raises:
+            ValueError: window が1未満の場合
+        """
+        if window < 1:
+            raise ValueError(f"window は1以上である必要があります: {window}")
+        self._instrument = instrument
+        self._window = window
+        self._log_interval_sec = log_interval_sec
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque[float]] = {}
+        self._current: dict[str, float] = {}
+        self._last: dict[str, float] = {}
+        self._iteration_started: Optional[float] = None
+        self._last_log_at = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # 計測
+    # ------------------------------------------------------------------
+
+    def begin_iteration(self) -> None:
+        """イテレーションの計測を開始する。"""
+        self._current = {}
+        self._iteration_started = time.perf_counter()
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """with ブロックの所要時間を stage に加算する（例外時も記録する）。"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            self._current[stage] = self._current.get(stage, 0.0) + elapsed_ms
+
+    def end_iteration(self) -> dict[str, float]:
+        """
+        イテレーションの計測を終了し、ステージ別の値をローリング分布に追加する。
+
+        Returns:
+            このイテレーションのステージ別所要時間（ミリ秒、total を含む）
+        """
+        if self._iteration_started is not None:
+            self._current[TOTAL_STAGE] = (
+                time.perf_counter() - self._iteration_started
+            ) * 1000.0
+            self._iteration_started = None
+        with self._lock:
+            for stage, ms in self._current.items():
+                samples = self._samples.get(stage)
+                if samples is None:
+                    samples = self._samples[stage] = deque(maxlen=self._window)
+                samples.append(ms)
+            self._last = dict(self._current)
+        return dict(self._current)
+
+    def elapsed_ms(self) -> float:
+        """計測中のイテレーションの経過時間（ミリ秒）。計測外なら 0。"""
+        if self._iteration_started is None:
+            return 0.0
+        return (time.perf_counter() - self._iteration_started) * 1000.0
+
+    @property
+    def current(self) -> dict[str, float]:
+        """計測中のイテレーションでここまでに計測したステージ（ミリ秒）"""
+        return dict(self._current)
+
+    @property
+    def last(self) -> dict[str, float]:
+        """直近に完了したイテレーションのステージ別所要時間（ミリ秒）"""
+        with self._lock:
+            return dict(self._last)
+
+    # ------------------------------------------------------------------
+    # 集計
+    # ------------------------------------------------------------------
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        ステージ別のローリング分布。
+
+        Returns:
+            {stage: {"count", "p50", "p95", "max"}}（ミリ秒、total は末尾）
+        """
+        with self._lock:
+            snapshot = {stage: np.fromiter(s, dtype=float) for stage, s in self._samples.items()}
+        result = {}
+        for stage in sorted(snapshot, key=lambda s: (s == TOTAL_STAGE, s)):
+            values = snapshot[stage]
+            result[stage] = {
+                "count": int(len(values)),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+                "max": float(values.max()),
+            }
+        return result
+
+    def format_summary(self) -> str:
+        """summary() を1ペア分の表形式テキストにする。"""
+        summary = self.summary()
+        if not summary:
+            return f"[{self._instrument}] 計測データなし"
+        lines = [f"[{self._instrument}] n={summary.get(TOTAL_STAGE, {}).get('count', 0)}"]
+        lines.append(f"{'stage':<12}{'p50':>8}{'p95':>8}{'max':>8}")
+        for stage, stats in summary.items():
+            lines.append(
+                f"{stage:<12}{stats['p50']:>8.1f}{stats['p95']:>8.1f}{stats['max']:>8.1f}"
+            )
+        return "\n".join(lines)
+
+    def should_log(self) -> bool:
+        """前回の定期ログから log_interval_sec 経過していれば True を返し、時刻を更新する。"""
+        now = time.monotonic()
+        if now - self._last_log_at < self._log_interval_sec:
+            return False
+        self._last_log_at = now
+        return True
+
+    @property
+    def instrument(self) -> str:
+        return self._instrument
+
+
+def format_perf_report(recorders: Iterable[LatencyRecorder]) -> str:
+    """
+    Telegram /perf 用のレポート（全ペア、ミリ秒）。
+
+    Telegram の HTML モードで等幅表示されるよう <pre> で囲む。
+    """
+    blocks = [recorder.format_summary() for recorder in recorders]
+    if not blocks:
+        return "計測対象のループがありません"
+    return "⏱ <b>パイプライン・レイテンシ (ms)</b>\n<pre>" + "\n\n".join(blocks) + "</pre>"
@@ -0,0 +1,338 @@
+"""
+FX自動取引システム — 取引ログのイベント索引
+
+trading.log（日次ローテートされた trading.log.* を含む）から分析に使う行だけを
+イベント表として SQLite に取り込み、時刻・通貨ペアで引けるようにする。
+
+- 各ファイルは前回取り込んだバイト位置の続きからだけ読む（書きかけの最終行は次回）
+- 1行につき正規表現を1回だけ当て、ヘッダ（時刻・レベル・ロガー）と
+  イベント種別・値をまとめて取り出す
+- ファイルは先頭行で識別するため、ローテートで名前が変わっても読み直さない
+- [PAIR] タグの無い行（戦略のシグナルログ・旧形式の AI 判定）は、同じ流れで
+  直前に現れた [PAIR] タグのペアを推定値として入れる（pair_inferred=1）
+
+イベント種別（kind）:
+    signal      シグナル実行（direction=BUY/SELL, multiplier=ポジションサイズ倍率）
+    ai          AIフィルター判定（verdict, direction=bullish/bearish/neutral, confidence, multiplier）
+    fill        ポジションオープン成功（trade_id, units, price, direction=units の符号）
+    bar_close   戦略シグナルを出した足の終値（price, direction, strategy_signal=シグナル名）
+    conviction  conviction score（score）
+    bear        Bear Researcher警告（severity）
+
+使い方:
+    index = LogIndex()
+    index.ingest(log_files(LOG_DIR))
+    ai = index.events(kinds=["ai"], pair="GBP_JPY", start="2026-05-01")
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+import pandas as pd
+
+from src.config import LOG_INDEX_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+EVENT_KINDS: tuple[str, ...] = ("signal", "ai", "fill", "bar_close", "conviction", "bear")
+
+# 先頭行の識別に使うバイト数（先頭行がこれより長くても先頭部分で識別する）
+_FINGERPRINT_BYTES = 256
+
+# ヘッダ + 任意の [PAIR] タグ + 任意のイベント本文を1つの正規表現で取り出す。
+# イベントに当たらない行もヘッダと [PAIR] タグは取れる（ペア推定に使う）
+_LINE = re.compile(
+    r"(?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),(?P<ms>\d{3}) "
+    r"\[(?P<level>\w+)\] (?P<logger>[\w.]+): "
+    r"(?:\[(?P<pair>[A-Z_]+)\]\s*)?"
+    r"(?:"
+    r"AIフィルター: (?P<ai_verdict>CONFIRM|CONTRADICT|NEUTRAL|REJECT)\s+"
+    r"\(direction=(?P<ai_dir>\w+), confidence=(?P<ai_conf>[\d.]+)\)(?: → 倍率(?P<ai_mult>[\d.]+))?"
+    r"|シグナル実行: (?P<sig_dir>BUY|SELL)(?:, ポジションサイズ倍率=(?P<sig_mult>[\d.]+))?"
+    r"|ポジションオープン成功: trade_id=(?P<trade_id>\d+), instrument=(?P<fill_pair>[A-Z_]+), "
+    r"units=(?P<units>-?\d+), price=(?P<price>\d+\.\d+)"
+    r"|(?P<strategy>BB(?:逆張り|平均回帰)?(?:買い|売り)|押し目買い|戻り売り)シグナル: close=(?P<close>[\d.]+)"
+    r"|conviction score: (?P<score>\d+)/10"
+    r"|Bear Researcher警告: severity=(?P<severity>[\d.]+)"
+    r")?"
+)
+
+_COLUMNS: tuple[str, ...] = (
+    "ts", "kind", "pair", "pair_inferred", "level", "logger", "direction", "verdict",
+    "confidence", "multiplier", "price", "units", "trade_id", "score", "severity",
+    "strategy_signal",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS log_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    pair TEXT,
+    pair_inferred INTEGER NOT NULL DEFAULT 0,
+    level TEXT,
+    logger TEXT,
+    direction TEXT,
+    verdict TEXT,
+    confidence REAL,
+    multiplier REAL,
+    price REAL,
+    units INTEGER,
+    trade_id TEXT,
+    score INTEGER,
+    severity REAL,
+    strategy_signal TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_log_events_ts ON log_events (ts);
+CREATE INDEX IF NOT EXISTS idx_log_events_pair_ts ON log_events (pair, ts);
+CREATE INDEX IF NOT EXISTS idx_log_events_kind_ts ON log_events (kind, ts);
+CREATE TABLE IF NOT EXISTS log_offsets (
+    fingerprint TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    first_ts TEXT,
+    offset INTEGER NOT NULL,
+    last_pair TEXT
+);
+"""
+
+
+# ------------------------------------------------------------------
+# 1行の解析
+# ------------------------------------------------------------------
+
+
+def parse_line(line: str, last_pair: Optional[str] = None) -> tuple[Optional[dict], Optional[str]]:
+    """
+    ログ1行をイベントにする。
+
+    Args:
+        line: 改行なしのログ行
+        last_pair: 直前までに現れた [PAIR] タグ（タグなし行のペア推定用）
+
+    Returns:
+        (イベント dict またはイベントでない行は None, 更新後の last_pair)
+    """
+    m = _LINE.match(line)
+    if m is None:
+        return None, last_pair
+    g = m.groupdict()
+    if g["pair"]:
+        last_pair = g["pair"]
+
+    event = {
+        "ts": f"{g['ts']}.{g['ms']}",
+        "pair": g["pair"] or last_pair,
+        "pair_inferred": 0 if g["pair"] else 1,
+        "level": g["level"],
+        "logger": g["logger"],
+    }
+    if g["ai_verdict"]:
+        event.update(
+            kind="ai", verdict=g["ai_verdict"], direction=g["ai_dir"],
+            confidence=float(g["ai_conf"]),
+            multiplier=float(g["ai_mult"]) if g["ai_mult"] else None,
+        )
+    elif g["sig_dir"]:
+        event.update(
+            kind="signal", direction=g["sig_dir"],
+            multiplier=float(g["sig_mult"]) if g["sig_mult"] else None,
+        )
+    elif g["trade_id"]:
+        units = int(g["units"])
+        event.update(
+            kind="fill", pair=g["fill_pair"], pair_inferred=0, trade_id=g["trade_id"],
+            units=units, price=float(g["price"]), direction="BUY" if units > 0 else "SELL",
+        )
+    elif g["strategy"]:
+        event.update(
+            kind="bar_close", price=float(g["close"]), strategy_signal=g["strategy"],
+            direction="BUY" if "買い" in g["strategy"] else "SELL",
+        )
+    elif g["score"]:
+        event.update(kind="conviction", score=int(g["score"]))
+    elif g["severity"]:
+        event.update(kind="bear", severity=float(g["severity"]))
+    else:
+        return None, last_pair
+    return event, last_pair
+
+
+def log_files(log_dir: Union[str, Path], pattern: str = "trading.log*") -> list[Path]:
+    """ログディレクトリ内のログファイル（ローテート済みを含む）"""
+    return sorted(p for p in Path(log_dir).glob(pattern) if p.is_file())
+
+
+def _head(path: Path) -> Optional[bytes]:
+    """ファイル先頭行（識別用）。改行まで書き終わっていなければ None。"""
+    with open(path, "rb") as f:
+        head = f.read(_FINGERPRINT_BYTES)
+    newline = head.find(b"\n")
+    if newline < 0:
+        return head if len(head) == _FINGERPRINT_BYTES else None
+    return head[:newline]
+
+
+# ------------------------------------------------------------------
+# 索引
+# ------------------------------------------------------------------
+
+
+class LogIndex:
+    """
+    取引ログのイベント表（SQLite）と、ファイルごとの取り込み済みバイト位置。
+
+    イベントの追加と取り込み位置の更新は1トランザクションで行うため、
+    取り込み途中で止まっても同じ行を二重に登録しない。
+    """
+
+    def __init__(self, db_path: Union[str, Path] = LOG_INDEX_DB_PATH) -> None:
+        """
+        Args:
+            db_path: 索引 DB のパス（":memory:" でメモリのみ）
+        """
+        self._db_path = str(db_path)
+        if self._db_path != ":memory:":
+            Path(self._db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self._db_path)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "LogIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 取り込み
+    # ------------------------------------------------------------------
+
+    def ingest(self, paths: Iterable[Union[str, Path]]) -> int:
+        """
+        ログファイルの未取り込み部分をイベント表に追加する。
+
+        ファイルは先頭行の時刻順（古い順）に処理し、タグなし行のペア推定は
+        前のファイルの末尾から引き継ぐ。
+
+        Returns:
+            追加したイベント数
+        """
+        files = []
+        for path in map(Path, paths):
+            if not path.exists():
+                continue
+            head = _head(path)
+            if head is None:
+                continue  # 先頭行の書き込み途中。次回取り込む
+            files.append((head[:23], hashlib.sha1(head).hexdigest(), path))
+        files.sort(key=lambda item: item[0])
+
+        added = 0
+        carried_pair: Optional[str] = None
+        for first_ts, fingerprint, path in files:
+            row = self._conn.execute(
+                "SELECT offset, last_pair FROM log_offsets WHERE fingerprint=?", (fingerprint,),
+            ).fetchone()
+            offset, last_pair = row if row else (0, carried_pair)
+            added += self._ingest_file(path, fingerprint, first_ts.decode(errors="replace"),
+                                       offset, last_pair)
+            carried_pair = self._conn.execute(
+                "SELECT last_pair FROM log_offsets WHERE fingerprint=?", (fingerprint,),
+            ).fetchone()[0]
+        if added:
+            logger.info("ログ索引: %d 件のイベントを追加しました", added)
+        return added
+
+    def _ingest_file(
+        self, path: Path, fingerprint: str, first_ts: str, offset: int, last_pair: Optional[str],
+    ) -> int:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1   # 書きかけの最終行は次回
+        if end == 0:
+            return 0
+
+        rows = []
+        for raw in chunk[:end].split(b"\n")[:-1]:
+            event, last_pair = parse_line(raw.decode("utf-8", errors="replace").rstrip("\r"), last_pair)
+            if event is not None:
+                rows.append(tuple(event.get(col) for col in _COLUMNS))
+
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO log_events ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT INTO log_offsets (fingerprint, path, first_ts, offset, last_pair) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(fingerprint) DO UPDATE SET "
+                "path=excluded.path, offset=excluded.offset, last_pair=excluded.last_pair",
+                (fingerprint, str(path), first_ts, offset + end, last_pair),
+            )
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # 参照
+    # ------------------------------------------------------------------
+
+    def events(
+        self,
+        kinds: Optional[Sequence[str]] = None,
+        pair: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        イベント表をログの出現順（時刻、同時刻は取り込み順）で返す。
+
+        Args:
+            kinds: イベント種別で絞る（EVENT_KINDS のいずれか）
+            pair: 通貨ペアで絞る（推定ペアを含む）
+            start / end: ログ時刻（ログに書かれたローカル時刻）の範囲。両端を含む
+
+        Returns:
+            index = ts（datetime64）、列は _COLUMNS から ts を除いたもの
+        """
+        clauses, params = [], []
+        if kinds is not None:
+            unknown = set(kinds) - set(EVENT_KINDS)
+            if unknown:
+                raise ValueError(f"不明なイベント種別: {sorted(unknown)}")
+            clauses.append(f"kind IN ({', '.join('?' * len(kinds))})")
+            params.extend(kinds)
+        if pair is not None:
+            clauses.append("pair = ?")
+            params.append(pair)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(_ts_key(start))
+        if end is not None:
+            clauses.append("ts <= ?")
+            params.append(_ts_key(end, upper=True))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        frame = pd.read_sql_query(
+            f"SELECT {', '.join(_COLUMNS)} FROM log_events {where} ORDER BY ts, seq",
+            self._conn, params=params,
+        )
+        frame["ts"] = pd.to_datetime(frame["ts"], format="%Y-%m-%d %H:%M:%S.%f")
+        frame["pair_inferred"] = frame["pair_inferred"].astype(bool)
+        return frame.set_index("ts")
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM log_events").fetchone()[0]
+
+
+def _ts_key(value: Union[str, pd.Timestamp], upper: bool = False) -> str:
+    """時刻を索引の ts 文字列と比較できる形にする（日付だけなら上限はその日の終わり）。"""
+    text = str(value)
+    if upper and len(text) == 10:
+        return f"{text} 23:59:59.999"
+    return pd.Timestamp(value).strftime("%Y-%m-%d %H:%M:%S.%f")[:23]
@@ -0,0 +1,244 @@
+"""
+FX自動取引システム — 損失集計レッジャー
+
+RiskManager の損失上限チェック（日次・週次・月次）と連続負けチェックを、
+取引履歴の全件走査ではなく決済イベントごとの差分更新で行う。
+
+- 損失（pl < 0）を決済時刻の昇順で保持し、期間ごとの窓の開始位置と合計を
+  持ち回す。時間が進んだ分だけ窓の先頭から差し引くため、照会は償却 O(1)
+- 合計は Fraction で厳密に保持し（加減算の丸め誤差を溜めない）、
+  照会時に float へ変換する
+- 連続負けは決済イベント順に数え、勝ち（pl >= 0）で途切れる
+- 保持期間（月次窓と同じ30日）を過ぎた損失は捨てる
+  （PositionManager._trim_trade_history と同じ保持範囲）
+- 照会も窓の位置を進めるため、更新・照会はすべてインスタンスのロック下で行う
+  （ペアごとのスレッド・オーケストレーターのワーカーから同時に呼ばれる）
+
+期間の定義は RiskManager._check_loss_limits_inner の全件走査と同じ:
+日次 = 当日 0:00 UTC 以降、週次 = 直近7日、月次 = 直近30日。
+"""
+
+import bisect
+import logging
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from fractions import Fraction
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 集計窓（RiskManager の損失上限と同じ順序）
+_WINDOWS: tuple[str, ...] = ("daily", "weekly", "monthly")
+
+# 月次窓・保持期間
+_RETENTION = timedelta(days=30)
+
+# 窓の外に出た先頭要素がこの件数を超えたらリストを詰める
+_COMPACT_THRESHOLD = 256
+
+# 詰める対象は月次窓の開始よりこれだけ前の損失に限る。スレッドごとに取得した now が
+# 前後しても（少し前の now での照会でも）窓の再計算に必要な損失を残しておく
+_COMPACT_MARGIN = timedelta(days=1)
+
+
+def _to_utc(value: datetime) -> datetime:
+    """naive datetime は UTC とみなす（全件走査の H3 と同じ扱い）。"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def window_starts(now: datetime) -> dict[str, datetime]:
+    """日次・週次・月次の集計開始時刻"""
+    return {
+        "daily": datetime(now.year, now.month, now.day, tzinfo=timezone.utc),
+        "weekly": now - timedelta(weeks=1),
+        "monthly": now - _RETENTION,
+    }
+
+
+class LossLedger:
+    """
+    決済イベントから期間別の損失合計と連続負け数を保持する。
+
+    使い方:
+        ledger = LossLedger()
+        ledger.record(pl=-1200.0, close_time=closed_at)
+        daily, weekly, monthly = ledger.losses(now)
+        streak = ledger.consecutive_losses(now)
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._times: list[datetime] = []     # 損失の決済時刻（昇順）
+        self._losses: list[Fraction] = []    # 損失額（正の値、_times と同じ並び）
+        # 窓ごとの開始位置・合計・直近に適用した開始時刻
+        self._index: dict[str, int] = {w: 0 for w in _WINDOWS}
+        self._sums: dict[str, Fraction] = {w: Fraction(0) for w in _WINDOWS}
+        self._applied: dict[str, Optional[datetime]] = {w: None for w in _WINDOWS}
+        # 現在の連敗を構成する損失の決済時刻（イベント順）
+        self._streak: deque[datetime] = deque()
+
+    # ------------------------------------------------------------------
+    # 更新
+    # ------------------------------------------------------------------
+
+    def record(self, pl: float, close_time: datetime) -> None:
+        """
+        決済イベントを1件反映する。
+
+        Args:
+            pl: 実現損益（円）
+            close_time: 決済時刻（naive は UTC とみなす）
+        """
+        with self._lock:
+            self._record(pl, close_time)
+
+    def rebuild(self, trades: Iterable[dict]) -> None:
+        """
+        取引履歴から作り直す。
+
+        Args:
+            trades: 決済順の {"pl": float, "close_time": datetime} の並び
+        """
+        with self._lock:
+            self._reset()
+            for trade in trades:
+                self._record(trade["pl"], trade["close_time"])
+
+    def _record(self, pl: float, close_time: datetime) -> None:
+        close_time = _to_utc(close_time)
+        if not pl < 0:
+            # 勝ちまたは引き分けで連敗が途切れる
+            self._streak.clear()
+            return
+        self._streak.append(close_time)
+
+        loss = -Fraction(pl)
+        pos = bisect.bisect_right(self._times, close_time)
+        self._times.insert(pos, close_time)
+        self._losses.insert(pos, loss)
+        for window in _WINDOWS:
+            start = self._applied[window]
+            if start is None:
+                continue
+            if close_time >= start:
+                self._sums[window] += loss
+            else:
+                # 窓より前に入った（決済時刻が遡る取り込み）: 開始位置だけずらす
+                self._index[window] += 1
+
+    # ------------------------------------------------------------------
+    # 照会
+    # ------------------------------------------------------------------
+
+    def losses(self, now: datetime) -> tuple[float, float, float]:
+        """
+        now 時点の (日次, 週次, 月次) 損失合計（正の値、円）を返す。
+        """
+        now = _to_utc(now)
+        with self._lock:
+            for window, start in window_starts(now).items():
+                self._advance(window, start)
+            self._compact()
+            return tuple(float(self._sums[w]) for w in _WINDOWS)
+
+    def consecutive_losses(self, now: Optional[datetime] = None) -> int:
+        """
+        直近の連続負け数。
+
+        now を渡した場合、保持期間（30日）を過ぎた損失は連敗から除く
+        （全件走査が対象とするメモリ上の履歴と同じ範囲）。
+        """
+        with self._lock:
+            if now is not None:
+                cutoff = _to_utc(now) - _RETENTION
+                while self._streak and self._streak[0] <= cutoff:
+                    self._streak.popleft()
+            return len(self._streak)
+
+    def __len__(self) -> int:
+        """保持している損失件数"""
+        with self._lock:
+            return len(self._times)
+
+    # ------------------------------------------------------------------
+    # 内部
+    # ------------------------------------------------------------------
+
+    def _advance(self, window: str, start: datetime) -> None:
+        """窓の開始時刻を start に進め、外に出た損失を合計から差し引く。"""
+        applied = self._applied[window]
+        if applied is not None and start < applied:
+            # 時刻が巻き戻った（時計補正など）: 開始位置を引き直す
+            applied = None
+        if applied is None:
+            index = bisect.bisect_left(self._times, start)
+            self._index[window] = index
+            self._sums[window] = sum(self._losses[index:], Fraction(0))
+        else:
+            index = self._index[window]
+            times = self._times
+            while index < len(times) and times[index] < start:
+                self._sums[window] -= self._losses[index]
+                index += 1
+            self._index[window] = index
+        self._applied[window] = start
+
+    def _compact(self) -> None:
+        """保持期間外（月次窓の開始より _COMPACT_MARGIN 以上前）の損失を捨てる。"""
+        expired = min(self._index.values())
+        if expired < _COMPACT_THRESHOLD:
+            return
+        cutoff = self._applied["monthly"] - _COMPACT_MARGIN
+        expired = min(expired, bisect.bisect_left(self._times, cutoff))
+        if expired < _COMPACT_THRESHOLD:
+            return
+        del self._times[:expired]
+        del self._losses[:expired]
+        for window in _WINDOWS:
+            self._index[window] -= expired
+
+
+def load_closed_trades(
+    db_path: Path, now: Optional[datetime] = None
+) -> list[dict]:
+    """
+    trades テーブルから保持期間内の決済済みトレードを決済順に読み出す。
+
+    LossLedger.rebuild() に渡して起動時に損失集計を復元する。
+    テーブルが無い（初回起動）場合は空リストを返す。
+
+    Returns:
+        [{"pl": float, "close_time": datetime}, ...]（決済時刻・id の昇順）
+    """
+    now = _to_utc(now or datetime.now(timezone.utc))
+    since = now - _RETENTION
+    try:
+        with sqlite3.connect(str(db_path)) as conn:
+            rows = conn.execute(
+                """SELECT pl, closed_at FROM trades
+                   WHERE status = 'closed' AND closed_at IS NOT NULL
+                   ORDER BY closed_at, id"""
+            ).fetchall()
+    except sqlite3.OperationalError as e:
+        logger.info("trades テーブルを読めないため損失集計は空から開始: %s", e)
+        return []
+
+    trades = []
+    for pl, closed_at in rows:
+        try:
+            close_time = _to_utc(datetime.fromisoformat(closed_at))
+        except (TypeError, ValueError):
+            logger.warning("closed_at を解釈できない行をスキップ: %r", closed_at)
+            continue
+        if close_time > since:
+            trades.append({"pl": float(pl or 0.0), "close_time": close_time})
+    trades.sort(key=lambda t: t["close_time"])
+    return trades
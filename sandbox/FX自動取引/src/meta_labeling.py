@@ -0,0 +1,457 @@
+"""
+FX自動取引システム — メタラベリング（トリプルバリア・ラベルと特徴量）
+
+一次シグナル（side）の採否を二次モデルで判定する meta-labeling 用に、
+全イベントのラベルと特徴量を NumPy 配列でまとめて計算する。
+
+- triple_barrier_labels(): 全イベントの利確・損切り・時間バリアの初回到達を一括判定
+  （同じ足で両方に触れたら損切りを優先。バー単位ループ版と同じ結果）
+- build_meta_features(): 二次モデルの特徴量列を1回の走査で組み立てる
+  （True Range・リターンを指標間で共有）
+- FeatureCache: データセットの内容ハッシュ（dataset_version）ごとに特徴量を保持し、
+  同じデータ・同じパラメータなら再計算しない（メモリ + 任意でディスク）
+
+使い方:
+    features = FeatureCache().get_or_build(data)
+    labels = triple_barrier_labels(data, event_idx, sides, features["atr"].to_numpy()[event_idx])
+"""
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    META_FEATURE_CACHE_DIR,
+    META_FEATURE_CACHE_VERSION,
+    TRIPLE_BARRIER_MAX_HOLD,
+    TRIPLE_BARRIER_SL_MULT,
+    TRIPLE_BARRIER_TP_MULT,
+)
+
+logger = logging.getLogger(__name__)
+
+# 二次モデルの入力列（build_meta_features が追加する列のうち学習に使うもの）
+META_FEATURE_COLUMNS: tuple[str, ...] = (
+    "rsi", "adx", "atr_over_price", "mfi",
+    "vol20_std", "sma_gap", "sma_gap_abs",
+    "ret_lag_1", "ret_lag_2", "ret_lag_3", "ret_lag_4", "ret_lag_5",
+    "hour", "dow",
+)
+
+# 判定結果（TripleBarrierLabels.outcome の値）
+OUTCOME_TP = "TP"
+OUTCOME_SL = "SL"
+OUTCOME_TIME = "TIME"
+
+# 一度に判定するイベント数（イベント数 × 保有本数 の判定行列が大きくなりすぎないように分割）
+_EVENT_CHUNK = 4096
+
+
+# ------------------------------------------------------------------
+# トリプルバリア
+# ------------------------------------------------------------------
+
+
+@dataclass
+class TripleBarrierLabels:
+    """
+    triple_barrier_labels の結果（event_idx と同じ並びの配列）
+
+    エントリーはイベント足の次の足の始値。時間バリアは
+    min(event_idx + 1 + max_hold, 最終行) の足の終値で手仕舞う。
+    イベント足が最終行（次の足が無い）の場合は label=0, exit_offset=0, raw_return=0。
+    """
+
+    event_idx: np.ndarray
+    side: np.ndarray           # +1 = 買い / -1 = 売り
+    label: np.ndarray          # 1 = 利確 or 時間切れで含み益 / 0 = それ以外
+    exit_offset: np.ndarray    # イベント足から何本後に手仕舞ったか
+    raw_return: np.ndarray     # コスト控除前の価格差（シグナル方向を正）
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    outcome: np.ndarray        # "TP" / "SL" / "TIME"（object配列）
+    window_end: np.ndarray     # 時間バリアの足（行番号）
+
+    def __len__(self) -> int:
+        return len(self.event_idx)
+
+    def to_frame(self, index: Optional[pd.Index] = None) -> pd.DataFrame:
+        """列指向の DataFrame にする（index を渡すとイベント足の時刻を index にする）。"""
+        frame = pd.DataFrame({
+            "idx": self.event_idx,
+            "side": self.side,
+            "label": self.label,
+            "exit_offset": self.exit_offset,
+            "raw_diff": self.raw_return,
+            "entry_price": self.entry_price,
+            "exit_price": self.exit_price,
+            "outcome": self.outcome,
+            "window_end": self.window_end,
+        })
+        if index is not None:
+            frame.index = index[self.event_idx]
+        return frame
+
+
+def triple_barrier_labels(
+    data: pd.DataFrame,
+    event_idx: np.ndarray,
+    sides: np.ndarray,
+    atr: np.ndarray,
+    tp_mult: float = TRIPLE_BARRIER_TP_MULT,
+    sl_mult: float = TRIPLE_BARRIER_SL_MULT,
+    max_hold: int = TRIPLE_BARRIER_MAX_HOLD,
+) -> TripleBarrierLabels:
+    """
+    全イベントのトリプルバリア・ラベルを一括で計算する。
+
+    各イベントについてエントリー足から時間バリアの足までの高値・安値を並べ、
+    利確・損切りバリアに初めて触れた足を探す。同じ足で両方に触れた場合は損切り。
+
+    Args:
+        data: open/high/low/close 列を持つ OHLC DataFrame
+        event_idx: イベント足の行番号
+        sides: イベントごとの方向（+1 = 買い / -1 = 売り）
+        atr: イベントごとのバリア幅の基準（イベント足の ATR）
+        tp_mult: 利確バリアの ATR 倍率
+        sl_mult: 損切りバリアの ATR 倍率
+        max_hold: 時間バリア（エントリー足から数えた本数）
+
+    Returns:
+        TripleBarrierLabels
+
+    Raises:
+        ValueError: event_idx / sides / atr の長さが揃っていない場合
+    """
+    event_idx = np.asarray(event_idx, dtype=np.int64)
+    sides = np.asarray(sides, dtype=np.int64)
+    atr = np.asarray(atr, dtype=float)
+    if not (len(event_idx) == len(sides) == len(atr)):
+        raise ValueError(
+            f"event_idx / sides / atr の長さが一致しません: "
+            f"{len(event_idx)}, {len(sides)}, {len(atr)}"
+        )
+
+    open_ = data["open"].to_numpy(dtype=float)
+    high = data["high"].to_numpy(dtype=float)
+    low = data["low"].to_numpy(dtype=float)
+    close = data["close"].to_numpy(dtype=float)
+    n = len(data)
+    count = len(event_idx)
+
+    label = np.zeros(count, dtype=np.int64)
+    exit_offset = np.zeros(count, dtype=np.int64)
+    raw_return = np.zeros(count, dtype=float)
+    entry_price = np.full(count, np.nan)
+    exit_price = np.full(count, np.nan)
+    outcome = np.full(count, OUTCOME_TIME, dtype=object)
+    window_end = np.minimum(event_idx + 1 + max_hold, n - 1)
+
+    valid = np.flatnonzero(event_idx + 1 < n)
+    offsets = np.arange(max_hold + 1)
+    for chunk_start in range(0, len(valid), _EVENT_CHUNK):
+        pos = valid[chunk_start:chunk_start + _EVENT_CHUNK]
+        idx = event_idx[pos]
+        side = sides[pos]
+        is_long = side == 1
+        entry = open_[idx + 1]
+        upper = entry + np.where(is_long, tp_mult, sl_mult) * atr[pos]
+        lower = entry - np.where(is_long, sl_mult, tp_mult) * atr[pos]
+        end = window_end[pos]
+
+        # (イベント, 保有本数) の判定行列。時間バリアより後の足は判定しない
+        rows = idx[:, None] + 1 + offsets
+        in_window = rows <= end[:, None]
+        rows = np.minimum(rows, n - 1)
+        hit_upper = (high[rows] >= upper[:, None]) & in_window
+        hit_lower = (low[rows] <= lower[:, None]) & in_window
+        touched = hit_upper | hit_lower
+        has_hit = touched.any(axis=1)
+        first = touched.argmax(axis=1)
+
+        # 初回到達の足で損切り側に触れていれば損切り（同じ足の利確より優先）
+        at_first = np.arange(len(pos))
+        stop_hit = np.where(is_long, hit_lower[at_first, first], hit_upper[at_first, first])
+        take_hit = has_hit & ~stop_hit
+        stop_hit &= has_hit
+
+        price = close[end].copy()
+        price[take_hit] = np.where(is_long, upper, lower)[take_hit]
+        price[stop_hit] = np.where(is_long, lower, upper)[stop_hit]
+        diff = (price - entry) * side
+
+        entry_price[pos] = entry
+        exit_price[pos] = price
+        raw_return[pos] = diff
+        exit_offset[pos] = np.where(has_hit, first + 1, end - idx)
+        label[pos] = np.where(has_hit, take_hit, diff > 0).astype(np.int64)
+        chunk_outcome = np.full(len(pos), OUTCOME_TIME, dtype=object)
+        chunk_outcome[take_hit] = OUTCOME_TP
+        chunk_outcome[stop_hit] = OUTCOME_SL
+        outcome[pos] = chunk_outcome
+
+    return TripleBarrierLabels(
+        event_idx=event_idx,
+        side=sides,
+        label=label,
+        exit_offset=exit_offset,
+        raw_return=raw_return,
+        entry_price=entry_price,
+        exit_price=exit_price,
+        outcome=outcome,
+        window_end=window_end,
+    )
+
+
+# ------------------------------------------------------------------
+# 特徴量
+# ------------------------------------------------------------------
+
+
+def _wilder(series: pd.Series, period: int) -> pd.Series:
+    """Wilder 平滑（alpha = 1/period の EMA）"""
+    return series.ewm(alpha=1.0 / period, adjust=False).mean()
+
+
+def _sma(series: pd.Series, period: int) -> pd.Series:
+    return series.rolling(period, min_periods=period).mean()
+
+
+def _rsi(close: pd.Series, period: int) -> pd.Series:
+    delta = close.diff()
+    up = _wilder(delta.clip(lower=0.0), period)
+    down = _wilder(-delta.clip(upper=0.0), period)
+    rs = up / down.replace(0, np.nan)
+    return (100.0 - (100.0 / (1.0 + rs))).fillna(50.0)
+
+
+def _true_range(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    prev_close = close.shift(1)
+    return pd.concat(
+        [(high - low).abs(), (high - prev_close).abs(), (low - prev_close).abs()],
+        axis=1,
+    ).max(axis=1)
+
+
+def _adx(high: pd.Series, low: pd.Series, atr: pd.Series, period: int) -> pd.Series:
+    """ADX（atr は同じ period の Wilder 平滑 True Range）"""
+    up_move = high.diff()
+    down_move = -low.diff()
+    plus_dm = pd.Series(
+        np.where((up_move > down_move) & (up_move > 0), up_move, 0.0), index=high.index,
+    )
+    minus_dm = pd.Series(
+        np.where((down_move > up_move) & (down_move > 0), down_move, 0.0), index=high.index,
+    )
+    atr_nonzero = atr.replace(0, np.nan)
+    plus_di = 100.0 * _wilder(plus_dm, period) / atr_nonzero
+    minus_di = 100.0 * _wilder(minus_dm, period) / atr_nonzero
+    dx = 100.0 * (plus_di - minus_di).abs() / (plus_di + minus_di).replace(0, np.nan)
+    return _wilder(dx, period).fillna(0.0)
+
+
+def _mfi_like(
+    high: pd.Series, low: pd.Series, close: pd.Series, volume: pd.Series, period: int,
+) -> pd.Series:
+    """出来高加重の MFI 風指標（典型価格の上げ下げで出来高を振り分ける）"""
+    typical = (high + low + close) / 3.0
+    flow = typical * volume
+    change = typical.diff()
+    positive = flow.where(change > 0, 0.0).rolling(period, min_periods=1).sum()
+    negative = flow.where(change < 0, 0.0).rolling(period, min_periods=1).sum()
+    ratio = positive / negative.replace(0, np.nan)
+    return (100.0 - 100.0 / (1.0 + ratio)).fillna(50.0)
+
+
+def build_meta_features(
+    data: pd.DataFrame,
+    rsi_period: int = 14,
+    adx_period: int = 14,
+    atr_period: int = 14,
+    mfi_period: int = 14,
+    ma_short: int = 20,
+    ma_long: int = 60,
+) -> pd.DataFrame:
+    """
+    二次モデルの特徴量列を追加した DataFrame を返す（data は変更しない）。
+
+    追加する列: META_FEATURE_COLUMNS と "atr"。True Range の Wilder 平滑
+    （ATR と ADX で同じ期間なら1回だけ計算）と終値リターンは列間で共有する。
+
+    Args:
+        data: DatetimeIndex を持つ OHLC DataFrame（volume / tick_volume 列があれば MFI に使う）
+
+    Raises:
+        ValueError: data が DatetimeIndex を持たない場合（hour / dow 列に必要）
+    """
+    if not isinstance(data.index, pd.DatetimeIndex):
+        raise ValueError("特徴量の計算には DatetimeIndex が必要です")
+    high, low, close = data["high"], data["low"], data["close"]
+
+    true_range = _true_range(high, low, close)
+    smoothed_tr: dict[int, pd.Series] = {}
+    for period in (atr_period, adx_period):
+        if period not in smoothed_tr:
+            smoothed_tr[period] = _wilder(true_range, period)
+    atr = smoothed_tr[atr_period]
+
+    volume_column = "volume" if "volume" in data.columns else "tick_volume"
+    if volume_column in data.columns:
+        mfi = _mfi_like(high, low, close, data[volume_column], mfi_period)
+    else:
+        mfi = pd.Series(50.0, index=data.index)
+
+    returns = close.pct_change()
+    sma_gap = (_sma(close, ma_short) - _sma(close, ma_long)) / close
+
+    columns: dict[str, pd.Series] = {
+        "rsi": _rsi(close, rsi_period),
+        "adx": _adx(high, low, smoothed_tr[adx_period], adx_period),
+        "atr": atr,
+        "atr_over_price": atr / close,
+        "mfi": mfi,
+        "vol20_std": returns.rolling(20, min_periods=5).std(),
+        "sma_gap": sma_gap,
+        "sma_gap_abs": sma_gap.abs(),
+        "ret_lag_1": returns,
+    }
+    for lag in range(2, 6):
+        columns[f"ret_lag_{lag}"] = close.pct_change(lag)
+    columns["hour"] = pd.Series(data.index.hour, index=data.index)
+    columns["dow"] = pd.Series(data.index.dayofweek, index=data.index)
+
+    features = pd.DataFrame(columns, index=data.index)
+    base = data.drop(columns=[c for c in features.columns if c in data.columns])
+    return pd.concat([base, features], axis=1)
+
+
+# ------------------------------------------------------------------
+# 特徴量キャッシュ
+# ------------------------------------------------------------------
+
+
+def dataset_version(data: pd.DataFrame) -> str:
+    """データセット（列名・インデックス・全列の値）の内容ハッシュ"""
+    digest = hashlib.sha256(",".join(map(str, data.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """
+    データセットの版（内容ハッシュ）・特徴量関数・パラメータごとに特徴量を保持する。
+
+    メモリ上は直近 max_entries 件を LRU で保持し、cache_dir を指定すると
+    pickle でディスクにも保存する（別プロセス・次回実行でも再計算しない）。
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = META_FEATURE_CACHE_DIR,
+        max_entries: int = 8,
+    ) -> None:
+        """
+        Args:
+            cache_dir: ディスクキャッシュの保存先（None でメモリのみ）
+            max_entries: メモリに保持する件数
+        """
+        self._cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._max_entries = max_entries
+        self._memory: OrderedDict[str, pd.DataFrame] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_build(
+        self,
+        data: pd.DataFrame,
+        builder: Callable[..., pd.DataFrame] = build_meta_features,
+        **params,
+    ) -> pd.DataFrame:
+        """
+        キャッシュ済みの特徴量を返す。無ければ builder(data, **params) で計算して保存する。
+
+        返す DataFrame はコピーなので、呼び出し側で列を追加してもキャッシュは汚れない。
+        """
+        key = self.cache_key(data, builder, params)
+        cached = self._memory.get(key)
+        if cached is None:
+            cached = self._load(key)
+            if cached is not None:
+                self._remember(key, cached)
+        if cached is not None:
+            self._memory.move_to_end(key)
+            self._hits += 1
+            return cached.copy()
+
+        self._misses += 1
+        features = builder(data, **params)
+        self._remember(key, features)
+        self._store(key, features)
+        return features.copy()
+
+    @staticmethod
+    def cache_key(
+        data: pd.DataFrame, builder: Callable[..., pd.DataFrame], params: dict,
+    ) -> str:
+        """
+        データセットの版・特徴量関数・パラメータ・キャッシュ版数からキーを作る。
+
+        functools.partial の builder は元の関数で識別する（partial で固定した引数はキーに
+        含めないので、並列数など結果を変えない引数だけを渡すこと）。
+        """
+        func = getattr(builder, "func", builder)
+        payload = {
+            "version": META_FEATURE_CACHE_VERSION,
+            "builder": f"{func.__module__}.{func.__qualname__}",
+            "params": params,
+            "data": dataset_version(data),
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=repr).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def _remember(self, key: str, features: pd.DataFrame) -> None:
+        self._memory[key] = features
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self._cache_dir / f"{key}.pkl" if self._cache_dir is not None else None
+
+    def _load(self, key: str) -> Optional[pd.DataFrame]:
+        """ディスクから読む。無い・壊れている場合は None（再計算させる）。"""
+        path = self._path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            logger.warning("特徴量キャッシュの読み込みに失敗: %s (%s)", path, e)
+            return None
+
+    def _store(self, key: str, features: pd.DataFrame) -> None:
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            features.to_pickle(tmp)
+            tmp.replace(path)
+        except OSError as e:
+            logger.warning("特徴量キャッシュの保存に失敗: %s (%s)", path, e)
@@ -8,8 +8,10 @@ FX自動取引システム — MetaTrader 5 ブローカークライアント
 
 import logging
 import math
+import threading
 import time
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
 
 import MetaTrader5 as mt5
 import pandas as pd
@@ -17,6 +19,12 @@ import pandas as pd
 logger = logging.getLogger(__name__)
 
 from src.broker_client import BrokerClient
+from src.candle_store import CandleStore
+from src.config import (
+    CANDLE_DELTA_FETCH_BARS,
+    DEAL_HISTORY_LOOKBACK_DAYS,
+    DEAL_HISTORY_REFETCH_OVERLAP_SEC,
+)
 
 
 # ================================================================
@@ -112,9 +120,12 @@ class Mt5Client(BrokerClient):
     BrokerClientインターフェースを実装する。
     """
 
-    def __init__(self):
+    def __init__(self, candle_store: Optional[CandleStore] = None):
         """MT5ターミナルに接続して初期化する。
 
+        Args:
+            candle_store: 確定足の保存先。指定時は get_prices が差分取得になる
+
         Raises:
             Mt5ClientError: MT5ターミナルへの接続に失敗した場合
         """
@@ -123,6 +134,16 @@ class Mt5Client(BrokerClient):
             raise Mt5ClientError(
                 f"MT5ターミナルへの接続に失敗しました: {error}"
             )
+        self._candle_store = candle_store
+        # 決済履歴キャッシュ（position_id → deals）。get_closed_deals で差分更新。
+        # Mt5Client は全ペアの sync_with_broker で共有されるため、索引の更新・参照は
+        # _deal_lock の内側で行う（全件取り直しと差分追加が競合すると deal を取りこぼす）
+        self._deal_lock = threading.Lock()
+        self._deal_index: dict[int, list] = {}
+        self._deal_tickets: set[tuple] = set()
+        self._deal_count: int = 0
+        self._deal_range_from: Optional[datetime] = None
+        self._deal_fetched_at: Optional[datetime] = None
 
     def __enter__(self):
         return self
@@ -148,8 +169,12 @@ class Mt5Client(BrokerClient):
             count: 取得するローソク足の本数
             granularity: 時間足（例: "H4", "D", "M15"）
 
+        ローソク足ストアが設定されている場合は、保存済みの最終確定足以降の
+        CANDLE_DELTA_FETCH_BARS 本だけを MT5 から取得して確定足を追記し、
+        ストアの確定足 + 形成中の足で count 本を組み立てる。
+
         Returns:
-            OHLCV形式のDataFrame
+            OHLCV形式のDataFrame（インデックス: 足の開始時刻, UTC）
 
         Raises:
             Mt5ClientError: 最大リトライ超過で取得失敗した場合
@@ -157,26 +182,77 @@ class Mt5Client(BrokerClient):
         symbol = to_mt5_symbol(instrument)
         timeframe = to_mt5_timeframe(granularity)
 
+        store = self._candle_store
+        if store is None:
+            return self._rates_to_frame(self._copy_rates(symbol, timeframe, count))
+
+        # 差分取得: 保存済みの最終確定足以降だけを取り直す
+        last_stored = store.last_time(instrument, granularity)
+        delta = (
+            last_stored is not None
+            and store.row_count(instrument, granularity) >= count - 1
+            and CANDLE_DELTA_FETCH_BARS < count
+        )
+        fetch_count = CANDLE_DELTA_FETCH_BARS if delta else count
+        fresh = self._rates_to_frame(self._copy_rates(symbol, timeframe, fetch_count))
+        if delta and (len(fresh) == 0 or fresh.index[0] > last_stored):
+            # 停止期間が長く差分が取得範囲に収まらない → 全量取得に戻る
+            logger.info(
+                "ローソク足ストア: 差分が%d本を超えたため全量取得: %s %s",
+                fetch_count, instrument, granularity,
+            )
+            delta = False
+            fresh = self._rates_to_frame(self._copy_rates(symbol, timeframe, count))
+        if len(fresh) == 0:
+            return fresh
+
+        # 最終行は形成中の足なので保存しない
+        try:
+            store.append(instrument, granularity, fresh.iloc[:-1])
+        except Exception as e:
+            logger.warning("ローソク足ストアへの追記失敗（取得データをそのまま返却）: %s", e)
+            return fresh
+        if not delta:
+            return fresh
+
+        closed = store.read(instrument, granularity, count=count - 1)
+        return pd.concat([closed, fresh.iloc[-1:]])
+
+    def _copy_rates(self, symbol: str, timeframe: int, count: int):
+        """copy_rates_from_pos をリトライ付きで呼び出す。
+
+        Raises:
+            Mt5ClientError: 最大リトライ超過で取得失敗した場合
+        """
         last_error = None
         for attempt in range(MAX_RETRIES + 1):
             rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
             if rates is not None:
-                break
+                return rates
             last_error = mt5.last_error()
             if attempt < MAX_RETRIES:
                 time.sleep(RETRY_DELAY)
-        else:
-            raise Mt5ClientError(
-                f"最大リトライ回数を超えました: {last_error}"
-            )
+        raise Mt5ClientError(
+            f"最大リトライ回数を超えました: {last_error}"
+        )
 
+    @staticmethod
+    def _rates_to_frame(rates) -> pd.DataFrame:
+        """MT5 の rates 構造化配列を OHLCV DataFrame（UTC DatetimeIndex）に変換する。"""
         # numpy structured array → DataFrame
         df = pd.DataFrame(rates)
         if len(df) == 0:
-            return pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
+            return pd.DataFrame(
+                columns=["open", "high", "low", "close", "volume"],
+                index=pd.DatetimeIndex([], tz="UTC", name="datetime"),
+            )
 
         # tick_volume を volume にリネームし、必要なカラムのみ返す
         df = df.rename(columns={"tick_volume": "volume"})
+        if "time" in df.columns:
+            df.index = pd.DatetimeIndex(
+                pd.to_datetime(df["time"], unit="s", utc=True), name="datetime"
+            )
         return df[["open", "high", "low", "close", "volume"]]
 
     # ================================================================
@@ -434,6 +510,7 @@ class Mt5Client(BrokerClient):
 
         SL/TP発動による自動決済はclose_position()を経由しないため、
         reconcile処理で事後的に close_price/realized_pl を復元するために使用する。
+        複数件をまとめて復元する場合は get_closed_deals() を使う。
 
         Args:
             trade_id: ポジションID（ticket番号）
@@ -442,39 +519,102 @@ class Mt5Client(BrokerClient):
             決済情報のdict（close_price, realized_pl, closed_at）。
             取得失敗時は None。
         """
-        from datetime import datetime, timedelta, timezone
+        return self.get_closed_deals([trade_id]).get(trade_id)
 
-        try:
-            ticket = int(trade_id)
-        except (TypeError, ValueError):
-            logger.warning("不正なtrade_id: %s", trade_id)
-            return None
+    def get_closed_deals(self, trade_ids: Iterable[str]) -> dict[str, dict]:
+        """複数の決済済みポジションの決済情報を1回の履歴取得で復元する。
+
+        取引履歴は position_id で索引化してキャッシュし、呼び出しごとに
+        前回取得以降の差分だけを追加取得する（_refresh_deal_index）。
 
-        # MT5の history_deals_get は時間範囲を要求する。
-        # ポジションは数日以内に決済される想定で、過去14日を範囲にする。
-        date_to = datetime.now(timezone.utc) + timedelta(days=1)
-        date_from = date_to - timedelta(days=14)
+        Args:
+            trade_ids: ポジションID（ticket番号）の並び
+
+        Returns:
+            {trade_id: 決済情報dict}。取得できなかった trade_id は含まない。
+        """
+        tickets: dict[str, int] = {}
+        for trade_id in trade_ids:
+            try:
+                tickets[trade_id] = int(trade_id)
+            except (TypeError, ValueError):
+                logger.warning("不正なtrade_id: %s", trade_id)
+        if not tickets:
+            return {}
+
+        with self._deal_lock:
+            index = self._refresh_deal_index()
+            if index is None:
+                return {}
+
+            result: dict[str, dict] = {}
+            for trade_id, ticket in tickets.items():
+                deals = index.get(ticket)
+                if not deals:
+                    logger.warning(
+                        "対象ポジションのdealが見つかりません: ticket=%s, all_deals=%d",
+                        ticket, self._deal_count,
+                    )
+                    continue
+                info = self._summarize_close_deals(trade_id, deals)
+                if info is not None:
+                    result[trade_id] = info
+        return result
+
+    def _refresh_deal_index(self) -> Optional[dict[int, list]]:
+        """取引履歴の索引（position_id → deals）を最新化して返す。
+
+        初回（またはキャッシュ範囲が古くなった場合）は過去
+        DEAL_HISTORY_LOOKBACK_DAYS 日を取得し、以降は前回取得時刻から
+        DEAL_HISTORY_REFETCH_OVERLAP_SEC 遡った範囲だけを取得して追加する。
+        重複は deal の ticket で除く。呼び出し側で _deal_lock を保持すること。
+
+        Returns:
+            索引。初回取得に失敗した場合は None。
+        """
+        now = datetime.now(timezone.utc)
+        # MT5 の history_deals_get は時間範囲を要求する（サーバー時刻のずれを見込んで+1日）
+        date_to = now + timedelta(days=1)
+        date_from = date_to - timedelta(days=DEAL_HISTORY_LOOKBACK_DAYS)
+
+        full = (
+            self._deal_fetched_at is None
+            or self._deal_range_from < date_from - timedelta(days=DEAL_HISTORY_LOOKBACK_DAYS)
+        )
+        fetch_from = (
+            date_from if full
+            else self._deal_fetched_at - timedelta(seconds=DEAL_HISTORY_REFETCH_OVERLAP_SEC)
+        )
 
         # NOTE: mt5.history_deals_get(..., position=ticket) はバージョン依存で
-        # フィルタが効かず全件返すケースがある。安全のため取得後に position_id で
-        # 手動フィルタする。
-        all_deals = mt5.history_deals_get(date_from, date_to)
-        if not all_deals:
+        # フィルタが効かず全件返すケースがある。範囲で全件取得して position_id で索引化する。
+        deals = mt5.history_deals_get(fetch_from, date_to)
+        if deals is None or (full and not deals):
             error = mt5.last_error()
             logger.warning(
-                "決済履歴を取得できませんでした: ticket=%s, mt5_error=%s",
-                ticket, error,
-            )
-            return None
-
-        deals = [d for d in all_deals if d.position_id == ticket]
-        if not deals:
-            logger.warning(
-                "対象ポジションのdealが見つかりません: ticket=%s, all_deals=%d",
-                ticket, len(all_deals),
+                "決済履歴を取得できませんでした: from=%s, mt5_error=%s",
+                fetch_from, error,
             )
-            return None
-
+            return None if full else self._deal_index
+
+        if full:
+            self._deal_index = {}
+            self._deal_tickets = set()
+            self._deal_count = 0
+            self._deal_range_from = date_from
+        for deal in deals:
+            key = (getattr(deal, "ticket", None), deal.position_id, deal.time, deal.entry)
+            if key in self._deal_tickets:
+                continue
+            self._deal_tickets.add(key)
+            self._deal_index.setdefault(deal.position_id, []).append(deal)
+            self._deal_count += 1
+        self._deal_fetched_at = now
+        return self._deal_index
+
+    @staticmethod
+    def _summarize_close_deals(trade_id: str, deals: list) -> Optional[dict]:
+        """1ポジション分の deals から決済情報を組み立てる。"""
         # entry == DEAL_ENTRY_OUT (1) または DEAL_ENTRY_INOUT (2) が決済側
         close_deals = [
             d for d in deals
@@ -483,7 +623,7 @@ class Mt5Client(BrokerClient):
         if not close_deals:
             logger.warning(
                 "決済方向のdealが見つかりません: ticket=%s, deals=%d",
-                ticket, len(deals),
+                trade_id, len(deals),
             )
             return None
 
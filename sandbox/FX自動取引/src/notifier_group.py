@@ -4,24 +4,75 @@ FX自動取引システム — 通知グループモジュール
 複数の通知先（Telegram, Slack等）を統合し、
 一括で通知を送信するコンポジットパターン。
 個別の通知先が失敗しても他の通知先への送信を継続する。
+
+シグナル・エラー通知は通知先ごとに集約する:
+- 静かな状態での1件目はそのまま即時送信する
+- 以降 coalesce_window_sec 以内に来た分は溜め、ウィンドウ終了時に1通のまとめで送る
+  （1件だけなら元の形式のまま送る）
+- 送信はトークンバケットで制限し、トークンが無い間はさらに溜めて次のまとめに含める
+キルスイッチ・ボット状態の通知は集約もレート制限もせず即時送信する
+（その通知先に溜まっている分を先に送り、順序を保つ）。
 """
 
 import logging
-from typing import Any
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from src.config import NOTIFY_BURST, NOTIFY_COALESCE_WINDOW_SEC, NOTIFY_RATE_PER_SEC
+from src.token_bucket import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+# 集約対象のメソッド（それ以外は即時送信）
+_COALESCED_METHODS = frozenset({"notify_signal", "notify_error"})
+
+# 送信1件分: (メソッド名, 位置引数, キーワード引数)
+_Call = tuple[str, tuple, dict]
+
+
+class _Channel:
+    """通知先1つ分の集約状態"""
+
+    __slots__ = ("notifier", "bucket", "pending", "window_until")
+
+    def __init__(self, notifier: Any, bucket: TokenBucket) -> None:
+        self.notifier = notifier
+        self.bucket = bucket
+        self.pending: list[_Call] = []
+        # この時刻まではシグナル・エラー通知を溜める
+        self.window_until = 0.0
+
 
 class NotifierGroup:
     """複数の通知先をまとめて呼び出すコンポジット"""
 
-    def __init__(self, notifiers: list) -> None:
+    def __init__(
+        self,
+        notifiers: list,
+        coalesce_window_sec: float = NOTIFY_COALESCE_WINDOW_SEC,
+        rate_per_sec: float = NOTIFY_RATE_PER_SEC,
+        burst: int = NOTIFY_BURST,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         """
         Args:
             notifiers: TelegramNotifier / SlackNotifier等のリスト。
                       Noneは自動除外される。
+            coalesce_window_sec: シグナル・エラー通知を集約する間隔（0以下で集約しない）
+            rate_per_sec: 通知先ごとの送信レート（トークン補充/秒）
+            burst: 通知先ごとのバースト上限
+            clock: 経過時間の計測に使う時計（テスト用に差し替え可能）
         """
         self._notifiers = [n for n in notifiers if n is not None]
+        self._window_sec = coalesce_window_sec
+        self._clock = clock
+        self._channels = [
+            _Channel(n, TokenBucket(rate_per_sec, burst, clock=clock))
+            for n in self._notifiers
+        ]
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
 
     def _dispatch(self, method_name: str, *args: Any, **kwargs: Any) -> None:
         """
@@ -29,29 +80,57 @@ class NotifierGroup:
 
         各通知先がメソッドを持っていない場合や、呼び出し失敗時は
         ログに記録して次の通知先に進む。
+        シグナル・エラー通知は集約ウィンドウ中なら溜めて後でまとめて送る。
 
         Args:
             method_name: 呼び出すメソッド名
             *args: メソッドに渡す位置引数
             **kwargs: メソッドに渡すキーワード引数
         """
-        for notifier in self._notifiers:
-            if not hasattr(notifier, method_name):
-                logger.debug(
-                    "%s は %s メソッドを持っていません。スキップします。",
-                    type(notifier).__name__,
-                    method_name,
-                )
-                continue
-            try:
-                getattr(notifier, method_name)(*args, **kwargs)
-            except Exception as e:
-                logger.warning(
-                    "%s.%s() の呼び出しに失敗しました: %s",
-                    type(notifier).__name__,
-                    method_name,
-                    e,
-                )
+        call: _Call = (method_name, args, kwargs)
+        deliveries: list[tuple[Any, list[_Call]]] = []
+        with self._lock:
+            now = self._clock()
+            for channel in self._channels:
+                if not hasattr(channel.notifier, method_name):
+                    logger.debug(
+                        "%s は %s メソッドを持っていません。スキップします。",
+                        type(channel.notifier).__name__,
+                        method_name,
+                    )
+                    continue
+                if method_name not in _COALESCED_METHODS or self._window_sec <= 0:
+                    # 即時送信。溜まっている分を先に出して順序を保つ
+                    if channel.pending:
+                        deliveries.append((channel.notifier, channel.pending))
+                        channel.pending = []
+                    deliveries.append((channel.notifier, [call]))
+                    continue
+                if (
+                    not channel.pending
+                    and now >= channel.window_until
+                    and channel.bucket.try_acquire()
+                ):
+                    channel.window_until = now + self._window_sec
+                    deliveries.append((channel.notifier, [call]))
+                else:
+                    channel.pending.append(call)
+            self._schedule_locked(now)
+
+        for notifier, calls in deliveries:
+            self._deliver(notifier, calls)
+
+    def flush(self) -> None:
+        """溜まっている通知をレート制限を無視して全て送る（停止時用）。"""
+        with self._lock:
+            deliveries = [(c.notifier, c.pending) for c in self._channels if c.pending]
+            for channel in self._channels:
+                channel.pending = []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        for notifier, calls in deliveries:
+            self._deliver(notifier, calls)
 
     def notify_signal(self, instrument: str, signal: str, **kwargs: Any) -> None:
         """シグナル通知"""
@@ -73,3 +152,107 @@ class NotifierGroup:
     def notifier_count(self) -> int:
         """登録されている通知先の数"""
         return len(self._notifiers)
+
+    @property
+    def pending_count(self) -> int:
+        """集約待ちの通知件数（全通知先の合計）"""
+        with self._lock:
+            return sum(len(c.pending) for c in self._channels)
+
+    # ------------------------------------------------------------------
+    # 内部: 集約ウィンドウ
+    # ------------------------------------------------------------------
+
+    def _schedule_locked(self, now: float) -> None:
+        """溜まっている通知先があれば、最も早い送信可能時刻にタイマーを張る（ロック保持中に呼ぶ）。"""
+        if self._timer is not None:
+            return
+        due_times = [
+            max(c.window_until, now + c.bucket.wait_time())
+            for c in self._channels
+            if c.pending
+        ]
+        if not due_times:
+            return
+        delay = max(0.0, min(due_times) - now)
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        """ウィンドウが閉じた通知先のまとめを送る。"""
+        deliveries: list[tuple[Any, list[_Call]]] = []
+        with self._lock:
+            self._timer = None
+            now = self._clock()
+            for channel in self._channels:
+                if not channel.pending or now < channel.window_until:
+                    continue
+                if not channel.bucket.try_acquire():
+                    # トークン切れ: さらに溜めて次のまとめに含める
+                    continue
+                deliveries.append((channel.notifier, channel.pending))
+                channel.pending = []
+                channel.window_until = now + self._window_sec
+            self._schedule_locked(now)
+
+        for notifier, calls in deliveries:
+            self._deliver(notifier, calls)
+
+    def _deliver(self, notifier: Any, calls: list[_Call]) -> None:
+        """1通知先へ送る。複数件は notify() で1通のまとめにする。"""
+        if len(calls) > 1 and hasattr(notifier, "notify"):
+            self._invoke(notifier, "notify", (format_digest(calls),), {})
+            return
+        for method_name, args, kwargs in calls:
+            self._invoke(notifier, method_name, args, kwargs)
+
+    @staticmethod
+    def _invoke(notifier: Any, method_name: str, args: tuple, kwargs: dict) -> None:
+        try:
+            getattr(notifier, method_name)(*args, **kwargs)
+        except Exception as e:
+            logger.warning(
+                "%s.%s() の呼び出しに失敗しました: %s",
+                type(notifier).__name__,
+                method_name,
+                e,
+            )
+
+
+def format_digest(calls: list[_Call]) -> str:
+    """
+    溜まった通知を1通のまとめ文面にする。
+
+    同じ内容のエラーは1行にまとめ、件数と最新の連続エラー回数を示す。
+    Telegram(HTML) / Slack(mrkdwn) の両方でそのまま読める平文で返す。
+    """
+    lines: list[str] = []
+    error_lines: dict[str, int] = {}   # エラー内容 → lines 上の位置
+    error_counts: dict[str, tuple[int, int]] = {}  # エラー内容 → (件数, 最新の連続回数)
+    for method_name, args, kwargs in calls:
+        if method_name == "notify_signal":
+            instrument, signal = args[0], args[1]
+            extras = []
+            if kwargs.get("conviction_score"):
+                extras.append(f"確信度 {kwargs['conviction_score']}/10")
+            if kwargs.get("regime"):
+                extras.append(str(kwargs["regime"]))
+            suffix = f"（{', '.join(extras)}）" if extras else ""
+            lines.append(f"・シグナル {instrument} {signal}{suffix}")
+        elif method_name == "notify_error":
+            error_msg, consecutive_count = args[0], args[1]
+            count, _ = error_counts.get(error_msg, (0, 0))
+            error_counts[error_msg] = (count + 1, consecutive_count)
+            if error_msg not in error_lines:
+                error_lines[error_msg] = len(lines)
+                lines.append("")
+        else:
+            lines.append(f"・{method_name} {args}")
+
+    for error_msg, index in error_lines.items():
+        count, consecutive_count = error_counts[error_msg]
+        repeat = f" ×{count}" if count > 1 else ""
+        lines[index] = f"・エラー（連続{consecutive_count}回）{error_msg}{repeat}"
+
+    return f"通知まとめ（{len(calls)}件）\n" + "\n".join(lines)
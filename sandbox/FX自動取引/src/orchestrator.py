@@ -0,0 +1,247 @@
+"""
+FX自動取引システム — マルチペア・オーケストレーター
+
+ペアごとに TradingLoop スレッドを立てる代わりに、1本のスケジューラで
+全ペアの TradingLoop.step() を回す。
+
+- 起床予定が近いペアを同じ tick にまとめ、tick 内のペア別処理は
+  小さなワーカープールで並行実行する。各ペアは自分の step() が終わり
+  次第再スケジュールするため、遅いペアが他のペアを待たせない
+- TickSnapshotBroker が get_positions / get_account_summary を tick ごとに
+  1回だけブローカーへ問い合わせ、同じ tick の全ペアで結果を共有する
+  （ペア数が増えてもこの2つの往復回数は増えない）
+
+価格・スプレッドは通貨ペアごとの取得になるため、引き続き各ペアの
+step() 内で取得する（Mt5Client のローソク足ストア有効時は差分取得）。
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import wait as futures_wait
+from typing import Any, Iterable, Optional
+
+import pandas as pd
+
+from src.broker_client import BrokerClient
+from src.config import ORCHESTRATOR_COALESCE_SEC, ORCHESTRATOR_MAX_WORKERS
+from src.trading_loop import TradingLoop
+
+logger = logging.getLogger(__name__)
+
+
+class TickSnapshotBroker(BrokerClient):
+    """
+    口座・ポジション照会を tick 単位でキャッシュする BrokerClient ラッパー。
+
+    refresh() から次の refresh() までの間、get_positions / get_account_summary は
+    最初の呼び出しで取得した結果を返す。発注・決済を通した場合は状態が
+    変わるため即座にキャッシュを破棄する。その他の呼び出しは委譲する。
+    """
+
+    def __init__(self, broker: BrokerClient) -> None:
+        """
+        Args:
+            broker: 実際のブローカークライアント
+        """
+        self._broker = broker
+        self._lock = threading.Lock()
+        self._positions: Optional[list[dict]] = None
+        self._account: Optional[dict] = None
+
+    def refresh(self) -> None:
+        """キャッシュを破棄する（tick の開始時に呼ぶ）。"""
+        with self._lock:
+            self._positions = None
+            self._account = None
+
+    # ------------------------------------------------------------------
+    # キャッシュ対象
+    # ------------------------------------------------------------------
+
+    def get_positions(self) -> list[dict]:
+        with self._lock:
+            if self._positions is None:
+                self._positions = self._broker.get_positions()
+            return [dict(p) for p in self._positions]
+
+    def get_account_summary(self) -> dict:
+        with self._lock:
+            if self._account is None:
+                self._account = self._broker.get_account_summary()
+            return dict(self._account)
+
+    # ------------------------------------------------------------------
+    # 状態を変える呼び出し（実行後にキャッシュ破棄）
+    # ------------------------------------------------------------------
+
+    def market_order(
+        self, instrument: str, units: int, stop_loss: float, take_profit: float,
+    ) -> dict:
+        try:
+            return self._broker.market_order(instrument, units, stop_loss, take_profit)
+        finally:
+            self.refresh()
+
+    def limit_order(
+        self, instrument: str, units: int, price: float,
+        stop_loss: float, take_profit: float,
+    ) -> dict:
+        try:
+            return self._broker.limit_order(
+                instrument, units, price, stop_loss, take_profit
+            )
+        finally:
+            self.refresh()
+
+    def close_position(self, trade_id: str) -> dict:
+        try:
+            return self._broker.close_position(trade_id)
+        finally:
+            self.refresh()
+
+    # ------------------------------------------------------------------
+    # 委譲
+    # ------------------------------------------------------------------
+
+    def get_prices(self, instrument: str, count: int, granularity: str) -> pd.DataFrame:
+        return self._broker.get_prices(instrument, count, granularity)
+
+    def get_spread(self, instrument: str) -> Optional[float]:
+        return self._broker.get_spread(instrument)
+
+    def get_closed_deal(self, trade_id: str) -> Optional[dict]:
+        return self._broker.get_closed_deal(trade_id)
+
+    def get_closed_deals(self, trade_ids: Iterable[str]) -> dict[str, dict]:
+        return self._broker.get_closed_deals(trade_ids)
+
+    def __getattr__(self, name: str) -> Any:
+        # ブローカー固有のメソッド・属性（Mt5Client 等）はそのまま委譲する
+        return getattr(self._broker, name)
+
+
+class TradingOrchestrator:
+    """
+    複数の TradingLoop を1本のスケジューラで実行する。
+
+    各ループの step() が返す待機秒数から次の起床時刻を管理し、
+    起床時刻に達した（ORCHESTRATOR_COALESCE_SEC 以内に達する）ループを
+    同じ tick でまとめて実行する。
+    """
+
+    def __init__(
+        self,
+        loops: list[TradingLoop],
+        broker: Optional[TickSnapshotBroker] = None,
+        max_workers: int = ORCHESTRATOR_MAX_WORKERS,
+    ) -> None:
+        """
+        Args:
+            loops: 実行する TradingLoop（全ペア）
+            broker: 各ループ・PositionManager・RiskManager が共有するスナップショット。
+                    指定時は tick ごとに refresh() する
+            max_workers: tick 内のペア別処理を並行実行するスレッド数
+
+        Raises:
+            ValueError: loops が空、または max_workers が1未満の場合
+        """
+        if not loops:
+            raise ValueError("loops は1つ以上必要です")
+        if max_workers < 1:
+            raise ValueError(f"max_workers は1以上である必要があります: {max_workers}")
+        self._loops = loops
+        self._broker = broker
+        self._max_workers = max_workers
+        self._stop_event = threading.Event()
+        self._tick_count: int = 0
+
+    def start(self) -> None:
+        """
+        全ループが停止するか stop() が呼ばれるまでスケジューラを回す。
+
+        KeyboardInterrupt でも安全に停止する。
+        """
+        self._stop_event.clear()
+        for loop in self._loops:
+            loop.begin()
+        due = {i: 0.0 for i in range(len(self._loops))}   # 0 = 起動直後に全ペア実行
+        in_flight: dict[Future, int] = {}
+
+        logger.info(
+            "オーケストレーター開始: %dペア, workers=%d",
+            len(self._loops), min(self._max_workers, len(self._loops)),
+        )
+        try:
+            with ThreadPoolExecutor(
+                max_workers=min(self._max_workers, len(self._loops)),
+                thread_name_prefix="pair",
+            ) as pool:
+                while not self._stop_event.is_set():
+                    self._collect_finished(in_flight, due)
+                    for i in [i for i in due if not self._loops[i].is_running]:
+                        del due[i]
+                    if not due and not in_flight:
+                        logger.info("全ループが停止したためオーケストレーターを終了します")
+                        break
+
+                    now = time.monotonic()
+                    if any(t <= now for t in due.values()):
+                        ready = [i for i, t in due.items() if t <= now + ORCHESTRATOR_COALESCE_SEC]
+                        self._run_tick(pool, ready, due, in_flight)
+
+                    wait = min(due.values()) - time.monotonic() if due else None
+                    if in_flight:
+                        # 実行中のペアは終わり次第その場で次の起床時刻を決める
+                        futures_wait(
+                            in_flight,
+                            timeout=None if wait is None else max(wait, 0.0),
+                            return_when=FIRST_COMPLETED,
+                        )
+                    elif wait is not None and wait > 0:
+                        self._stop_event.wait(wait)
+        except KeyboardInterrupt:
+            logger.info("KeyboardInterrupt を受信。オーケストレーターを停止します。")
+        finally:
+            for loop in self._loops:
+                loop.finish()
+            logger.info("オーケストレーター停止: total_ticks=%d", self._tick_count)
+
+    def stop(self) -> None:
+        """スケジューラを安全に停止する（実行中の step() は完了させる）。"""
+        logger.info("オーケストレーターの停止を要求しました。")
+        self._stop_event.set()
+
+    def _run_tick(
+        self,
+        pool: ThreadPoolExecutor,
+        ready: list[int],
+        due: dict[int, float],
+        in_flight: dict[Future, int],
+    ) -> None:
+        """
+        起床したループを1 tick 分投入する。
+
+        完了は待たない。遅いペア（LLM 呼び出し・SignalCoordinator 待ち等）が
+        あっても、他のペアは _collect_finished() で個別に再スケジュールされる。
+        """
+        if self._broker is not None:
+            self._broker.refresh()
+
+        for i in ready:
+            del due[i]
+            in_flight[pool.submit(self._loops[i].step)] = i
+        self._tick_count += 1
+
+    @staticmethod
+    def _collect_finished(in_flight: dict[Future, int], due: dict[int, float]) -> None:
+        """完了した step() の戻り値（待機秒数）から次の起床時刻を決める。"""
+        for future in [f for f in in_flight if f.done()]:
+            i = in_flight.pop(future)
+            due[i] = time.monotonic() + future.result()
+
+    @property
+    def tick_count(self) -> int:
+        """実行した tick 数"""
+        return self._tick_count
@@ -0,0 +1,425 @@
+"""
+FX自動取引システム — パラメータスイープ
+
+戦略・パラメータ空間・データを受け取り、全トライアルを評価して
+1トライアル1行の結果テーブル（パラメータ列 p_* + メトリクス列）を返す。
+
+- 指標（特徴量）列は「特徴量に効くパラメータの組」ごとに1回だけ計算し、
+  その組に属するトライアル全てで使い回す
+- トライアルはプロセスプールに分配する（n_workers=1 なら逐次）
+- checkpoint_path を指定すると完了トライアルを JSONL に追記し、
+  中断後の再実行では完了済みトライアルをスキップする。各行には実行の指紋
+  （データの内容ハッシュ・評価関数/特徴量関数とその固定引数・ソース）を付け、
+  別のペア・データ・評価関数で書かれた行は再利用しない
+
+評価関数は (data, params) -> dict のモジュールレベル関数（または
+functools.partial）で、プロセスプールに渡すため pickle 可能である必要がある。
+Backtesting.py の戦略クラスは StrategyEvaluator でラップして渡す。
+"""
+
+import functools
+import hashlib
+import inspect
+import itertools
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+Evaluator = Callable[[pd.DataFrame, dict[str, Any]], dict[str, Any]]
+FeatureBuilder = Callable[[pd.DataFrame, dict[str, Any]], pd.DataFrame]
+
+
+class SweepError(Exception):
+    """パラメータスイープに関するエラー"""
+
+
+# ------------------------------------------------------------------
+# パラメータ空間
+# ------------------------------------------------------------------
+
+
+def grid(space: dict[str, Sequence[Any]], base: Optional[dict[str, Any]] = None) -> list[dict[str, Any]]:
+    """
+    パラメータ空間の直積を列挙する。
+
+    Args:
+        space: {パラメータ名: 候補値のリスト}
+        base: 全トライアルに共通する既定パラメータ（space の値で上書き）
+
+    Returns:
+        トライアルごとのパラメータ dict のリスト
+    """
+    names = list(space)
+    return [
+        {**(base or {}), **dict(zip(names, values))}
+        for values in itertools.product(*(space[n] for n in names))
+    ]
+
+
+def one_at_a_time(
+    base: dict[str, Any],
+    targets: Iterable[str],
+    deltas_pct: Sequence[float] = (-20, -10, 0, 10, 20),
+) -> list[dict[str, Any]]:
+    """
+    感度分析用に、1パラメータずつ base 値を ±delta% 変動させたトライアルを列挙する。
+
+    各トライアルには変動させたパラメータ名 (_target) と変動率 (_delta_pct) を付ける。
+    先頭が "_" のキーは評価関数には渡らず、結果テーブルにはそのまま列として残る。
+    """
+    trials = []
+    for name in targets:
+        for delta in deltas_pct:
+            params = dict(base)
+            params[name] = base[name] * (1 + delta / 100)
+            params["_target"] = name
+            params["_delta_pct"] = delta
+            trials.append(params)
+    return trials
+
+
+# ------------------------------------------------------------------
+# Backtesting.py 戦略用の評価関数
+# ------------------------------------------------------------------
+
+
+class StrategyEvaluator:
+    """
+    Backtesting.py の戦略クラスを (data, params) -> メトリクス dict の評価関数にする。
+
+    params はクラス属性として上書きしたサブクラスで BacktestEngine.run() を実行する。
+    エンジンはワーカープロセスごとにインメモリDBで1つだけ生成する。
+    """
+
+    def __init__(self, strategy_class: type, engine_class: Optional[type] = None, **run_kwargs: Any) -> None:
+        """
+        Args:
+            strategy_class: Backtesting.py の Strategy サブクラス（モジュールレベルで定義されたもの）
+            engine_class: BacktestEngine またはその派生（省略時 BacktestEngine）
+            **run_kwargs: BacktestEngine.run() に渡す引数（cash, spread など）
+        """
+        self.strategy_class = strategy_class
+        self.engine_class = engine_class
+        self.run_kwargs = run_kwargs
+        self._engine = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = dict(self.__dict__)
+        state["_engine"] = None
+        return state
+
+    def __call__(self, data: pd.DataFrame, params: dict[str, Any]) -> dict[str, Any]:
+        if self._engine is None:
+            from src.backtester import BacktestEngine
+
+            self._engine = (self.engine_class or BacktestEngine)(db_path=":memory:")
+        klass = type(self.strategy_class.__name__, (self.strategy_class,), dict(params))
+        return self._engine.run(data, klass, **self.run_kwargs)
+
+
+# ------------------------------------------------------------------
+# ワーカー
+# ------------------------------------------------------------------
+
+# ワーカープロセスごとに1回だけ受け取るデータと関数
+_worker_data: Optional[pd.DataFrame] = None
+_worker_evaluate: Optional[Evaluator] = None
+_worker_features: Optional[FeatureBuilder] = None
+
+
+def _init_sweep_worker(
+    data: pd.DataFrame,
+    evaluate: Evaluator,
+    features: Optional[FeatureBuilder],
+) -> None:
+    """ワーカー初期化: データと評価関数を保持する。"""
+    global _worker_data, _worker_evaluate, _worker_features
+    _worker_data = data
+    _worker_evaluate = evaluate
+    _worker_features = features
+
+
+def _evaluate_group(
+    data: pd.DataFrame,
+    evaluate: Evaluator,
+    features: Optional[FeatureBuilder],
+    trials: list[tuple[str, dict[str, Any]]],
+) -> list[tuple[str, dict[str, Any]]]:
+    """
+    特徴量パラメータが同じトライアル群を評価する。
+
+    特徴量は群の先頭トライアルのパラメータで1回だけ計算する。
+    個々のトライアルの例外は握りつぶさず error 列として記録する。
+    """
+    prepared = data
+    if features is not None:
+        prepared = features(data, _public(trials[0][1]))
+
+    results = []
+    for key, params in trials:
+        try:
+            metrics = evaluate(prepared, _public(params))
+        except Exception as e:
+            logger.warning("トライアル %s の評価に失敗: %s", key, e)
+            metrics = {"error": str(e)}
+        results.append((key, metrics))
+    return results
+
+
+def _run_group_in_worker(trials: list[tuple[str, dict[str, Any]]]) -> list[tuple[str, dict[str, Any]]]:
+    return _evaluate_group(_worker_data, _worker_evaluate, _worker_features, trials)
+
+
+def _public(params: dict[str, Any]) -> dict[str, Any]:
+    """評価関数に渡すパラメータ（先頭 "_" の注記キーを除く）"""
+    return {k: v for k, v in params.items() if not k.startswith("_")}
+
+
+def _trial_key(params: dict[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True, default=repr)
+
+
+def _callable_identity(obj: Any) -> Any:
+    """
+    評価関数・特徴量関数を指紋に含められる形にする。
+
+    関数・クラスは「モジュール.名前」とソースのハッシュ、functools.partial は
+    元の関数と固定引数、StrategyEvaluator のようなインスタンスはクラスと公開属性で表す。
+    """
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, functools.partial):
+        return {
+            "func": _callable_identity(obj.func),
+            "args": [_callable_identity(a) for a in obj.args],
+            "keywords": {k: _callable_identity(v) for k, v in sorted(obj.keywords.items())},
+        }
+    if inspect.isfunction(obj) or inspect.isclass(obj):
+        try:
+            source = hashlib.sha256(inspect.getsource(obj).encode()).hexdigest()
+        except (OSError, TypeError):
+            source = None
+        return {"name": f"{obj.__module__}.{obj.__qualname__}", "source": source}
+    if isinstance(obj, (list, tuple)):
+        return [_callable_identity(v) for v in obj]
+    if isinstance(obj, dict):
+        return {str(k): _callable_identity(v) for k, v in sorted(obj.items(), key=lambda kv: str(kv[0]))}
+    if hasattr(obj, "__dict__") and callable(obj):
+        return {
+            "class": _callable_identity(type(obj)),
+            "attrs": {
+                k: _callable_identity(v) for k, v in sorted(vars(obj).items())
+                if not k.startswith("_")
+            },
+        }
+    return repr(obj)
+
+
+def _data_fingerprint(data: pd.DataFrame) -> str:
+    """評価対象データ（列名・インデックス・全列の値）の内容ハッシュ"""
+    digest = hashlib.sha256(",".join(map(str, data.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# ------------------------------------------------------------------
+# スイープ本体
+# ------------------------------------------------------------------
+
+
+class ParameterSweep:
+    """
+    パラメータスイープの実行器。
+
+    使い方:
+        sweep = ParameterSweep(
+            evaluate, features=prepare_features,
+            feature_keys=("atr_period", "rsi_period"), n_workers=4,
+            checkpoint_path="data/sweep_ckpt.jsonl",
+        )
+        table = sweep.run(df, grid({"atr_sl_mult": [1.0, 1.5], ...}, base=DEFAULT_PARAMS))
+    """
+
+    def __init__(
+        self,
+        evaluate: Evaluator,
+        features: Optional[FeatureBuilder] = None,
+        feature_keys: Sequence[str] = (),
+        n_workers: int = 1,
+        checkpoint_path: Optional[Path | str] = None,
+    ) -> None:
+        """
+        Args:
+            evaluate: (data, params) -> メトリクス dict
+            features: (data, params) -> 特徴量列を追加した DataFrame。None なら data をそのまま渡す
+            feature_keys: features の結果を左右するパラメータ名。
+                          この組が同じトライアルは特徴量を共有する
+            n_workers: ワーカープロセス数（1 なら逐次実行）
+            checkpoint_path: 完了トライアルを追記する JSONL。None なら再開しない
+        """
+        if n_workers < 1:
+            raise SweepError(f"n_workers は1以上が必要です: {n_workers}")
+        self.evaluate = evaluate
+        self.features = features
+        self.feature_keys = tuple(feature_keys)
+        self.n_workers = n_workers
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+
+    def run(
+        self,
+        data: pd.DataFrame,
+        trials: Sequence[dict[str, Any]],
+        results_path: Optional[Path | str] = None,
+    ) -> pd.DataFrame:
+        """
+        全トライアルを評価し、結果テーブルを返す。
+
+        Args:
+            data: 評価対象データ
+            trials: トライアルごとのパラメータ dict
+            results_path: 指定時は結果テーブルを CSV で保存する
+
+        Returns:
+            トライアル順の DataFrame（パラメータは p_ 接頭辞、注記キーは "_" を除いた名前、
+            以降にメトリクス列）
+        """
+        keyed = [(_trial_key(p), dict(p)) for p in trials]
+        run_id = self._run_fingerprint(data) if self.checkpoint_path is not None else ""
+        done = self._load_checkpoint(run_id)
+        pending = [(k, p) for k, p in keyed if k not in done]
+        if done:
+            logger.info(
+                "チェックポイントから %d / %d トライアルを再利用します",
+                len(keyed) - len(pending), len(keyed),
+            )
+
+        for key, metrics in self._evaluate(data, pending):
+            done[key] = metrics
+            self._append_checkpoint(run_id, key, metrics)
+
+        table = pd.DataFrame([self._row(p, done[k]) for k, p in keyed])
+        if results_path is not None:
+            Path(results_path).parent.mkdir(parents=True, exist_ok=True)
+            table.to_csv(results_path, index=False)
+        return table
+
+    # ------------------------------------------------------------------
+    # 内部
+    # ------------------------------------------------------------------
+
+    def _groups(
+        self, trials: list[tuple[str, dict[str, Any]]]
+    ) -> list[list[tuple[str, dict[str, Any]]]]:
+        """
+        特徴量パラメータの組でトライアルをまとめる。
+
+        並列時は群の数がワーカー数より少ないと遊休が出るため、
+        大きい群を分割する（分割した群ごとに特徴量を再計算する）。
+        """
+        groups: dict[str, list[tuple[str, dict[str, Any]]]] = {}
+        for key, params in trials:
+            feature_params = {k: params.get(k) for k in self.feature_keys}
+            groups.setdefault(_trial_key(feature_params), []).append((key, params))
+
+        result = list(groups.values())
+        if self.n_workers > 1 and len(result) < self.n_workers:
+            chunk = max(1, -(-len(trials) // self.n_workers))
+            result = [g[i:i + chunk] for g in result for i in range(0, len(g), chunk)]
+        return result
+
+    def _evaluate(
+        self, data: pd.DataFrame, trials: list[tuple[str, dict[str, Any]]]
+    ) -> Iterable[tuple[str, dict[str, Any]]]:
+        """トライアルを評価し、完了した群から順に (キー, メトリクス) を返す。"""
+        if not trials:
+            return
+        groups = self._groups(trials)
+
+        if self.n_workers == 1:
+            for group in groups:
+                yield from _evaluate_group(data, self.evaluate, self.features, group)
+            return
+
+        workers = min(self.n_workers, len(groups))
+        logger.info(
+            "%d トライアル（特徴量 %d 組）を %d プロセスで評価します",
+            len(trials), len(groups), workers,
+        )
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_sweep_worker,
+                initargs=(data, self.evaluate, self.features),
+            ) as pool:
+                for results in pool.map(_run_group_in_worker, groups):
+                    yield from results
+        except Exception as e:
+            raise SweepError(f"並列スイープに失敗しました: {e}") from e
+
+    def _run_fingerprint(self, data: pd.DataFrame) -> str:
+        """データ・評価関数・特徴量関数が同じ実行かを識別する指紋"""
+        payload = {
+            "data": _data_fingerprint(data),
+            "evaluate": _callable_identity(self.evaluate),
+            "features": _callable_identity(self.features),
+            "feature_keys": list(self.feature_keys),
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=repr).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _load_checkpoint(self, run_id: str) -> dict[str, dict[str, Any]]:
+        """
+        チェックポイントから同じ実行の完了トライアルを読む（壊れた末尾行は無視）。
+
+        別の実行（指紋が違う・指紋の無い旧形式）の行があれば、同じ実行の行だけを
+        残してファイルを書き直す。
+        """
+        done: dict[str, dict[str, Any]] = {}
+        if self.checkpoint_path is None or not self.checkpoint_path.exists():
+            return done
+        stale = 0
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning("チェックポイントの不完全な行を無視します: %s", self.checkpoint_path)
+                    continue
+                if record.get("run") != run_id:
+                    stale += 1
+                    continue
+                done[record["key"]] = record["metrics"]
+        if stale:
+            logger.info(
+                "チェックポイントの別の実行（データ・評価関数が異なる）の %d 行を破棄します: %s",
+                stale, self.checkpoint_path,
+            )
+            with open(self.checkpoint_path, "w", encoding="utf-8") as f:
+                for key, metrics in done.items():
+                    f.write(self._checkpoint_line(run_id, key, metrics))
+        return done
+
+    def _append_checkpoint(self, run_id: str, key: str, metrics: dict[str, Any]) -> None:
+        if self.checkpoint_path is None:
+            return
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(self._checkpoint_line(run_id, key, metrics))
+
+    @staticmethod
+    def _checkpoint_line(run_id: str, key: str, metrics: dict[str, Any]) -> str:
+        return json.dumps({"run": run_id, "key": key, "metrics": metrics}, default=str) + "\n"
+
+    @staticmethod
+    def _row(params: dict[str, Any], metrics: dict[str, Any]) -> dict[str, Any]:
+        row = {}
+        for k, v in params.items():
+            row[k[1:] if k.startswith("_") else f"p_{k}"] = v
+        row.update(metrics)
+        return row
@@ -0,0 +1,420 @@
+"""
+FX自動取引システム — 構造化パイプライン trace
+
+TradingLoop のシグナルパイプラインに到達したイテレーションごとに、
+各フィルターの判定・スコア・倍率・ステージ別所要時間を1レコードとして
+列指向のバイナリファイルへ追記する（1行サマリログの正規表現による復元を不要にする）。
+
+- 取引スレッドはメモリ上のバッファに積むだけで、ファイル I/O は書き込みスレッドが
+  PIPELINE_TRACE_FLUSH_SEC ごと（または PIPELINE_TRACE_FLUSH_ROWS 件たまったら）にまとめて行う
+- ファイルはレコード時刻の UTC 日付ごとに分け、PIPELINE_TRACE_RETENTION_DAYS より古い日は削除する
+- load_traces() で DataFrame として読み出す（ライブ vs バックテスト・フィルター効果の分析用）
+
+ファイル形式:
+    data/pipeline_trace/trace_YYYYMMDD.ptc
+    フラッシュ1回分のブロックを連続して追記する。
+        b"PTRC" | ヘッダ長（uint32 LE） | ヘッダ JSON {"rows": n, "columns": [[列名, dtype, バイト数], ...]}
+        | 列ごとの生バイト列（ヘッダの列順）
+    文字列列はブロック内の最大長の固定長 Unicode で保存する（切り詰めない）。
+    書き込み途中で止まった末尾のブロックは読み出し時に無視し、次回の追記前に切り詰める。
+
+使い方:
+    writer = PipelineTraceWriter()
+    loop = TradingLoop(..., trace_writer=writer)
+    ...
+    writer.close()
+    df = load_traces(start="2026-05-01", instrument="USD_JPY")
+"""
+
+import json
+import logging
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    PIPELINE_TRACE_DIR,
+    PIPELINE_TRACE_FLUSH_ROWS,
+    PIPELINE_TRACE_FLUSH_SEC,
+    PIPELINE_TRACE_RETENTION_DAYS,
+)
+from src.latency import TOTAL_STAGE
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"PTRC"
+_HEADER_LEN = struct.Struct("<I")
+_FILE_PREFIX = "trace_"
+_FILE_SUFFIX = ".ptc"
+
+# ステージ別所要時間として保存する LatencyRecorder のステージ（列名は ms_<stage>）
+TIMING_STAGES: tuple[str, ...] = (
+    "account", "kill_switch", "sync", "prices", "indicators", "spread",
+    "regime", "strategy", "conviction", "ai", "bear", "coordinator", "order", TOTAL_STAGE,
+)
+
+# 列名 → 型（"i8" / "f8" / "str"）。未到達ステージの値は -1 / NaN / ""
+TRACE_COLUMNS: dict[str, str] = {
+    "ts": "i8",                   # 記録時刻（UNIX ミリ秒）
+    "bar_time": "i8",             # 判定した最新足の時刻（UNIX 秒）
+    "instrument": "str",
+    "iteration": "i8",
+    "decision": "str",            # SKIP / HOLD / REJECT / EXECUTE
+    "final_mult": "f8",
+    "session_status": "str",
+    "session_label": "str",
+    "regime_status": "str",
+    "regime": "str",
+    "regime_confidence": "f8",
+    "adx": "f8",
+    "atr_ratio": "f8",
+    "exposure_mult": "f8",
+    "strategy_status": "str",     # BUY / SELL / HOLD
+    "strategy": "str",
+    "pair_adx_status": "str",
+    "pair_adx_threshold": "f8",
+    "conviction_status": "str",
+    "conviction_score": "f8",
+    "conviction_mult": "f8",
+    "ai_status": "str",           # CONFIRM / CONTRADICT / NEUTRAL / REJECT / SKIP
+    "ai_direction": "str",
+    "ai_confidence": "f8",
+    "ai_mult": "f8",
+    "bear_status": "str",         # PASS / WARN
+    "bear_severity": "f8",
+    "bear_penalty": "f8",
+    **{f"ms_{stage}": "f8" for stage in TIMING_STAGES},
+}
+
+_DEFAULTS = {"i8": -1, "f8": np.nan, "str": ""}
+_NUMPY_DTYPES = {"i8": np.dtype("<i8"), "f8": np.dtype("<f8")}
+_COLUMN_NAMES = tuple(TRACE_COLUMNS)
+
+
+def make_record(instrument: str, iteration: int, trace: dict, now: Optional[float] = None) -> tuple:
+    """
+    TradingLoop.last_pipeline_trace から1レコード（TRACE_COLUMNS の列順のタプル）を作る。
+
+    Args:
+        instrument: 通貨ペア
+        iteration: イテレーション番号
+        trace: {"stages", "decision", "final_mult", "values", "latency_ms"}
+        now: 記録時刻（UNIX 秒、省略時は現在時刻）
+    """
+    row = {name: _DEFAULTS[kind] for name, kind in TRACE_COLUMNS.items()}
+    row["ts"] = int((time.time() if now is None else now) * 1000)
+    row["instrument"] = instrument
+    row["iteration"] = iteration
+    row["decision"] = trace.get("decision") or ""
+    if trace.get("final_mult") is not None:
+        row["final_mult"] = trace["final_mult"]
+    for name, status, _detail in trace.get("stages", ()):
+        column = f"{name}_status"
+        if column in row:
+            row[column] = status
+
+    for name, value in (trace.get("values") or {}).items():
+        if name == "bar_time":
+            row["bar_time"] = int(pd.Timestamp(value).timestamp()) if value is not None else -1
+        elif name in row and value is not None:
+            row[name] = value
+    for stage, ms in (trace.get("latency_ms") or {}).items():
+        column = f"ms_{stage}"
+        if column in row:
+            row[column] = ms
+    return tuple(row[name] for name in _COLUMN_NAMES)
+
+
+# ------------------------------------------------------------------
+# ブロックの読み書き
+# ------------------------------------------------------------------
+
+
+def _encode_block(rows: list[tuple]) -> bytes:
+    """レコードのリストを1ブロック（列ごとの生バイト列）にする。"""
+    columns = []
+    payloads = []
+    for k, (name, kind) in enumerate(TRACE_COLUMNS.items()):
+        values = [row[k] for row in rows]
+        if kind == "str":
+            arr = np.array([str(v) for v in values], dtype=str)
+        else:
+            arr = np.array(values, dtype=_NUMPY_DTYPES[kind])
+        data = arr.tobytes()
+        columns.append([name, arr.dtype.str, len(data)])
+        payloads.append(data)
+    header = json.dumps({"rows": len(rows), "columns": columns}).encode()
+    return b"".join([_MAGIC, _HEADER_LEN.pack(len(header)), header, *payloads])
+
+
+def _read_blocks(path: Path) -> tuple[list[tuple[int, dict[str, np.ndarray]]], int]:
+    """
+    ファイル内の完全なブロックを読む。
+
+    Returns:
+        (ブロックごとの (行数, {列名: 配列}), 完全なブロックの末尾バイト位置)
+    """
+    buf = path.read_bytes()
+    blocks = []
+    pos = 0
+    while pos + len(_MAGIC) + _HEADER_LEN.size <= len(buf):
+        if buf[pos:pos + len(_MAGIC)] != _MAGIC:
+            break
+        (header_len,) = _HEADER_LEN.unpack_from(buf, pos + len(_MAGIC))
+        start = pos + len(_MAGIC) + _HEADER_LEN.size
+        if start + header_len > len(buf):
+            break
+        try:
+            header = json.loads(buf[start:start + header_len])
+        except ValueError:
+            break
+        cursor = start + header_len
+        end = cursor + sum(nbytes for _, _, nbytes in header["columns"])
+        if end > len(buf):
+            break
+        rows = header["rows"]
+        block = {}
+        for name, dtype, nbytes in header["columns"]:
+            block[name] = np.frombuffer(buf, dtype=np.dtype(dtype), count=rows, offset=cursor)
+            cursor += nbytes
+        blocks.append((rows, block))
+        pos = end
+    return blocks, pos
+
+
+def _to_frame(blocks: list[tuple[int, dict[str, np.ndarray]]]) -> pd.DataFrame:
+    """
+    ブロックを連結して DataFrame にする（ts / bar_time は UTC の datetime）。
+
+    列を追加する前に書かれたブロックは、その列を既定値で埋める。
+    """
+    columns = {}
+    for name, kind in TRACE_COLUMNS.items():
+        dtype = np.dtype(str) if kind == "str" else _NUMPY_DTYPES[kind]
+        parts = [
+            block[name] if name in block else np.full(rows, _DEFAULTS[kind], dtype=dtype)
+            for rows, block in blocks
+        ]
+        columns[name] = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+    frame = pd.DataFrame(columns)
+    frame["ts"] = pd.to_datetime(frame["ts"], unit="ms", utc=True)
+    frame["bar_time"] = pd.to_datetime(
+        frame["bar_time"].where(frame["bar_time"] >= 0), unit="s", utc=True,
+    )
+    return frame
+
+
+def read_trace_file(path: Union[str, Path]) -> pd.DataFrame:
+    """1ファイル分のレコードを DataFrame にする（書きかけの末尾ブロックは無視）。"""
+    blocks, _ = _read_blocks(Path(path))
+    return _to_frame(blocks)
+
+
+def trace_files(directory: Union[str, Path] = PIPELINE_TRACE_DIR) -> list[Path]:
+    """trace ファイルを日付順に返す。"""
+    return sorted(Path(directory).glob(f"{_FILE_PREFIX}*{_FILE_SUFFIX}"))
+
+
+def load_traces(
+    directory: Union[str, Path] = PIPELINE_TRACE_DIR,
+    start: Optional[Union[str, pd.Timestamp]] = None,
+    end: Optional[Union[str, pd.Timestamp]] = None,
+    instrument: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    trace を DataFrame として読み出す。
+
+    Args:
+        directory: trace ファイルのディレクトリ
+        start / end: 記録時刻（UTC）の範囲。両端を含む
+        instrument: 通貨ペアで絞る
+
+    Returns:
+        TRACE_COLUMNS の列を持つ DataFrame（ts / bar_time は UTC の datetime）
+    """
+    start_ts = pd.Timestamp(start, tz="UTC") if start is not None else None
+    end_ts = pd.Timestamp(end, tz="UTC") if end is not None else None
+    frames = []
+    for path in trace_files(directory):
+        day = pd.Timestamp(path.stem[len(_FILE_PREFIX):], tz="UTC")
+        if start_ts is not None and day + pd.Timedelta(days=1) <= start_ts.floor("D"):
+            continue
+        if end_ts is not None and day > end_ts:
+            continue
+        frames.append(read_trace_file(path))
+    if not frames:
+        return _to_frame([])
+    frame = pd.concat(frames, ignore_index=True)
+    mask = pd.Series(True, index=frame.index)
+    if start_ts is not None:
+        mask &= frame["ts"] >= start_ts
+    if end_ts is not None:
+        mask &= frame["ts"] <= end_ts
+    if instrument is not None:
+        mask &= frame["instrument"] == instrument
+    return frame[mask].reset_index(drop=True)
+
+
+# ------------------------------------------------------------------
+# 書き込み
+# ------------------------------------------------------------------
+
+
+class PipelineTraceWriter:
+    """
+    trace レコードをバッファし、書き込みスレッドでまとめて日別ファイルへ追記する。
+
+    複数の TradingLoop（ペアごとのスレッド）で1つを共有できる。
+    書き込みの失敗は取引に影響させず warning ログに残す。
+    close() 後に積まれたレコードは呼び出しスレッドで同期的に書き込む。
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path] = PIPELINE_TRACE_DIR,
+        flush_interval_sec: float = PIPELINE_TRACE_FLUSH_SEC,
+        flush_rows: int = PIPELINE_TRACE_FLUSH_ROWS,
+        retention_days: int = PIPELINE_TRACE_RETENTION_DAYS,
+    ) -> None:
+        """
+        Args:
+            directory: trace ファイルの保存先（存在しなければ作成）
+            flush_interval_sec: 書き込みスレッドのフラッシュ間隔（秒）
+            flush_rows: この件数たまったら間隔を待たずにフラッシュする
+            retention_days: これより古い日のファイルを削除する（0 以下なら削除しない）
+
+        Raises:
+            ValueError: flush_interval_sec が0以下、または flush_rows が1未満の場合
+        """
+        if flush_interval_sec <= 0:
+            raise ValueError(f"flush_interval_sec は正の値である必要があります: {flush_interval_sec}")
+        if flush_rows < 1:
+            raise ValueError(f"flush_rows は1以上である必要があります: {flush_rows}")
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._flush_interval_sec = flush_interval_sec
+        self._flush_rows = flush_rows
+        self._retention_days = retention_days
+        self._buffer: list[tuple] = []
+        self._buffer_lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._checked_files: set[Path] = set()
+        self._last_day: Optional[str] = None
+        self._thread = threading.Thread(
+            target=self._run, name=f"trace-writer:{self._directory.name}", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @property
+    def pending(self) -> int:
+        """未書き込みのレコード数"""
+        with self._buffer_lock:
+            return len(self._buffer)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, instrument: str, iteration: int, trace: dict) -> None:
+        """TradingLoop.last_pipeline_trace を1レコードとして積む。"""
+        self.append(make_record(instrument, iteration, trace))
+
+    def append(self, record: tuple) -> None:
+        """make_record() のレコードを積む。"""
+        with self._buffer_lock:
+            self._buffer.append(record)
+            full = len(self._buffer) >= self._flush_rows
+        if self._closed:
+            self.flush()
+        elif full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """
+        バッファを今すぐファイルへ書き込む。
+
+        Returns:
+            書き込んだレコード数
+        """
+        with self._buffer_lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        with self._io_lock:
+            try:
+                self._write_rows(rows)
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning("パイプライン trace の書き込みに失敗（%d件を破棄）: %s", len(rows), e)
+                return 0
+        return len(rows)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """残りを書き切って書き込みスレッドを止める。"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("パイプライン trace 書き込みスレッドが %.1f 秒以内に終了しませんでした", timeout)
+        self.flush()
+
+    # ------------------------------------------------------------------
+    # 内部
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self._flush_interval_sec)
+            self._wake.clear()
+            self.flush()
+
+    def _write_rows(self, rows: list[tuple]) -> None:
+        ts_col = _COLUMN_NAMES.index("ts")
+        by_day: dict[str, list[tuple]] = {}
+        for row in rows:
+            day = time.strftime("%Y%m%d", time.gmtime(row[ts_col] / 1000))
+            by_day.setdefault(day, []).append(row)
+        for day, day_rows in sorted(by_day.items()):
+            path = self._directory / f"{_FILE_PREFIX}{day}{_FILE_SUFFIX}"
+            self._prepare(path)
+            with open(path, "ab") as f:
+                f.write(_encode_block(day_rows))
+            if day != self._last_day:
+                self._last_day = day
+                self._remove_expired(day)
+
+    def _prepare(self, path: Path) -> None:
+        """このプロセスで初めて追記するファイルは、書きかけの末尾ブロックを切り詰める。"""
+        if path in self._checked_files:
+            return
+        self._checked_files.add(path)
+        if not path.exists():
+            return
+        _, valid = _read_blocks(path)
+        if valid < path.stat().st_size:
+            logger.warning("パイプライン trace の不完全な末尾を切り詰めます: %s", path)
+            with open(path, "r+b") as f:
+                f.truncate(valid)
+
+    def _remove_expired(self, today: str) -> None:
+        if self._retention_days <= 0:
+            return
+        cutoff = (pd.Timestamp(today) - pd.Timedelta(days=self._retention_days)).strftime("%Y%m%d")
+        for path in trace_files(self._directory):
+            if path.stem[len(_FILE_PREFIX):] < cutoff:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    logger.warning("古いパイプライン trace を削除できません: %s (%s)", path, e)
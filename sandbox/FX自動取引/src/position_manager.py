@@ -17,6 +17,7 @@ import pandas as pd
 
 from src.broker_client import BrokerClient
 from src.config import CORRELATION_GROUPS, MAX_CORRELATION_EXPOSURE, MAX_OPEN_POSITIONS
+from src.db_writer import DbWriter, get_writer
 from src.risk_manager import RiskManager
 from src.strategy.base import Signal, StrategyBase
 from src.trade_postmortem import TradePostMortem
@@ -42,6 +43,7 @@ class PositionManager:
         risk_manager: RiskManager,
         max_positions: int = MAX_OPEN_POSITIONS,
         db_path: Optional[Path] = None,
+        postmortem_enabled: bool = True,
     ) -> None:
         """
         Args:
@@ -50,6 +52,7 @@ class PositionManager:
             max_positions: 最大同時ポジション数
             db_path: SQLiteデータベースパス（tradesテーブル用。
                      未設定時はDB永続化を行わない）
+            postmortem_enabled: 決済時のLLM事後分析を行うか（リプレイでは False）
 
         Raises:
             ValueError: max_positions が1未満の場合
@@ -65,9 +68,12 @@ class PositionManager:
         self._trade_history: list[dict] = []
         self._lock = threading.Lock()  # マルチスレッド対応: ポジション操作の排他制御
         self._db_path = db_path
-        self._postmortem = TradePostMortem(db_path=db_path)
+        self._postmortem = TradePostMortem(db_path=db_path, enabled=postmortem_enabled)
+        self._db_writer: Optional[DbWriter] = None
         if db_path is not None:
             self._init_trades_db()
+            # 取引スレッドはキューに積むだけ（コミットは書き込みスレッドがまとめて行う）
+            self._db_writer = get_writer(db_path)
 
     # ------------------------------------------------------------------
     # SQLite 永続化
@@ -130,50 +136,47 @@ class PositionManager:
         bot 再起動後の sync_with_broker (broker_only パス) では position に ai_* が無いため、
         既存行の ai_* を NULL で上書きしないよう COALESCE で保護する。
         """
-        if self._db_path is None:
+        if self._db_writer is None:
             return
-        try:
-            with sqlite3.connect(str(self._db_path)) as conn:
-                # ON CONFLICT(trade_id): 既存の ai_* は新値が NULL なら維持、
-                # それ以外のフィールドは新値で上書き。
-                conn.execute(
-                    """INSERT INTO trades
-                       (trade_id, instrument, units, open_price,
-                        stop_loss, take_profit, opened_at, status,
-                        ai_decision, ai_confidence, ai_reasons,
-                        ai_direction, ai_regime)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, 'open', ?, ?, ?, ?, ?)
-                       ON CONFLICT(trade_id) DO UPDATE SET
-                           instrument    = excluded.instrument,
-                           units         = excluded.units,
-                           open_price    = excluded.open_price,
-                           stop_loss     = excluded.stop_loss,
-                           take_profit   = excluded.take_profit,
-                           opened_at     = excluded.opened_at,
-                           status        = excluded.status,
-                           ai_decision   = COALESCE(excluded.ai_decision,   ai_decision),
-                           ai_confidence = COALESCE(excluded.ai_confidence, ai_confidence),
-                           ai_reasons    = COALESCE(excluded.ai_reasons,    ai_reasons),
-                           ai_direction  = COALESCE(excluded.ai_direction,  ai_direction),
-                           ai_regime     = COALESCE(excluded.ai_regime,     ai_regime)
-                    """,
-                    (
-                        position["trade_id"],
-                        position["instrument"],
-                        position["units"],
-                        position["open_price"],
-                        position["stop_loss"],
-                        position["take_profit"],
-                        position["opened_at"].isoformat(),
-                        position.get("ai_decision"),
-                        position.get("ai_confidence"),
-                        position.get("ai_reasons"),
-                        position.get("ai_direction"),
-                        position.get("ai_regime"),
-                    ),
-                )
-        except sqlite3.Error as e:
-            logger.warning("ポジションオープンのDB記録に失敗: %s", e)
+        # ON CONFLICT(trade_id): 既存の ai_* は新値が NULL なら維持、
+        # それ以外のフィールドは新値で上書き。
+        self._db_writer.execute(
+            """INSERT INTO trades
+               (trade_id, instrument, units, open_price,
+                stop_loss, take_profit, opened_at, status,
+                ai_decision, ai_confidence, ai_reasons,
+                ai_direction, ai_regime)
+               VALUES (?, ?, ?, ?, ?, ?, ?, 'open', ?, ?, ?, ?, ?)
+               ON CONFLICT(trade_id) DO UPDATE SET
+                   instrument    = excluded.instrument,
+                   units         = excluded.units,
+                   open_price    = excluded.open_price,
+                   stop_loss     = excluded.stop_loss,
+                   take_profit   = excluded.take_profit,
+                   opened_at     = excluded.opened_at,
+                   status        = excluded.status,
+                   ai_decision   = COALESCE(excluded.ai_decision,   ai_decision),
+                   ai_confidence = COALESCE(excluded.ai_confidence, ai_confidence),
+                   ai_reasons    = COALESCE(excluded.ai_reasons,    ai_reasons),
+                   ai_direction  = COALESCE(excluded.ai_direction,  ai_direction),
+                   ai_regime     = COALESCE(excluded.ai_regime,     ai_regime)
+            """,
+            (
+                position["trade_id"],
+                position["instrument"],
+                position["units"],
+                position["open_price"],
+                position["stop_loss"],
+                position["take_profit"],
+                position["opened_at"].isoformat(),
+                position.get("ai_decision"),
+                position.get("ai_confidence"),
+                position.get("ai_reasons"),
+                position.get("ai_direction"),
+                position.get("ai_regime"),
+            ),
+            error_message="ポジションオープンのDB記録に失敗",
+        )
 
     def _db_save_closed_trade(
         self,
@@ -183,18 +186,15 @@ class PositionManager:
         closed_at: datetime,
     ) -> None:
         """決済済みトレードをDBに反映する。"""
-        if self._db_path is None:
+        if self._db_writer is None:
             return
-        try:
-            with sqlite3.connect(str(self._db_path)) as conn:
-                conn.execute(
-                    """UPDATE trades
-                       SET close_price=?, pl=?, closed_at=?, status='closed'
-                       WHERE trade_id=?""",
-                    (close_price, pl, closed_at.isoformat(), trade_id),
-                )
-        except sqlite3.Error as e:
-            logger.warning("ポジション決済のDB記録に失敗: %s", e)
+        self._db_writer.execute(
+            """UPDATE trades
+               SET close_price=?, pl=?, closed_at=?, status='closed'
+               WHERE trade_id=?""",
+            (close_price, pl, closed_at.isoformat(), trade_id),
+            error_message="ポジション決済のDB記録に失敗",
+        )
 
     # ------------------------------------------------------------------
     # 相関チェック
@@ -332,18 +332,14 @@ class PositionManager:
                 )
                 return None
 
-            # 5. 損失上限チェック
-            is_allowed, reason = self._risk_manager.check_loss_limits(
-                self._trade_history
-            )
+            # 5. 損失上限チェック（決済ごとに更新される損失集計を参照）
+            is_allowed, reason = self._risk_manager.check_loss_limits()
             if not is_allowed:
                 logger.warning("損失上限に到達のため取引不可: %s", reason)
                 return None
 
             # 6. 連続負けチェック
-            _, is_stopped = self._risk_manager.check_consecutive_losses(
-                self._trade_history
-            )
+            _, is_stopped = self._risk_manager.check_consecutive_losses()
             if is_stopped:
                 logger.warning("連続負け上限に到達のため取引不可")
                 return None
@@ -529,6 +525,9 @@ class PositionManager:
                 "close_time": datetime.now(timezone.utc),
             }
             self._trade_history.append(history_entry)
+            self._risk_manager.record_trade_close(
+                history_entry["pl"], history_entry["close_time"]
+            )
             self._db_save_closed_trade(
                 trade_id,
                 history_entry["close_price"],
@@ -675,24 +674,29 @@ class PositionManager:
 
             # H-3: ローカルのみのポジションを自動除去（ブローカーで決済済み）
             if local_only:
-                for orphan_id in local_only:
-                    target = next(
-                        (p for p in self._open_positions if p["trade_id"] == orphan_id),
-                        None,
+                orphan_ids = set(local_only)
+                open_by_id = {
+                    p["trade_id"]: p for p in self._open_positions
+                    if p["trade_id"] in orphan_ids
+                }
+                self._open_positions = [
+                    p for p in self._open_positions if p["trade_id"] not in orphan_ids
+                ]
+
+                # ブローカーの取引履歴から決済情報を一括で復元（SL/TP自動決済対応）
+                deals: dict[str, dict] = {}
+                try:
+                    deals = self._broker_client.get_closed_deals(local_only)
+                except Exception as e:
+                    logger.warning(
+                        "決済履歴の取得に失敗: trade_ids=%s, error=%s",
+                        local_only, e,
                     )
-                    if target:
-                        self._open_positions.remove(target)
-
-                        # ブローカーの取引履歴から決済情報を復元（SL/TP自動決済対応）
-                        deal = None
-                        try:
-                            deal = self._broker_client.get_closed_deal(orphan_id)
-                        except Exception as e:
-                            logger.warning(
-                                "決済履歴の取得に失敗: trade_id=%s, error=%s",
-                                orphan_id, e,
-                            )
 
+                for orphan_id in local_only:
+                    target = open_by_id.get(orphan_id)
+                    if target:
+                        deal = deals.get(orphan_id)
                         if deal is not None:
                             close_price = float(deal.get("close_price", 0.0))
                             realized_pl = float(deal.get("realized_pl", 0.0))
@@ -716,6 +720,7 @@ class PositionManager:
                             "opened_at": target["opened_at"],
                             "close_time": close_time,
                         })
+                        self._risk_manager.record_trade_close(realized_pl, close_time)
                         self._db_save_closed_trade(
                             orphan_id, close_price, realized_pl, close_time
                         )
@@ -12,6 +12,7 @@ import enum
 import logging
 from dataclasses import dataclass
 
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 
@@ -49,6 +50,46 @@ class RegimeInfo:
     reasoning: str              # 判定理由（日本語）
 
 
+@dataclass
+class RegimeSeries:
+    """
+    全足分のレジーム判定結果（detect_series の戻り値）
+
+    i 番目の要素は data.iloc[:i + 1] を detect() に渡した結果と一致する。
+    regime は RegimeType.value の文字列配列（"trending" 等）で、
+    series.regime == RegimeType.VOLATILE.value のような配列演算でフィルタに使える。
+    """
+
+    index: pd.Index
+    regime: np.ndarray               # RegimeType.value（object配列）
+    confidence: np.ndarray
+    exposure_multiplier: np.ndarray
+    adx: np.ndarray                  # 判定不能の足は0.0（detect と同じ）
+    atr_ratio: np.ndarray
+    bbw_ratio: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.regime)
+
+    def mask(self, regime: RegimeType) -> np.ndarray:
+        """指定レジームの足を True とする bool 配列"""
+        return self.regime == regime.value
+
+    def to_frame(self) -> pd.DataFrame:
+        """列 regime / confidence / exposure_multiplier / adx / atr_ratio / bbw_ratio の DataFrame"""
+        return pd.DataFrame(
+            {
+                "regime": self.regime,
+                "confidence": self.confidence,
+                "exposure_multiplier": self.exposure_multiplier,
+                "adx": self.adx,
+                "atr_ratio": self.atr_ratio,
+                "bbw_ratio": self.bbw_ratio,
+            },
+            index=self.index,
+        )
+
+
 class RegimeDetector:
     """
     市場レジーム検出器
@@ -103,17 +144,12 @@ class RegimeDetector:
         Returns:
             RegimeInfo: 判定結果
         """
-        # 監査A4: pair_config が与えられたらペア別閾値を優先、なければ全ペア共通の
-        # config.py グローバル値を使う。これによりペア別 ADX 基準を尊重しつつ
-        # 後方互換性を保つ。
-        cfg = pair_config or {}
-        adx_trending = cfg.get("regime_adx_trending", REGIME_ADX_TRENDING)
-        adx_ranging = cfg.get("regime_adx_ranging", REGIME_ADX_RANGING)
-        atr_volatile_ratio = cfg.get("regime_atr_volatile_ratio", REGIME_ATR_VOLATILE_RATIO)
-        bbw_squeeze_ratio = cfg.get("regime_bbw_squeeze_ratio", REGIME_BBW_SQUEEZE_RATIO)
+        adx_trending, adx_ranging, atr_volatile_ratio, bbw_squeeze_ratio = (
+            self._thresholds(pair_config)
+        )
 
         # 必要な最小データ数（各指標の計算に十分な行数）
-        min_rows = max(self._adx_period, self._atr_period, self._bb_length) * 2
+        min_rows = self._min_rows
         if len(data) < min_rows:
             logger.warning(
                 "データ行数が不足しています（%d行 < 必要最低%d行）。UNKNOWNを返します。",
@@ -246,12 +282,142 @@ class RegimeDetector:
             ),
         )
 
+    def detect_series(
+        self,
+        data: pd.DataFrame,
+        pair_config: dict | None = None,
+    ) -> RegimeSeries:
+        """
+        全足のレジームを1回のベクトル演算で判定する（バックテスト・分析用）。
+
+        ADX/ATR/BBW を全期間で1回だけ計算し、各足の時点で detect() が使う
+        「現在ATR / それまでのATR中央値」「現在BBW / それまでのBBW平均」を
+        expanding 集計で求める。閾値と確信度・倍率の式は detect() と同じ。
+
+        Args:
+            data: OHLCV形式のDataFrame（high, low, close列が必須）
+            pair_config: ペア別閾値（detect() と同じキー）
+
+        Returns:
+            RegimeSeries: 足ごとの判定結果（データ不足・計算不能の足は UNKNOWN）
+        """
+        adx_trending, adx_ranging, atr_volatile_ratio, bbw_squeeze_ratio = (
+            self._thresholds(pair_config)
+        )
+        n = len(data)
+
+        adx = self._adx_series(data)
+        adx = (
+            np.full(n, np.nan) if adx is None
+            else adx.to_numpy(dtype=float)
+        )
+        atr_ratio = self._expanding_ratio(self._atr_series(data), "median", n)
+        bbw_ratio = self._expanding_ratio(self._bbw_series(data), "mean", n)
+
+        valid = (
+            (np.arange(n) + 1 >= self._min_rows)
+            & np.isfinite(adx)
+            & np.isfinite(atr_ratio)
+            & np.isfinite(bbw_ratio)
+        )
+
+        volatile = valid & (atr_ratio > atr_volatile_ratio)
+        rest = valid & ~volatile
+        strong_trend = rest & (adx >= adx_trending)
+        rest &= ~strong_trend
+        ranging = rest & (adx < adx_ranging)
+        rest &= ~ranging
+        squeeze = rest & (bbw_ratio < bbw_squeeze_ratio)
+        weak_trend = rest & ~squeeze
+
+        adx_range = adx_trending - adx_ranging
+        adx_position = (
+            (adx - adx_ranging) / adx_range if adx_range > 0 else np.full(n, 0.5)
+        )
+        strong_conf = np.minimum(1.0, (adx - adx_trending) / 15.0 + 0.7)
+
+        with np.errstate(invalid="ignore"):
+            confidence = np.select(
+                [volatile, strong_trend, ranging, squeeze, weak_trend],
+                [
+                    np.minimum(1.0, (atr_ratio - atr_volatile_ratio) / 1.0 + 0.7),
+                    strong_conf,
+                    np.minimum(1.0, (adx_ranging - adx) / 10.0 + 0.7),
+                    np.clip(0.5 + (bbw_squeeze_ratio - bbw_ratio) * 0.3, 0.3, 1.0),
+                    0.3 + adx_position * 0.3,
+                ],
+                default=0.0,
+            )
+            exposure = np.select(
+                [volatile, strong_trend, ranging, squeeze, weak_trend],
+                [0.0, np.where(strong_conf > 0.7, 1.2, 1.0), 0.3, 0.3, 1.0],
+                default=0.5,
+            )
+        regime = np.select(
+            [volatile, strong_trend | weak_trend, ranging | squeeze],
+            [
+                RegimeType.VOLATILE.value,
+                RegimeType.TRENDING.value,
+                RegimeType.RANGING.value,
+            ],
+            default=RegimeType.UNKNOWN.value,
+        ).astype(object)
+
+        return RegimeSeries(
+            index=data.index,
+            regime=regime,
+            confidence=confidence,
+            exposure_multiplier=exposure,
+            adx=np.where(valid, adx, 0.0),
+            atr_ratio=np.where(valid, atr_ratio, 0.0),
+            bbw_ratio=np.where(valid, bbw_ratio, 0.0),
+        )
+
     # ================================================================
     # 内部ヘルパー
     # ================================================================
 
-    def _calc_adx(self, data: pd.DataFrame) -> float | None:
-        """ADX値を算出する。計算失敗時はNoneを返す。"""
+    @property
+    def _min_rows(self) -> int:
+        """判定に必要な最小データ数（各指標の計算に十分な行数）"""
+        return max(self._adx_period, self._atr_period, self._bb_length) * 2
+
+    @staticmethod
+    def _thresholds(pair_config: dict | None) -> tuple[float, float, float, float]:
+        """(adx_trending, adx_ranging, atr_volatile_ratio, bbw_squeeze_ratio) を返す。"""
+        # 監査A4: pair_config が与えられたらペア別閾値を優先、なければ全ペア共通の
+        # config.py グローバル値を使う。これによりペア別 ADX 基準を尊重しつつ
+        # 後方互換性を保つ。
+        cfg = pair_config or {}
+        return (
+            cfg.get("regime_adx_trending", REGIME_ADX_TRENDING),
+            cfg.get("regime_adx_ranging", REGIME_ADX_RANGING),
+            cfg.get("regime_atr_volatile_ratio", REGIME_ATR_VOLATILE_RATIO),
+            cfg.get("regime_bbw_squeeze_ratio", REGIME_BBW_SQUEEZE_RATIO),
+        )
+
+    @staticmethod
+    def _expanding_ratio(
+        values: pd.Series | None, how: str, n: int
+    ) -> np.ndarray:
+        """
+        各足の「直近の有効値 / それまでの有効値の中央値（または平均）」を返す。
+
+        有効値が2つ未満の足・基準値が0の足は NaN。
+        """
+        if values is None:
+            return np.full(n, np.nan)
+        expanding = values.expanding(min_periods=2)
+        base = expanding.median() if how == "median" else expanding.mean()
+        base = base.to_numpy(dtype=float)
+        current = values.ffill().to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = current / base
+        ratio[base == 0] = np.nan
+        return ratio
+
+    def _adx_series(self, data: pd.DataFrame) -> pd.Series | None:
+        """ADX系列を算出する。計算失敗時はNoneを返す。"""
         adx_df = ta.adx(
             data["high"], data["low"], data["close"],
             length=self._adx_period,
@@ -264,8 +430,15 @@ class RegimeDetector:
         if adx_col not in adx_df.columns:
             logger.warning("ADX列が見つかりません: %s", adx_col)
             return None
+        return adx_df[adx_col]
 
-        value = adx_df[adx_col].iloc[-1]
+    def _calc_adx(self, data: pd.DataFrame) -> float | None:
+        """ADX値を算出する。計算失敗時はNoneを返す。"""
+        adx = self._adx_series(data)
+        if adx is None:
+            return None
+
+        value = adx.iloc[-1]
         if pd.isna(value):
             logger.warning("ADX値がNaNです。")
             return None
@@ -274,12 +447,8 @@ class RegimeDetector:
 
     def _calc_atr_ratio(self, data: pd.DataFrame) -> float | None:
         """現在ATR / 中央値ATR の比率を算出する。計算失敗時はNoneを返す。"""
-        atr = ta.atr(
-            data["high"], data["low"], data["close"],
-            length=self._atr_period,
-        )
+        atr = self._atr_series(data)
         if atr is None:
-            logger.warning("ATR計算に失敗しました。")
             return None
 
         # NaN を除いた有効値のみで中央値を算出
@@ -297,8 +466,19 @@ class RegimeDetector:
 
         return float(current_atr / median_atr)
 
-    def _calc_bbw_ratio(self, data: pd.DataFrame) -> float | None:
-        """BBW / 平均BBW の比率を算出する。計算失敗時はNoneを返す。"""
+    def _atr_series(self, data: pd.DataFrame) -> pd.Series | None:
+        """ATR系列を算出する。計算失敗時はNoneを返す。"""
+        atr = ta.atr(
+            data["high"], data["low"], data["close"],
+            length=self._atr_period,
+        )
+        if atr is None:
+            logger.warning("ATR計算に失敗しました。")
+            return None
+        return atr
+
+    def _bbw_series(self, data: pd.DataFrame) -> pd.Series | None:
+        """ボリンジャーバンド幅（BBW）系列を算出する。計算失敗時はNoneを返す。"""
         bbands = ta.bbands(
             data["close"],
             length=self._bb_length,
@@ -320,8 +500,15 @@ class RegimeDetector:
                 )
                 return None
             bbw_col = bbw_candidates[0]
+        return bbands[bbw_col]
+
+    def _calc_bbw_ratio(self, data: pd.DataFrame) -> float | None:
+        """BBW / 平均BBW の比率を算出する。計算失敗時はNoneを返す。"""
+        bbw = self._bbw_series(data)
+        if bbw is None:
+            return None
 
-        bbw = bbands[bbw_col].dropna()
+        bbw = bbw.dropna()
         if len(bbw) < 2:
             logger.warning("有効なBBW値が不足しています。")
             return None
@@ -0,0 +1,608 @@
+"""
+FX自動取引システム — ヒストリカル・リプレイ
+
+本番と同じ TradingLoop.run_once()（セッションフィルター・レジーム・戦略・
+conviction・Bear Researcher・pair_config・PositionManager・RiskManager）に
+過去データを流し込み、ライブコードそのままのバックテストと
+パイプラインのスループット計測を行う。
+
+- SimClock: 足確定時刻（+猶予）を「現在時刻」とする模擬時計。リプレイ中は
+  position_manager / risk_manager / session_filter の datetime.now() を
+  この時計に差し替える
+- ReplayBroker: 履歴から「確定足 + 形成中の足（始値のみ）」を返し、
+  成行注文を次の足の始値（+スプレッド）で約定、SL/TP を足の高値・安値で判定する
+  インメモリ BrokerClient
+- ReplayHarness: 足ごとに時計を進め、sleep なしで run_once() を連続実行し、
+  足ごとのパイプライン trace（TradingLoop.last_pipeline_trace）を記録する
+
+LLM を使う AIAdvisor / SignalCoordinator / 事後分析はリプレイでは使わない。
+"""
+
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.backtester import DEFAULT_SPREAD_PIPS, TYPICAL_SPREADS_PIPS
+from src.bar_clock import granularity_seconds
+from src.bear_researcher import BearResearcher
+from src.broker_client import BrokerClient
+from src.config import (
+    BAR_CLOSE_GRACE_SEC,
+    BEAR_RESEARCHER_ENABLED,
+    MAIN_TIMEFRAME,
+    MAX_LEVERAGE,
+    REPLAY_QUOTE_TO_JPY,
+    REPLAY_WARMUP_BARS,
+)
+from src.position_manager import PositionManager
+from src.risk_manager import RiskManager
+from src.strategy.base import StrategyBase
+from src.trading_loop import TradingLoop
+
+logger = logging.getLogger(__name__)
+
+# リプレイ中に datetime.now() を模擬時計へ差し替えるモジュール
+_CLOCK_MODULES: tuple[str, ...] = (
+    "src.position_manager",
+    "src.risk_manager",
+    "src.session_filter",
+)
+
+_PRICE_COLUMNS: tuple[str, ...] = ("open", "high", "low", "close", "volume")
+
+
+class ReplayError(Exception):
+    """リプレイに関するエラー"""
+
+
+# ------------------------------------------------------------------
+# 模擬時計
+# ------------------------------------------------------------------
+
+
+class SimClock:
+    """リプレイ用の模擬時計（UTC）"""
+
+    def __init__(self, start: Optional[datetime] = None) -> None:
+        self._now = start or datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+    def now(self) -> datetime:
+        """現在の模擬時刻（UTC aware）"""
+        return self._now
+
+    def set(self, now: datetime) -> None:
+        """模擬時刻を設定する。"""
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        self._now = now
+
+
+@contextmanager
+def simulated_clock(clock: SimClock) -> Iterator[SimClock]:
+    """
+    リプレイ対象モジュールの datetime.now() を模擬時計に差し替える。
+
+    datetime のサブクラスで now() だけを上書きするため、
+    fromisoformat() 等の他のクラスメソッドや isinstance 判定はそのまま使える。
+    """
+
+    class _SimDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            now = clock.now()
+            return now.astimezone(tz) if tz is not None else now.replace(tzinfo=None)
+
+    modules = [sys.modules[name] for name in _CLOCK_MODULES if name in sys.modules]
+    originals = [module.datetime for module in modules]
+    for module in modules:
+        module.datetime = _SimDatetime
+    try:
+        yield clock
+    finally:
+        for module, original in zip(modules, originals):
+            module.datetime = original
+
+
+# ------------------------------------------------------------------
+# インメモリ・ブローカー
+# ------------------------------------------------------------------
+
+
+class ReplayBroker(BrokerClient):
+    """
+    履歴データを配信し、注文を約定させるインメモリ BrokerClient。
+
+    履歴の価格は Bid とみなし、Ask = Bid + スプレッドとする。
+    各通貨ペアの「現在」は advance_to() で設定した時刻までに始まった足で、
+    最後の足は形成中（始値のみ確定）として返す。
+    """
+
+    def __init__(
+        self,
+        history: dict[str, pd.DataFrame],
+        clock: SimClock,
+        initial_balance: float = 1_000_000.0,
+        spread_pips: Optional[dict[str, float]] = None,
+        quote_to_jpy: Optional[dict[str, float]] = None,
+    ) -> None:
+        """
+        Args:
+            history: {通貨ペア: OHLCV DataFrame（小文字カラム、UTC DatetimeIndex、昇順）}
+            clock: 模擬時計
+            initial_balance: 初期口座残高（円）
+            spread_pips: ペア別スプレッド（pip）。省略時はバックテストと同じ実測値
+            quote_to_jpy: 履歴に {quote}_JPY が無い決済通貨の円換算レート
+        """
+        self._clock = clock
+        self._times: dict[str, np.ndarray] = {}
+        self._arrays: dict[str, dict[str, np.ndarray]] = {}
+        self._index: dict[str, pd.DatetimeIndex] = {}
+        for instrument, df in history.items():
+            if not isinstance(df.index, pd.DatetimeIndex):
+                raise ReplayError(f"DatetimeIndex が必要です: {instrument}")
+            index = df.index if df.index.tz is not None else df.index.tz_localize("UTC")
+            self._index[instrument] = index
+            self._times[instrument] = index.as_unit("ns").asi8
+            self._arrays[instrument] = {
+                col: df[col].to_numpy(dtype=np.float64) if col in df.columns
+                else np.zeros(len(df))
+                for col in _PRICE_COLUMNS
+            }
+
+        spread_pips = spread_pips or {}
+        self._spread = {
+            instrument: _pip_size(instrument) * spread_pips.get(
+                instrument, TYPICAL_SPREADS_PIPS.get(instrument, DEFAULT_SPREAD_PIPS)
+            )
+            for instrument in history
+        }
+        self._quote_to_jpy = dict(REPLAY_QUOTE_TO_JPY if quote_to_jpy is None else quote_to_jpy)
+
+        self._balance = float(initial_balance)
+        self._cursor: dict[str, int] = {instrument: -1 for instrument in history}
+        self._positions: dict[str, dict] = {}
+        self._deals: dict[str, dict] = {}
+        self._next_id = 1
+
+    # ------------------------------------------------------------------
+    # 時間の進行
+    # ------------------------------------------------------------------
+
+    def advance_to(self, now: datetime) -> None:
+        """
+        now までに始まった足を「現在」にし、その間に確定した足で SL/TP を判定する。
+
+        形成中だった足が確定するたびに、その足の高値・安値で保有ポジションを判定する
+        （同じ足で SL と TP の両方に届いた場合は保守的に SL を優先）。
+        """
+        now_ns = pd.Timestamp(now).as_unit("ns").value
+        for instrument, times in self._times.items():
+            target = int(np.searchsorted(times, now_ns, side="right")) - 1
+            while self._cursor[instrument] < target:
+                if self._cursor[instrument] >= 0:
+                    self._check_exits(instrument, self._cursor[instrument])
+                self._cursor[instrument] += 1
+
+    def has_bar_at(self, instrument: str, bar_open: pd.Timestamp) -> bool:
+        """指定時刻に始まる足が履歴にあるか"""
+        times = self._times[instrument]
+        value = bar_open.as_unit("ns").value
+        pos = int(np.searchsorted(times, value))
+        return pos < len(times) and times[pos] == value
+
+    def _check_exits(self, instrument: str, bar: int) -> None:
+        arrays = self._arrays[instrument]
+        high, low = arrays["high"][bar], arrays["low"][bar]
+        spread = self._spread[instrument]
+        closed_at = self._index[instrument][bar].to_pydatetime()
+        for trade_id, pos in list(self._positions.items()):
+            if pos["instrument"] != instrument:
+                continue
+            if pos["units"] > 0:
+                # 買い: Bid で決済
+                if low <= pos["stop_loss"]:
+                    self._settle(trade_id, pos["stop_loss"], closed_at, "SL")
+                elif high >= pos["take_profit"]:
+                    self._settle(trade_id, pos["take_profit"], closed_at, "TP")
+            else:
+                # 売り: Ask で決済
+                if high + spread >= pos["stop_loss"]:
+                    self._settle(trade_id, pos["stop_loss"], closed_at, "SL")
+                elif low + spread <= pos["take_profit"]:
+                    self._settle(trade_id, pos["take_profit"], closed_at, "TP")
+
+    # ------------------------------------------------------------------
+    # 価格
+    # ------------------------------------------------------------------
+
+    def _current_bar(self, instrument: str) -> int:
+        if instrument not in self._cursor:
+            raise ReplayError(f"履歴にない通貨ペアです: {instrument}")
+        bar = self._cursor[instrument]
+        if bar < 0:
+            raise ReplayError(f"リプレイ開始前の時刻です: {instrument}")
+        return bar
+
+    def _bid(self, instrument: str) -> float:
+        """現在の Bid（形成中の足の始値）"""
+        return float(self._arrays[instrument]["open"][self._current_bar(instrument)])
+
+    def get_prices(self, instrument: str, count: int, granularity: str) -> pd.DataFrame:
+        """
+        確定足 count-1 本 + 形成中の足1本を返す（MT5 の copy_rates_from_pos と同じ形）。
+
+        形成中の足は始値のみ確定しているため OHLC すべて始値、出来高 0 とする。
+        granularity は履歴の時間足で固定（換算レート取得等の他時間足要求も同じ足で返す）。
+        """
+        if instrument not in self._cursor and instrument.endswith("_JPY"):
+            rate = self._quote_to_jpy.get(instrument[:3])
+            if rate is not None:
+                return pd.DataFrame(
+                    {col: [rate] for col in ("open", "high", "low", "close")} | {"volume": [0.0]},
+                    index=pd.DatetimeIndex([self._clock.now()]),
+                )
+        bar = self._current_bar(instrument)
+        start = max(0, bar - count + 1)
+        arrays = self._arrays[instrument]
+        columns = {col: arrays[col][start:bar + 1].copy() for col in _PRICE_COLUMNS}
+        forming = columns["open"][-1]
+        for col in ("high", "low", "close"):
+            columns[col][-1] = forming
+        columns["volume"][-1] = 0.0
+        return pd.DataFrame(columns, index=self._index[instrument][start:bar + 1])
+
+    def get_spread(self, instrument: str) -> Optional[float]:
+        return self._spread.get(instrument)
+
+    # ------------------------------------------------------------------
+    # 注文・ポジション
+    # ------------------------------------------------------------------
+
+    def market_order(
+        self, instrument: str, units: int, stop_loss: float, take_profit: float,
+    ) -> dict:
+        """形成中の足の始値（買いは Ask、売りは Bid）で約定させる。"""
+        bid = self._bid(instrument)
+        price = bid + self._spread[instrument] if units > 0 else bid
+        trade_id = str(self._next_id)
+        self._next_id += 1
+        self._positions[trade_id] = {
+            "trade_id": trade_id,
+            "instrument": instrument,
+            "units": int(units),
+            "price_open": price,
+            "stop_loss": float(stop_loss),
+            "take_profit": float(take_profit),
+            "opened_at": self._clock.now(),
+        }
+        return {
+            "status": "filled",
+            "order_id": trade_id,
+            "trade_id": trade_id,
+            "units": int(units),
+            "price": price,
+        }
+
+    def limit_order(
+        self, instrument: str, units: int, price: float,
+        stop_loss: float, take_profit: float,
+    ) -> dict:
+        raise ReplayError("リプレイは指値注文に未対応です")
+
+    def get_positions(self) -> list[dict]:
+        return [
+            {
+                "trade_id": pos["trade_id"],
+                "instrument": pos["instrument"],
+                "units": pos["units"],
+                "unrealized_pl": self._unrealized_pl(pos),
+                "price_open": pos["price_open"],
+                "stop_loss": pos["stop_loss"],
+                "take_profit": pos["take_profit"],
+            }
+            for pos in self._positions.values()
+        ]
+
+    def close_position(self, trade_id: str) -> dict:
+        pos = self._positions.get(str(trade_id))
+        if pos is None:
+            raise ReplayError(f"ポジションが見つかりません: trade_id={trade_id}")
+        deal = self._settle(
+            pos["trade_id"], self._exit_price(pos), self._clock.now(), "CLOSE"
+        )
+        return {
+            "trade_id": deal["trade_id"],
+            "realized_pl": deal["realized_pl"],
+            "close_price": deal["close_price"],
+        }
+
+    def get_closed_deal(self, trade_id: str) -> Optional[dict]:
+        deal = self._deals.get(str(trade_id))
+        if deal is None:
+            return None
+        return {k: deal[k] for k in ("trade_id", "close_price", "realized_pl", "closed_at")}
+
+    def get_account_summary(self) -> dict:
+        unrealized = sum(self._unrealized_pl(p) for p in self._positions.values())
+        margin_used = sum(
+            abs(p["units"]) * self._bid(p["instrument"]) * self._jpy_rate(p["instrument"])
+            for p in self._positions.values()
+        ) / MAX_LEVERAGE
+        return {
+            "balance": self._balance,
+            "unrealized_pl": unrealized,
+            "margin_used": margin_used,
+            "margin_available": self._balance + unrealized - margin_used,
+        }
+
+    # ------------------------------------------------------------------
+    # 損益計算
+    # ------------------------------------------------------------------
+
+    def _exit_price(self, pos: dict) -> float:
+        bid = self._bid(pos["instrument"])
+        return bid if pos["units"] > 0 else bid + self._spread[pos["instrument"]]
+
+    def _jpy_rate(self, instrument: str) -> float:
+        quote = instrument[-3:]
+        if quote == "JPY":
+            return 1.0
+        rate_instrument = f"{quote}_JPY"
+        if rate_instrument in self._cursor and self._cursor[rate_instrument] >= 0:
+            return self._bid(rate_instrument)
+        rate = self._quote_to_jpy.get(quote)
+        if rate is None:
+            raise ReplayError(f"{quote} の円換算レートがありません")
+        return rate
+
+    def _unrealized_pl(self, pos: dict) -> float:
+        diff = self._exit_price(pos) - pos["price_open"]
+        return diff * pos["units"] * self._jpy_rate(pos["instrument"])
+
+    def _settle(self, trade_id: str, price: float, closed_at: datetime, reason: str) -> dict:
+        pos = self._positions.pop(trade_id)
+        pl = (price - pos["price_open"]) * pos["units"] * self._jpy_rate(pos["instrument"])
+        self._balance += pl
+        deal = {
+            "trade_id": trade_id,
+            "instrument": pos["instrument"],
+            "units": pos["units"],
+            "open_price": pos["price_open"],
+            "close_price": float(price),
+            "realized_pl": float(pl),
+            "opened_at": pos["opened_at"],
+            "closed_at": closed_at,
+            "exit_reason": reason,
+        }
+        self._deals[trade_id] = deal
+        return deal
+
+    @property
+    def deals(self) -> list[dict]:
+        """決済済みトレード（決済順）"""
+        return list(self._deals.values())
+
+    @property
+    def balance(self) -> float:
+        """確定損益反映後の残高"""
+        return self._balance
+
+
+def _pip_size(instrument: str) -> float:
+    return 0.01 if "JPY" in instrument.upper() else 0.0001
+
+
+def _utc_timestamp(value) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+# ------------------------------------------------------------------
+# ハーネス
+# ------------------------------------------------------------------
+
+
+@dataclass
+class ReplayResult:
+    """リプレイ結果"""
+
+    trades: pd.DataFrame        # 決済済みトレード（ReplayBroker.deals）
+    trace: pd.DataFrame         # 足ごとのパイプライン trace
+    bars: int                   # 処理した足確定の数（全ペア合計の run_once 回数）
+    elapsed_sec: float          # run_once ループの実時間
+    final_balance: float
+
+    @property
+    def bars_per_sec(self) -> float:
+        """スループット（run_once 回数 / 秒）"""
+        return self.bars / self.elapsed_sec if self.elapsed_sec > 0 else 0.0
+
+
+class ReplayHarness:
+    """
+    ライブの TradingLoop を過去データで実行するハーネス。
+
+    使い方:
+        harness = ReplayHarness(
+            {"USD_JPY": df_usdjpy}, {"USD_JPY": MTFPullback()}, granularity="M15",
+        )
+        result = harness.run(trace_path="data/replay_trace.csv")
+    """
+
+    def __init__(
+        self,
+        history: dict[str, pd.DataFrame],
+        strategies: dict[str, StrategyBase],
+        granularity: str = MAIN_TIMEFRAME,
+        initial_balance: float = 1_000_000.0,
+        spread_pips: Optional[dict[str, float]] = None,
+        warmup_bars: int = REPLAY_WARMUP_BARS,
+        use_bear_researcher: bool = BEAR_RESEARCHER_ENABLED,
+    ) -> None:
+        """
+        Args:
+            history: {通貨ペア: OHLCV DataFrame（小文字カラム、UTC DatetimeIndex）}
+            strategies: {通貨ペア: 戦略インスタンス}。キーのペアを売買対象にする
+                        （history にだけあるペアは換算レート用）
+            granularity: 履歴の時間足
+            initial_balance: 初期口座残高（円）
+            spread_pips: ペア別スプレッド（pip）
+            warmup_bars: 売買開始前に必要な確定足の本数
+            use_bear_researcher: Bear Researcher をパイプラインに含めるか
+
+        Raises:
+            ReplayError: 戦略のペアが history に無い場合
+        """
+        missing = set(strategies) - set(history)
+        if missing:
+            raise ReplayError(f"履歴がありません: {sorted(missing)}")
+        granularity_seconds(granularity)
+
+        self._history = history
+        self._strategies = strategies
+        self._granularity = granularity
+        self._initial_balance = initial_balance
+        self._spread_pips = spread_pips
+        self._warmup_bars = warmup_bars
+        self._use_bear_researcher = use_bear_researcher
+
+    def run(
+        self,
+        start: Optional[pd.Timestamp | str] = None,
+        end: Optional[pd.Timestamp | str] = None,
+        trace_path: Optional[Path | str] = None,
+        quiet: bool = True,
+    ) -> ReplayResult:
+        """
+        足確定ごとに run_once() を sleep なしで連続実行する。
+
+        Args:
+            start / end: リプレイする足確定の範囲（足の開始時刻、UTC）
+            trace_path: 指定時はパイプライン trace を CSV で保存する
+            quiet: True ならリプレイ中の src.* ロガーを WARNING 以上に絞る
+
+        Returns:
+            ReplayResult（終了時に残ったポジションは最終足で決済する）
+        """
+        clock = SimClock()
+        broker = ReplayBroker(
+            self._history, clock,
+            initial_balance=self._initial_balance, spread_pips=self._spread_pips,
+        )
+        risk_manager = RiskManager(
+            account_balance=self._initial_balance, broker_client=broker,
+        )
+        position_manager = PositionManager(
+            broker_client=broker, risk_manager=risk_manager, postmortem_enabled=False,
+        )
+        loops = {
+            instrument: TradingLoop(
+                broker_client=broker,
+                position_manager=position_manager,
+                risk_manager=risk_manager,
+                strategy=strategy,
+                instrument=instrument,
+                granularity=self._granularity,
+                scheduler_mode="bar_close",
+                bear_researcher=BearResearcher() if self._use_bear_researcher else None,
+            )
+            for instrument, strategy in self._strategies.items()
+        }
+
+        bar_opens = self._bar_opens(start, end)
+        bar_delta = timedelta(seconds=granularity_seconds(self._granularity))
+        grace = timedelta(seconds=BAR_CLOSE_GRACE_SEC)
+        trace_rows: list[dict] = []
+        runs = 0
+
+        src_logger = logging.getLogger("src")
+        previous_level = src_logger.level
+        if quiet:
+            src_logger.setLevel(logging.WARNING)
+        started = time.perf_counter()
+        try:
+            with simulated_clock(clock):
+                for bar_open in bar_opens:
+                    # bar_open の足が確定した直後（次の足の始値が出た時点）
+                    clock.set((bar_open + bar_delta + grace).to_pydatetime())
+                    broker.advance_to(clock.now())
+                    for instrument, loop in loops.items():
+                        if not broker.has_bar_at(instrument, bar_open):
+                            continue
+                        order = loop.run_once()
+                        runs += 1
+                        trace_rows.append(self._trace_row(bar_open, instrument, loop, order))
+                position_manager.close_all_positions(reason="リプレイ終了")
+        finally:
+            elapsed = time.perf_counter() - started
+            src_logger.setLevel(previous_level)
+
+        trace = pd.DataFrame(trace_rows)
+        if trace_path is not None:
+            Path(trace_path).parent.mkdir(parents=True, exist_ok=True)
+            trace.to_csv(trace_path, index=False)
+
+        logger.info(
+            "リプレイ完了: %d 回 / %.1f 秒 (%.0f 回/秒), トレード %d 件, 残高 %.0f",
+            runs, elapsed, runs / elapsed if elapsed > 0 else 0.0,
+            len(broker.deals), broker.balance,
+        )
+        return ReplayResult(
+            trades=pd.DataFrame(broker.deals),
+            trace=trace,
+            bars=runs,
+            elapsed_sec=elapsed,
+            final_balance=broker.balance,
+        )
+
+    def _bar_opens(
+        self, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]
+    ) -> pd.DatetimeIndex:
+        """売買対象ペアの足の開始時刻（ウォームアップ後・範囲内、最終足は除く）"""
+        opens = None
+        for instrument in self._strategies:
+            index = self._history[instrument].index
+            if index.tz is None:
+                index = index.tz_localize("UTC")
+            # 最終足は次の足の始値が無く約定できないため除く
+            usable = index[self._warmup_bars:-1]
+            opens = usable if opens is None else opens.union(usable)
+        if opens is None:
+            return pd.DatetimeIndex([], tz="UTC")
+        if start is not None:
+            opens = opens[opens >= _utc_timestamp(start)]
+        if end is not None:
+            opens = opens[opens <= _utc_timestamp(end)]
+        return opens
+
+    @staticmethod
+    def _trace_row(
+        bar_open: pd.Timestamp, instrument: str, loop: TradingLoop, order: Optional[dict]
+    ) -> dict:
+        trace = loop.last_pipeline_trace
+        if trace is None:
+            return {
+                "bar_time": bar_open, "instrument": instrument,
+                "decision": "NO_PIPELINE", "final_mult": None, "pipeline": "", "trade_id": None,
+                "latency_ms": loop.latency.last.get("total"),
+            }
+        return {
+            "bar_time": bar_open,
+            "instrument": instrument,
+            "decision": trace["decision"],
+            "final_mult": trace["final_mult"],
+            "pipeline": " → ".join(
+                f"{name}={status}({detail})" if detail else f"{name}={status}"
+                for name, status, detail in trace["stages"]
+            ),
+            "trade_id": order.get("trade_id") if order else None,
+            "latency_ms": trace.get("latency_ms", {}).get("total"),
+        }
@@ -13,6 +13,9 @@ from pathlib import Path
 from typing import Optional
 
 from src.broker_client import BrokerClient
+from src.db_writer import DbWriter, get_writer
+from src.fx_rates import FxRateCache, quote_currency_of
+from src.loss_ledger import LossLedger, load_closed_trades
 from src.config import (
     DRAWDOWN_LEVELS,
     KILL_API_DISCONNECT_SEC,
@@ -59,8 +62,10 @@ class KillSwitch:
         self._activated_at: Optional[datetime] = None
         self._db_path = db_path
         self._db_log_id: Optional[int] = None
+        self._db_writer: Optional[DbWriter] = None
         if db_path is not None:
             self._init_kill_switch_db()
+            self._db_writer = get_writer(db_path)
 
     # --- プロパティ ---
 
@@ -140,32 +145,36 @@ class KillSwitch:
             )
 
     def _db_log_activation(self) -> None:
-        """キルスイッチ発動をDBに記録する。"""
-        if self._db_path is None or self._activated_at is None:
+        """キルスイッチ発動をDBに記録する（書き込みスレッドで実行）。"""
+        if self._db_writer is None or self._activated_at is None:
             return
-        try:
-            with sqlite3.connect(str(self._db_path)) as conn:
-                cursor = conn.execute(
-                    "INSERT INTO kill_switch_log (reason, activated_at) VALUES (?, ?)",
-                    (self._reason, self._activated_at.isoformat()),
-                )
-                self._db_log_id = cursor.lastrowid
-        except sqlite3.Error as e:
-            logger.warning("キルスイッチ発動のDB記録に失敗: %s", e)
+        params = (self._reason, self._activated_at.isoformat())
+
+        def insert(conn: sqlite3.Connection) -> None:
+            # 解除の UPDATE が同じキューの後ろで参照するため、行IDは書き込みスレッドで保持する
+            self._db_log_id = conn.execute(
+                "INSERT INTO kill_switch_log (reason, activated_at) VALUES (?, ?)",
+                params,
+            ).lastrowid
+
+        self._db_writer.call(insert, error_message="キルスイッチ発動のDB記録に失敗")
 
     def _db_log_deactivation(self) -> None:
-        """キルスイッチ解除をDBに記録する。"""
-        if self._db_path is None or self._db_log_id is None:
+        """キルスイッチ解除をDBに記録する（書き込みスレッドで実行）。"""
+        if self._db_writer is None:
             return
-        try:
-            with sqlite3.connect(str(self._db_path)) as conn:
-                conn.execute(
-                    "UPDATE kill_switch_log SET deactivated_at=? WHERE id=?",
-                    (datetime.now(timezone.utc).isoformat(), self._db_log_id),
-                )
+        deactivated_at = datetime.now(timezone.utc).isoformat()
+
+        def update(conn: sqlite3.Connection) -> None:
+            if self._db_log_id is None:
+                return
+            conn.execute(
+                "UPDATE kill_switch_log SET deactivated_at=? WHERE id=?",
+                (deactivated_at, self._db_log_id),
+            )
             self._db_log_id = None
-        except sqlite3.Error as e:
-            logger.warning("キルスイッチ解除のDB記録に失敗: %s", e)
+
+        self._db_writer.call(update, error_message="キルスイッチ解除のDB記録に失敗")
 
     def is_trading_allowed(self) -> bool:
         """取引が許可されているかどうかを返す（キルスイッチ未発動なら True）。"""
@@ -267,17 +276,34 @@ class RiskManager:
         self._peak_balance = account_balance
         self._broker_client = broker_client
         self.kill_switch = KillSwitch(db_path=db_path)
-        # 直近成功した quote_currency → JPY レートのキャッシュ。
+        # quote_currency → JPY レートのキャッシュ（XXX_JPY ループの価格・ブローカー取得で更新）。
+        # TTL 内なら pip 値をメモリから返し、古い場合のみブローカーから取り直す。
         # broker 一時失敗時のフォールバック優先順位:
-        #   1. このキャッシュ（最新成功値）  2. 静的 _FALLBACK_QUOTE_TO_JPY
+        #   1. このキャッシュ（古くても最新成功値）  2. 静的 _FALLBACK_QUOTE_TO_JPY
         # インスタンス属性にしてプロセス間で共有しない（テスト独立性のため）。
-        self._live_jpy_rate_cache: dict[str, float] = {}
+        self._fx_rates = FxRateCache()
+        # 損失上限・連続負けチェック用の差分集計（決済イベントで更新）
+        self._loss_ledger = LossLedger()
 
     @property
     def account_balance(self) -> float:
         """現在の口座残高"""
         return self._account_balance
 
+    @property
+    def _live_jpy_rate_cache(self) -> dict[str, float]:
+        """直近成功した quote_currency → JPY レート（TTL 切れを含む）"""
+        return self._fx_rates.snapshot()
+
+    def update_fx_rate(self, instrument: str, price: float) -> None:
+        """
+        取得済みの価格で決済通貨→JPY レートを更新する（XXX_JPY のみ反映）。
+
+        TradingLoop が自ペアの価格取得後に呼ぶ。USD_JPY を回していれば
+        EUR_USD 等のサイジングでブローカーへの追加照会が不要になる。
+        """
+        self._fx_rates.update_from_instrument(instrument, price)
+
     @property
     def peak_balance(self) -> float:
         """最高残高（ドローダウン計算基準）"""
@@ -303,6 +329,41 @@ class RiskManager:
             self._peak_balance = new_balance
             logger.info("ピーク残高を更新: %.0f", new_balance)
 
+    # ------------------------------------------------------------------
+    # 損失集計（決済イベント）
+    # ------------------------------------------------------------------
+
+    def record_trade_close(self, pl: float, close_time: datetime) -> None:
+        """
+        決済を損失集計に反映する。PositionManager が決済ごとに呼ぶ。
+
+        Args:
+            pl: 実現損益（円）
+            close_time: 決済時刻
+        """
+        self._loss_ledger.record(pl, close_time)
+
+    def rebuild_loss_ledger(self, trade_history: list[dict]) -> None:
+        """
+        損失集計を取引履歴から作り直す。
+
+        Args:
+            trade_history: 決済順の {"pl": float, "close_time": datetime} のリスト
+        """
+        self._loss_ledger.rebuild(trade_history)
+
+    def load_loss_ledger(self, db_path: Path) -> int:
+        """
+        起動時に trades テーブルの直近30日の決済から損失集計を復元する。
+
+        Returns:
+            読み込んだ決済件数
+        """
+        trades = load_closed_trades(db_path, now=datetime.now(timezone.utc))
+        self._loss_ledger.rebuild(trades)
+        logger.info("損失集計を trades テーブルから復元: %d 件", len(trades))
+        return len(trades)
+
     # ------------------------------------------------------------------
     # 0. キルスイッチ総合評価（F14）
     # ------------------------------------------------------------------
@@ -310,7 +371,7 @@ class RiskManager:
     def evaluate_kill_switch(
         self,
         current_balance: float,
-        trade_history: list[dict],
+        trade_history: Optional[list[dict]] = None,
         current_atr: Optional[float] = None,
         normal_atr: Optional[float] = None,
         current_spread: Optional[float] = None,
@@ -331,7 +392,7 @@ class RiskManager:
 
         Args:
             current_balance: 現在の口座残高
-            trade_history: 取引履歴リスト
+            trade_history: 取引履歴リスト。None なら損失集計（record_trade_close）を使う
             current_atr: 現在のATR値（None可）
             normal_atr: 通常時のATR値（None可）
             current_spread: 現在のスプレッド（None可）
@@ -568,16 +629,18 @@ class RiskManager:
 
     def check_loss_limits(
         self,
-        trade_history: list[dict],
+        trade_history: Optional[list[dict]] = None,
     ) -> tuple[bool, Optional[str]]:
         """
         日次・週次・月次の損失上限をチェックする。
 
         trade_history の各要素は {"pl": float, "close_time": datetime} を含む。
         損失合計を口座残高比で計算し、上限超過時は取引停止を返す。
+        trade_history を省略した場合は損失集計（record_trade_close で更新）を
+        使い、履歴を走査しない。
 
         Args:
-            trade_history: 取引履歴リスト
+            trade_history: 取引履歴リスト（None なら損失集計）
 
         Returns:
             (is_allowed, reason) のタプル。
@@ -586,6 +649,11 @@ class RiskManager:
         """
         # 安全チェックでの例外は取引停止に倒す（C2: 安全側フォールバック）
         try:
+            if trade_history is None:
+                daily, weekly, monthly = self._loss_ledger.losses(
+                    datetime.now(timezone.utc)
+                )
+                return self._judge_loss_limits(daily, weekly, monthly)
             return self._check_loss_limits_inner(trade_history)
         except (KeyError, TypeError) as e:
             logger.error(
@@ -632,6 +700,12 @@ class RiskManager:
                 if close_time >= month_start:
                     monthly_loss += abs(pl)
 
+        return self._judge_loss_limits(daily_loss, weekly_loss, monthly_loss)
+
+    def _judge_loss_limits(
+        self, daily_loss: float, weekly_loss: float, monthly_loss: float,
+    ) -> tuple[bool, Optional[str]]:
+        """期間別の損失合計（正の値）を口座残高比で上限と比較する。"""
         # H5: 口座残高が0以下の場合は即座に取引停止
         balance = self._account_balance
         if balance <= 0:
@@ -682,16 +756,18 @@ class RiskManager:
 
     def check_consecutive_losses(
         self,
-        trade_history: list[dict],
+        trade_history: Optional[list[dict]] = None,
     ) -> tuple[int, bool]:
         """
         直近の連続負け数をカウントし、上限超過で停止判定する。
 
         trade_history は close_time の昇順であることを前提とする。
+        省略した場合は損失集計が保持する連敗数を使う。
         MAX_CONSECUTIVE_LOSSES（5）連敗で24時間停止。
 
         Args:
             trade_history: 取引履歴リスト。各要素は {"pl": float, ...}。
+                           None なら損失集計。
 
         Returns:
             (consecutive_count, is_stopped) のタプル。
@@ -700,6 +776,10 @@ class RiskManager:
         """
         # 安全チェックでの例外は取引停止に倒す（C3: 安全側フォールバック）
         try:
+            if trade_history is None:
+                return self._judge_consecutive_losses(
+                    self._loss_ledger.consecutive_losses(datetime.now(timezone.utc))
+                )
             return self._check_consecutive_losses_inner(trade_history)
         except (KeyError, TypeError) as e:
             logger.error(
@@ -722,6 +802,10 @@ class RiskManager:
                 # 勝ちまたは引き分け（pl >= 0）で連続負けが途切れる
                 break
 
+        return self._judge_consecutive_losses(consecutive_count)
+
+    def _judge_consecutive_losses(self, consecutive_count: int) -> tuple[int, bool]:
+        """連続負け数を上限と比較する。"""
         is_stopped = consecutive_count >= MAX_CONSECUTIVE_LOSSES
 
         if is_stopped:
@@ -817,13 +901,13 @@ class RiskManager:
           2. _FALLBACK_QUOTE_TO_JPY (静的デフォルト)
           3. _FALLBACK_PIP_VALUE_NON_JPY_DEFAULT (最終フォールバック)
         """
-        cached = self._live_jpy_rate_cache.get(quote_currency)
+        cached = self._fx_rates.get(quote_currency)
         if cached is not None:
-            value = 0.0001 * lot_size * cached
+            value = 0.0001 * lot_size * cached.rate
             logger.critical(
                 "pip_value フォールバック発動（キャッシュ使用）: "
-                "quote=%s, cached_jpy_rate=%.3f, pip_value=%.2f",
-                quote_currency, cached, value,
+                "quote=%s, cached_jpy_rate=%.3f, age=%.0fs, pip_value=%.2f",
+                quote_currency, cached.rate, cached.age_sec, value,
             )
             return value
 
@@ -855,7 +939,8 @@ class RiskManager:
         JPYクロス: 0.01 * lot_size（例: 1,000通貨 → 10円/pip）
         非JPYペア: 0.0001 * lot_size * 決済通貨JPYレート
           - 決済通貨はペア後半3文字（例: EUR_USD → USD）
-          - 決済通貨JPYレートをbroker_clientから取得
+          - 決済通貨JPYレートは FxRateCache から取得（TTL 内ならブローカーを呼ばない）。
+            古い・未取得の場合のみ broker_client から取得してキャッシュを更新
 
         broker_client未設定またはレート取得失敗時はPhase 1固定値にフォールバック。
 
@@ -881,17 +966,28 @@ class RiskManager:
         # --- 非JPYペア: 決済通貨のJPYレートが必要 ---
 
         # 決済通貨を特定（ペア後半3文字: EUR_USD → USD）
-        parts = instrument.upper().replace(" ", "").split("_")
-        if len(parts) != 2 or len(parts[1]) < 3:
+        quote_currency = quote_currency_of(instrument)
+        if quote_currency is None:
             logger.warning(
                 "通貨ペアフォーマットが不正: %s。フォールバック値を使用。",
                 instrument,
             )
             return self._fallback_pip_value_non_jpy("USD", lot_size)
 
-        quote_currency = parts[1][:3]
         rate_instrument = f"{quote_currency}_JPY"
 
+        # TTL 内のキャッシュがあればブローカーを呼ばない
+        cached = self._fx_rates.fresh(quote_currency)
+        if cached is not None:
+            pip_value = 0.0001 * lot_size * cached.rate
+            logger.debug(
+                "pip_value計算（非JPY・キャッシュ）: instrument=%s, %s=%.4f, "
+                "age=%.1fs, source=%s, pip_value=%.2f",
+                instrument, rate_instrument, cached.rate,
+                cached.age_sec, cached.source, pip_value,
+            )
+            return pip_value
+
         # broker_client未設定 → フォールバック
         if self._broker_client is None:
             logger.debug(
@@ -913,14 +1009,16 @@ class RiskManager:
                 )
                 return self._fallback_pip_value_non_jpy(quote_currency, lot_size)
 
-            # 成功時はキャッシュ更新（次回フォールバック時に最新値を使える）
-            self._live_jpy_rate_cache[quote_currency] = jpy_rate
+            # 成功時はキャッシュ更新（TTL 内の次回以降はブローカーを呼ばない）
+            stale = self._fx_rates.get(quote_currency)
+            self._fx_rates.update(quote_currency, jpy_rate, source="broker")
 
             pip_value = 0.0001 * lot_size * jpy_rate
-            logger.debug(
-                "pip_value計算（非JPY）: instrument=%s, lot_size=%d, "
-                "%s=%.4f, pip_value=%.2f",
+            logger.info(
+                "pip_value計算（非JPY・ブローカー取得）: instrument=%s, lot_size=%d, "
+                "%s=%.4f, age=0.0s, pip_value=%.2f, 更新前キャッシュ=%s",
                 instrument, lot_size, rate_instrument, jpy_rate, pip_value,
+                "なし" if stale is None else f"期限切れ(age={stale.age_sec:.0f}s)",
             )
             return pip_value
 
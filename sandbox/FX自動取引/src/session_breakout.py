@@ -0,0 +1,279 @@
+"""
+FX自動取引システム — セッションレンジ・ブレイクアウトの一括シミュレータ
+
+アジア時間等のレンジを日ごとに記録し、ブレイク判定時間帯にレンジを抜けた足で
+順張りエントリー、ATR 基準の SL/TP か強制決済時刻で手仕舞う戦略を、
+全履歴の配列演算で一度にシミュレートする（日ごとの groupby・足ごとの iterrows を使わない）。
+
+- 日の区切りは index のタイムゾーンでの日付（index.date と同じ）
+- 日ごとのレンジ・ブレイク足・SL/TP 到達はすべて reduceat / 判定行列で求める
+- SL と TP に同じ足で触れた場合は SL を優先する
+- news_blackout_mask(): 高インパクト指標発表前後の近似ブラックアウト（足ごとの bool 配列）
+
+フィルタ（MACD・RSI 等）は呼び出し側が long_ok / short_ok の配列で渡す。
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# 判定結果（BreakoutTrades.outcome の値）
+OUTCOME_TP = "TP"
+OUTCOME_SL = "SL"
+OUTCOME_FORCE_CLOSE = "FORCE_CLOSE"   # 強制決済時刻の最初の足の始値で決済
+OUTCOME_EOD_CLOSE = "EOD_CLOSE"       # その日に強制決済時刻の足が無く、最終足の終値で決済
+
+
+def news_blackout_mask(index: pd.DatetimeIndex) -> np.ndarray:
+    """
+    高インパクト指標の発表前後（近似）に当たる足の bool 配列。
+
+    - NFP: 第1金曜（1-7日の金曜）12-14時台
+    - ECB/BoE: 第1木曜（1-7日の木曜）11-14時台
+    - FOMC: 第3水曜（15-21日の水曜）17-19時台
+    時刻は index のタイムゾーン（UTC 前提）。経済カレンダー連携ではなく保守的な近似。
+    """
+    weekday = np.asarray(index.weekday)
+    day = np.asarray(index.day)
+    hour = np.asarray(index.hour)
+    first_week = (day >= 1) & (day <= 7)
+    nfp = (weekday == 4) & first_week & (hour >= 12) & (hour <= 14)
+    ecb_boe = (weekday == 3) & first_week & (hour >= 11) & (hour <= 14)
+    fomc = (weekday == 2) & (day >= 15) & (day <= 21) & (hour >= 17) & (hour <= 19)
+    return nfp | ecb_boe | fomc
+
+
+@dataclass
+class BreakoutTrades:
+    """
+    simulate_session_breakout の結果（1日最大1トレード、エントリー順の配列）
+
+    行番号（entry_idx / exit_idx）は渡した data の行。
+    """
+
+    entry_idx: np.ndarray
+    exit_idx: np.ndarray
+    direction: np.ndarray      # +1 = 買い / -1 = 売り
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    sl: np.ndarray
+    tp: np.ndarray
+    range_high: np.ndarray
+    range_low: np.ndarray
+    atr: np.ndarray            # エントリー足の ATR
+    outcome: np.ndarray        # "TP" / "SL" / "FORCE_CLOSE" / "EOD_CLOSE"（object配列）
+    holding_bars: np.ndarray   # エントリー後に判定した足の本数（決済足を含む）
+
+    def __len__(self) -> int:
+        return len(self.entry_idx)
+
+    def to_frame(self, index: pd.DatetimeIndex) -> pd.DataFrame:
+        """エントリー・決済時刻を付けた DataFrame にする。"""
+        return pd.DataFrame({
+            "entry_time": index[self.entry_idx],
+            "exit_time": index[self.exit_idx],
+            "direction": np.where(self.direction == 1, "long", "short"),
+            "entry_price": self.entry_price,
+            "exit_price": self.exit_price,
+            "sl": self.sl,
+            "tp": self.tp,
+            "range_high": self.range_high,
+            "range_low": self.range_low,
+            "atr": self.atr,
+            "outcome": self.outcome,
+            "holding_bars": self.holding_bars,
+        })
+
+
+def _empty_trades() -> BreakoutTrades:
+    ints = np.array([], dtype=np.int64)
+    floats = np.array([], dtype=float)
+    return BreakoutTrades(
+        entry_idx=ints, exit_idx=ints, direction=ints,
+        entry_price=floats, exit_price=floats, sl=floats, tp=floats,
+        range_high=floats, range_low=floats, atr=floats,
+        outcome=np.array([], dtype=object), holding_bars=ints,
+    )
+
+
+def simulate_session_breakout(
+    data: pd.DataFrame,
+    atr: np.ndarray,
+    long_ok: np.ndarray,
+    short_ok: np.ndarray,
+    tradable: np.ndarray,
+    range_start_h: int,
+    range_end_h: int,
+    break_start_h: int,
+    break_end_h: int,
+    force_close_h: int,
+    buffer: float,
+    entry_slippage: float,
+    sl_atr_mult: float,
+    tp_atr_mult: float,
+    min_day_bars: int = 10,
+    min_range_bars: int = 3,
+    min_range_atr: float = 0.3,
+    max_range_atr: float = 5.0,
+) -> BreakoutTrades:
+    """
+    セッションレンジ・ブレイクアウトを全履歴で一括シミュレートする。
+
+    日ごとに:
+    1. [range_start_h, range_end_h) の足の高値・安値でレンジを作る（min_range_bars 本未満は見送り）
+    2. レンジ最終足の ATR に対してレンジ幅が [min_range_atr, max_range_atr] 倍の外なら見送り
+    3. [break_start_h, break_end_h) の足を順に見て、tradable な足で
+       高値 > レンジ上限 + buffer かつ long_ok なら買い、
+       （上抜けていない足で）安値 < レンジ下限 - buffer かつ short_ok なら売り。
+       エントリーはバッファ位置 ± entry_slippage、SL/TP はエントリー足の ATR の倍率
+    4. エントリー後、force_close_h 時より前の足で SL/TP 到達を判定（同じ足なら SL 優先）。
+       到達しなければその日の force_close_h 時以降の最初の足の始値、それも無ければ最終足の終値で決済
+
+    Args:
+        data: 時系列順の open/high/low/close と DatetimeIndex を持つ DataFrame
+        atr: 足ごとの ATR
+        long_ok / short_ok: 足ごとの買い・売りフィルタ（MACD・RSI 等）
+        tradable: エントリー判定してよい足（指標の欠損・ニュースブラックアウトを除外）
+        range_start_h / range_end_h: レンジを作る時間帯（時、end は排他）
+        break_start_h / break_end_h: ブレイクを判定する時間帯（時、end は排他）
+        force_close_h: 強制決済の時刻（時）
+        buffer: ブレイク判定のバッファ（価格）
+        entry_slippage: エントリー価格に上乗せするスリッページ（価格）
+        sl_atr_mult / tp_atr_mult: SL/TP の ATR 倍率
+        min_day_bars: これより足が少ない日は見送り
+
+    Returns:
+        BreakoutTrades
+
+    Raises:
+        ValueError: data が DatetimeIndex を持たない、または配列の長さが data と一致しない場合
+    """
+    if not isinstance(data.index, pd.DatetimeIndex):
+        raise ValueError("セッションブレイクアウトの判定には DatetimeIndex が必要です")
+    n = len(data)
+    atr = np.asarray(atr, dtype=float)
+    long_ok = np.asarray(long_ok, dtype=bool)
+    short_ok = np.asarray(short_ok, dtype=bool)
+    tradable = np.asarray(tradable, dtype=bool)
+    if not (len(atr) == len(long_ok) == len(short_ok) == len(tradable) == n):
+        raise ValueError("atr / long_ok / short_ok / tradable の長さが data と一致しません")
+    if n == 0:
+        return _empty_trades()
+
+    open_ = data["open"].to_numpy(dtype=float)
+    high = data["high"].to_numpy(dtype=float)
+    low = data["low"].to_numpy(dtype=float)
+    close = data["close"].to_numpy(dtype=float)
+    hour = np.asarray(data.index.hour)
+    positions = np.arange(n)
+
+    # 日の区切り（index のタイムゾーンでの日付）
+    wall_clock = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    day_key = wall_clock.as_unit("s").asi8 // 86400
+    starts = np.flatnonzero(np.r_[True, day_key[1:] != day_key[:-1]])
+    ends = np.r_[starts[1:], n]             # 各日の最終行 + 1
+    bar_day = np.repeat(np.arange(len(starts)), ends - starts)
+
+    # 1-2. 日ごとのレンジとレンジ最終足の ATR
+    in_range = (hour >= range_start_h) & (hour < range_end_h)
+    range_bars = np.add.reduceat(in_range.astype(np.int64), starts)
+    range_high = np.maximum.reduceat(np.where(in_range, high, -np.inf), starts)
+    range_low = np.minimum.reduceat(np.where(in_range, low, np.inf), starts)
+    last_range_bar = np.maximum.reduceat(np.where(in_range, positions, -1), starts)
+    range_atr = np.where(last_range_bar >= 0, atr[np.maximum(last_range_bar, 0)], np.nan)
+    range_size = range_high - range_low
+    with np.errstate(invalid="ignore"):
+        day_ok = (
+            (ends - starts >= min_day_bars)
+            & (range_bars >= min_range_bars)
+            & (range_atr > 0)
+            & ~(range_size < min_range_atr * range_atr)
+            & ~(range_size > max_range_atr * range_atr)
+        )
+
+    # 3. ブレイク足（その日の最初の候補）
+    upper = range_high[bar_day] + buffer
+    lower = range_low[bar_day] - buffer
+    in_break = (hour >= break_start_h) & (hour < break_end_h)
+    broke_up = high > upper
+    candidate = (
+        in_break & tradable & day_ok[bar_day]
+        & ((broke_up & long_ok) | (~broke_up & (low < lower) & short_ok))
+    )
+    first_candidate = np.minimum.reduceat(np.where(candidate, positions, n), starts)
+    entry_days = np.flatnonzero(first_candidate < n)
+    if len(entry_days) == 0:
+        return _empty_trades()
+
+    entry_idx = first_candidate[entry_days]
+    direction = np.where(broke_up[entry_idx], 1, -1)
+    is_long = direction == 1
+    entry_atr = atr[entry_idx]
+    entry_price = np.where(
+        is_long,
+        range_high[entry_days] + buffer + entry_slippage,
+        range_low[entry_days] - buffer - entry_slippage,
+    )
+    sl = np.where(
+        is_long, entry_price - sl_atr_mult * entry_atr, entry_price + sl_atr_mult * entry_atr,
+    )
+    tp = np.where(
+        is_long, entry_price + tp_atr_mult * entry_atr, entry_price - tp_atr_mult * entry_atr,
+    )
+
+    # 4. 保有中の SL/TP 判定（エントリー翌足〜強制決済時刻の前の足）
+    day_end = ends[entry_days]
+    force_bar = np.minimum.reduceat(np.where(hour >= force_close_h, positions, n), starts)
+    force_bar = force_bar[entry_days]
+    has_force_bar = force_bar < n
+    manage_end = np.maximum(entry_idx + 1, np.minimum(force_bar, day_end))
+    manage_len = manage_end - entry_idx - 1
+
+    width = max(int(manage_len.max()), 1)
+    rows = entry_idx[:, None] + 1 + np.arange(width)
+    in_window = rows < manage_end[:, None]
+    rows = np.minimum(rows, n - 1)
+    hit_high = high[rows]
+    hit_low = low[rows]
+    stop_touched = np.where(
+        is_long[:, None], hit_low <= sl[:, None], hit_high >= sl[:, None],
+    ) & in_window
+    take_touched = np.where(
+        is_long[:, None], hit_high >= tp[:, None], hit_low <= tp[:, None],
+    ) & in_window
+    touched = stop_touched | take_touched
+    has_hit = touched.any(axis=1)
+    first = touched.argmax(axis=1)
+    stop_first = stop_touched[np.arange(len(entry_idx)), first]
+
+    exit_idx = np.where(
+        has_hit, entry_idx + 1 + first,
+        np.where(has_force_bar, force_bar, day_end - 1),
+    )
+    exit_price = np.where(
+        has_hit,
+        np.where(stop_first, sl, tp),
+        np.where(has_force_bar, open_[np.minimum(force_bar, n - 1)], close[day_end - 1]),
+    )
+    outcome = np.where(
+        has_hit,
+        np.where(stop_first, OUTCOME_SL, OUTCOME_TP),
+        np.where(has_force_bar, OUTCOME_FORCE_CLOSE, OUTCOME_EOD_CLOSE),
+    ).astype(object)
+    holding_bars = np.where(has_hit, first + 1, manage_len + has_force_bar.astype(np.int64))
+
+    return BreakoutTrades(
+        entry_idx=entry_idx,
+        exit_idx=exit_idx,
+        direction=direction,
+        entry_price=entry_price,
+        exit_price=exit_price,
+        sl=sl,
+        tp=tp,
+        range_high=range_high[entry_days],
+        range_low=range_low[entry_days],
+        atr=entry_atr,
+        outcome=outcome,
+        holding_bars=holding_bars,
+    )
@@ -5,6 +5,10 @@ FX自動取引システム — シグナル協調モジュール
 相関リスクをLLMで評価する。
 ルールベースの相関チェック（R5: PositionManager._check_correlation_exposure）
 を補完する動的判断レイヤー。
+
+ウィンドウは最初のシグナルで開き、稼働中の全ペアのループがこの足の判定を
+報告した時点（シグナル登録 or report_iteration()）で閉じる。window_sec は上限。
+同じ (ペア, 方向) の組み合わせの LLM 判定は VERDICT_CACHE_TTL_SEC の間再利用する。
 """
 
 import json
@@ -26,8 +30,9 @@ _CLAUDE_API_URL = "https://api.anthropic.com/v1/messages"
 _CLAUDE_API_TIMEOUT = 10
 
 # デフォルト設定
-COORDINATION_WINDOW_SEC: float = 5.0  # シグナル集約ウィンドウ（秒）
+COORDINATION_WINDOW_SEC: float = 5.0  # シグナル集約ウィンドウ（秒）。全ペア報告済みなら早期に閉じる
 CORRELATION_LLM_ENABLED: bool = True  # LLM相関判断の有効/無効
+VERDICT_CACHE_TTL_SEC: float = 900.0  # 同じシグナル組み合わせの LLM 判定を再利用する秒数（M15 1本分）
 
 # 監査B7: register_signal のデフォルト待機時間は window_sec + LLM timeout + バッファ。
 # 旧実装は 10s 固定で、ウィンドウ5s + Claude API 10s = 15s に対して timeout が早く切れ、
@@ -74,21 +79,54 @@ class SignalCoordinator:
     相関リスクをLLMで評価する協調器。
 
     使い方:
-    1. TradingLoopがシグナル検出時に register_signal() を呼ぶ
-    2. ウィンドウ内に他のシグナルが来たらLLMで相関評価
-    3. register_signal() はブロッキングで結果（承認/拒否）を返す
+    1. TradingLoop が register_participant() で参加し、毎イテレーション末に
+       report_iteration() を呼ぶ（シグナルが無くても報告する）
+    2. シグナル検出時に register_signal() を呼ぶ
+    3. 全参加ペアが報告済みになるか window_sec が経過したらウィンドウを閉じ、
+       2件以上ならLLMで相関評価（同じ組み合わせはキャッシュ済み判定を使う）
+    4. register_signal() はブロッキングで結果（承認/拒否）を返す
     """
 
     def __init__(
         self,
         window_sec: float = COORDINATION_WINDOW_SEC,
         llm_enabled: bool = CORRELATION_LLM_ENABLED,
+        verdict_ttl_sec: float = VERDICT_CACHE_TTL_SEC,
     ) -> None:
         self._window_sec = window_sec
         self._llm_enabled = llm_enabled
+        self._verdict_ttl_sec = verdict_ttl_sec
         self._lock = threading.Lock()
+        # シグナル登録・イテレーション報告で評価スレッドを起こす
+        self._cond = threading.Condition(self._lock)
         self._pending: list[PendingSignal] = []
         self._evaluator_running = False
+        self._participants: set[str] = set()
+        self._last_report: dict[str, float] = {}  # instrument → time.monotonic()
+        # (instrument, signal) の組 → (判定時刻 monotonic, 推奨ペア)
+        self._verdicts: dict[tuple[tuple[str, str], ...], tuple[float, list[str]]] = {}
+
+    # ------------------------------------------------------------------
+    # 参加ペア・報告
+    # ------------------------------------------------------------------
+
+    def register_participant(self, instrument: str) -> None:
+        """ウィンドウの早期クローズ判定の対象に instrument のループを加える。"""
+        with self._cond:
+            self._participants.add(instrument)
+
+    def unregister_participant(self, instrument: str) -> None:
+        """停止したループを対象から外す（待っているウィンドウを再判定させる）。"""
+        with self._cond:
+            self._participants.discard(instrument)
+            self._last_report.pop(instrument, None)
+            self._cond.notify_all()
+
+    def report_iteration(self, instrument: str) -> None:
+        """instrument のループがこの足の判定を終えたことを報告する。"""
+        with self._cond:
+            self._last_report[instrument] = time.monotonic()
+            self._cond.notify_all()
 
     def register_signal(
         self,
@@ -126,17 +164,21 @@ class SignalCoordinator:
             timestamp=time.time(),
         )
 
-        with self._lock:
+        with self._cond:
             self._pending.append(pending)
+            self._last_report[instrument] = time.monotonic()
             # 評価スレッドが未起動なら起動
             if not self._evaluator_running:
                 self._evaluator_running = True
                 t = threading.Thread(
                     target=self._evaluator_loop,
+                    args=(time.monotonic(),),
                     daemon=True,
                     name="signal-coordinator",
                 )
                 t.start()
+            else:
+                self._cond.notify_all()
 
         # 結果を待つ（タイムアウト付き）
         if pending.event.wait(timeout=timeout):
@@ -149,11 +191,31 @@ class SignalCoordinator:
             )
             return True
 
-    def _evaluator_loop(self) -> None:
-        """ウィンドウ時間待ってから集約評価を実行する。"""
-        time.sleep(self._window_sec)
+    def _all_reported(self, opened_at: float) -> bool:
+        """
+        全参加ペアが報告済みか。_lock 保持下で呼ぶ。
+
+        前回ウィンドウ以降、かつ開始の window_sec 前以降の報告だけを数える
+        （同じ tick でシグナルより先に判定を終えたペアを含めるため）。
+        """
+        if not self._participants:
+            return False
+        since = opened_at - self._window_sec
+        return all(
+            self._last_report.get(instrument, float("-inf")) >= since
+            for instrument in self._participants
+        )
+
+    def _evaluator_loop(self, opened_at: float) -> None:
+        """全参加ペアの報告（最長 window_sec）を待ってから集約評価を実行する。"""
+        deadline = opened_at + self._window_sec
+        with self._cond:
+            while not self._all_reported(opened_at):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
 
-        with self._lock:
             # ウィンドウ内のシグナルを取り出し
             now = time.time()
             window_signals = [
@@ -162,6 +224,8 @@ class SignalCoordinator:
             ]
             self._pending = []
             self._evaluator_running = False
+            # 報告はこのウィンドウで消費する（次のウィンドウは改めて全ペアの報告を待つ）
+            self._last_report.clear()
 
         if len(window_signals) <= 1:
             # 単一シグナル → 無条件承認
@@ -170,13 +234,16 @@ class SignalCoordinator:
                 sig.event.set()
             return
 
-        # 2件以上 → LLM評価
-        logger.info(
-            "[SignalCoordinator] %d件の同時シグナルを評価中...",
-            len(window_signals),
-        )
-
-        recommended = self._evaluate_correlation(window_signals)
+        # 2件以上 → LLM評価（同じ組み合わせの直近判定があれば再利用）
+        recommended = self._cached_verdict(window_signals)
+        if recommended is None:
+            logger.info(
+                "[SignalCoordinator] %d件の同時シグナルを評価中...",
+                len(window_signals),
+            )
+            recommended = self._evaluate_correlation(window_signals)
+            if recommended is not None:
+                self._store_verdict(window_signals, recommended)
 
         for sig in window_signals:
             if recommended is None:
@@ -191,6 +258,41 @@ class SignalCoordinator:
                     )
             sig.event.set()
 
+    # ------------------------------------------------------------------
+    # 判定キャッシュ
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _verdict_key(signals: list[PendingSignal]) -> tuple[tuple[str, str], ...]:
+        return tuple(sorted({(s.instrument, s.signal) for s in signals}))
+
+    def _cached_verdict(self, signals: list[PendingSignal]) -> Optional[list[str]]:
+        """TTL 内の同じ組み合わせの判定を返す（無ければ None）。"""
+        key = self._verdict_key(signals)
+        with self._lock:
+            entry = self._verdicts.get(key)
+            if entry is None:
+                return None
+            decided_at, recommended = entry
+            if time.monotonic() - decided_at > self._verdict_ttl_sec:
+                del self._verdicts[key]
+                return None
+        logger.info(
+            "[SignalCoordinator] キャッシュ済み判定を使用: signals=%s, recommended=%s",
+            key, recommended,
+        )
+        return list(recommended)
+
+    def _store_verdict(self, signals: list[PendingSignal], recommended: list[str]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            # 期限切れを掃除してから追加（組み合わせ数はペア数で頭打ち）
+            self._verdicts = {
+                k: v for k, v in self._verdicts.items()
+                if now - v[0] <= self._verdict_ttl_sec
+            }
+            self._verdicts[self._verdict_key(signals)] = (now, list(recommended))
+
     def _evaluate_correlation(
         self, signals: list[PendingSignal]
     ) -> Optional[list[str]]:
@@ -4,6 +4,7 @@ FX自動取引システム — Slack Webhook通知モジュール
 Slack Incoming Webhookを使用して取引イベントを通知する。
 Block Kit形式で構造化メッセージを送信。
 送信失敗はログに記録するが、メインのトレーディングループをブロックしない。
+HTTP接続は requests.Session で保持し、通知ごとの TCP/TLS ハンドシェイクを省く。
 """
 
 import logging
@@ -45,6 +46,12 @@ class SlackNotifier:
 
         self._webhook_url = webhook_url
         self._timeout = timeout
+        # Keep-Alive で Webhook への接続を使い回す
+        self._session = requests.Session()
+
+    def close(self) -> None:
+        """保持しているHTTP接続を閉じる。"""
+        self._session.close()
 
     def notify(self, text: str, color: str = COLOR_GREEN) -> bool:
         """
@@ -360,7 +367,7 @@ class SlackNotifier:
             送信成功ならTrue、失敗ならFalse
         """
         try:
-            resp = requests.post(
+            resp = self._session.post(
                 self._webhook_url,
                 json=payload,
                 timeout=self._timeout,
@@ -7,7 +7,10 @@ Telegram Bot APIを直接使用し、以下の機能を提供する:
 
 スレッド構成:
 - 送信スレッド: Queueからメッセージを取り出してTelegram APIに送信
+  （溜まっているメッセージは1通に連結し、トークンバケットで送信レートを制限）
 - ポーリングスレッド: getUpdatesでコマンドを受信しディスパッチ
+
+HTTP接続はスレッドごとの requests.Session で保持する（Keep-Alive）。
 """
 
 import logging
@@ -18,6 +21,9 @@ from typing import Callable, Optional
 
 import requests
 
+from src.config import TELEGRAM_SEND_BURST, TELEGRAM_SEND_RATE_PER_SEC
+from src.token_bucket import TokenBucket
+
 logger = logging.getLogger(__name__)
 
 # Telegram Bot API ベースURL
@@ -26,6 +32,12 @@ _API_BASE = "https://api.telegram.org/bot{token}/{method}"
 # 送信キューの上限（溢れた場合は古いメッセージを捨てる）
 _MAX_QUEUE_SIZE = 100
 
+# sendMessage の本文上限（連結はこの長さまで）
+_MAX_MESSAGE_CHARS = 4096
+
+# 連結するメッセージの区切り
+_BATCH_SEPARATOR = "\n\n"
+
 
 class TelegramNotifier:
     """
@@ -82,6 +94,17 @@ class TelegramNotifier:
         # ポーリング用: 最後に処理したupdate_id
         self._last_update_id: int = 0
 
+        # HTTP接続（送信スレッド・ポーリングスレッドで別々に保持）
+        self._send_session = requests.Session()
+        self._poll_session = requests.Session()
+
+        # 送信レート制限（Telegram は同一チャットへの連続送信を制限する）
+        self._rate_limiter = TokenBucket(
+            TELEGRAM_SEND_RATE_PER_SEC, TELEGRAM_SEND_BURST
+        )
+        # 連結できずに次回送信へ回したメッセージ
+        self._carry: Optional[str] = None
+
     # ------------------------------------------------------------------
     # ライフサイクル
     # ------------------------------------------------------------------
@@ -125,6 +148,8 @@ class TelegramNotifier:
             # ポーリングはpoll_timeout秒でタイムアウトするので待つ
             self._poller_thread.join(timeout=self._poll_timeout + 5)
 
+        self._send_session.close()
+        self._poll_session.close()
         self._started = False
         logger.info("Telegram通知スレッドを停止しました")
 
@@ -269,7 +294,7 @@ class TelegramNotifier:
             "parse_mode": parse_mode,
         }
         try:
-            resp = requests.post(url, json=payload, timeout=self._send_timeout)
+            resp = self._send_session.post(url, json=payload, timeout=self._send_timeout)
             if resp.status_code == 200:
                 data = resp.json()
                 if data.get("ok"):
@@ -305,7 +330,7 @@ class TelegramNotifier:
             params["offset"] = self._last_update_id + 1
 
         try:
-            resp = requests.get(
+            resp = self._poll_session.get(
                 url, params=params,
                 timeout=self._poll_timeout + 10,
             )
@@ -327,25 +352,66 @@ class TelegramNotifier:
     def _sender_loop(self) -> None:
         """送信スレッドのメインループ。"""
         while not self._stop_event.is_set():
-            try:
-                item = self._send_queue.get(timeout=1.0)
-            except queue.Empty:
-                continue
+            if self._carry is not None:
+                item, self._carry = self._carry, None
+            else:
+                try:
+                    item = self._send_queue.get(timeout=1.0)
+                except queue.Empty:
+                    continue
 
             # sentinel値（None）で終了
             if item is None:
                 break
 
-            # "parse_mode:message" 形式をパース
-            if ":" in item:
-                parse_mode, message = item.split(":", 1)
-            else:
-                parse_mode, message = "HTML", item
+            parse_mode, message, stop = self._collect_batch(item)
 
+            # レート制限対策（トークンが補充されるまで待つ。待つ間に溜まった分は次回まとめて送る）
+            if not self._rate_limiter.acquire(stop_event=self._stop_event):
+                # 停止指示。手元の1通だけは送ってから抜ける
+                self._send_message(message, parse_mode)
+                break
             self._send_message(message, parse_mode)
 
-            # レート制限対策（Telegram: 毎秒30メッセージまで）
-            time.sleep(0.05)
+            if stop:
+                break
+
+    @staticmethod
+    def _parse_item(item: str) -> tuple[str, str]:
+        """"parse_mode:message" 形式をパースする。"""
+        if ":" in item:
+            parse_mode, message = item.split(":", 1)
+            return parse_mode, message
+        return "HTML", item
+
+    def _collect_batch(self, first: str) -> tuple[str, str, bool]:
+        """
+        キューに溜まっているメッセージを first に連結する。
+
+        parse_mode が同じで、連結後も本文上限に収まる分だけを取り込む。
+        収まらなかったメッセージは次回の送信に回す。
+
+        Returns:
+            (parse_mode, 連結した本文, sentinel を受け取ったか)
+        """
+        parse_mode, message = self._parse_item(first)
+        parts = [message]
+        length = len(message)
+        while True:
+            try:
+                item = self._send_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return parse_mode, _BATCH_SEPARATOR.join(parts), True
+            next_mode, next_message = self._parse_item(item)
+            added = len(_BATCH_SEPARATOR) + len(next_message)
+            if next_mode != parse_mode or length + added > _MAX_MESSAGE_CHARS:
+                self._carry = item
+                break
+            parts.append(next_message)
+            length += added
+        return parse_mode, _BATCH_SEPARATOR.join(parts), False
 
     def _poller_loop(self) -> None:
         """ポーリングスレッドのメインループ。"""
@@ -0,0 +1,100 @@
+"""
+FX自動取引システム — トークンバケット型レートリミッタ
+
+通知（Telegram / Slack）の送信レートを外部サービスの制限内に抑える。
+
+- rate_per_sec でトークンを補充し、capacity までバーストを許容する
+- try_acquire() は待たずに可否を返す（NotifierGroup の集約判定用）
+- acquire() はトークンが補充されるまで待つ（Telegram 送信スレッド用）
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    スレッドセーフなトークンバケット。
+
+    複数の取引ループ（スレッド）から同じ通知先のバケットを共有するためロックで保護する。
+    """
+
+    def __init__(
+        self,
+        rate_per_sec: float,
+        capacity: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            rate_per_sec: 1秒あたりに補充するトークン数
+            capacity: 保持できるトークンの上限（バースト許容量）
+            clock: 経過時間の計測に使う時計（テスト用に差し替え可能）
+
+        Raises:
+            ValueError: rate_per_sec が0以下、または capacity が1未満の場合
+        """
+        if rate_per_sec <= 0:
+            raise ValueError(f"rate_per_sec は正の値である必要があります: {rate_per_sec}")
+        if capacity < 1:
+            raise ValueError(f"capacity は1以上である必要があります: {capacity}")
+        self._rate = rate_per_sec
+        self._capacity = float(capacity)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated_at = clock()
+
+    def try_acquire(self) -> bool:
+        """トークンが1つあれば消費して True、無ければ待たずに False。"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    def wait_time(self) -> float:
+        """次のトークンが補充されるまでの秒数（今あれば0）。"""
+        with self._lock:
+            self._refill()
+            return max(0.0, (1.0 - self._tokens) / self._rate)
+
+    def acquire(
+        self,
+        timeout: Optional[float] = None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> bool:
+        """
+        トークンが得られるまで待って消費する。
+
+        Args:
+            timeout: 待機の上限（秒）。None なら無制限
+            stop_event: セットされたら待機を打ち切る
+
+        Returns:
+            トークンを消費できた場合 True
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            if self.try_acquire():
+                return True
+            wait = self.wait_time()
+            if deadline is not None:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+        self._updated_at = now
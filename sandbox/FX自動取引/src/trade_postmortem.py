@@ -3,14 +3,18 @@ FX自動取引システム — トレード事後分析モジュール
 
 決済されたトレードに対してLLMで勝因/敗因分析を行い、
 パラメータ改善の示唆を提供する。
-fire-and-forget型のデーモンスレッドで非同期実行し、
-メインのトレーディングループをブロックしない。
+固定数のワーカースレッドがキューから順に処理し、メインのトレーディングループを
+ブロックしない。待ちジョブは postmortem_queue テーブルに保存して再起動後も引き継ぎ、
+レート制限時は全ワーカー共通で待機してから再試行する。
 """
 
 import json
 import logging
+import queue
 import sqlite3
 import threading
+import time
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
@@ -19,9 +23,17 @@ import requests
 
 from src.config import (
     ANTHROPIC_API_KEY,
+    DB_WRITER_FLUSH_TIMEOUT_SEC,
+    POSTMORTEM_BACKOFF_BASE_SEC,
+    POSTMORTEM_BACKOFF_MAX_SEC,
+    POSTMORTEM_BATCH_SIZE,
     POSTMORTEM_ENABLED,
+    POSTMORTEM_MAX_ATTEMPTS,
     POSTMORTEM_MODEL_ID,
+    POSTMORTEM_QUEUE_MAX,
+    POSTMORTEM_WORKERS,
 )
+from src.db_writer import DbWriter, get_writer
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +89,50 @@ _USER_PROMPT_TEMPLATE = """\
 改善提案がある場合は、具体的なパラメータ変更を1つだけ提案してください。"""
 
 
+_BATCH_PROMPT_HEADER = """\
+以下の{count}件のトレード結果をそれぞれ独立に分析してください。
+"""
+
+_BATCH_PROMPT_FOOTER = """\
+出力は必ず以下のJSON形式のみ（analyses の各要素はシステムプロンプトの形式に trade_id を加えたもの）:
+{{"analyses": [{{"trade_id": "<トレードID>", "outcome": "win" | "loss", ...}}, ...]}}"""
+
+# レート制限・過負荷として待機後に再試行する HTTP ステータス
+_RATE_LIMIT_STATUSES = (429, 529)
+
+
+class PostMortemRateLimited(Exception):
+    """Claude API のレート制限（待機後に再試行する）"""
+
+    def __init__(self, retry_after: Optional[float] = None) -> None:
+        super().__init__(f"rate limited (retry_after={retry_after})")
+        self.retry_after = retry_after
+
+
+@dataclass
+class PostMortemJob:
+    """事後分析の待ちジョブ（postmortem_queue テーブルに永続化する）"""
+    trade_id: str
+    instrument: str
+    units: int
+    open_price: float
+    close_price: float
+    pl: float
+    opened_at: str                  # ISO 8601
+    closed_at: str                  # ISO 8601
+    exit_snapshot: dict = field(default_factory=dict)
+    attempts: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, payload: str, attempts: int = 0) -> "PostMortemJob":
+        data = json.loads(payload)
+        data["attempts"] = attempts
+        return cls(**data)
+
+
 class TradePostMortem:
     """
     トレード事後分析を管理するクラス。
@@ -85,10 +141,41 @@ class TradePostMortem:
     決済時にLLMで分析を実行する。
     """
 
-    def __init__(self, db_path: Optional[Path] = None) -> None:
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        enabled: bool = True,
+        workers: int = POSTMORTEM_WORKERS,
+        batch_size: int = POSTMORTEM_BATCH_SIZE,
+        queue_max: int = POSTMORTEM_QUEUE_MAX,
+    ) -> None:
+        """
+        Args:
+            db_path: SQLiteデータベースパス（未設定時は永続化しない）
+            enabled: False なら trigger_analysis() を何もしない（リプレイ等のオフライン実行用）
+            workers: 分析ワーカースレッド数
+            batch_size: 1回のAPI呼び出しにまとめるトレード数
+            queue_max: メモリ上の待ちジョブ上限
+        """
         self._db_path = db_path
+        self._enabled = enabled
+        self._db_writer: Optional[DbWriter] = None
+        self._workers = max(1, workers)
+        self._batch_size = max(1, batch_size)
+        # ワーカー・キュー（初回の trigger_analysis / 再開時に起動）
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_max))
+        self._state_lock = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._queued_ids: set[str] = set()   # メモリキュー上 or 処理中の trade_id
+        self._overflowed = False             # メモリキューが溢れ DB にのみ残したジョブがある
+        self._backoff_until = 0.0            # time.monotonic()。この時刻まで API を呼ばない
+        self._rate_limit_streak = 0
         if db_path is not None:
             self._init_db()
+            self._db_writer = get_writer(db_path)
+            if self._analysis_available():
+                # 前回プロセスで未完了のジョブを引き継ぐ
+                self._refill_from_db()
 
     def _init_db(self) -> None:
         """事後分析用テーブルを作成する。"""
@@ -118,6 +205,19 @@ class TradePostMortem:
                 )
                 """
             )
+            # 未完了の事後分析ジョブ（完了で削除、再試行上限超過で status='failed'）
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS postmortem_queue (
+                    trade_id TEXT PRIMARY KEY,
+                    payload_json TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    enqueued_at TEXT NOT NULL,
+                    last_error TEXT
+                )
+                """
+            )
 
     # ------------------------------------------------------------------
     # エントリー時スナップショット保存
@@ -133,29 +233,26 @@ class TradePostMortem:
             trade_id: トレードID
             indicators: compute_indicators()の返却値から抽出したスカラー値dict
         """
-        if self._db_path is None:
+        if self._db_writer is None:
             return
 
         # Seriesは保存できないのでスカラー値のみ抽出
         snapshot = _extract_scalars(indicators)
 
-        try:
-            with sqlite3.connect(str(self._db_path)) as conn:
-                conn.execute(
-                    """INSERT OR REPLACE INTO trade_snapshots
-                       (trade_id, indicators_json, captured_at)
-                       VALUES (?, ?, ?)""",
-                    (
-                        trade_id,
-                        json.dumps(snapshot, ensure_ascii=False),
-                        datetime.now(timezone.utc).isoformat(),
-                    ),
-                )
-        except sqlite3.Error as e:
-            logger.warning("エントリースナップショット保存失敗: %s", e)
+        self._db_writer.execute(
+            """INSERT OR REPLACE INTO trade_snapshots
+               (trade_id, indicators_json, captured_at)
+               VALUES (?, ?, ?)""",
+            (
+                trade_id,
+                json.dumps(snapshot, ensure_ascii=False),
+                datetime.now(timezone.utc).isoformat(),
+            ),
+            error_message="エントリースナップショット保存失敗",
+        )
 
     # ------------------------------------------------------------------
-    # 事後分析トリガー（fire-and-forget）
+    # 事後分析トリガー（ワーカープールへ投入）
     # ------------------------------------------------------------------
 
     def trigger_analysis(
@@ -171,89 +268,292 @@ class TradePostMortem:
         exit_indicators: Optional[dict] = None,
     ) -> None:
         """
-        事後分析をバックグラウンドで実行する。
+        事後分析をワーカープールのキューに積む。
 
-        デーモンスレッドで非同期実行し、メインループをブロックしない。
+        ジョブは postmortem_queue テーブルにも保存し、プロセス再起動後も引き継ぐ。
+        固定数のワーカーが処理するため、一括決済でもスレッド数・同時API呼び出し数は増えない。
         """
-        if not POSTMORTEM_ENABLED:
+        if not POSTMORTEM_ENABLED or not self._enabled:
             return
         if not ANTHROPIC_API_KEY:
             logger.debug("ANTHROPIC_API_KEY未設定のため事後分析スキップ")
             return
 
-        t = threading.Thread(
-            target=self._run_analysis,
-            args=(
-                trade_id, instrument, units, open_price, close_price,
-                pl, opened_at, closed_at, exit_indicators,
-            ),
-            daemon=True,
-            name=f"postmortem-{trade_id}",
+        job = PostMortemJob(
+            trade_id=str(trade_id),
+            instrument=instrument,
+            units=int(units),
+            open_price=float(open_price),
+            close_price=float(close_price),
+            pl=float(pl),
+            opened_at=opened_at.isoformat(),
+            closed_at=closed_at.isoformat(),
+            exit_snapshot=_extract_scalars(exit_indicators) if exit_indicators else {},
         )
-        t.start()
-
-    def _run_analysis(
-        self,
-        trade_id: str,
-        instrument: str,
-        units: int,
-        open_price: float,
-        close_price: float,
-        pl: float,
-        opened_at: datetime,
-        closed_at: datetime,
-        exit_indicators: Optional[dict],
-    ) -> None:
-        """事後分析の実行本体（バックグラウンドスレッド内）。"""
+        if self._db_writer is not None:
+            self._db_writer.execute(
+                """INSERT OR REPLACE INTO postmortem_queue
+                   (trade_id, payload_json, status, attempts, enqueued_at)
+                   VALUES (?, ?, 'pending', 0, ?)""",
+                (job.trade_id, job.to_json(), datetime.now(timezone.utc).isoformat()),
+                error_message="事後分析キューの保存失敗",
+            )
+        self._enqueue(job)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """キュー上・処理中のジョブが無くなるまで待つ。timeout 内に空になれば True。"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._state_lock:
+            while self._queued_ids:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._state_lock.wait(remaining)
+        return True
+
+    @property
+    def pending_count(self) -> int:
+        """メモリキュー上・処理中のジョブ数"""
+        with self._state_lock:
+            return len(self._queued_ids)
+
+    def _analysis_available(self) -> bool:
+        return self._enabled and POSTMORTEM_ENABLED and bool(ANTHROPIC_API_KEY)
+
+    def _enqueue(self, job: PostMortemJob) -> bool:
+        """メモリキューに積みワーカーを起動する。溢れた場合は DB 側にだけ残す。"""
+        with self._state_lock:
+            if job.trade_id in self._queued_ids:
+                return True
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._overflowed = self._db_writer is not None
+                logger.warning(
+                    "事後分析キューが満杯: trade_id=%s（%s）",
+                    job.trade_id,
+                    "DBキューから後で処理" if self._overflowed else "破棄",
+                )
+                return False
+            self._queued_ids.add(job.trade_id)
+            self._ensure_workers()
+        return True
+
+    def _ensure_workers(self) -> None:
+        """ワーカースレッドを workers 本まで起動する。_state_lock 保持下で呼ぶ。"""
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self._workers:
+            t = threading.Thread(
+                target=self._worker_loop,
+                daemon=True,
+                name=f"postmortem-worker-{len(self._threads)}",
+            )
+            self._threads.append(t)
+            t.start()
+
+    def _refill_from_db(self) -> int:
+        """postmortem_queue の pending ジョブをメモリキューへ補充する。"""
+        if self._db_writer is None:
+            return 0
+        self._db_writer.flush()
         try:
-            # エントリー時スナップショットをDBから取得
-            entry_snapshot = self._load_entry_snapshot(trade_id)
-
-            # 決済時指標のスカラー抽出
-            exit_snapshot = _extract_scalars(exit_indicators) if exit_indicators else {}
-
-            # 保有期間算出
-            duration = closed_at - opened_at
-            duration_str = f"{duration.total_seconds() / 3600:.1f}時間"
-
-            # 方向判定
-            direction = "BUY" if units > 0 else "SELL"
-
-            # エントリー/決済指標のフォーマット
-            entry_text = _format_indicators(entry_snapshot) if entry_snapshot else "（スナップショットなし）"
-            exit_text = _format_indicators(exit_snapshot) if exit_snapshot else "（指標なし）"
-
-            # Claude API呼び出し
-            user_prompt = _USER_PROMPT_TEMPLATE.format(
-                instrument=instrument,
-                direction=direction,
-                units=abs(units),
-                open_price=f"{open_price:.5f}",
-                close_price=f"{close_price:.5f}",
-                pl=f"{pl:+.2f}",
-                duration=duration_str,
-                entry_indicators=entry_text,
-                exit_indicators=exit_text,
+            with self._db_writer.reader() as conn:
+                rows = conn.execute(
+                    """SELECT payload_json, attempts FROM postmortem_queue
+                       WHERE status = 'pending' ORDER BY enqueued_at"""
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("事後分析キューの読込失敗: %s", e)
+            return 0
+
+        with self._state_lock:
+            self._overflowed = False
+        added = 0
+        for payload, attempts in rows:
+            try:
+                job = PostMortemJob.from_json(payload, attempts)
+            except (TypeError, ValueError) as e:
+                logger.warning("事後分析キューの不正な行をスキップ: %s", e)
+                continue
+            with self._state_lock:
+                if job.trade_id in self._queued_ids:
+                    continue
+            if not self._enqueue(job):
+                break
+            added += 1
+        if added:
+            logger.info("[PostMortem] DBキューから %d 件の未完了ジョブを再開", added)
+        return added
+
+    def _worker_loop(self) -> None:
+        """ワーカースレッド本体。batch_size 件までまとめて分析する。"""
+        while True:
+            try:
+                job = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                with self._state_lock:
+                    overflowed = self._overflowed
+                if overflowed:
+                    self._refill_from_db()
+                continue
+
+            batch = [job]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._wait_backoff()
+            try:
+                self._run_batch(batch)
+            except PostMortemRateLimited as e:
+                self._on_rate_limited(batch, e.retry_after)
+            except Exception as e:
+                logger.warning(
+                    "事後分析エラー (trade_id=%s): %s",
+                    ",".join(j.trade_id for j in batch), e,
+                )
+                for j in batch:
+                    self._finish(j, error=str(e))
+
+    def _wait_backoff(self) -> None:
+        """レート制限の待機時間が残っていれば待つ（全ワーカー共通）。"""
+        with self._state_lock:
+            wait = self._backoff_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _on_rate_limited(self, batch: list[PostMortemJob], retry_after: Optional[float]) -> None:
+        """待機時間を延ばし、再試行上限内のジョブをキューへ戻す。"""
+        with self._state_lock:
+            self._rate_limit_streak += 1
+            delay = retry_after if retry_after is not None else min(
+                POSTMORTEM_BACKOFF_BASE_SEC * 2 ** (self._rate_limit_streak - 1),
+                POSTMORTEM_BACKOFF_MAX_SEC,
             )
-
-            analysis = self._call_claude(user_prompt)
+            self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+        logger.warning(
+            "事後分析API レート制限: %.1f 秒待機して再試行（%d件）", delay, len(batch),
+        )
+        for job in batch:
+            job.attempts += 1
+            if job.attempts >= POSTMORTEM_MAX_ATTEMPTS:
+                self._finish(job, error="rate limited")
+                continue
+            if self._db_writer is not None:
+                self._db_writer.execute(
+                    "UPDATE postmortem_queue SET attempts=? WHERE trade_id=?",
+                    (job.attempts, job.trade_id),
+                    error_message="事後分析キューの更新失敗",
+                )
+            # 同じ trade_id のまま積み直す（queued_ids は維持）
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                with self._state_lock:
+                    self._queued_ids.discard(job.trade_id)
+                    self._overflowed = self._db_writer is not None
+                    self._state_lock.notify_all()
+
+    def _finish(self, job: PostMortemJob, error: Optional[str] = None) -> None:
+        """ジョブを完了扱いにする（成功はキューから削除、失敗は status='failed'）。"""
+        if self._db_writer is not None:
+            if error is None:
+                self._db_writer.execute(
+                    "DELETE FROM postmortem_queue WHERE trade_id=?",
+                    (job.trade_id,),
+                    error_message="事後分析キューの更新失敗",
+                )
+            else:
+                self._db_writer.execute(
+                    """UPDATE postmortem_queue
+                       SET status='failed', attempts=?, last_error=?
+                       WHERE trade_id=?""",
+                    (job.attempts, error[:500], job.trade_id),
+                    error_message="事後分析キューの更新失敗",
+                )
+        with self._state_lock:
+            self._queued_ids.discard(job.trade_id)
+            self._state_lock.notify_all()
+
+    def _run_batch(self, batch: list[PostMortemJob]) -> None:
+        """1件なら従来どおり単独プロンプト、複数件ならまとめて1回で分析する。"""
+        if len(batch) == 1:
+            job = batch[0]
+            analysis = self._call_claude(self._build_trade_prompt(job))
             if analysis is None:
+                self._finish(job, error="analysis failed")
                 return
+            self._record_analysis(job, analysis)
+            return
 
-            # DB保存
-            self._save_analysis(trade_id, analysis)
-
-            logger.info(
-                "[PostMortem] %s %s: %s → %s | 原因: %s",
-                instrument,
-                direction,
-                "勝ち" if pl > 0 else "負け",
-                f"{pl:+.2f}",
-                analysis.get("primary_cause", "不明"),
-            )
+        sections = [
+            f"### トレード {i} (trade_id={job.trade_id})\n{self._build_trade_prompt(job)}"
+            for i, job in enumerate(batch, start=1)
+        ]
+        prompt = (
+            _BATCH_PROMPT_HEADER.format(count=len(batch))
+            + "\n" + "\n\n".join(sections) + "\n\n" + _BATCH_PROMPT_FOOTER
+        )
+        result = self._call_claude(prompt, scale=len(batch))
+        analyses = {}
+        if isinstance(result, dict):
+            for item in result.get("analyses") or []:
+                if isinstance(item, dict) and item.get("trade_id") is not None:
+                    analyses[str(item.pop("trade_id"))] = item
+        for job in batch:
+            analysis = analyses.get(job.trade_id)
+            if analysis is None:
+                self._finish(job, error="analysis missing in batch response")
+            else:
+                self._record_analysis(job, analysis)
+
+    def _record_analysis(self, job: PostMortemJob, analysis: dict) -> None:
+        """分析結果を保存してジョブを完了する。"""
+        self._save_analysis(job.trade_id, analysis)
+        self._finish(job)
+        with self._state_lock:
+            self._rate_limit_streak = 0
+        direction = "BUY" if job.units > 0 else "SELL"
+        logger.info(
+            "[PostMortem] %s %s: %s → %s | 原因: %s",
+            job.instrument,
+            direction,
+            "勝ち" if job.pl > 0 else "負け",
+            f"{job.pl:+.2f}",
+            analysis.get("primary_cause", "不明"),
+        )
 
-        except Exception as e:
-            logger.warning("事後分析エラー (trade_id=%s): %s", trade_id, e)
+    def _build_trade_prompt(self, job: PostMortemJob) -> str:
+        """1トレード分の分析プロンプトを組み立てる。"""
+        # エントリー時スナップショットをDBから取得
+        entry_snapshot = self._load_entry_snapshot(job.trade_id)
+
+        # 保有期間算出
+        opened_at = datetime.fromisoformat(job.opened_at)
+        closed_at = datetime.fromisoformat(job.closed_at)
+        duration = closed_at - opened_at
+        duration_str = f"{duration.total_seconds() / 3600:.1f}時間"
+
+        # 方向判定
+        direction = "BUY" if job.units > 0 else "SELL"
+
+        # エントリー/決済指標のフォーマット
+        entry_text = _format_indicators(entry_snapshot) if entry_snapshot else "（スナップショットなし）"
+        exit_text = _format_indicators(job.exit_snapshot) if job.exit_snapshot else "（指標なし）"
+
+        return _USER_PROMPT_TEMPLATE.format(
+            instrument=job.instrument,
+            direction=direction,
+            units=abs(job.units),
+            open_price=f"{job.open_price:.5f}",
+            close_price=f"{job.close_price:.5f}",
+            pl=f"{job.pl:+.2f}",
+            duration=duration_str,
+            entry_indicators=entry_text,
+            exit_indicators=exit_text,
+        )
 
     # ------------------------------------------------------------------
     # Claude API
@@ -267,14 +567,18 @@ class TradePostMortem:
     _MAX_TOKENS_INITIAL = 1536
     _MAX_TOKENS_RETRY = 3072
 
-    def _call_claude(self, user_prompt: str) -> Optional[dict]:
+    def _call_claude(self, user_prompt: str, scale: int = 1) -> Optional[dict]:
         """Claude APIで事後分析を実行する。
 
         truncation (stop_reason=max_tokens) を検出したら 1 度だけ大きい
         max_tokens でリトライする。それでも parse 不可なら None を返す。
+        scale はまとめて分析するトレード数（max_tokens を比例して増やす）。
+
+        Raises:
+            PostMortemRateLimited: レート制限・過負荷（呼び出し側で待機後に再試行）
         """
         for attempt, max_tokens in enumerate(
-            (self._MAX_TOKENS_INITIAL, self._MAX_TOKENS_RETRY), start=1,
+            (self._MAX_TOKENS_INITIAL * scale, self._MAX_TOKENS_RETRY * scale), start=1,
         ):
             result = self._call_claude_once(user_prompt, max_tokens)
             if result is None:
@@ -287,7 +591,7 @@ class TradePostMortem:
                 return None
             logger.info(
                 "事後分析: max_tokens=%d で truncated。max_tokens=%d でリトライ",
-                max_tokens, self._MAX_TOKENS_RETRY,
+                max_tokens, self._MAX_TOKENS_RETRY * scale,
             )
         return None
 
@@ -326,6 +630,12 @@ class TradePostMortem:
         except requests.exceptions.Timeout:
             logger.warning("事後分析API タイムアウト")
             return None
+        except requests.exceptions.HTTPError as e:
+            response = e.response
+            if response is not None and response.status_code in _RATE_LIMIT_STATUSES:
+                raise PostMortemRateLimited(_retry_after_sec(response)) from e
+            logger.warning("事後分析APIエラー: %s", e)
+            return None
         except requests.exceptions.RequestException as e:
             logger.warning("事後分析APIエラー: %s", e)
             return None
@@ -358,10 +668,13 @@ class TradePostMortem:
 
     def _load_entry_snapshot(self, trade_id: str) -> Optional[dict]:
         """エントリー時スナップショットをDBから取得する。"""
-        if self._db_path is None:
+        if self._db_writer is None:
             return None
+        # エントリー時の保存がまだキューに残っている場合に備えて書き切ってから読む
+        # （事後分析スレッドで呼ばれるため取引スレッドは待たない）
+        self._db_writer.flush(DB_WRITER_FLUSH_TIMEOUT_SEC)
         try:
-            with sqlite3.connect(str(self._db_path)) as conn:
+            with self._db_writer.reader() as conn:
                 row = conn.execute(
                     "SELECT indicators_json FROM trade_snapshots WHERE trade_id = ?",
                     (trade_id,),
@@ -374,23 +687,20 @@ class TradePostMortem:
 
     def _save_analysis(self, trade_id: str, analysis: dict) -> None:
         """事後分析結果をDBに保存する。"""
-        if self._db_path is None:
+        if self._db_writer is None:
             return
-        try:
-            with sqlite3.connect(str(self._db_path)) as conn:
-                conn.execute(
-                    """INSERT OR REPLACE INTO trade_postmortems
-                       (trade_id, analysis_json, model, created_at)
-                       VALUES (?, ?, ?, ?)""",
-                    (
-                        trade_id,
-                        json.dumps(analysis, ensure_ascii=False),
-                        POSTMORTEM_MODEL_ID,
-                        datetime.now(timezone.utc).isoformat(),
-                    ),
-                )
-        except sqlite3.Error as e:
-            logger.warning("事後分析結果の保存失敗: %s", e)
+        self._db_writer.execute(
+            """INSERT OR REPLACE INTO trade_postmortems
+               (trade_id, analysis_json, model, created_at)
+               VALUES (?, ?, ?, ?)""",
+            (
+                trade_id,
+                json.dumps(analysis, ensure_ascii=False),
+                POSTMORTEM_MODEL_ID,
+                datetime.now(timezone.utc).isoformat(),
+            ),
+            error_message="事後分析結果の保存失敗",
+        )
 
 
 # ============================================================
@@ -416,6 +726,15 @@ def _extract_scalars(indicators: Optional[dict]) -> dict:
     return result
 
 
+def _retry_after_sec(response: requests.Response) -> Optional[float]:
+    """Retry-After ヘッダ（秒）。無い・解釈できない場合は None。"""
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
 def _format_indicators(snapshot: dict) -> str:
     """指標スナップショットを人間が読める文字列に変換する。"""
     if not snapshot:
@@ -14,20 +14,31 @@ from typing import Optional
 import pandas as pd
 
 from src.ai_advisor import AIAdvisor
+from src.bar_clock import granularity_seconds, last_closed_bar_key, next_bar_close
 from src.bear_researcher import BearResearcher
 from src.broker_client import BrokerClient
 from src.config import (
     ATR_PERIOD,
+    BAR_ALIGN_OFFSET_SEC,
+    BAR_CLOSE_GRACE_SEC,
+    BAR_CLOSE_MAX_WAIT_SEC,
+    BAR_CLOSE_RETRY_SEC,
+    BEAR_HTF_GRANULARITY,
     BEAR_RESEARCHER_ENABLED,
     BEAR_SEVERITY_THRESHOLD,
+    INDICATOR_STREAM_ENABLED,
     MAIN_TIMEFRAME,
     PIPELINE_TRACE_DETAIL_MAXLEN,
     SPREAD_EMA_ALPHA,
 )
 from src.conviction_scorer import ConvictionResult, ConvictionScorer
 from src.indicator_cache import compute_indicators
+from src.bar_aggregator import BarAggregator, higher_timeframes
+from src.indicator_stream import IndicatorStream
+from src.latency import LatencyRecorder
 from src.notifier_group import NotifierGroup
 from src.pair_config import get_pair_config
+from src.pipeline_trace import PipelineTraceWriter
 from src.position_manager import PositionManager
 from src.regime_detector import RegimeDetector, RegimeInfo
 from src.risk_manager import RiskManager
@@ -65,6 +76,8 @@ class TradingLoop:
         ai_advisor: Optional[AIAdvisor] = None,
         bear_researcher: Optional[BearResearcher] = None,
         signal_coordinator: Optional[SignalCoordinator] = None,
+        scheduler_mode: str = "interval",
+        trace_writer: Optional[PipelineTraceWriter] = None,
     ) -> None:
         """
         Args:
@@ -76,10 +89,15 @@ class TradingLoop:
             granularity: メインタイムフレーム
             check_interval_sec: イテレーション間の待機秒数
             max_consecutive_errors: 連続エラー許容回数（超過でループ停止）
+            scheduler_mode: "interval"（固定間隔で全パイプライン）または
+                "bar_close"（足確定駆動。足の途中は軽量tickのみ）
+            trace_writer: パイプライン trace の構造化レコード書き込み先（None なら記録しない）
 
         Raises:
             ValueError: check_interval_sec が0以下の場合
             ValueError: max_consecutive_errors が1未満の場合
+            ValueError: scheduler_mode が不正、または bar_close で
+                granularity が未対応の場合
         """
         if check_interval_sec <= 0:
             raise ValueError(
@@ -90,6 +108,13 @@ class TradingLoop:
                 f"max_consecutive_errors は1以上である必要があります: "
                 f"{max_consecutive_errors}"
             )
+        if scheduler_mode not in ("interval", "bar_close"):
+            raise ValueError(
+                f"scheduler_mode は 'interval' または 'bar_close' である必要があります: "
+                f"{scheduler_mode}"
+            )
+        if scheduler_mode == "bar_close":
+            granularity_seconds(granularity)
 
         self._broker_client = broker_client
         self._position_manager = position_manager
@@ -99,16 +124,25 @@ class TradingLoop:
         self._granularity = granularity
         self._check_interval_sec = check_interval_sec
         self._max_consecutive_errors = max_consecutive_errors
+        self._scheduler_mode = scheduler_mode
 
         self._notifier = notifier
         self._ai_advisor = ai_advisor
         self._bear_researcher = bear_researcher
         self._signal_coordinator = signal_coordinator
+        self._trace_writer = trace_writer
+        if signal_coordinator is not None:
+            # 全ペアの報告が揃った時点で協調ウィンドウを閉じられるよう参加登録
+            signal_coordinator.register_participant(instrument)
 
         self._running: bool = False
         self._iteration_count: int = 0
         self._last_error: Optional[str] = None
         self._consecutive_error_count: int = 0
+        # 直近 run_once のシグナルパイプライン trace（パイプライン未到達なら None）
+        self._last_pipeline_trace: Optional[dict] = None
+        # run_once のステージ別レイテンシ（ローリング p50/p95/max）
+        self._latency = LatencyRecorder(instrument)
 
         # 前回イテレーションのATR/spread情報（キルスイッチ評価用キャッシュ）
         self._last_atr: Optional[float] = None
@@ -116,10 +150,26 @@ class TradingLoop:
         self._last_spread: Optional[float] = None
         self._normal_spread: Optional[float] = None
 
+        # 足確定駆動スケジューラ用の状態
+        self._last_bar_key = None
+        self._next_bar_close_ts: float = 0.0   # 0 = 起動直後に全パイプラインを1回実行
+        self._bar_handled: bool = False
+
         # Phase 3: レジーム検出 + conviction score
         self._regime_detector = RegimeDetector()
         self._conviction_scorer = ConvictionScorer()
 
+        # R1拡張: 指標キャッシュの差分更新エンジン（ペア別に状態を保持）
+        self._indicator_stream: Optional[IndicatorStream] = (
+            IndicatorStream() if INDICATOR_STREAM_ENABLED else None
+        )
+
+        # 上位足アグリゲータ（取引足から組み立てられる上位足が無ければ None）
+        htf = higher_timeframes(granularity)
+        self._bar_aggregator: Optional[BarAggregator] = (
+            BarAggregator(granularity, htf) if htf else None
+        )
+
     # ------------------------------------------------------------------
     # メインループ制御
     # ------------------------------------------------------------------
@@ -129,72 +179,153 @@ class TradingLoop:
         無限ループを開始する。
 
         KeyboardInterrupt または stop() で安全に停止する。
-        各イテレーションで run_once() を呼び出し、
-        check_interval_sec 秒待機する。
+        interval モードでは各イテレーションで run_once() を呼び出し、
+        check_interval_sec 秒待機する。bar_close モードでは
+        _scheduled_step() が足確定時刻に合わせて run_once() と
+        run_light_tick() を使い分け、次の起床までの秒数を決める。
         連続エラーが max_consecutive_errors を超過するとループを自動停止する。
         """
+        self.begin()
+        try:
+            while self._running:
+                sleep_sec = self.step()
+
+                # ループ中かつ次のイテレーションまで待機
+                if self._running:
+                    time.sleep(sleep_sec)
+
+        except KeyboardInterrupt:
+            logger.info("KeyboardInterrupt を受信。トレーディングループを停止します。")
+        finally:
+            self.finish()
+
+    def begin(self) -> None:
+        """
+        ループを実行状態にする。
+
+        start() を使わず外部スケジューラ（TradingOrchestrator）から
+        step() を呼ぶ場合は、最初の step() の前に呼ぶ。
+        """
         self._running = True
         logger.info(
             "トレーディングループ開始: instrument=%s, granularity=%s, "
-            "interval=%ds, max_errors=%d",
+            "interval=%ds, max_errors=%d, scheduler=%s",
             self._instrument,
             self._granularity,
             self._check_interval_sec,
             self._max_consecutive_errors,
+            self._scheduler_mode,
         )
 
-        try:
-            while self._running:
-                try:
-                    self.run_once()
-                    # 正常完了 → 連続エラーカウントをリセット
-                    self._consecutive_error_count = 0
-                except Exception as e:
-                    self._consecutive_error_count += 1
-                    self._last_error = str(e)
-                    logger.error(
-                        "イテレーションエラー (%d/%d): %s",
-                        self._consecutive_error_count,
-                        self._max_consecutive_errors,
-                        e,
-                        exc_info=True,
-                    )
+    def finish(self) -> None:
+        """ループを停止状態にする（begin() と対）。"""
+        self._running = False
+        logger.info(
+            "トレーディングループ停止: total_iterations=%d",
+            self._iteration_count,
+        )
 
-                    # 3回以上の連続エラーで通知
-                    if self._consecutive_error_count >= 3:
-                        error_msg = self._last_error or "不明なエラー"
-                        if self._notifier:
-                            self._notifier.notify_error(
-                                error_msg, self._consecutive_error_count,
-                            )
-
-                    # 連続エラー上限超過でループ停止
-                    if self._consecutive_error_count > self._max_consecutive_errors:
-                        logger.critical(
-                            "連続エラーが上限(%d)を超過しました。"
-                            "トレーディングループを緊急停止します。",
-                            self._max_consecutive_errors,
-                        )
-                        self._running = False
-                        break
+    def step(self) -> float:
+        """
+        1ステップ実行し、次のステップまでの待機秒数を返す。
 
-                # ループ中かつ次のイテレーションまで待機
-                if self._running:
-                    time.sleep(self._check_interval_sec)
+        例外は連続エラーとして計上して握りつぶす。連続エラーが
+        max_consecutive_errors を超過した場合はループを停止状態にする。
 
-        except KeyboardInterrupt:
-            logger.info("KeyboardInterrupt を受信。トレーディングループを停止します。")
-        finally:
-            self._running = False
-            logger.info(
-                "トレーディングループ停止: total_iterations=%d",
-                self._iteration_count,
+        Returns:
+            次のステップまでの待機秒数
+        """
+        sleep_sec: float = self._check_interval_sec
+        try:
+            if self._scheduler_mode == "bar_close":
+                sleep_sec = self._scheduled_step()
+            else:
+                self.run_once()
+            # 正常完了 → 連続エラーカウントをリセット
+            self._consecutive_error_count = 0
+        except Exception as e:
+            self._consecutive_error_count += 1
+            self._last_error = str(e)
+            logger.error(
+                "イテレーションエラー (%d/%d): %s",
+                self._consecutive_error_count,
+                self._max_consecutive_errors,
+                e,
+                exc_info=True,
             )
 
+            # 3回以上の連続エラーで通知
+            if self._consecutive_error_count >= 3:
+                error_msg = self._last_error or "不明なエラー"
+                if self._notifier:
+                    self._notifier.notify_error(
+                        error_msg, self._consecutive_error_count,
+                    )
+
+            # 連続エラー上限超過でループ停止
+            if self._consecutive_error_count > self._max_consecutive_errors:
+                logger.critical(
+                    "連続エラーが上限(%d)を超過しました。"
+                    "トレーディングループを緊急停止します。",
+                    self._max_consecutive_errors,
+                )
+                self._running = False
+        return sleep_sec
+
     def stop(self) -> None:
         """ループを安全に停止する。"""
         logger.info("トレーディングループの停止を要求しました。")
         self._running = False
+        if self._signal_coordinator is not None:
+            self._signal_coordinator.unregister_participant(self._instrument)
+
+    def _scheduled_step(self) -> float:
+        """
+        bar_close モードの1ステップを実行し、次の起床までの待機秒数を返す。
+
+        - 足確定時刻（+猶予）前: run_light_tick() のみ
+        - 足確定時刻後: run_once()。新しい足がまだデータに出ていなければ
+          BAR_CLOSE_RETRY_SEC 後に再試行し、BAR_CLOSE_MAX_WAIT_SEC を超えたら
+          その足は諦めて次の足確定を待つ
+
+        Returns:
+            次のステップまでの待機秒数
+        """
+        now = time.time()
+        if now < self._next_bar_close_ts:
+            self.run_light_tick()
+            return self._seconds_until_bar_close(time.time())
+
+        self._bar_handled = False
+        self.run_once()
+        now = time.time()
+        waited = now - self._next_bar_close_ts
+        if not self._bar_handled and waited < BAR_CLOSE_MAX_WAIT_SEC:
+            return BAR_CLOSE_RETRY_SEC
+
+        if not self._bar_handled:
+            logger.warning(
+                "新しい足が%.0f秒以内に反映されませんでした: instrument=%s, "
+                "granularity=%s（次の足確定まで軽量tickに戻ります）",
+                BAR_CLOSE_MAX_WAIT_SEC, self._instrument, self._granularity,
+            )
+        self._next_bar_close_ts = (
+            next_bar_close(now, self._granularity, BAR_ALIGN_OFFSET_SEC)
+            + BAR_CLOSE_GRACE_SEC
+        )
+        return self._seconds_until_bar_close(now)
+
+    def _seconds_until_bar_close(self, now: float) -> float:
+        """次の足確定（+猶予）までの秒数。check_interval_sec を上限とする。"""
+        return max(0.0, min(self._check_interval_sec, self._next_bar_close_ts - now))
+
+    def run_light_tick(self) -> None:
+        """
+        足の途中の軽量tick。ポジション同期とスプレッドキャッシュ更新のみ行い、
+        価格取得・指標計算・シグナルパイプラインは実行しない。
+        """
+        self._position_manager.sync_with_broker()
+        self._update_spread_cache()
 
     # ------------------------------------------------------------------
     # 1イテレーション
@@ -214,6 +345,7 @@ class TradingLoop:
            - そうでなければ新規取引スキップ
         4. position_manager.sync_with_broker()
         5. broker_client.get_prices(instrument, 100, granularity)
+           - bar_close モードで新しい足が出ていなければここで終了
         6. strategy.generate_signal(data)
         7. BUY/SELL → position_manager.open_position()
         8. iteration_count += 1
@@ -224,14 +356,38 @@ class TradingLoop:
         Raises:
             各ステップで発生した例外はそのまま上位に伝播する。
         """
+        self._last_pipeline_trace = None
+        self._latency.begin_iteration()
+        try:
+            return self._run_stages()
+        finally:
+            if self._signal_coordinator is not None:
+                # シグナルが無くても報告する（他ペアの協調ウィンドウを早く閉じるため）
+                self._signal_coordinator.report_iteration(self._instrument)
+            self._record_latency()
+
+    def _run_stages(self) -> Optional[dict]:
+        """run_once のステージ1〜4 を実行する（レイテンシ計測は run_once 側）。"""
         # ステージ1: プリトレードチェック（残高・キルスイッチ）
         if not self._pre_trade_checks():
+            self._bar_handled = True
             self._iteration_count += 1
             return None
 
         # ステージ2: データ取得・指標計算
         data, indicators = self._fetch_and_compute()
 
+        # bar_close モード: 新しい足が出ていなければシグナル判定しない
+        new_bar = self._detect_new_bar(data)
+        if self._scheduler_mode == "bar_close" and not new_bar:
+            logger.debug(
+                "新しい足なし、シグナルパイプラインをスキップ: instrument=%s",
+                self._instrument,
+            )
+            self._iteration_count += 1
+            return None
+        self._bar_handled = True
+
         # ステージ3: シグナルパイプライン（レジーム→戦略→conviction→AI→Bear）
         pipeline_result = self._signal_pipeline(data, indicators)
 
@@ -250,6 +406,30 @@ class TradingLoop:
         self._iteration_count += 1
         return order_result
 
+    def _record_latency(self) -> None:
+        """
+        イテレーションのステージ別所要時間を確定し、trace に付与する。
+
+        trace_writer があれば trace を構造化レコードとして積む。
+        LATENCY_LOG_INTERVAL_SEC ごとにペアのレイテンシ・サマリをログ出力する。
+        """
+        timings = self._latency.end_iteration()
+        if self._last_pipeline_trace is not None:
+            self._last_pipeline_trace["latency_ms"] = timings
+            if self._trace_writer is not None:
+                try:
+                    self._trace_writer.write(
+                        self._instrument, self._iteration_count, self._last_pipeline_trace,
+                    )
+                except Exception as e:
+                    # trace の記録失敗で取引を止めない
+                    logger.warning("[%s] パイプライン trace の記録に失敗: %s", self._instrument, e)
+        if self._latency.should_log():
+            logger.info(
+                "[%s] レイテンシ・サマリ (ms):\n%s",
+                self._instrument, self._latency.format_summary(),
+            )
+
     # ------------------------------------------------------------------
     # run_once サブステージ
     # ------------------------------------------------------------------
@@ -263,20 +443,21 @@ class TradingLoop:
             False: このイテレーションはスキップ
         """
         # 1. 口座残高の取得・更新
-        account_summary = self._broker_client.get_account_summary()
+        with self._latency.measure("account"):
+            account_summary = self._broker_client.get_account_summary()
         current_balance = account_summary["balance"]
         self._risk_manager.update_balance(current_balance)
 
         # 2. キルスイッチ総合評価（前回イテレーションのATR/spreadを使用）
-        trade_history = self._position_manager.trade_history
-        kill_reason = self._risk_manager.evaluate_kill_switch(
-            current_balance=current_balance,
-            trade_history=trade_history,
-            current_atr=self._last_atr,
-            normal_atr=self._normal_atr,
-            current_spread=self._last_spread,
-            normal_spread=self._normal_spread,
-        )
+        # 損失上限・連続負けは RiskManager の損失集計を参照する（履歴は渡さない）
+        with self._latency.measure("kill_switch"):
+            kill_reason = self._risk_manager.evaluate_kill_switch(
+                current_balance=current_balance,
+                current_atr=self._last_atr,
+                normal_atr=self._normal_atr,
+                current_spread=self._last_spread,
+                normal_spread=self._normal_spread,
+            )
 
         if kill_reason is not None:
             # キルスイッチ発動
@@ -324,16 +505,30 @@ class TradingLoop:
             (価格データ, 指標キャッシュdict)
         """
         # 4. ブローカーとのポジション同期
-        self._position_manager.sync_with_broker()
+        with self._latency.measure("sync"):
+            self._position_manager.sync_with_broker()
 
         # 5. 価格データ取得
         # MA200（MTFPullback）に必要なので300本取得
-        data = self._broker_client.get_prices(
-            self._instrument, 300, self._granularity
-        )
+        with self._latency.measure("prices"):
+            data = self._broker_client.get_prices(
+                self._instrument, 300, self._granularity
+            )
+        # XXX_JPY の価格は非JPYペアのサイジング用レートとして共有する
+        if len(data) > 0:
+            self._risk_manager.update_fx_rate(
+                self._instrument, float(data["close"].iloc[-1])
+            )
 
         # 5a. 指標キャッシュの一括計算（全モジュールで共有）
-        indicators = compute_indicators(data)
+        # ストリーミング有効時は新規確定足だけを差分更新する
+        with self._latency.measure("indicators"):
+            if self._indicator_stream is not None:
+                indicators = self._indicator_stream.update(data)
+            else:
+                indicators = compute_indicators(data)
+            if self._bar_aggregator is not None and isinstance(data.index, pd.DatetimeIndex):
+                self._bar_aggregator.update(data)
 
         # 5b. ATR/spreadキャッシュ更新（次回イテレーションのキルスイッチ評価用）
         cached_atr = indicators.get("current_atr")
@@ -346,6 +541,27 @@ class TradingLoop:
                     self._normal_atr = float(valid_atr.median())
 
         # 5c. spreadキャッシュ更新（キルスイッチのスプレッド監視用）
+        with self._latency.measure("spread"):
+            self._update_spread_cache()
+
+        return data, indicators
+
+    def _detect_new_bar(self, data: pd.DataFrame) -> bool:
+        """
+        前回の取得から新しい足が出現したかを判定し、判定キーを更新する。
+
+        Returns:
+            新しい足が出現した（または初回）なら True
+        """
+        key = last_closed_bar_key(data)
+        if key is None:
+            return True
+        is_new = key != self._last_bar_key
+        self._last_bar_key = key
+        return is_new
+
+    def _update_spread_cache(self) -> None:
+        """スプレッドを取得し、現在値と通常値（EMA）のキャッシュを更新する。"""
         try:
             current_spread = self._broker_client.get_spread(self._instrument)
             if current_spread is not None and current_spread >= 0:
@@ -362,8 +578,6 @@ class TradingLoop:
                 "スプレッド取得失敗（前回値を継続使用）: %s", e
             )
 
-        return data, indicators
-
     def _signal_pipeline(
         self, data: pd.DataFrame, indicators: dict
     ) -> Optional[
@@ -381,6 +595,13 @@ class TradingLoop:
             (signal, combined_multiplier, conviction, regime_info, ai_record) または None
         """
         trace: list[tuple[str, str, str]] = []
+        # 構造化 trace 用の数値（列名は pipeline_trace.TRACE_COLUMNS）
+        values: dict = {
+            "bar_time": (
+                data.index[-1]
+                if isinstance(data.index, pd.DatetimeIndex) and len(data) else None
+            ),
+        }
 
         # 0. 時間帯フィルター（T4）: 許可セッション外ならスキップ
         if not is_in_allowed_session(self._instrument):
@@ -390,10 +611,11 @@ class TradingLoop:
                 "[%s] 時間帯フィルター: 許可セッション外のためシグナル生成をスキップ",
                 self._instrument,
             )
-            self._log_pipeline_trace(trace, decision="SKIP")
+            self._log_pipeline_trace(trace, decision="SKIP", values=values)
             return None
         active_label = get_active_session_label(self._instrument)
         trace.append(("session", "PASS", active_label or "-"))
+        values["session_label"] = active_label
         logger.debug(
             "[%s] アクティブセッション: %s", self._instrument, active_label,
         )
@@ -402,8 +624,16 @@ class TradingLoop:
         pair_cfg = get_pair_config(self._instrument)
 
         # 6. レジーム検出（監査A4: pair_config の regime_* キーで閾値オーバーライド可）
-        regime_info = self._regime_detector.detect(
-            data, indicators=indicators, pair_config=pair_cfg,
+        with self._latency.measure("regime"):
+            regime_info = self._regime_detector.detect(
+                data, indicators=indicators, pair_config=pair_cfg,
+            )
+        values.update(
+            regime=regime_info.regime.value,
+            regime_confidence=regime_info.confidence,
+            adx=regime_info.adx,
+            atr_ratio=regime_info.atr_ratio,
+            exposure_mult=regime_info.exposure_multiplier,
         )
         regime_label = (
             f"{regime_info.regime.value}("
@@ -427,15 +657,17 @@ class TradingLoop:
                 self._instrument,
                 regime_info.atr_ratio,
             )
-            self._log_pipeline_trace(trace, decision="SKIP")
+            self._log_pipeline_trace(trace, decision="SKIP", values=values)
             return None
         trace.append(("regime", "PASS", regime_label))
 
         # 7. シグナル生成（pair_cfg は将来の戦略側オーバーライド用に渡す）
-        signal = self._strategy.generate_signal(
-            data, indicators=indicators, pair_config=pair_cfg,
-        )
+        with self._latency.measure("strategy"):
+            signal = self._strategy.generate_signal(
+                data, indicators=indicators, pair_config=pair_cfg,
+            )
         strategy_name = type(self._strategy).__name__
+        values["strategy"] = strategy_name
 
         if signal not in (Signal.BUY, Signal.SELL):
             # 戦略側の last_diagnostics から HOLD 理由を取得（あれば）
@@ -447,12 +679,13 @@ class TradingLoop:
                 self._instrument,
                 self._iteration_count + 1,
             )
-            self._log_pipeline_trace(trace, decision="HOLD")
+            self._log_pipeline_trace(trace, decision="HOLD", values=values)
             return None
         trace.append(("strategy", signal.value, strategy_name))
 
         # ペア別ADXフィルター（T4）: ペア別 adx_threshold を満たさなければスキップ
         pair_adx_threshold = pair_cfg.get("adx_threshold")
+        values["pair_adx_threshold"] = pair_adx_threshold
         if pair_adx_threshold is not None and regime_info.adx < pair_adx_threshold:
             trace.append((
                 "pair_adx",
@@ -465,13 +698,16 @@ class TradingLoop:
                 regime_info.adx,
                 pair_adx_threshold,
             )
-            self._log_pipeline_trace(trace, decision="REJECT")
+            self._log_pipeline_trace(trace, decision="REJECT", values=values)
             return None
 
         # 8. conviction score 評価
-        conviction = self._conviction_scorer.score(
-            data, signal, regime_info, indicators=indicators,
-        )
+        with self._latency.measure("conviction"):
+            conviction = self._conviction_scorer.score(
+                data, signal, regime_info, indicators=indicators,
+            )
+        values["conviction_score"] = conviction.score
+        values["conviction_mult"] = conviction.position_size_multiplier
         # 詳細ログは DEBUG（reasoning は長文のためサマリでは MAXLEN 切り詰め済み）
         logger.debug(
             "[%s] conviction score: %d/10 (倍率=%.1f, 取引=%s) — %s",
@@ -494,7 +730,7 @@ class TradingLoop:
                 conviction.score,
                 signal.value,
             )
-            self._log_pipeline_trace(trace, decision="REJECT")
+            self._log_pipeline_trace(trace, decision="REJECT", values=values)
             return None
         trace.append((
             "conviction",
@@ -512,10 +748,16 @@ class TradingLoop:
         ai_eval = "N/A"
         ai_record: Optional[dict] = None
         if self._ai_advisor:
-            bias = self._ai_advisor.get_bias(self._instrument)
+            with self._latency.measure("ai"):
+                bias = self._ai_advisor.get_bias(self._instrument)
             if bias:
                 ai_eval = bias.evaluate_signal(signal.value)
                 ai_multiplier = bias.position_size_multiplier(ai_eval)
+                values.update(
+                    ai_direction=bias.direction,
+                    ai_confidence=bias.confidence,
+                    ai_mult=ai_multiplier,
+                )
                 # 詳細ログは DEBUG。REJECT のときだけ WARNING で目立たせる
                 logger.debug(
                     "[%s] AIフィルター: %s (direction=%s, confidence=%.2f) → 倍率%.2f",
@@ -530,7 +772,7 @@ class TradingLoop:
                         "[%s] AIフィルター: REJECT（%s）。シグナルを見送り。",
                         self._instrument, bias.reasoning,
                     )
-                    self._log_pipeline_trace(trace, decision="REJECT")
+                    self._log_pipeline_trace(trace, decision="REJECT", values=values)
                     return None
                 trace.append(("ai", ai_eval, f"mult={ai_multiplier:.2f}"))
                 combined_multiplier *= ai_multiplier
@@ -540,9 +782,13 @@ class TradingLoop:
 
         # Bear Researcher: 逆張り検証
         if self._bear_researcher:
-            bear_verdict = self._bear_researcher.verify(
-                data, signal, regime_info, indicators=indicators,
-            )
+            with self._latency.measure("bear"):
+                bear_verdict = self._bear_researcher.verify(
+                    data, signal, regime_info, indicators=indicators,
+                    htf_indicators=self._htf_indicators(BEAR_HTF_GRANULARITY),
+                )
+            values["bear_severity"] = bear_verdict.severity
+            values["bear_penalty"] = bear_verdict.penalty_multiplier
             if bear_verdict.severity >= BEAR_SEVERITY_THRESHOLD:
                 trace.append((
                     "bear",
@@ -561,7 +807,7 @@ class TradingLoop:
                 trace.append(("bear", "PASS", f"sev={bear_verdict.severity:.2f}"))
 
         self._log_pipeline_trace(
-            trace, decision="EXECUTE", final_mult=combined_multiplier,
+            trace, decision="EXECUTE", final_mult=combined_multiplier, values=values,
         )
         return signal, combined_multiplier, conviction, regime_info, ai_record
 
@@ -574,6 +820,7 @@ class TradingLoop:
         trace: list[tuple[str, str, str]],
         decision: str,
         final_mult: Optional[float] = None,
+        values: Optional[dict] = None,
     ) -> None:
         """シグナルパイプラインの全ステージを1行 INFO に集約して出力する。
 
@@ -587,7 +834,12 @@ class TradingLoop:
             trace: (stage_name, status, detail) のリスト。
             decision: SKIP / HOLD / REJECT / EXECUTE
             final_mult: EXECUTE 時のみ最終ポジション倍率を末尾に付与する。
+            values: 構造化 trace 用の数値（足時刻・スコア・倍率など。切り詰めない）
         """
+        self._last_pipeline_trace = {
+            "stages": list(trace), "decision": decision, "final_mult": final_mult,
+            "values": dict(values or {}),
+        }
         parts = []
         for name, status, detail in trace:
             if detail:
@@ -597,15 +849,16 @@ class TradingLoop:
                 parts.append(f"{name}={status}")
         summary = " → ".join(parts) if parts else "(empty)"
 
+        elapsed_ms = self._latency.elapsed_ms()
         if final_mult is not None:
             logger.info(
-                "[%s] pipeline: %s | DECISION=%s mult=%.2f",
-                self._instrument, summary, decision, final_mult,
+                "[%s] pipeline: %s | DECISION=%s mult=%.2f | %.1fms",
+                self._instrument, summary, decision, final_mult, elapsed_ms,
             )
         else:
             logger.info(
-                "[%s] pipeline: %s | DECISION=%s",
-                self._instrument, summary, decision,
+                "[%s] pipeline: %s | DECISION=%s | %.1fms",
+                self._instrument, summary, decision, elapsed_ms,
             )
 
     @staticmethod
@@ -633,9 +886,10 @@ class TradingLoop:
             adx_val = 0.0
             if indicators and indicators.get("current_adx") is not None:
                 adx_val = indicators["current_adx"]
-            approved = self._signal_coordinator.register_signal(
-                self._instrument, signal.value, adx=adx_val,
-            )
+            with self._latency.measure("coordinator"):
+                approved = self._signal_coordinator.register_signal(
+                    self._instrument, signal.value, adx=adx_val,
+                )
             if not approved:
                 logger.info(
                     "[%s] SignalCoordinator: 相関リスクによりシグナル拒否",
@@ -659,14 +913,23 @@ class TradingLoop:
                 conviction_score=conviction.score,
                 regime=regime_info.regime.value,
             )
-        return self._position_manager.open_position(
-            instrument=self._instrument,
-            signal=signal,
-            data=data,
-            strategy=self._strategy,
-            indicators=indicators,
-            ai_record=ai_record,
-        )
+        with self._latency.measure("order"):
+            return self._position_manager.open_position(
+                instrument=self._instrument,
+                signal=signal,
+                data=data,
+                strategy=self._strategy,
+                indicators=indicators,
+                ai_record=ai_record,
+            )
+
+    def _htf_indicators(self, timeframe: str) -> Optional[dict]:
+        """上位足の指標キャッシュ。未指定・組み立てていない上位足なら None。"""
+        if not timeframe or self._bar_aggregator is None:
+            return None
+        if timeframe not in self._bar_aggregator.timeframes:
+            return None
+        return self._bar_aggregator.indicators(timeframe)
 
     # ------------------------------------------------------------------
     # プロパティ
@@ -682,6 +945,28 @@ class TradingLoop:
         """完了したイテレーション数"""
         return self._iteration_count
 
+    @property
+    def last_pipeline_trace(self) -> Optional[dict]:
+        """
+        直近 run_once のパイプライン trace。
+
+        {"stages": [(stage, status, detail), ...], "decision": str, "final_mult": float|None,
+         "values": {"bar_time", "regime", "adx", "conviction_score", ...},
+         "latency_ms": {stage: ms, ..., "total": ms}}。
+        プリトレードチェックで止まった・新しい足が無かった場合は None。
+        """
+        return self._last_pipeline_trace
+
+    @property
+    def bar_aggregator(self) -> Optional[BarAggregator]:
+        """上位足アグリゲータ（取引足から組み立てられる上位足が無ければ None）"""
+        return self._bar_aggregator
+
+    @property
+    def latency(self) -> LatencyRecorder:
+        """ステージ別レイテンシの記録（/perf・定期ログ用）"""
+        return self._latency
+
     @property
     def last_error(self) -> Optional[str]:
         """最後に発生したエラーメッセージ。エラーなしの場合は None。"""
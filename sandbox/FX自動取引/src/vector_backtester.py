@@ -0,0 +1,528 @@
+"""
+FX自動取引システム — ベクトル化バックテストエンジン
+
+Backtesting.py の Strategy.next() をバーごとに呼ぶ代わりに、
+エントリー条件・SL/TP到達・エクイティ曲線を NumPy の配列演算で求める
+BacktestEngine の代替バックエンド。パラメータスイープや複数年の M15 データでの
+ウォークフォワードを高速化する。
+
+約定モデルは BacktestEngine.run()（exclusive_orders=True）と同じ:
+- シグナル足の次の足の始値で約定し、spread を約定価格に相対値で上乗せ
+- SL/TP は約定足から判定し、同一足で両方に届いた場合は SL を優先
+  （窓開けで SL/TP を飛び越えた場合は始値で約定）
+- ポジション保有中の新規シグナルは次の足の始値で決済して入れ替える
+  （その足で SL/TP に届いていても始値決済が先。next() で self.position を
+  見る戦略は保有中のシグナルを無視）
+- サイズは利用可能証拠金いっぱいの整数単位、手数料は約定価格に対する相対値
+
+メトリクスは Backtesting.py の compute_stats と同じ定義で算出し、
+BacktestEngine._extract_metrics() と同じ dict を返すため、
+fill_rate 補正・IS/OOS 分割・WFA・結果保存はそのまま使える。
+
+対応戦略は SIGNAL_BUILDERS に登録した Strategy クラス
+（パラメータだけを上書きしたサブクラスを含む）。
+"""
+
+import logging
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+from backtesting import Strategy
+
+from src.backtester import BacktestEngine, BacktestError, RsiMaCrossoverBT
+from src.strategy.variants_bt import (
+    ATRChannelBreakoutBT,
+    BollingerReversalBT,
+    DonchianBreakoutBT,
+    MTFPullbackBT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Backtesting.py の buy()/sell() 既定サイズ（証拠金いっぱい）
+_FULL_EQUITY = 1 - sys.float_info.epsilon
+
+# SL/TP 到達を探索する最初のチャンク長（見つからなければ倍々に伸ばす）
+_BARRIER_CHUNK = 256
+
+
+@dataclass
+class VectorSignals:
+    """シグナル足ごとのエントリー条件と SL/TP 価格"""
+
+    long_entry: np.ndarray    # bool: 足 i の確定時に買いシグナル
+    short_entry: np.ndarray   # bool: 足 i の確定時に売りシグナル
+    sl: np.ndarray            # float: シグナル足 i で発注する SL 価格
+    tp: np.ndarray            # float: シグナル足 i で発注する TP 価格
+    warmup: int               # 指標のウォームアップ本数（next() は warmup+1 本目から）
+    flat_only: bool = False   # True: ポジション保有中のシグナルは無視する
+
+
+# ------------------------------------------------------------------
+# シグナル生成（各 Strategy の init/next を配列演算で再現）
+# ------------------------------------------------------------------
+
+
+def _column(data: pd.DataFrame, name: str) -> pd.Series:
+    """Backtesting.py の self.data.X と同じ RangeIndex の Series を返す。"""
+    return pd.Series(data[name].to_numpy(dtype=float))
+
+
+def _values(indicator: Optional[pd.Series], n: int) -> np.ndarray:
+    if indicator is None:
+        return np.full(n, np.nan)
+    return np.asarray(indicator, dtype=float)
+
+
+def _warmup_bars(*indicators: np.ndarray) -> int:
+    """Backtesting.py と同じく、各指標の最初の非NaN位置の最大値を返す。"""
+    return max((int(np.isnan(ind).argmin()) for ind in indicators), default=0)
+
+
+def _atr(high: pd.Series, low: pd.Series, close: pd.Series, length: int) -> np.ndarray:
+    return _values(ta.atr(high, low, close, length=length), len(close))
+
+
+def _brackets(
+    price: np.ndarray, sl_dist: np.ndarray, rr: float, long_entry: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """SL距離と RR から買い/売りそれぞれの SL/TP 価格を組み立てる。"""
+    sl = np.where(long_entry, price - sl_dist, price + sl_dist)
+    tp = np.where(long_entry, price + sl_dist * rr, price - sl_dist * rr)
+    return sl, tp
+
+
+def _rsi_ma_crossover_signals(
+    data: pd.DataFrame, strategy: type[Strategy]
+) -> VectorSignals:
+    close, high, low = _column(data, "Close"), _column(data, "High"), _column(data, "Low")
+    n = len(close)
+    ma_s = _values(ta.sma(close, length=strategy.ma_short), n)
+    ma_l = _values(ta.sma(close, length=strategy.ma_long), n)
+    rsi = _values(ta.rsi(close, length=strategy.rsi_period), n)
+    atr = _atr(high, low, close, strategy.atr_period)
+    adx_df = ta.adx(high, low, close, length=strategy.adx_period)
+    adx_col = f"ADX_{strategy.adx_period}"
+    adx = _values(
+        adx_df[adx_col] if adx_df is not None and adx_col in adx_df.columns else None, n
+    )
+
+    prev_s = np.concatenate(([np.nan], ma_s[:-1]))
+    prev_l = np.concatenate(([np.nan], ma_l[:-1]))
+    valid = ~(
+        np.isnan(ma_s) | np.isnan(ma_l) | np.isnan(rsi) | np.isnan(atr)
+        | np.isnan(adx) | np.isnan(prev_s) | np.isnan(prev_l)
+    )
+    valid &= adx >= strategy.adx_threshold
+
+    long_entry = valid & (prev_s <= prev_l) & (ma_s > ma_l) & (rsi < strategy.rsi_overbought)
+    short_entry = (
+        valid & ~long_entry & (prev_s >= prev_l) & (ma_s < ma_l)
+        & (rsi > strategy.rsi_oversold)
+    )
+
+    entry = close.to_numpy()
+    sl = np.where(
+        long_entry, entry - atr * strategy.atr_multiplier,
+        entry + atr * strategy.atr_multiplier,
+    )
+    risk = np.where(long_entry, entry - sl, sl - entry)
+    tp = np.where(
+        long_entry, entry + risk * strategy.min_risk_reward,
+        entry - risk * strategy.min_risk_reward,
+    )
+    return VectorSignals(
+        long_entry, short_entry, sl, tp,
+        warmup=_warmup_bars(ma_s, ma_l, rsi, atr, adx),
+    )
+
+
+def _donchian_signals(data: pd.DataFrame, strategy: type[Strategy]) -> VectorSignals:
+    close, high, low = _column(data, "Close"), _column(data, "High"), _column(data, "Low")
+    high_n = high.rolling(strategy.donchian_len).max().shift(1).to_numpy()
+    low_n = low.rolling(strategy.donchian_len).min().shift(1).to_numpy()
+    atr = _atr(high, low, close, strategy.atr_period)
+
+    price = close.to_numpy()
+    valid = ~(np.isnan(high_n) | np.isnan(low_n) | np.isnan(atr)) & (atr != 0)
+    long_entry = valid & (price > high_n)
+    short_entry = valid & ~long_entry & (price < low_n)
+    sl, tp = _brackets(price, atr * strategy.atr_mult, strategy.rr, long_entry)
+    return VectorSignals(
+        long_entry, short_entry, sl, tp,
+        warmup=_warmup_bars(high_n, low_n, atr), flat_only=True,
+    )
+
+
+def _atr_channel_signals(data: pd.DataFrame, strategy: type[Strategy]) -> VectorSignals:
+    close, high, low = _column(data, "Close"), _column(data, "High"), _column(data, "Low")
+    ma = _values(ta.sma(close, length=strategy.ma_period), len(close))
+    atr = _atr(high, low, close, strategy.atr_period)
+
+    price = close.to_numpy()
+    valid = ~(np.isnan(ma) | np.isnan(atr)) & (atr != 0)
+    long_entry = valid & (price > ma + atr * strategy.atr_mult)
+    short_entry = valid & ~long_entry & (price < ma - atr * strategy.atr_mult)
+    sl, tp = _brackets(price, atr * strategy.sl_atr_mult, strategy.rr, long_entry)
+    return VectorSignals(
+        long_entry, short_entry, sl, tp,
+        warmup=_warmup_bars(ma, atr), flat_only=True,
+    )
+
+
+def _mtf_pullback_signals(data: pd.DataFrame, strategy: type[Strategy]) -> VectorSignals:
+    close, high, low = _column(data, "Close"), _column(data, "High"), _column(data, "Low")
+    n = len(close)
+    ma = _values(ta.sma(close, length=strategy.trend_ma), n)
+    rsi = _values(ta.rsi(close, length=strategy.rsi_period), n)
+    atr = _atr(high, low, close, strategy.atr_period)
+
+    price = close.to_numpy()
+    valid = ~(np.isnan(ma) | np.isnan(rsi) | np.isnan(atr)) & (atr != 0)
+    long_entry = valid & (price > ma) & (rsi < strategy.rsi_oversold)
+    short_entry = valid & ~long_entry & (price < ma) & (rsi > strategy.rsi_overbought)
+    sl, tp = _brackets(price, atr * strategy.atr_mult, strategy.rr, long_entry)
+    return VectorSignals(
+        long_entry, short_entry, sl, tp,
+        warmup=_warmup_bars(ma, rsi, atr), flat_only=True,
+    )
+
+
+def _bollinger_reversal_signals(
+    data: pd.DataFrame, strategy: type[Strategy]
+) -> VectorSignals:
+    close, high, low = _column(data, "Close"), _column(data, "High"), _column(data, "Low")
+    n = len(close)
+    bb = ta.bbands(close, length=strategy.bb_length, std=strategy.bb_std)
+    bb_u = _values(
+        bb[[c for c in bb.columns if c.startswith("BBU_")][0]] if bb is not None else None, n
+    )
+    bb_l = _values(
+        bb[[c for c in bb.columns if c.startswith("BBL_")][0]] if bb is not None else None, n
+    )
+    rsi = _values(ta.rsi(close, length=strategy.rsi_period), n)
+    atr = _atr(high, low, close, strategy.atr_period)
+
+    price = close.to_numpy()
+    valid = ~(np.isnan(bb_u) | np.isnan(bb_l) | np.isnan(rsi) | np.isnan(atr)) & (atr != 0)
+    # 上バンド + RSI過熱の売りを優先（next() の if/elif 順）
+    short_entry = valid & (price >= bb_u) & (rsi >= strategy.rsi_overbought)
+    long_entry = valid & ~short_entry & (price <= bb_l) & (rsi <= strategy.rsi_oversold)
+    sl, tp = _brackets(price, atr * strategy.atr_mult, strategy.rr, long_entry)
+    return VectorSignals(
+        long_entry, short_entry, sl, tp,
+        warmup=_warmup_bars(bb_u, bb_l, rsi, atr), flat_only=True,
+    )
+
+
+# Strategy クラス → シグナル生成関数
+SIGNAL_BUILDERS: dict[type[Strategy], Callable[[pd.DataFrame, type[Strategy]], VectorSignals]] = {
+    RsiMaCrossoverBT: _rsi_ma_crossover_signals,
+    DonchianBreakoutBT: _donchian_signals,
+    ATRChannelBreakoutBT: _atr_channel_signals,
+    MTFPullbackBT: _mtf_pullback_signals,
+    BollingerReversalBT: _bollinger_reversal_signals,
+}
+
+
+def build_signals(data: pd.DataFrame, strategy_class: type[Strategy]) -> VectorSignals:
+    """
+    Strategy クラスに対応するシグナル配列を生成する。
+
+    登録クラスのサブクラスはパラメータ（クラス属性）の上書きのみ許可し、
+    init()/next() を上書きしている場合はロジックが一致しないためエラーとする。
+
+    Raises:
+        BacktestError: ベクトル化に対応していない戦略の場合
+    """
+    for base in strategy_class.__mro__:
+        builder = SIGNAL_BUILDERS.get(base)
+        if builder is None:
+            continue
+        if strategy_class.init is not base.init or strategy_class.next is not base.next:
+            break
+        return builder(data, strategy_class)
+    raise BacktestError(
+        f"ベクトル化バックテスト未対応の戦略です: {strategy_class.__name__}"
+        "（BacktestEngine を使用してください）"
+    )
+
+
+# ------------------------------------------------------------------
+# 約定シミュレーション
+# ------------------------------------------------------------------
+
+
+def _first_barrier(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    start: int,
+    is_long: bool,
+    sl: float,
+    tp: float,
+) -> Optional[tuple[int, float]]:
+    """start 以降で最初に SL/TP に届いた足と約定価格を返す（届かなければ None）。"""
+    n = len(open_)
+    chunk = _BARRIER_CHUNK
+    i = start
+    while i < n:
+        j = min(n, i + chunk)
+        if is_long:
+            sl_hit = low[i:j] <= sl
+            tp_hit = high[i:j] >= tp
+        else:
+            sl_hit = high[i:j] >= sl
+            tp_hit = low[i:j] <= tp
+        hits = np.flatnonzero(sl_hit | tp_hit)
+        if hits.size:
+            k = i + int(hits[0])
+            if sl_hit[hits[0]]:
+                price = min(open_[k], sl) if is_long else max(open_[k], sl)
+            else:
+                price = max(open_[k], tp) if is_long else min(open_[k], tp)
+            return k, float(price)
+        i = j
+        chunk *= 2
+    return None
+
+
+def simulate(
+    data: pd.DataFrame,
+    signals: VectorSignals,
+    cash: float = 1_000_000,
+    spread: float = 0.0,
+    commission: float = 0.0,
+    margin: float = 1.0,
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    シグナル配列から約定・決済・エクイティ曲線を求める。
+
+    ループはトレード単位（バー単位ではない）で、SL/TP 到達は配列の一括比較で探す。
+
+    Args:
+        data: OHLCV DataFrame（大文字カラム名）
+        signals: build_signals() の戻り値
+        cash: 初期資金
+        spread: スリッページ（相対値）
+        commission: 手数料（相対値、エントリー・決済の両方に適用）
+        margin: 証拠金率（1.0 = レバレッジなし）
+
+    Returns:
+        (足ごとのエクイティ, 決済済みトレードの配列dict)
+        トレードdictのキー: size, entry_bar, exit_bar, entry_price, exit_price, pnl, return_pct
+
+    Raises:
+        BacktestError: SL/TP がエントリー価格の正しい側に無い場合（Backtesting.py と同様）
+    """
+    open_ = data["Open"].to_numpy(dtype=float)
+    high = data["High"].to_numpy(dtype=float)
+    low = data["Low"].to_numpy(dtype=float)
+    close = data["Close"].to_numpy(dtype=float)
+    n = len(close)
+    leverage = 1 / margin
+
+    # next() が呼ばれるのは warmup+1 本目から。最終足のシグナルは約定しない
+    is_signal = signals.long_entry | signals.short_entry
+    is_signal[: signals.warmup + 1] = False
+    is_signal[max(n - 1, 0):] = False
+    signal_bars = np.flatnonzero(is_signal)
+
+    def next_signal(from_bar: int) -> Optional[int]:
+        pos = int(np.searchsorted(signal_bars, from_bar, side="left"))
+        return int(signal_bars[pos]) if pos < len(signal_bars) else None
+
+    cash_delta = np.zeros(n)
+    unrealized = np.zeros(n)
+    trades: dict[str, list] = {
+        "size": [], "entry_bar": [], "exit_bar": [], "entry_price": [],
+        "exit_price": [], "pnl": [], "return_pct": [],
+    }
+    balance = float(cash)
+    out_of_money_bar: Optional[int] = None
+
+    s = next_signal(0)
+    while s is not None:
+        is_long = bool(signals.long_entry[s])
+        sl, tp = float(signals.sl[s]), float(signals.tp[s])
+        reference = close[s] * (1 + spread if is_long else 1 - spread)
+        if not ((sl < reference < tp) if is_long else (tp < reference < sl)):
+            raise BacktestError(
+                f"SL/TP がエントリー価格の正しい側にありません: "
+                f"bar={s}, sl={sl}, price={reference}, tp={tp}"
+            )
+
+        e = s + 1
+        fill = open_[e]
+        entry = fill * (1 + spread) if is_long else fill * (1 - spread)
+        cost_per_unit = entry + (_FULL_EQUITY * fill * commission) / _FULL_EQUITY
+        units = int((balance * leverage * _FULL_EQUITY) // cost_per_unit)
+        if units == 0:
+            logger.warning("証拠金不足でシグナルを見送りました: bar=%d", s)
+            s = next_signal(e)
+            continue
+        size = units if is_long else -units
+        open_fee = units * entry * commission
+
+        barrier = _first_barrier(open_, high, low, e, is_long, sl, tp)
+        s_next = next_signal(e if not signals.flat_only else (barrier[0] if barrier else n))
+        if not signals.flat_only and s_next is not None and (
+            barrier is None or s_next + 1 <= barrier[0]
+        ):
+            # 保有中のシグナル → 次の足の始値で決済（決済注文は SL/TP より先に処理される）
+            x = s_next + 1
+            exit_price = open_[x]
+        elif barrier is not None:
+            x, exit_price = barrier
+        else:
+            x, exit_price = n, np.nan
+
+        # 保有中の評価額がゼロ以下になったら Backtesting.py 同様にその足の終値で強制決済
+        held = balance - open_fee + size * (close[e:x] - entry)
+        broke = np.flatnonzero(held <= 0)
+        if broke.size:
+            x = e + int(broke[0])
+            exit_price = close[x]
+            out_of_money_bar = x
+
+        cash_delta[e] -= open_fee
+        unrealized[e:x] = size * (close[e:x] - entry)
+        if x >= n:
+            break  # 最終足まで保有（未決済トレードは統計に含めない）
+
+        gross = size * (exit_price - entry)
+        close_fee = units * exit_price * commission
+        fees = close_fee + units * entry * commission
+        cash_delta[x] += gross - close_fee
+        balance += gross - open_fee - close_fee
+        trades["size"].append(size)
+        trades["entry_bar"].append(e)
+        trades["exit_bar"].append(x)
+        trades["entry_price"].append(entry)
+        trades["exit_price"].append(exit_price)
+        trades["pnl"].append(gross - fees)
+        trades["return_pct"].append(
+            np.copysign(1, size) * (exit_price / entry - 1) - fees / (units * entry)
+        )
+
+        if out_of_money_bar is None and balance <= 0:
+            out_of_money_bar = x
+        if out_of_money_bar is not None:
+            break
+        s = s_next
+
+    equity = cash + np.cumsum(cash_delta) + unrealized
+    if out_of_money_bar is not None:
+        equity[out_of_money_bar:] = 0.0
+    return equity, {
+        key: np.asarray(values, dtype=int if key in ("size", "entry_bar", "exit_bar") else float)
+        for key, values in trades.items()
+    }
+
+
+# ------------------------------------------------------------------
+# メトリクス（Backtesting.py compute_stats と同じ定義）
+# ------------------------------------------------------------------
+
+
+def _geometric_mean(returns: pd.Series) -> float:
+    returns = returns.fillna(0) + 1
+    if np.any(returns <= 0):
+        return 0
+    return np.exp(np.log(returns).sum() / (len(returns) or np.nan)) - 1
+
+
+def compute_stats(
+    equity: np.ndarray, trades: dict[str, np.ndarray], index: pd.Index
+) -> dict[str, Any]:
+    """
+    エクイティ曲線とトレード配列から Backtesting.py と同名のメトリクスを算出する。
+
+    BacktestEngine._extract_metrics() が参照するキーのみを返す。
+    """
+    dd = 1 - equity / np.maximum.accumulate(equity)
+    pl = pd.Series(trades["pnl"])
+    returns = pd.Series(trades["return_pct"])
+    n_trades = len(pl)
+
+    gmean_day_return: float = 0
+    day_returns = pd.Series(np.nan)
+    annual_trading_days = np.nan
+    if isinstance(index, pd.DatetimeIndex):
+        freq_days = pd.Series(index[-100:]).diff().dropna().median().days
+        have_weekends = index.dayofweek.to_series().between(5, 6).mean() > 2 / 7 * .6
+        annual_trading_days = (
+            52 if freq_days == 7 else
+            12 if freq_days == 31 else
+            1 if freq_days == 365 else
+            (365 if have_weekends else 252))
+        freq = {7: "W", 31: "ME", 365: "YE"}.get(freq_days, "D")
+        day_returns = (
+            pd.Series(equity, index=index).resample(freq).last()
+            .dropna().pct_change().dropna()
+        )
+        gmean_day_return = _geometric_mean(day_returns)
+
+    annualized_return = (1 + gmean_day_return) ** annual_trading_days - 1
+    volatility = np.sqrt(
+        (day_returns.var(ddof=1) + (1 + gmean_day_return) ** 2) ** annual_trading_days
+        - (1 + gmean_day_return) ** (2 * annual_trading_days)
+    )
+    max_dd = np.nan_to_num(dd.max())
+    win_rate = np.nan if not n_trades else (pl > 0).mean()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sortino = annualized_return / (
+            np.sqrt(np.mean(day_returns.clip(-np.inf, 0) ** 2))
+            * np.sqrt(annual_trading_days)
+        )
+    return {
+        "Sharpe Ratio": annualized_return * 100 / ((volatility * 100) or np.nan),
+        "Max. Drawdown [%]": -max_dd * 100,
+        "Win Rate [%]": win_rate * 100,
+        "Profit Factor": (
+            returns[returns > 0].sum() / (abs(returns[returns < 0].sum()) or np.nan)
+        ),
+        "# Trades": n_trades,
+        "Return [%]": (equity[-1] - equity[0]) / equity[0] * 100,
+        "Equity Final [$]": equity[-1],
+        "Sortino Ratio": sortino,
+        "Calmar Ratio": annualized_return / (max_dd or np.nan),
+        "Avg. Trade [%]": _geometric_mean(returns) * 100,
+        "SQN": np.sqrt(n_trades) * pl.mean() / (pl.std() or np.nan),
+    }
+
+
+# ------------------------------------------------------------------
+# エンジン
+# ------------------------------------------------------------------
+
+
+class VectorBacktestEngine(BacktestEngine):
+    """
+    BacktestEngine のベクトル化バックエンド。
+
+    バックテスト本体（_run_backend）だけを差し替えるため、
+    run() / run_in_out_sample() / run_walk_forward() / save_result() は
+    BacktestEngine と同じ引数・戻り値で使える。
+    """
+
+    def _run_backend(
+        self,
+        data: pd.DataFrame,
+        strategy_class: type[Strategy],
+        cash: float,
+        spread: float,
+        commission: float,
+        margin: float,
+    ) -> dict[str, Any]:
+        signals = build_signals(data, strategy_class)
+        equity, trades = simulate(
+            data, signals,
+            cash=cash, spread=spread, commission=commission, margin=margin,
+        )
+        return self._extract_metrics(compute_stats(equity, trades, data.index))
@@ -370,6 +370,9 @@ class TestPositionInconsistency:
         }
         # 決済履歴は取得不可 → pl_unknown=True 経路を検証
         broker.get_closed_deal.return_value = None
+        broker.get_closed_deals.side_effect = (
+            lambda ids: BrokerClient.get_closed_deals(broker, ids)
+        )
         rm = MagicMock(spec=RiskManager)
         rm.kill_switch = MagicMock(spec=KillSwitch)
         rm.kill_switch.is_trading_allowed.return_value = True
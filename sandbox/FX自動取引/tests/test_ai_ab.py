@@ -27,6 +27,7 @@ if str(_root) not in sys.path:
 
 from src.ai_advisor import AIBias
 from src.broker_client import BrokerClient
+from src.db_writer import flush_all_writers
 from src.position_manager import PositionManager
 from src.risk_manager import KillSwitch, RiskManager
 from src.strategy.base import Signal, StrategyBase
@@ -436,6 +437,9 @@ def _mock_broker():
     broker.get_positions.return_value = []
     broker.get_account_summary.return_value = {"balance": 1_000_000}
     broker.get_closed_deal.return_value = None
+    broker.get_closed_deals.side_effect = (
+        lambda ids: BrokerClient.get_closed_deals(broker, ids)
+    )
     return broker
 
 
@@ -480,6 +484,7 @@ class TestPositionManagerAiPersistence:
         )
         assert result is not None
 
+        flush_all_writers()
         with sqlite3.connect(str(db)) as conn:
             row = conn.execute(
                 "SELECT ai_decision, ai_confidence, ai_reasons, ai_direction, ai_regime "
@@ -500,6 +505,7 @@ class TestPositionManagerAiPersistence:
         )
         assert result is not None
 
+        flush_all_writers()
         with sqlite3.connect(str(db)) as conn:
             row = conn.execute(
                 "SELECT ai_decision, ai_confidence FROM trades WHERE trade_id=?",
@@ -5,6 +5,10 @@ src/backtester.py の BacktestEngine / RsiMaCrossoverBT / ヘルパー関数を
 SPEC.md F8 テストケース準拠（15件）。
 """
 
+import importlib
+import sqlite3
+import sys
+
 import numpy as np
 import pandas as pd
 import pytest
@@ -297,6 +301,27 @@ class TestPersistence:
         assert loaded[0]["run_at"] >= loaded[1]["run_at"]
 
 
+    def test_file_db_save_roundtrip(self, tmp_path, prepared_data):
+        """ファイルDBでは書き込みスレッド経由で保存し、直後に読み込める"""
+        with BacktestEngine(db_path=tmp_path / "bt.db", use_cache=False) as eng:
+            result = eng.run(prepared_data, RsiMaCrossoverBT)
+            eng.save_result(result, "USD_JPY", "H4")
+
+            loaded = eng.load_results("USD_JPY", "H4")
+        assert len(loaded) == 1
+        assert loaded[0]["total_trades"] == result["total_trades"]
+
+    def test_file_db_save_failure_raises(self, tmp_path):
+        """ファイルDBへの保存失敗も BacktestError で返る"""
+        db_path = tmp_path / "bt.db"
+        with BacktestEngine(db_path=db_path, use_cache=False) as eng:
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("DROP TABLE backtest_results")
+
+            with pytest.raises(BacktestError, match="保存に失敗"):
+                eng.save_result({"sharpe_ratio": 1.0}, "USD_JPY", "H4")
+
+
 # ================================================================
 # 13. RsiMaCrossoverBT テスト
 # ================================================================
@@ -508,6 +533,43 @@ class TestRunAutoSpread:
             )
 
 
+class TestWalkForwardParallel:
+    """BacktestEngine.run_walk_forward() の n_workers（プロセス並列）テスト"""
+
+    def test_parallel_matches_sequential(self, engine, large_data):
+        """並列実行でもウィンドウ順・メトリクス・WFE平均が逐次実行と一致する"""
+        sequential = engine.run_walk_forward(large_data, RsiMaCrossoverBT, n_windows=3)
+        parallel = engine.run_walk_forward(
+            large_data, RsiMaCrossoverBT, n_windows=3, n_workers=2
+        )
+
+        assert [w["window"] for w in parallel["windows"]] == [1, 2, 3]
+        for seq_w, par_w in zip(sequential["windows"], parallel["windows"]):
+            assert par_w["in_sample"] == seq_w["in_sample"]
+            assert par_w["out_of_sample"] == seq_w["out_of_sample"]
+        assert parallel["wfe_mean"] == sequential["wfe_mean"]
+
+    def test_dynamic_strategy_class(self, engine, large_data):
+        """type() で動的生成したパラメータ違いの戦略クラスも並列実行できる"""
+        klass = type("RsiMaFast", (RsiMaCrossoverBT,), {"ma_short": 10})
+
+        sequential = engine.run_walk_forward(large_data, klass, n_windows=2)
+        parallel = engine.run_walk_forward(large_data, klass, n_windows=2, n_workers=2)
+
+        for seq_w, par_w in zip(sequential["windows"], parallel["windows"]):
+            assert par_w["out_of_sample"] == seq_w["out_of_sample"]
+
+    def test_results_saved_by_parent(self, engine, large_data):
+        """並列実行の結果は親プロセスの DB に保存できる"""
+        result = engine.run_walk_forward(
+            large_data, RsiMaCrossoverBT, n_windows=2, n_workers=2
+        )
+        engine.save_result(result, "USD_JPY", "H4", run_type="walk_forward")
+
+        rows = engine.load_results("USD_JPY", "H4")
+        assert len(rows) == 1
+
+
 # ================================================================
 # 20-21. L1: n_windows 自動調整テスト
 # ================================================================
@@ -547,3 +609,188 @@ class TestWalkForwardAutoAdjust:
                 small_data, RsiMaCrossoverBT,
                 n_windows=5, auto_adjust=False,
             )
+
+
+# ================================================================
+# 結果キャッシュ
+# ================================================================
+
+
+class TestResultCache:
+    """backtest_cache による run() 結果の再利用"""
+
+    @staticmethod
+    def _count_backend(engine, monkeypatch) -> list:
+        calls = []
+        original = engine._run_backend
+
+        def counting(*args, **kwargs):
+            calls.append(1)
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(engine, "_run_backend", counting)
+        return calls
+
+    def test_hit_skips_backend(self, engine, prepared_data, monkeypatch):
+        """同一条件の2回目はバックエンドを呼ばず同じメトリクスを返す"""
+        calls = self._count_backend(engine, monkeypatch)
+
+        first = engine.run(prepared_data, RsiMaCrossoverBT)
+        second = engine.run(prepared_data.copy(), RsiMaCrossoverBT)
+
+        assert len(calls) == 1
+        assert second == first
+
+    def test_miss_on_changed_inputs(self, engine, prepared_data, monkeypatch):
+        """データ・パラメータ・実行条件が変われば再計算する"""
+        calls = self._count_backend(engine, monkeypatch)
+
+        class SlowMa(RsiMaCrossoverBT):
+            ma_long = 60
+
+        engine.run(prepared_data, RsiMaCrossoverBT)
+        engine.run(prepared_data, SlowMa)
+        engine.run(prepared_data, RsiMaCrossoverBT, spread=0.0001)
+        engine.run(prepared_data.iloc[:-1], RsiMaCrossoverBT)
+
+        assert len(calls) == 4
+
+    def test_bypass(self, prepared_data, monkeypatch):
+        """use_cache=False（エンジン・run() 引数）ではキャッシュしない"""
+        with BacktestEngine(db_path=":memory:", use_cache=False) as eng:
+            calls = self._count_backend(eng, monkeypatch)
+            eng.run(prepared_data, RsiMaCrossoverBT)
+            eng.run(prepared_data, RsiMaCrossoverBT)
+            eng.run(prepared_data, RsiMaCrossoverBT, use_cache=True)
+            eng.run(prepared_data, RsiMaCrossoverBT, use_cache=True)
+
+        assert len(calls) == 3
+
+    def test_fill_rate_applied_after_cache(self, engine, prepared_data):
+        """キャッシュヒット時も fill_rate 補正が反映される"""
+        base = engine.run(prepared_data, RsiMaCrossoverBT)
+        adjusted = engine.run(prepared_data, RsiMaCrossoverBT, fill_rate=0.5)
+
+        assert adjusted == apply_fill_rate_adjustment(base, 0.5)
+
+    def test_evict_by_size_and_age(self, engine, prepared_data):
+        """上限件数を超えた分・期限切れのエントリが削除される"""
+        for seed in range(3):
+            engine.run(_generate_prepared_data(seed=seed), RsiMaCrossoverBT)
+
+        assert engine.evict_cache(max_entries=2) == 1
+        assert engine.evict_cache(max_age_days=-1) == 2
+
+        engine.run(prepared_data, RsiMaCrossoverBT)
+        engine.clear_cache()
+        assert engine.evict_cache(max_age_days=-1) == 0
+
+    def test_evicts_only_over_max_entries(self, engine, monkeypatch):
+        """件数上限による evict_cache() は上限を超えたときだけ走る"""
+        monkeypatch.setattr("src.backtester.BACKTEST_CACHE_MAX_ENTRIES", 2)
+        evictions = []
+        original = engine.evict_cache
+
+        def counting(*args, **kwargs):
+            evictions.append(kwargs.get("max_entries"))
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(engine, "evict_cache", counting)
+        for seed in range(4):
+            engine.run(_generate_prepared_data(n_bars=300, seed=seed), RsiMaCrossoverBT)
+
+        # 3件目・4件目で上限を超えたときだけ
+        assert evictions == [2, 2]
+        assert engine._count_cache() == 2
+
+    def test_expired_entries_removed_on_save(self, engine, prepared_data):
+        """上限件数未満でも、保存のたびに期限切れエントリが削除される"""
+        conn = engine._get_connection()
+        conn.execute(
+            "INSERT INTO backtest_cache VALUES (?, ?, ?, ?, ?)",
+            ("stale", "Old", "2000-01-01T00:00:00+00:00", "2000-01-01T00:00:00+00:00", "{}"),
+        )
+        conn.commit()
+        engine._close_connection(conn)
+
+        engine.run(prepared_data, RsiMaCrossoverBT)
+
+        assert engine._cache_get("stale") is None
+        assert engine._count_cache() == 1
+
+    def test_key_covers_library_version(self, engine, prepared_data, monkeypatch):
+        """pandas_ta のバージョンが変われば別キーになる"""
+        before = engine._cache_key(prepared_data, RsiMaCrossoverBT, {})
+        monkeypatch.setattr("src.backtester.ta.version", "0.0.0")
+        assert engine._cache_key(prepared_data, RsiMaCrossoverBT, {}) != before
+
+
+# ------------------------------------------------------------------
+# キャッシュキーが辿るソースの範囲
+# ------------------------------------------------------------------
+
+_HELPER_SOURCE = (
+    "LIMIT = 1\n"
+    "def _base():\n"
+    "    return LIMIT\n"
+    "def threshold():\n"
+    "    return _base()\n"
+    "class Band:\n"
+    "    width = 2\n"
+)
+
+_STRATEGY_SOURCE = (
+    "from backtesting import Strategy\n"
+    "from bt_cache_helper import Band, threshold\n"
+    "class HelperStrategy(Strategy):\n"
+    "    def init(self):\n"
+    "        pass\n"
+    "    def next(self):\n"
+    "        threshold() + Band.width\n"
+    "class OtherStrategy(Strategy):\n"
+    "    def next(self):\n"
+    "        return 1\n"
+    "def report():\n"
+    "    return 'summary'\n"
+)
+
+
+class TestCacheKeySources:
+    """戦略が実際に参照する定義だけがキーに入る"""
+
+    @pytest.fixture
+    def strategy_key(self, engine, prepared_data, tmp_path, monkeypatch):
+        def key(tag: str, helper_source: str = _HELPER_SOURCE,
+                strategy_source: str = _STRATEGY_SOURCE) -> str:
+            directory = tmp_path / tag
+            directory.mkdir()
+            (directory / "bt_cache_helper.py").write_text(helper_source)
+            (directory / "bt_cache_strategy.py").write_text(strategy_source)
+            monkeypatch.syspath_prepend(str(directory))
+            for name in ("bt_cache_helper", "bt_cache_strategy"):
+                monkeypatch.delitem(sys.modules, name, raising=False)
+            module = importlib.import_module("bt_cache_strategy")
+            return engine._cache_key(prepared_data, module.HelperStrategy, {})
+
+        return key
+
+    def test_same_source_same_key(self, strategy_key):
+        assert strategy_key("a") == strategy_key("b")
+
+    @pytest.mark.parametrize("old, new", [
+        ("    return LIMIT\n", "    return LIMIT + 1\n"),   # ヘルパーの呼び出し先
+        ("LIMIT = 1\n", "LIMIT = 2\n"),                      # 呼び出し先が参照する定数
+        ("    width = 2\n", "    width = 3\n"),              # 取り込んだクラス
+    ])
+    def test_referenced_change_changes_key(self, strategy_key, old, new):
+        """ヘルパーの呼び出し先・定数・取り込んだクラスの変更は推移的に反映される"""
+        assert strategy_key("base") != strategy_key("edited", helper_source=_HELPER_SOURCE.replace(old, new))
+
+    @pytest.mark.parametrize("old, new", [
+        ("        return 1\n", "        return 2\n"),       # 同じファイルの別の戦略
+        ("'summary'", "'report'"),                           # レポート整形
+    ])
+    def test_unrelated_change_keeps_key(self, strategy_key, old, new):
+        """同じモジュールでも参照していない定義の変更ではキャッシュが無効にならない"""
+        edited = _STRATEGY_SOURCE.replace(old, new)
+        assert strategy_key("base") == strategy_key("edited", strategy_source=edited)
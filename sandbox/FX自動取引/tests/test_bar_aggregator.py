@@ -0,0 +1,163 @@
+"""
+上位足アグリゲータのテスト
+
+- aggregate_bars() が足境界（offset 含む）どおりに OHLCV を集約すること
+- 300本スライド窓で差分更新した BarAggregator が、全履歴の aggregate_bars() と一致すること
+  （週末・欠損足あり、offset あり）
+- 指標キャッシュが update() ごとに1回だけ計算されること
+- 組み立てられない上位足・DatetimeIndex なしでの ValueError
+- BearResearcher が上位足の MA長期で上位足矛盾を判定すること
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.bar_aggregator import BarAggregator, aggregate_bars, higher_timeframes
+from src.bear_researcher import BearResearcher
+from src.strategy.base import Signal
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+
+def _make_m15(n: int = 3000, seed: int = 1, gaps: bool = True) -> pd.DataFrame:
+    """週末を除き、ランダムに欠損させた M15 の OHLCV を生成する。"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01 00:00", periods=n, freq="15min", tz="UTC")
+    if gaps:
+        keep = (index.dayofweek < 5) & (rng.random(n) > 0.03)
+        index = index[keep]
+    m = len(index)
+    close = 150.0 + np.cumsum(rng.normal(0, 0.05, m))
+    return pd.DataFrame({
+        "open": close + rng.normal(0, 0.01, m),
+        "high": close + rng.uniform(0.01, 0.05, m),
+        "low": close - rng.uniform(0.01, 0.05, m),
+        "close": close,
+        "volume": rng.integers(1, 100, m).astype(float),
+    }, index=index)
+
+
+# ============================================================
+# aggregate_bars
+# ============================================================
+
+
+class TestAggregateBars:
+    """一括集約"""
+
+    def test_h1_ohlcv(self) -> None:
+        data = _make_m15(n=8, gaps=False)
+        h1 = aggregate_bars(data, "H1")
+
+        assert list(h1.index) == [data.index[0], data.index[4]]
+        first = data.iloc[:4]
+        assert h1["open"].iloc[0] == first["open"].iloc[0]
+        assert h1["high"].iloc[0] == first["high"].max()
+        assert h1["low"].iloc[0] == first["low"].min()
+        assert h1["close"].iloc[0] == first["close"].iloc[-1]
+        assert h1["volume"].iloc[0] == first["volume"].sum()
+
+    def test_offset_shifts_boundaries(self) -> None:
+        data = _make_m15(n=400, gaps=False)
+        d1 = aggregate_bars(data, "D1", offset_sec=-7200)
+
+        # UTC 22:00 始まりの日足
+        assert set(d1.index[1:].hour) == {22}
+
+    def test_requires_datetime_index(self) -> None:
+        data = _make_m15(n=8, gaps=False).reset_index(drop=True)
+        with pytest.raises(ValueError):
+            aggregate_bars(data, "H1")
+
+
+# ============================================================
+# BarAggregator
+# ============================================================
+
+
+class TestBarAggregator:
+    """差分更新"""
+
+    @pytest.mark.parametrize("offset_sec", [0, -7200])
+    def test_sliding_window_matches_full_history(self, offset_sec: int) -> None:
+        data = _make_m15()
+        aggregator = BarAggregator("M15", offset_sec=offset_sec)
+
+        for end in range(300, len(data), 37):
+            aggregator.update(data.iloc[end - 300:end + 1])
+            for tf in aggregator.timeframes:
+                expected = aggregate_bars(data.iloc[:end + 1], tf, offset_sec)
+                got = aggregator.frame(tf)
+                n = min(len(got), len(expected))
+                pd.testing.assert_frame_equal(
+                    got.iloc[-n:], expected.iloc[-n:], check_freq=False,
+                )
+
+        # 取得窓（300本 ≒ 3日強）より前の日足も保持している
+        assert len(aggregator.frame("D1")) > 300 // 96 + 2
+
+    def test_update_counts_only_new_closed_bars(self) -> None:
+        data = _make_m15(n=400, gaps=False)
+        aggregator = BarAggregator("M15")
+
+        assert aggregator.update(data.iloc[:301]) == 300
+        assert aggregator.update(data.iloc[:301]) == 0
+        assert aggregator.update(data.iloc[2:303]) == 2
+
+    def test_indicators_cached_per_update(self) -> None:
+        data = _make_m15(n=3000, gaps=False)
+        aggregator = BarAggregator("M15", timeframes=("H1",))
+        aggregator.update(data.iloc[:301])
+
+        first = aggregator.indicators("H1")
+        assert first is aggregator.indicators("H1")
+        assert {"ma_long", "rsi", "adx_df", "atr", "current_rsi"} <= set(first)
+
+        aggregator.update(data.iloc[:305])
+        assert aggregator.indicators("H1") is not first
+
+    def test_higher_timeframes(self) -> None:
+        assert higher_timeframes("M15") == ["H1", "H4", "D1"]
+        assert higher_timeframes("H4") == ["D1"]
+
+    def test_invalid_timeframe(self) -> None:
+        with pytest.raises(ValueError):
+            BarAggregator("H4", timeframes=("H1",))
+
+    def test_update_requires_datetime_index(self) -> None:
+        aggregator = BarAggregator("M15")
+        with pytest.raises(ValueError):
+            aggregator.update(_make_m15(n=8, gaps=False).reset_index(drop=True))
+
+
+# ============================================================
+# BearResearcher の上位足矛盾チェック
+# ============================================================
+
+
+class TestBearHigherTimeframe:
+    """上位足 MA長期の傾きで判定する"""
+
+    def test_uses_htf_ma_slope(self) -> None:
+        data = _make_m15(n=120, gaps=False)
+        researcher = BearResearcher()
+        falling = {"ma_long": pd.Series([1.2, 1.1])}
+        rising = {"ma_long": pd.Series([1.1, 1.2])}
+
+        assert "上位足MA" in researcher._check_higher_timeframe(
+            data, True, htf_indicators=falling,
+        )
+        assert researcher._check_higher_timeframe(data, True, htf_indicators=rising) is None
+
+    def test_falls_back_when_htf_ma_missing(self) -> None:
+        data = _make_m15(n=120, gaps=False)
+        researcher = BearResearcher()
+        htf = {"ma_long": pd.Series([np.nan, np.nan])}
+
+        verdict_default = researcher.verify(data, Signal.BUY)
+        verdict_htf = researcher.verify(data, Signal.BUY, htf_indicators=htf)
+        assert verdict_htf.risk_factors == verdict_default.risk_factors
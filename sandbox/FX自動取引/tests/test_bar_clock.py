@@ -0,0 +1,86 @@
+"""
+足確定クロックモジュールのテスト
+
+- タイムフレーム → 秒の変換と未対応タイムフレームのエラー
+- 次の足確定時刻の計算（境界ちょうど・オフセット）
+- 最終確定足キーによる新しい足の検出
+"""
+
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from src.bar_clock import granularity_seconds, last_closed_bar_key, next_bar_close
+
+
+def _ts(text: str) -> float:
+    """ISO形式のUTC時刻をUNIX秒に変換する。"""
+    return datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp()
+
+
+def _make_ohlcv(rows: int = 5, start_price: float = 150.0) -> pd.DataFrame:
+    prices = [start_price + i * 0.1 for i in range(rows)]
+    return pd.DataFrame({
+        "open": prices,
+        "high": [p + 0.05 for p in prices],
+        "low": [p - 0.05 for p in prices],
+        "close": prices,
+        "volume": [100.0] * rows,
+    })
+
+
+class TestGranularitySeconds:
+    """granularity_seconds() のテスト"""
+
+    @pytest.mark.parametrize("granularity, expected", [
+        ("M1", 60), ("M15", 900), ("H1", 3600), ("H4", 14400), ("D1", 86400),
+    ])
+    def test_known_granularities(self, granularity: str, expected: int) -> None:
+        assert granularity_seconds(granularity) == expected
+
+    def test_unknown_granularity_raises(self) -> None:
+        with pytest.raises(ValueError, match="未対応のタイムフレーム"):
+            granularity_seconds("W1")
+
+
+class TestNextBarClose:
+    """next_bar_close() のテスト"""
+
+    def test_mid_bar(self) -> None:
+        """M15 の途中なら次の15分境界"""
+        assert next_bar_close(_ts("2026-03-02T10:07:30"), "M15") == _ts("2026-03-02T10:15:00")
+
+    def test_exact_boundary_returns_next(self) -> None:
+        """境界ちょうどなら次の境界"""
+        assert next_bar_close(_ts("2026-03-02T10:15:00"), "M15") == _ts("2026-03-02T10:30:00")
+
+    def test_offset_for_server_time(self) -> None:
+        """サーバー時刻 UTC+2 の D1 足は UTC 22:00 に確定する"""
+        result = next_bar_close(_ts("2026-03-02T10:00:00"), "D1", offset_sec=-7200)
+        assert result == _ts("2026-03-02T22:00:00")
+
+
+class TestLastClosedBarKey:
+    """last_closed_bar_key() のテスト"""
+
+    def test_key_changes_when_bar_appended(self) -> None:
+        """RangeIndex のデータでも新しい足の追加でキーが変わること"""
+        data = _make_ohlcv(6)
+        assert last_closed_bar_key(data.iloc[:5]) != last_closed_bar_key(data)
+
+    def test_key_stable_while_forming_bar_ticks(self) -> None:
+        """形成中の足の値が変わってもキーは変わらないこと"""
+        data = _make_ohlcv(5)
+        ticked = data.copy()
+        ticked.iloc[-1, ticked.columns.get_loc("close")] += 0.3
+        assert last_closed_bar_key(data) == last_closed_bar_key(ticked)
+
+    def test_datetime_index_uses_timestamp(self) -> None:
+        data = _make_ohlcv(5)
+        data.index = pd.date_range("2026-03-02", periods=5, freq="15min", tz="UTC")
+        assert last_closed_bar_key(data) == data.index[-1]
+
+    def test_short_data_returns_none(self) -> None:
+        assert last_closed_bar_key(_make_ohlcv(1)) is None
+        assert last_closed_bar_key(None) is None
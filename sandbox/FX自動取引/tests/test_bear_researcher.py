@@ -428,3 +428,42 @@ def test_weighted_severity_clamped_to_unit_interval():
     # _RISK_WEIGHTS の合計を確認
     total_weight = sum(_RISK_WEIGHTS.values())
     assert total_weight <= 1.01  # 0.35+0.25+0.20+0.15+0.05 = 1.00
+
+
+class TestBearResearcherBatch:
+    """verify_batch と verify() の一致"""
+
+    def test_verify_batch_matches_per_signal_verify(self):
+        """各シグナルの severity / penalty が data.iloc[:i+1] への verify() と一致する"""
+        rng = np.random.default_rng(5)
+        n = 260
+        close = 150 + np.cumsum(rng.normal(0, 0.3, n) + 0.05 * np.sin(np.arange(n) / 40))
+        close = np.round(close, 2)  # 同値が続く足（プラトー）も含める
+        data = pd.DataFrame({
+            "open": close,
+            "high": close + np.abs(rng.normal(0, 0.2, n)),
+            "low": close - np.abs(rng.normal(0, 0.2, n)),
+            "close": close,
+            "volume": rng.integers(100, 1000, n).astype(float),
+        })
+        indices = np.arange(n)
+        signals = [Signal.BUY if rng.random() < 0.5 else Signal.SELL for _ in indices]
+        signals[100] = Signal.HOLD
+
+        researcher = BearResearcher()
+        batch = researcher.verify_batch(data, indices, signals)
+
+        assert batch.fired["divergence"].any()
+        for k, i in enumerate(indices):
+            expected = researcher.verify(data.iloc[: i + 1], signals[k])
+            assert batch.severity[k] == pytest.approx(expected.severity), i
+            assert batch.penalty_multiplier[k] == pytest.approx(expected.penalty_multiplier), i
+            assert batch.risk_count[k] == len(expected.risk_factors), i
+
+    def test_single_signal_broadcast(self):
+        """signals に1つだけ渡すと全件に適用される"""
+        data = _make_ohlcv(rows=100)
+        batch = BearResearcher().verify_batch(data, [60, 80, 99], Signal.SELL)
+        assert len(batch) == 3
+        expected = BearResearcher().verify(data, Signal.SELL)
+        assert batch.severity[-1] == pytest.approx(expected.severity)
@@ -0,0 +1,206 @@
+"""
+ローソク足ストアのテスト
+
+- 追記は保存済みの最終時刻より新しい足だけを書き込むこと
+- read() が memmap を共有したゼロコピーの DataFrame を返すこと
+- 中断された追記の残骸を次回追記時に切り詰めること
+- write() による置き換え・CSV取り込み（load_csv_via_store）
+"""
+
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtester import BacktestEngine, BacktestError
+from src.candle_store import (
+    CandleStore,
+    CandleStoreError,
+    load_csv_via_store,
+    parse_mt5_csv_name,
+)
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+
+def _assert_same_candles(actual: pd.DataFrame, expected: pd.DataFrame) -> None:
+    """時刻（秒精度）と OHLCV 値が一致することを検証する。"""
+    assert list(actual.columns) == list(expected.columns)
+    np.testing.assert_array_equal(
+        actual.index.as_unit("s").asi8, expected.index.as_unit("s").asi8
+    )
+    np.testing.assert_array_equal(actual.to_numpy(), expected.to_numpy())
+
+
+def _make_candles(n: int = 50, start: str = "2026-01-05") -> pd.DataFrame:
+    """M15 の OHLCV DataFrame（UTC DatetimeIndex）を生成する。"""
+    rng = np.random.default_rng(7)
+    close = 150.0 + np.cumsum(rng.normal(0, 0.1, n))
+    index = pd.date_range(start, periods=n, freq="15min", tz="UTC", name="datetime")
+    return pd.DataFrame({
+        "open": close + rng.normal(0, 0.02, n),
+        "high": close + 0.1,
+        "low": close - 0.1,
+        "close": close,
+        "volume": rng.integers(100, 1000, size=n).astype(float),
+    }, index=index)
+
+
+@pytest.fixture
+def store(tmp_path) -> CandleStore:
+    return CandleStore(tmp_path / "candles")
+
+
+# ============================================================
+# テストケース
+# ============================================================
+
+
+class TestAppendAndRead:
+    """追記と読み出し"""
+
+    def test_roundtrip(self, store: CandleStore) -> None:
+        """追記した足がそのまま読み出せること"""
+        data = _make_candles(50)
+        assert store.append("USD_JPY", "M15", data) == 50
+
+        result = store.read("USD_JPY", "M15")
+        _assert_same_candles(result, data)
+        assert store.last_time("USD_JPY", "M15") == data.index[-1]
+
+    def test_overlapping_append_writes_only_new_rows(self, store: CandleStore) -> None:
+        """保存済みと重なる足は書き込まず、新しい足だけを追記すること"""
+        data = _make_candles(60)
+        store.append("USD_JPY", "M15", data.iloc[:40])
+
+        assert store.append("USD_JPY", "M15", data.iloc[30:]) == 20
+        assert store.append("USD_JPY", "M15", data.iloc[50:]) == 0
+        assert store.row_count("USD_JPY", "M15") == 60
+
+    def test_read_is_zero_copy(self, store: CandleStore) -> None:
+        """read() の列が memmap を共有すること"""
+        store.append("USD_JPY", "M15", _make_candles(30))
+
+        assert isinstance(store.read_arrays("USD_JPY", "M15")["close"], np.memmap)
+
+        base = store.read("USD_JPY", "M15")["close"].to_numpy()
+        while base is not None and not isinstance(base, np.memmap):
+            base = base.base
+        assert isinstance(base, np.memmap)
+
+    def test_read_range_and_count(self, store: CandleStore) -> None:
+        """start / end / count で範囲を絞れること"""
+        data = _make_candles(40)
+        store.append("USD_JPY", "M15", data)
+
+        ranged = store.read("USD_JPY", "M15", start=data.index[10], end=data.index[19])
+        _assert_same_candles(ranged, data.iloc[10:20])
+        tail = store.read("USD_JPY", "M15", count=5)
+        _assert_same_candles(tail, data.iloc[-5:])
+
+    def test_empty_store(self, store: CandleStore) -> None:
+        """未保存のキーは空で返ること"""
+        assert store.row_count("EUR_USD", "H1") == 0
+        assert store.last_time("EUR_USD", "H1") is None
+        assert store.read("EUR_USD", "H1").empty
+
+    def test_requires_datetime_index(self, store: CandleStore) -> None:
+        """DatetimeIndex が無いデータはエラー"""
+        with pytest.raises(CandleStoreError):
+            store.append("USD_JPY", "M15", _make_candles(5).reset_index(drop=True))
+
+
+class TestRecovery:
+    """中断された追記の復旧"""
+
+    def test_partial_append_is_truncated(self, store: CandleStore) -> None:
+        """値の列だけ書き込まれた残骸は切り詰められ、続く追記が整合すること"""
+        data = _make_candles(30)
+        store.append("USD_JPY", "M15", data.iloc[:20])
+
+        # time 列の書き込み前に中断した状態を再現する
+        with open(store.root / "USD_JPY_M15" / "close.f8", "ab") as f:
+            f.write(np.zeros(3).tobytes())
+
+        assert store.append("USD_JPY", "M15", data.iloc[20:]) == 10
+        _assert_same_candles(store.read("USD_JPY", "M15"), data)
+
+
+class TestWriteAndCsvImport:
+    """置き換え書き込みと CSV 取り込み"""
+
+    def test_write_replaces_contents(self, store: CandleStore) -> None:
+        """write() は既存データを置き換えること"""
+        data = _make_candles(30)
+        store.append("USD_JPY", "M15", data.iloc[10:])
+
+        store.write("USD_JPY", "M15", data)
+        _assert_same_candles(store.read("USD_JPY", "M15"), data)
+
+    def test_load_csv_via_store(self, store: CandleStore, tmp_path) -> None:
+        """初回はCSVを取り込み、2回目以降はCSVを読まずにストアから返すこと"""
+        data = _make_candles(40)
+        csv_path = tmp_path / "mt5_USD_JPY_M15_2y.csv"
+        data.reset_index().to_csv(csv_path, index=False)
+
+        first = load_csv_via_store(csv_path, store=store)
+        _assert_same_candles(first, data)
+
+        with patch("src.candle_store.pd.read_csv", side_effect=AssertionError):
+            second = load_csv_via_store(csv_path, store=store)   # 2回目はCSVを読まない
+        _assert_same_candles(second, data)
+
+    def test_reexported_csv_is_reimported(self, store: CandleStore, tmp_path) -> None:
+        """同じ名前のCSVが延長・修正されたら取り込み直し、古い期間を返さないこと"""
+        data = _make_candles(40)
+        csv_path = tmp_path / "mt5_USD_JPY_M15_2y.csv"
+        data.iloc[:30].reset_index().to_csv(csv_path, index=False)
+        load_csv_via_store(csv_path, store=store)
+
+        revised = data.copy()
+        revised.iloc[5, revised.columns.get_loc("close")] += 1.0
+        revised.reset_index().to_csv(csv_path, index=False)
+        os.utime(csv_path, ns=(0, csv_path.stat().st_mtime_ns + 1_000_000))
+
+        result = load_csv_via_store(csv_path, store=store)
+        _assert_same_candles(result, revised)
+        assert store.row_count("USD_JPY", "M15") == 40
+
+    def test_load_older_csv_merges(self, store: CandleStore, tmp_path) -> None:
+        """ライブで保存済みの足より古いCSVは結合して書き直すこと"""
+        data = _make_candles(40)
+        store.append("USD_JPY", "M15", data.iloc[30:])
+        csv_path = tmp_path / "mt5_USD_JPY_M15_2y.csv"
+        data.iloc[:35].reset_index().to_csv(csv_path, index=False)
+
+        result = load_csv_via_store(csv_path, store=store)
+        _assert_same_candles(result, data.iloc[:35])
+        assert store.row_count("USD_JPY", "M15") == 40
+
+    def test_parse_mt5_csv_name(self) -> None:
+        """CSV名から通貨ペアと時間足を推定できること"""
+        assert parse_mt5_csv_name("data/mt5_GBP_USD_H1_5y.csv") == ("GBP_USD", "H1")
+        with pytest.raises(ValueError):
+            parse_mt5_csv_name("usdjpy.csv")
+
+
+class TestBacktestLoader:
+    """BacktestEngine.load_from_store"""
+
+    def test_load_from_store_capitalizes_columns(self, store: CandleStore) -> None:
+        """Backtesting.py 用の大文字カラムで読み出せること"""
+        store.append("USD_JPY", "M15", _make_candles(20))
+
+        df = BacktestEngine.load_from_store("USD_JPY", "M15", store=store)
+        assert list(df.columns) == ["Open", "High", "Low", "Close", "Volume"]
+        assert len(df) == 20
+
+    def test_load_from_empty_store_raises(self, store: CandleStore) -> None:
+        """データが無ければ BacktestError"""
+        with pytest.raises(BacktestError):
+            BacktestEngine.load_from_store("USD_JPY", "M15", store=store)
@@ -0,0 +1,172 @@
+"""
+共和分スキャナのテスト
+
+- mackinnon_pvalue() の既知値（5% 臨界値 ≒ -3.34）と範囲外の扱い
+- adf_tstat() の QR 一括ラグ選択が、ラグごとに回帰し直す参照実装と一致すること
+- engle_granger() が共和分ペアで低い p値、独立ランダムウォークで高い p値を返すこと
+- scan_cointegration() の各行が同じウィンドウの engle_granger() と一致すること
+  （期間ウィンドウ・本数ウィンドウ、短いウィンドウは NaN、並列実行でも同じ）
+- cached_scan() が並列数に関係なくキャッシュを再利用すること
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cointegration import (
+    adf_tstat,
+    cached_scan,
+    engle_granger,
+    mackinnon_pvalue,
+    scan_cointegration,
+)
+from src.meta_labeling import FeatureCache
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+
+def _make_closes(n: int = 400, seed: int = 5) -> pd.DataFrame:
+    """A と B は共和分、C は独立なランダムウォーク（平日の日足）"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2022-01-03", periods=n, freq="B", tz="UTC")
+    base = 1.1 + np.cumsum(rng.normal(0, 0.005, n))
+    return pd.DataFrame({
+        "A": base + rng.normal(0, 0.002, n),
+        "B": 0.8 * base + 0.2 + rng.normal(0, 0.002, n),
+        "C": 0.7 + np.cumsum(rng.normal(0, 0.005, n)),
+    }, index=index)
+
+
+def _adf_reference(x: np.ndarray) -> float:
+    """ラグ候補ごとに最小二乗をやり直す ADF（定数項なし・AIC）"""
+    nobs = len(x)
+    maxlag = min(nobs // 2 - 1, int(math.ceil(12.0 * (nobs / 100.0) ** 0.25)))
+    dx = np.diff(x)
+
+    def design(lags: int) -> tuple[np.ndarray, np.ndarray]:
+        m = len(dx) - lags
+        cols = [x[-m - 1:-1]] + [dx[lags - k:len(dx) - k] for k in range(1, lags + 1)]
+        return np.column_stack(cols), dx[-m:]
+
+    full, target = design(maxlag)
+    aics = []
+    for k in range(1, maxlag + 2):
+        _, ssr, _, _ = np.linalg.lstsq(full[:, :k], target, rcond=None)
+        aics.append(len(target) * np.log(ssr[0] / len(target)) + 2 * k)
+    best = int(np.argmin(aics))
+
+    X, y = design(best)
+    coef, ssr, _, _ = np.linalg.lstsq(X, y, rcond=None)
+    s2 = ssr[0] / (len(y) - X.shape[1])
+    return coef[0] / math.sqrt(s2 * np.linalg.inv(X.T @ X)[0, 0])
+
+
+# ============================================================
+# 検定
+# ============================================================
+
+
+class TestEngleGranger:
+    """単一ウィンドウの検定"""
+
+    def test_mackinnon_pvalue(self) -> None:
+        assert mackinnon_pvalue(-3.3377) == pytest.approx(0.05, abs=5e-4)
+        assert mackinnon_pvalue(1.0) == 1.0
+        assert mackinnon_pvalue(-20.0) == 0.0
+        assert mackinnon_pvalue(-4.0) < mackinnon_pvalue(-3.0) < mackinnon_pvalue(-2.0)
+
+    @pytest.mark.parametrize("n", [30, 120, 500])
+    def test_adf_matches_reference(self, n: int) -> None:
+        rng = np.random.default_rng(n)
+        for x in (np.cumsum(rng.normal(size=n)), rng.normal(size=n)):
+            assert adf_tstat(x) == pytest.approx(_adf_reference(x), rel=1e-9)
+
+    def test_adf_rejects_constant(self) -> None:
+        with pytest.raises(ValueError):
+            adf_tstat(np.ones(50))
+
+    def test_cointegrated_vs_independent(self) -> None:
+        closes = _make_closes()
+        coint = engle_granger(closes["A"].values, closes["B"].values)
+        independent = engle_granger(closes["A"].values, closes["C"].values)
+
+        assert coint.pvalue < 0.01
+        assert coint.beta == pytest.approx(1.25, rel=0.05)
+        assert coint.nobs == len(closes)
+        assert independent.pvalue > 0.1
+
+    def test_untestable_returns_nan(self) -> None:
+        result = engle_granger(np.ones(50), np.arange(50.0))
+        assert np.isnan(result.pvalue)
+
+
+# ============================================================
+# ローリングスキャン
+# ============================================================
+
+
+class TestScan:
+    """全組ローリング"""
+
+    def test_rows_match_single_window(self) -> None:
+        closes = _make_closes()
+        window = pd.Timedelta(days=120)
+        scan = scan_cointegration(closes, window, pairs=[("A", "B"), ("C", "A")])
+
+        assert scan.pairs == [("A", "B"), ("C", "A")]
+        for ts in closes.index[::23]:
+            for a, b in scan.pairs:
+                sa = closes[a].loc[ts - window:ts]
+                sb = closes[b].loc[ts - window:ts]
+                assert scan.nobs.at[ts, (a, b)] == len(sa)
+                if len(sa) < 30:
+                    assert np.isnan(scan.pvalue.at[ts, (a, b)])
+                    continue
+                expected = engle_granger(sa.values, sb.values)
+                assert scan.pvalue.at[ts, (a, b)] == pytest.approx(expected.pvalue, abs=1e-9)
+                assert scan.beta.at[ts, (a, b)] == pytest.approx(expected.beta, rel=1e-9)
+                assert scan.resid_std.at[ts, (a, b)] == pytest.approx(expected.resid_std, rel=1e-6)
+
+    def test_bar_window_and_every(self) -> None:
+        closes = _make_closes(n=200)
+        scan = scan_cointegration(closes, 60, every=10)
+
+        assert scan.pvalue.index[-1] == closes.index[-1]
+        assert len(scan.pvalue) == 20
+        assert scan.pairs == [("A", "B"), ("A", "C"), ("B", "C")]
+        expected = engle_granger(closes["B"].values[-60:], closes["C"].values[-60:])
+        assert scan.tstat.iloc[-1][("B", "C")] == pytest.approx(expected.tstat, rel=1e-9)
+
+    def test_parallel_matches_sequential(self) -> None:
+        closes = _make_closes(n=150)
+        sequential = scan_cointegration(closes, 50)
+        parallel = scan_cointegration(closes, 50, n_workers=2)
+        pd.testing.assert_frame_equal(parallel.to_frame(), sequential.to_frame())
+
+    def test_invalid_input(self) -> None:
+        closes = _make_closes(n=50)
+        with pytest.raises(ValueError):
+            scan_cointegration(closes, 30, pairs=[("A", "Z")])
+        closes.iloc[3, 0] = np.nan
+        with pytest.raises(ValueError):
+            scan_cointegration(closes, 30)
+
+    def test_cached_scan(self, tmp_path) -> None:
+        closes = _make_closes(n=120)
+        cache = FeatureCache(cache_dir=tmp_path)
+
+        first = cached_scan(closes, 40, cache=cache)
+        second = cached_scan(closes, 40, n_workers=2, cache=cache)
+        assert (cache.hits, cache.misses) == (1, 1)
+        pd.testing.assert_frame_equal(second.pvalue, first.pvalue)
+
+        reloaded = cached_scan(closes, 40, cache=FeatureCache(cache_dir=tmp_path))
+        pd.testing.assert_frame_equal(reloaded.to_frame(), first.to_frame())
+
+        cached_scan(closes, 50, cache=cache)
+        assert cache.misses == 2
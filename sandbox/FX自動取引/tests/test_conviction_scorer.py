@@ -1,8 +1,13 @@
 """ConvictionScorer のテスト（監査P0-#1, P0-#2 回帰防止含む）"""
+from unittest.mock import patch
+
 import numpy as np
 import pandas as pd
+import pytest
 
+from src.config import MFI_PERIOD
 from src.conviction_scorer import ConvictionScorer
+from src.regime_detector import RegimeDetector
 from src.strategy.base import Signal
 
 
@@ -117,3 +122,66 @@ def test_score_trend_clear_uptrend_for_buy():
     assert result.components["trend"] == 2, (
         f"明確な上昇MAは BUY で 2点期待、実際 {result.components['trend']}"
     )
+
+
+def test_score_batch_matches_per_signal_score():
+    """score_batch の各要素が data.iloc[:i+1] への score() と一致する"""
+    rng = np.random.default_rng(5)
+    n = 220
+    closes = 150 + np.cumsum(rng.normal(0, 0.3, n) + 0.05 * np.sin(np.arange(n) / 30))
+    data = pd.DataFrame({
+        "open": closes,
+        "high": closes + np.abs(rng.normal(0, 0.2, n)),
+        "low": closes - np.abs(rng.normal(0, 0.2, n)),
+        "close": closes,
+        "volume": rng.integers(100, 1000, n).astype(float),
+    })
+    indices = np.arange(n)
+    signals = [Signal.BUY if rng.random() < 0.5 else Signal.SELL for _ in indices]
+    signals[3] = Signal.HOLD
+    detector = RegimeDetector()
+    regimes = detector.detect_series(data).regime[indices]
+
+    scorer = ConvictionScorer()
+    batch = scorer.score_batch(data, indices, signals, regimes=regimes)
+
+    assert len(batch) == n
+    for k, i in enumerate(indices):
+        expected = scorer.score(
+            data.iloc[: i + 1], signals[k], regime=detector.detect(data.iloc[: i + 1]),
+        )
+        assert batch.score[k] == expected.score, i
+        assert batch.position_size_multiplier[k] == expected.position_size_multiplier, i
+        assert batch.should_trade[k] == expected.should_trade, i
+        assert {name: int(v[k]) for name, v in batch.components.items()} == expected.components, i
+
+
+def test_score_batch_follows_library_min_length():
+    """
+    pandas_ta が短い入力でも値を返す版（0.3.14b の MFI など）でも、
+    score_batch のウォームアップ判定が data.iloc[:i+1] への score() と一致する
+    """
+    def early_mfi(high, low, close, volume, length=None, **kwargs):
+        # length-1 本から値を返す因果的な MFI（常に 35 = 買いで2点）
+        if len(close) < length - 1:
+            return None
+        return pd.Series(np.where(np.arange(len(close)) >= length - 2, 35.0, np.nan),
+                         index=close.index)
+
+    data = _make_data(60)
+    indices = np.arange(30)
+    scorer = ConvictionScorer()
+    with patch("src.conviction_scorer.ta.mfi", side_effect=early_mfi):
+        batch = scorer.score_batch(data, indices, Signal.BUY)
+        expected = [
+            scorer.score(data.iloc[: i + 1], Signal.BUY, regime=None).components["mfi"]
+            for i in indices
+        ]
+    assert list(batch.components["mfi"]) == expected
+    assert expected[MFI_PERIOD - 2] == 2
+
+
+def test_score_batch_rejects_mismatched_signals():
+    """signals と signal_indices の件数が違えば ValueError"""
+    with pytest.raises(ValueError):
+        ConvictionScorer().score_batch(_make_data(), [10, 20], [Signal.BUY])
@@ -0,0 +1,125 @@
+"""
+SQLite 非同期書き込みのテスト
+
+- キューに積んだ書き込みが flush() / close() でコミットされる
+- 失敗した文はログのみで、同じバッチの他の書き込みは確定する
+- call() の実行順（キルスイッチ発動 → 解除の行ID受け渡し）
+- close() 後の書き込みは同期実行される
+- 同じファイルのパスは同じ DbWriter を共有する
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from src.db_writer import DbWriter, close_all_writers, get_writer
+from src.risk_manager import KillSwitch
+
+
+def _create_table(db_path) -> None:
+    with sqlite3.connect(str(db_path)) as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER NOT NULL)")
+
+
+def _values(db_path) -> list[int]:
+    with sqlite3.connect(str(db_path)) as conn:
+        return [row[0] for row in conn.execute("SELECT v FROM t ORDER BY id")]
+
+
+class TestDbWriter:
+    """書き込みスレッドの基本動作"""
+
+    def test_flush_commits_queued_writes_from_many_threads(self, tmp_path) -> None:
+        db = tmp_path / "w.db"
+        _create_table(db)
+        writer = DbWriter(db, batch_size=16)
+        try:
+            threads = [
+                threading.Thread(
+                    target=lambda base=i: [
+                        writer.execute("INSERT INTO t (v) VALUES (?)", (base * 100 + k,))
+                        for k in range(50)
+                    ]
+                )
+                for i in range(4)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            assert writer.flush(timeout=5)
+            assert len(_values(db)) == 200
+            with sqlite3.connect(str(db)) as conn:
+                assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        finally:
+            writer.close()
+
+    def test_failed_statement_does_not_drop_batch(self, tmp_path, caplog) -> None:
+        db = tmp_path / "w.db"
+        _create_table(db)
+        writer = DbWriter(db)
+        writer.execute("INSERT INTO t (v) VALUES (?)", (1,))
+        writer.execute("INSERT INTO t (v) VALUES (?)", (None,), error_message="テスト書き込み失敗")
+        writer.execute("INSERT INTO t (v) VALUES (?)", (2,))
+        writer.close()
+
+        assert _values(db) == [1, 2]
+        assert "テスト書き込み失敗" in caplog.text
+
+    def test_write_after_close_runs_synchronously(self, tmp_path) -> None:
+        db = tmp_path / "w.db"
+        _create_table(db)
+        writer = DbWriter(db)
+        writer.close()
+
+        writer.execute("INSERT INTO t (v) VALUES (?)", (7,))
+
+        assert writer.closed
+        assert _values(db) == [7]
+
+    def test_reader_sees_flushed_writes(self, tmp_path) -> None:
+        db = tmp_path / "w.db"
+        _create_table(db)
+        writer = DbWriter(db)
+        try:
+            writer.execute("INSERT INTO t (v) VALUES (?)", (3,))
+            writer.flush(timeout=5)
+            with writer.reader() as conn:
+                assert conn.execute("SELECT v FROM t").fetchall() == [(3,)]
+        finally:
+            writer.close()
+
+    def test_invalid_batch_size(self, tmp_path) -> None:
+        with pytest.raises(ValueError):
+            DbWriter(tmp_path / "w.db", batch_size=0)
+
+
+class TestSharedWriters:
+    """DBファイルごとの共有インスタンス"""
+
+    def test_same_file_shares_writer(self, tmp_path) -> None:
+        db = tmp_path / "shared.db"
+        try:
+            assert get_writer(db) is get_writer(str(tmp_path / "." / "shared.db"))
+        finally:
+            close_all_writers()
+        assert not get_writer(db).closed
+        close_all_writers()
+
+    def test_kill_switch_log_round_trip(self, tmp_path) -> None:
+        """発動 → 解除が書き込みスレッド上で行IDを受け渡して記録される"""
+        db = tmp_path / "ks.db"
+        ks = KillSwitch(db_path=db)
+        ks.activate("daily_loss")
+        ks.deactivate()
+        close_all_writers()
+
+        with sqlite3.connect(str(db)) as conn:
+            rows = conn.execute(
+                "SELECT reason, deactivated_at FROM kill_switch_log"
+            ).fetchall()
+        assert len(rows) == 1
+        assert rows[0][0] == "daily_loss"
+        assert rows[0][1] is not None
@@ -0,0 +1,89 @@
+"""
+決済通貨→JPY レートキャッシュのテスト
+
+- TTL 内は新鮮、超えたら古い（古くても get では返す）
+- XXX_JPY の価格だけをレートとして取り込む
+- RiskManager が TTL 内はブローカーを呼ばず、古くなったら1回だけ取り直す
+"""
+
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from src.fx_rates import FxRateCache, quote_currency_of
+from src.risk_manager import RiskManager
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestFxRateCache:
+    """TTL と更新元"""
+
+    def test_ttl_staleness(self) -> None:
+        clock = _FakeClock()
+        cache = FxRateCache(ttl_sec=60, clock=clock)
+        cache.update("usd", 150.0)
+
+        clock.now += 30
+        assert cache.fresh("USD").rate == 150.0
+        assert cache.fresh("USD").age_sec == pytest.approx(30.0)
+
+        clock.now += 31
+        assert cache.fresh("USD") is None
+        assert cache.get("USD").rate == 150.0
+        assert cache.snapshot() == {"USD": 150.0}
+
+    def test_update_from_instrument_only_jpy_quotes(self) -> None:
+        cache = FxRateCache()
+        assert cache.update_from_instrument("USD_JPY", 151.2)
+        assert not cache.update_from_instrument("EUR_USD", 1.08)
+        assert not cache.update_from_instrument("GBP_JPY", float("nan"))
+        assert not cache.update("EUR", 0.0)
+        assert cache.snapshot() == {"USD": 151.2}
+        assert cache.get("USD").source == "bars"
+
+    def test_quote_currency_of(self) -> None:
+        assert quote_currency_of("eur_usd") == "USD"
+        assert quote_currency_of("EURUSD") is None
+
+    def test_invalid_ttl(self) -> None:
+        with pytest.raises(ValueError):
+            FxRateCache(ttl_sec=0)
+
+
+class TestRiskManagerRateCache:
+    """サイジング時のブローカー照会回数"""
+
+    def _risk_manager(self, clock: _FakeClock, close: float = 150.0):
+        broker = MagicMock()
+        broker.get_prices.return_value = pd.DataFrame({"close": [close]})
+        rm = RiskManager(account_balance=1_000_000, broker_client=broker)
+        rm._fx_rates = FxRateCache(ttl_sec=300, clock=clock)
+        return rm, broker
+
+    def test_bar_fed_rate_avoids_broker_call(self) -> None:
+        clock = _FakeClock()
+        rm, broker = self._risk_manager(clock)
+        rm.update_fx_rate("USD_JPY", 148.0)
+
+        assert rm._get_pip_value("EUR_USD") == pytest.approx(14.8)
+        broker.get_prices.assert_not_called()
+
+    def test_refetches_only_when_stale(self) -> None:
+        clock = _FakeClock()
+        rm, broker = self._risk_manager(clock)
+
+        for _ in range(3):
+            rm._get_pip_value("GBP_USD")
+        assert broker.get_prices.call_count == 1
+
+        clock.now += 301
+        assert rm._get_pip_value("GBP_USD") == pytest.approx(15.0)
+        assert broker.get_prices.call_count == 2
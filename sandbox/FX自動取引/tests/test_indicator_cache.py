@@ -21,7 +21,7 @@ from src.config import (
     MFI_PERIOD,
     RSI_PERIOD,
 )
-from src.indicator_cache import compute_indicators
+from src.indicator_cache import compute_indicators, min_input_rows
 
 
 # ============================================================
@@ -189,3 +189,21 @@ class TestComputeIndicators:
 
         for key, value in result.items():
             assert value is None, f"{key} がNoneではありません: {value}"
+
+
+class TestMinInputRows:
+    """min_input_rows() のテスト"""
+
+    def test_matches_library_threshold(self) -> None:
+        """部分データへの適用で初めて None でなくなる本数を返すこと"""
+        data = _make_ohlcv(100)
+        rows = min_input_rows(lambda d: ta.rsi(d["close"], length=RSI_PERIOD), data)
+
+        assert ta.rsi(data["close"].iloc[:rows], length=RSI_PERIOD) is not None
+        assert ta.rsi(data["close"].iloc[:rows - 1], length=RSI_PERIOD) is None
+
+    def test_never_computable(self) -> None:
+        """全期間でも None なら len(data) + 1 を返すこと"""
+        data = _make_ohlcv(10)
+        assert min_input_rows(lambda d: None, data) == 11
+
@@ -0,0 +1,237 @@
+"""
+ストリーミング指標エンジンのテスト
+
+R1拡張: IndicatorStream の単体テスト
+- 伸長するデータ（確定足の追記）で compute_indicators() と数値一致すること
+- 300本スライド窓でも全キー・全系列が compute_indicators() と一致すること
+  （窓の先頭が進んだら再シード、先頭が同じ間は差分更新）
+- 形成中の足の更新で確定状態が汚れないこと
+- DatetimeIndex / RangeIndex の双方で新規確定足を検出できること
+- 履歴改訂・データ不足・volume列なしのフォールバック
+- シード照合で全再計算と一致しない（pandas_ta の指標定義が異なる）場合の全再計算切替
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicator_cache import compute_indicators
+from src.indicator_stream import MIN_STREAM_ROWS, IndicatorStream
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+
+def _make_ohlcv(
+    n: int = 400,
+    base_price: float = 150.0,
+    with_volume: bool = True,
+    with_time_index: bool = False,
+) -> pd.DataFrame:
+    """テスト用OHLCVデータを生成する。"""
+    rng = np.random.default_rng(42)
+    close = base_price + np.cumsum(rng.normal(0, 0.1, n))
+    df = pd.DataFrame({
+        "open": close + rng.normal(0, 0.02, n),
+        "high": close + rng.uniform(0, 0.1, n),
+        "low": close - rng.uniform(0, 0.1, n),
+        "close": close,
+    })
+    if with_volume:
+        df["volume"] = rng.integers(100, 1000, size=n).astype(float)
+    if with_time_index:
+        df.index = pd.date_range("2026-01-05", periods=n, freq="15min", tz="UTC")
+    return df
+
+
+def _assert_cache_close(
+    actual: dict, expected: dict, atol: float = 1e-9, tail: int = 0
+) -> None:
+    """2つの指標キャッシュが同じキー・同じNaN配置・近い値を持つことを検証する。
+
+    tail > 0 の場合、Series/DataFrame は末尾 tail 行のみ比較する。
+    """
+    assert set(actual.keys()) == set(expected.keys())
+    for key, exp in expected.items():
+        act = actual[key]
+        if exp is None:
+            assert act is None, key
+        elif isinstance(exp, pd.DataFrame):
+            assert list(act.columns) == list(exp.columns), key
+            assert act.index.equals(exp.index), key
+            np.testing.assert_allclose(
+                act.to_numpy(float)[-tail:], exp.to_numpy(float)[-tail:],
+                atol=atol, rtol=0, equal_nan=True, err_msg=key,
+            )
+        elif isinstance(exp, pd.Series):
+            assert act.index.equals(exp.index), key
+            np.testing.assert_allclose(
+                act.to_numpy(float)[-tail:], exp.to_numpy(float)[-tail:],
+                atol=atol, rtol=0, equal_nan=True, err_msg=key,
+            )
+        else:
+            assert act == pytest.approx(exp, abs=atol), key
+
+
+# ============================================================
+# テストケース
+# ============================================================
+
+
+class TestParity:
+    """pandas_ta（compute_indicators）とのパリティ"""
+
+    def test_first_update_equals_full_compute(self) -> None:
+        """初回（シード）は compute_indicators() の結果そのものを返すこと"""
+        data = _make_ohlcv(300)
+        stream = IndicatorStream()
+
+        _assert_cache_close(stream.update(data), compute_indicators(data), atol=0)
+        assert stream.is_seeded
+
+    @pytest.mark.parametrize("with_time_index", [False, True])
+    def test_growing_data_matches_full_compute(self, with_time_index: bool) -> None:
+        """確定足を1本ずつ追記しても全期間で compute_indicators() と一致すること"""
+        full = _make_ohlcv(260, with_time_index=with_time_index)
+        stream = IndicatorStream()
+
+        for end in range(MIN_STREAM_ROWS, len(full) + 1):
+            data = full.iloc[:end]
+            _assert_cache_close(stream.update(data), compute_indicators(data))
+
+    def test_multiple_new_bars_in_one_update(self) -> None:
+        """1回の更新で複数本確定しても一致すること"""
+        full = _make_ohlcv(300)
+        stream = IndicatorStream()
+        stream.update(full.iloc[:100])
+
+        data = full.iloc[:107]
+        _assert_cache_close(stream.update(data), compute_indicators(data))
+
+    def test_sliding_window_matches_full_compute(self) -> None:
+        """300本スライド窓でも、全キー・全系列が compute_indicators() と一致すること
+
+        窓の先頭が進むたびに再シードし、同じ足が形成中の間（先頭が同じ）は
+        差分更新になる。どちらも pandas_ta を窓に直接適用した値と丸め誤差以内。
+        """
+        full = _make_ohlcv(600, with_time_index=True)
+        stream = IndicatorStream()
+
+        for end in range(300, len(full) + 1, 7):
+            for delta in (0.0, 0.03, -0.05):
+                data = full.iloc[end - 300:end].copy()
+                data.iloc[-1, data.columns.get_loc("close")] += delta
+                data.iloc[-1, data.columns.get_loc("high")] += abs(delta)
+                _assert_cache_close(stream.update(data), compute_indicators(data))
+
+    def test_fixed_start_window_updates_incrementally(self) -> None:
+        """窓の先頭が同じ間は再シードしないこと"""
+        full = _make_ohlcv(300)
+        stream = IndicatorStream()
+        stream.update(full.iloc[:250])
+
+        with patch("src.indicator_stream.compute_indicators") as mock_compute:
+            stream.update(full.iloc[:251])
+            stream.update(full.iloc[:252])
+        mock_compute.assert_not_called()
+
+        with patch(
+            "src.indicator_stream.compute_indicators", side_effect=compute_indicators
+        ) as mock_compute:
+            _assert_cache_close(stream.update(full.iloc[1:253]), compute_indicators(full.iloc[1:253]))
+        mock_compute.assert_called_once()
+
+
+class TestFormingBar:
+    """形成中の最終足の扱い"""
+
+    def test_forming_bar_update_does_not_corrupt_state(self) -> None:
+        """形成中の足が何度変化しても、確定後の値は全再計算と一致すること"""
+        full = _make_ohlcv(200)
+        stream = IndicatorStream()
+        stream.update(full.iloc[:150])
+
+        for delta in (0.05, -0.08, 0.02):
+            ticking = full.iloc[:151].copy()
+            ticking.iloc[-1, ticking.columns.get_loc("close")] += delta
+            ticking.iloc[-1, ticking.columns.get_loc("high")] += abs(delta)
+            _assert_cache_close(stream.update(ticking), compute_indicators(ticking))
+
+        data = full.iloc[:152]
+        _assert_cache_close(stream.update(data), compute_indicators(data))
+
+
+class TestFallback:
+    """再シード・全再計算フォールバック"""
+
+    def test_revised_history_triggers_reseed(self) -> None:
+        """前回の確定足が見つからない場合は再シードして一致を保つこと"""
+        full = _make_ohlcv(300)
+        stream = IndicatorStream()
+        stream.update(full.iloc[:200])
+
+        revised = full.iloc[:201].copy()
+        revised["close"] += 0.5
+        revised["high"] += 0.5
+        revised["low"] += 0.5
+        _assert_cache_close(stream.update(revised), compute_indicators(revised), atol=0)
+
+    def test_short_data_delegates_to_full_compute(self) -> None:
+        """MIN_STREAM_ROWS 未満では compute_indicators() と同一で状態を持たないこと"""
+        data = _make_ohlcv(MIN_STREAM_ROWS - 1)
+        stream = IndicatorStream()
+
+        _assert_cache_close(stream.update(data), compute_indicators(data), atol=0)
+        assert not stream.is_seeded
+
+    def test_empty_data(self) -> None:
+        """空データでは全てNoneになること"""
+        result = IndicatorStream().update(pd.DataFrame())
+        assert all(v is None for v in result.values())
+
+    def test_without_volume_mfi_is_none(self) -> None:
+        """volume列なしでは mfi / current_mfi が None のまま差分更新されること"""
+        full = _make_ohlcv(200, with_volume=False)
+        stream = IndicatorStream()
+        stream.update(full.iloc[:150])
+
+        result = stream.update(full.iloc[:151])
+        assert result["mfi"] is None
+        assert result["current_mfi"] is None
+        _assert_cache_close(result, compute_indicators(full.iloc[:151]))
+
+    def test_seed_mismatch_disables_streaming(self) -> None:
+        """シード照合で全再計算と一致しなければ、以降は常に全再計算を返すこと"""
+        full = _make_ohlcv(300)
+
+        def drifted(data: pd.DataFrame) -> dict:
+            # 指標定義の異なる pandas_ta を模擬（BB の分散の定義違い相当）
+            cache = compute_indicators(data)
+            cache["bbands"] = cache["bbands"] * 1.03
+            return cache
+
+        stream = IndicatorStream()
+        with patch("src.indicator_stream.compute_indicators", side_effect=drifted) as mock_compute:
+            stream.update(full.iloc[:200])
+            assert stream.is_disabled
+            assert not stream.is_seeded
+
+            result = stream.update(full.iloc[:201])
+        assert mock_compute.call_count == 2
+        _assert_cache_close(result, drifted(full.iloc[:201]), atol=0)
+
+    def test_seed_check_passes_with_installed_pandas_ta(self) -> None:
+        """インストール済み pandas_ta ではシード照合が通り差分更新が有効なこと"""
+        stream = IndicatorStream()
+        stream.update(_make_ohlcv(300, with_time_index=True))
+        assert stream.is_seeded
+        assert not stream.is_disabled
+
+    def test_invalid_history_size(self) -> None:
+        """history_size が小さすぎる場合はValueError"""
+        with pytest.raises(ValueError):
+            IndicatorStream(history_size=MIN_STREAM_ROWS - 1)
@@ -0,0 +1,85 @@
+"""
+パイプライン・レイテンシ計測のテスト
+
+- ステージ計測の合算・例外時の記録
+- ローリング分布（window 超過分の破棄）と p50/p95/max
+- 定期ログの間隔判定と /perf レポート
+"""
+
+import pytest
+
+from src.latency import TOTAL_STAGE, LatencyRecorder, format_perf_report
+
+
+def _record(recorder: LatencyRecorder, stage: str, values: list[float]) -> None:
+    """measure を通さず既知の値を積む（分布の検証用）"""
+    for value in values:
+        recorder.begin_iteration()
+        recorder._current[stage] = value
+        recorder.end_iteration()
+
+
+class TestLatencyRecorder:
+    """ステージ計測と集計"""
+
+    def test_measure_accumulates_per_iteration(self) -> None:
+        """同じステージの複数回計測は合算し、total を付与する"""
+        recorder = LatencyRecorder("USD_JPY")
+        recorder.begin_iteration()
+        with recorder.measure("prices"):
+            pass
+        with recorder.measure("prices"):
+            pass
+        with pytest.raises(RuntimeError):
+            with recorder.measure("order"):
+                raise RuntimeError("発注失敗")
+
+        timings = recorder.end_iteration()
+
+        assert set(timings) == {"prices", "order", TOTAL_STAGE}
+        assert timings[TOTAL_STAGE] >= timings["prices"]
+        assert recorder.last == timings
+        assert recorder.elapsed_ms() == 0.0
+
+    def test_rolling_percentiles(self) -> None:
+        """直近 window 件で p50/p95/max を求め、total は末尾に並ぶ"""
+        recorder = LatencyRecorder("USD_JPY", window=100)
+        _record(recorder, "regime", [1000.0] * 10 + [float(v) for v in range(1, 101)])
+
+        summary = recorder.summary()
+        stats = summary["regime"]
+
+        assert stats["count"] == 100
+        assert stats["p50"] == pytest.approx(50.5)
+        assert stats["p95"] == pytest.approx(95.05)
+        assert stats["max"] == 100.0
+        assert list(summary)[-1] == TOTAL_STAGE
+
+    def test_should_log_interval(self) -> None:
+        recorder = LatencyRecorder("USD_JPY", log_interval_sec=0.0)
+        assert recorder.should_log()
+        assert not LatencyRecorder("USD_JPY", log_interval_sec=3600).should_log()
+
+    def test_invalid_window(self) -> None:
+        with pytest.raises(ValueError):
+            LatencyRecorder("USD_JPY", window=0)
+
+
+class TestPerfReport:
+    """Telegram /perf 用レポート"""
+
+    def test_report_lists_all_pairs(self) -> None:
+        usd = LatencyRecorder("USD_JPY")
+        _record(usd, "prices", [12.0, 14.0])
+        eur = LatencyRecorder("EUR_USD")
+
+        report = format_perf_report([usd, eur])
+
+        assert report.startswith("⏱")
+        assert "<pre>" in report and report.endswith("</pre>")
+        assert "[USD_JPY] n=2" in report
+        assert "prices" in report
+        assert "[EUR_USD] 計測データなし" in report
+
+    def test_report_without_loops(self) -> None:
+        assert format_perf_report([]) == "計測対象のループがありません"
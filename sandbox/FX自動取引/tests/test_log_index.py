@@ -0,0 +1,153 @@
+"""
+取引ログ索引のテスト
+
+- parse_line() が各イベント（シグナル実行・AI判定・約定・戦略シグナルの終値・conviction・Bear警告）を
+  取り出し、[PAIR] タグの無い行は直前のタグからペアを推定すること
+- ingest() が前回のバイト位置から続きだけを取り込み、書きかけの最終行を次回に回すこと
+- ローテートで名前が変わったファイルを読み直さないこと
+- events() の種別・ペア・時刻での絞り込み
+"""
+
+import os
+
+import pytest
+
+from src.log_index import LogIndex, log_files, parse_line
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+
+def _line(ts: str, msg: str, level: str = "INFO", name: str = "src.trading_loop") -> str:
+    return f"2026-05-01 {ts} [{level}] {name}: {msg}\n"
+
+
+_DAY1 = (
+    _line("10:00:00,001", "[GBP_JPY] pipeline: session=PASS | DECISION=HOLD | 1.0ms")
+    + _line("10:00:00,002", "BB逆張り売りシグナル: close=215.29700 >= BBU=215.27800, RSI=65.26>=65",
+            name="src.strategy.bollinger_reversal")
+    + _line("10:00:00,003", "[GBP_JPY] AIフィルター: CONTRADICT (direction=bullish, confidence=0.70) → 倍率0.50",
+            level="DEBUG")
+    + _line("10:00:00,004", "[GBP_JPY] シグナル実行: SELL, ポジションサイズ倍率=0.50 (レジーム1.0 × conviction1.0)")
+    + _line("10:00:01,500", "ポジションオープン成功: trade_id=8588008, instrument=GBP_JPY, units=-4620, "
+            "price=215.01000, sl=215.50000, tp=214.50000", name="src.position_manager")
+    + "Traceback (most recent call last):\n"
+)
+
+
+# ============================================================
+# parse_line
+# ============================================================
+
+
+class TestParseLine:
+    """1行の解析"""
+
+    def test_events(self) -> None:
+        last_pair = None
+        events = []
+        for line in _DAY1.splitlines():
+            event, last_pair = parse_line(line, last_pair)
+            events.append(event)
+
+        assert events[0] is None                       # pipeline 行はイベントではない
+        bar, ai, signal, fill, traceback = events[1:]
+        assert bar["kind"] == "bar_close"
+        assert (bar["pair"], bar["pair_inferred"], bar["price"], bar["direction"]) == (
+            "GBP_JPY", 1, 215.297, "SELL",
+        )
+        assert (ai["verdict"], ai["direction"], ai["confidence"], ai["multiplier"]) == (
+            "CONTRADICT", "bullish", 0.70, 0.50,
+        )
+        assert (signal["kind"], signal["direction"], signal["multiplier"]) == ("signal", "SELL", 0.50)
+        assert (fill["trade_id"], fill["units"], fill["price"], fill["pair_inferred"]) == (
+            "8588008", -4620, 215.01, 0,
+        )
+        assert fill["ts"] == "2026-05-01 10:00:01.500"
+        assert traceback is None
+
+    def test_conviction_and_bear(self) -> None:
+        conv, _ = parse_line(_line(
+            "10:00:00,000", "[USD_JPY] conviction score: 7/10 (倍率=1.0, 取引=True) — ok", level="DEBUG",
+        ).rstrip())
+        bear, _ = parse_line(_line(
+            "10:00:00,000", "[USD_JPY] Bear Researcher警告: severity=0.65, penalty=0.70, リスク=[]",
+            level="WARNING",
+        ).rstrip())
+        assert (conv["kind"], conv["score"]) == ("conviction", 7)
+        assert (bear["kind"], bear["severity"]) == ("bear", 0.65)
+
+    def test_reject_notice_is_not_a_verdict(self) -> None:
+        event, pair = parse_line(_line(
+            "10:00:00,000", "[EUR_USD] AIフィルター: REJECT（弱気）。シグナルを見送り。", level="WARNING",
+        ).rstrip())
+        assert event is None
+        assert pair == "EUR_USD"
+
+
+# ============================================================
+# LogIndex
+# ============================================================
+
+
+class TestLogIndex:
+    """差分取り込みと参照"""
+
+    def test_ingests_only_new_complete_lines(self, tmp_path) -> None:
+        log = tmp_path / "trading.log"
+        log.write_text(_DAY1, encoding="utf-8")
+        index = LogIndex(tmp_path / "index.db")
+
+        assert index.ingest([log]) == 4
+        assert index.ingest([log]) == 0
+
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(_line("10:05:00,000", "[USD_JPY] シグナル実行: BUY, ポジションサイズ").rstrip("\n"))
+        assert index.ingest([log]) == 0                 # 書きかけの行は取り込まない
+        with open(log, "a", encoding="utf-8") as f:
+            f.write("倍率=1.00 (x)\n")
+        assert index.ingest([log]) == 1
+
+        index.close()
+        with LogIndex(tmp_path / "index.db") as reopened:   # 取り込み位置は次回実行に引き継ぐ
+            assert reopened.ingest([log]) == 0
+            assert reopened.count() == 5
+
+    def test_rotation_does_not_reread(self, tmp_path) -> None:
+        log = tmp_path / "trading.log"
+        log.write_text(_DAY1, encoding="utf-8")
+        index = LogIndex(tmp_path / "index.db")
+        index.ingest(log_files(tmp_path))
+
+        # 日次ローテート: 名前変更後に追記分があり、新しい trading.log は戦略シグナルから始まる
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(_line("23:59:59,000", "[USD_JPY] pipeline: DECISION=HOLD"))
+        os.rename(log, tmp_path / "trading.log.2026-05-01")
+        log.write_text(
+            "2026-05-02 00:00:01,000 [INFO] src.strategy.mtf_pullback: "
+            "押し目買いシグナル: close=150.10000 > MA200=149.00000, RSI=30.00<35\n",
+            encoding="utf-8",
+        )
+
+        assert index.ingest(log_files(tmp_path)) == 1
+        bars = index.events(kinds=["bar_close"])
+        assert list(bars["pair"]) == ["GBP_JPY", "USD_JPY"]   # 前のファイル末尾のタグを引き継ぐ
+        assert bars["pair_inferred"].all()
+        assert list(bars["direction"]) == ["SELL", "BUY"]
+
+    def test_events_filters(self, tmp_path) -> None:
+        log = tmp_path / "trading.log"
+        log.write_text(_DAY1 + _line("11:00:00,000", "[USD_JPY] シグナル実行: BUY"), encoding="utf-8")
+        index = LogIndex(":memory:")
+        index.ingest([log])
+
+        signals = index.events(kinds=["signal"])
+        assert list(signals["pair"]) == ["GBP_JPY", "USD_JPY"]
+        assert signals.index.is_monotonic_increasing
+        assert len(index.events(pair="GBP_JPY")) == 4
+        assert len(index.events(start="2026-05-01 10:30", end="2026-05-01")) == 1
+        assert len(index.events(end="2026-05-01 10:00:00.003")) == 2
+        with pytest.raises(ValueError):
+            index.events(kinds=["unknown"])
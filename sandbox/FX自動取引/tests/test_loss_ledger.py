@@ -0,0 +1,222 @@
+"""
+損失集計レッジャーのテスト
+
+- 日次・週次・月次の損失合計と連敗数が全件走査（RiskManager の従来実装）と一致すること
+  （時間経過による窓の移動・決済時刻が遡る取り込み・naive datetime を含む）
+- trades テーブルからの復元
+- RiskManager / PositionManager が決済イベントで集計を更新し、履歴なしで判定すること
+"""
+
+import random
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from src.loss_ledger import LossLedger, load_closed_trades, window_starts
+from src.risk_manager import RiskManager
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+BASE = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def _scan_losses(history: list[dict], now: datetime) -> tuple[float, float, float]:
+    """RiskManager._check_loss_limits_inner と同じ全件走査"""
+    starts = window_starts(now)
+    totals = [0.0, 0.0, 0.0]
+    for trade in history:
+        close_time = trade["close_time"]
+        if close_time.tzinfo is None:
+            close_time = close_time.replace(tzinfo=timezone.utc)
+        if trade["pl"] < 0:
+            for i, window in enumerate(("daily", "weekly", "monthly")):
+                if close_time >= starts[window]:
+                    totals[i] += abs(trade["pl"])
+    return tuple(totals)
+
+
+def _scan_streak(history: list[dict]) -> int:
+    count = 0
+    for trade in reversed(history):
+        if trade["pl"] >= 0:
+            break
+        count += 1
+    return count
+
+
+# ============================================================
+# テストケース
+# ============================================================
+
+
+class TestLossLedger:
+    """全件走査との一致"""
+
+    def test_matches_scan_over_random_stream(self) -> None:
+        """時間を進めながら決済と照会を繰り返しても全件走査と一致する"""
+        rng = random.Random(7)
+        ledger = LossLedger()
+        history: list[dict] = []
+        now = BASE
+
+        for _ in range(3000):
+            now += timedelta(minutes=rng.randint(1, 90))
+            # 5% は過去の決済の取り込み（ブローカー同期で遅れて判明したもの）
+            lag = timedelta(days=rng.uniform(0, 40)) if rng.random() < 0.05 else timedelta(0)
+            close_time = now - lag
+            if rng.random() < 0.1:
+                close_time = close_time.replace(tzinfo=None)
+            trade = {"pl": round(rng.uniform(-3000, 2000), 2), "close_time": close_time}
+            history.append(trade)
+            ledger.record(trade["pl"], trade["close_time"])
+
+            if rng.random() < 0.3:
+                assert ledger.losses(now) == pytest.approx(_scan_losses(history, now), abs=1e-6)
+                assert ledger.consecutive_losses() == _scan_streak(history)
+
+        # 保持期間外の損失は詰められている
+        ledger.losses(now)
+        assert len(ledger) < len([t for t in history if t["pl"] < 0])
+
+    def test_day_boundary_and_clock_rewind(self) -> None:
+        """日付が変わると日次は0に戻り、時刻が巻き戻っても再計算で一致する"""
+        ledger = LossLedger()
+        history = [
+            {"pl": -100.0, "close_time": BASE + timedelta(hours=23)},
+            {"pl": -50.0, "close_time": BASE + timedelta(hours=23, minutes=30)},
+        ]
+        for trade in history:
+            ledger.record(trade["pl"], trade["close_time"])
+
+        before = BASE + timedelta(hours=23, minutes=59)
+        after = BASE + timedelta(days=1, minutes=1)
+        assert ledger.losses(before) == (150.0, 150.0, 150.0)
+        assert ledger.losses(after) == (0.0, 150.0, 150.0)
+        assert ledger.losses(before) == _scan_losses(history, before)
+
+    def test_streak_resets_and_expires(self) -> None:
+        """勝ちで連敗が途切れ、保持期間を過ぎた損失は連敗から除く"""
+        ledger = LossLedger()
+        ledger.record(-1.0, BASE)
+        ledger.record(0.0, BASE + timedelta(hours=1))
+        ledger.record(-1.0, BASE + timedelta(hours=2))
+        ledger.record(-1.0, BASE + timedelta(days=20))
+
+        assert ledger.consecutive_losses(BASE + timedelta(days=21)) == 2
+        assert ledger.consecutive_losses(BASE + timedelta(days=31)) == 1
+
+    def test_concurrent_readers(self) -> None:
+        """
+        複数スレッドが同時に照会しても（窓の移動・詰め直しを含め）合計が崩れない。
+
+        各スレッドの now は数時間ずつ前後する（スレッドごとに取得した現在時刻のずれ）。
+        """
+        history = [
+            {"pl": -10.0, "close_time": BASE + timedelta(minutes=10 * k)} for k in range(6000)
+        ]
+        end = history[-1]["close_time"]
+        nows = [end + timedelta(hours=h) for h in range(0, 24 * 35, 6)]
+        expected = {now: _scan_losses(history, now) for now in nows}
+        errors: list[str] = []
+
+        def reader(ledger: LossLedger, barrier: threading.Barrier, offset: int) -> None:
+            try:
+                for step in range(len(nows)):
+                    now = nows[max(0, step - offset)]
+                    barrier.wait(timeout=10)
+                    got = ledger.losses(now)
+                    if got != pytest.approx(expected[now], abs=1e-6):
+                        errors.append(f"{now}: {got} != {expected[now]}")
+            except Exception as e:                  # 崩れた状態での例外も失敗として数える
+                errors.append(repr(e))
+                barrier.abort()
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for _ in range(10):
+                ledger = LossLedger()
+                ledger.rebuild(history)
+                barrier = threading.Barrier(4)
+                threads = [
+                    threading.Thread(target=reader, args=(ledger, barrier, k)) for k in range(4)
+                ]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert errors == []
+
+
+class TestLoadClosedTrades:
+    """trades テーブルからの復元"""
+
+    def test_rebuild_from_db(self, tmp_path) -> None:
+        db_path = tmp_path / "trades.db"
+        now = BASE + timedelta(days=40, hours=12)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                "CREATE TABLE trades (id INTEGER PRIMARY KEY, pl REAL, closed_at TEXT, status TEXT)"
+            )
+            conn.executemany(
+                "INSERT INTO trades (pl, closed_at, status) VALUES (?, ?, ?)",
+                [
+                    (-500.0, (now - timedelta(days=35)).isoformat(), "closed"),  # 保持期間外
+                    (-300.0, (now - timedelta(days=3)).isoformat(), "closed"),
+                    (200.0, (now - timedelta(days=2)).isoformat(), "closed"),
+                    (-100.0, (now - timedelta(hours=1)).isoformat(), "closed"),
+                    (None, None, "open"),
+                ],
+            )
+
+        trades = load_closed_trades(db_path, now=now)
+        ledger = LossLedger()
+        ledger.rebuild(trades)
+
+        assert [t["pl"] for t in trades] == [-300.0, 200.0, -100.0]
+        assert ledger.losses(now) == (100.0, 400.0, 400.0)
+        assert ledger.consecutive_losses() == 1
+
+    def test_missing_table(self, tmp_path) -> None:
+        assert load_closed_trades(tmp_path / "empty.db") == []
+
+
+class TestRiskManagerIntegration:
+    """RiskManager の履歴なし判定"""
+
+    def test_ledger_path_matches_history_path(self) -> None:
+        """record_trade_close で積んだ集計と履歴の全件走査が同じ判定になる"""
+        rm = RiskManager(account_balance=1_000_000)
+        now = datetime.now(timezone.utc)
+        history = [
+            {"pl": -30_000.0, "close_time": now - timedelta(days=2)},
+            {"pl": -40_000.0, "close_time": now - timedelta(days=3)},
+            {"pl": 5_000.0, "close_time": now - timedelta(days=1)},
+            {"pl": -35_000.0, "close_time": now - timedelta(days=4)},
+        ]
+        rm.rebuild_loss_ledger(history)
+
+        assert rm.check_loss_limits() == rm.check_loss_limits(history)
+        assert rm.check_loss_limits()[0] is False
+        assert rm.check_consecutive_losses() == rm.check_consecutive_losses(history)
+
+        assert rm.evaluate_kill_switch(current_balance=1_000_000) == "daily_loss"
+
+    def test_history_is_not_scanned(self) -> None:
+        """履歴を渡さない判定は全件走査を呼ばない"""
+        rm = RiskManager(account_balance=1_000_000)
+        rm.record_trade_close(-1_000.0, datetime.now(timezone.utc))
+
+        with patch.object(RiskManager, "_check_loss_limits_inner") as scan:
+            assert rm.check_loss_limits() == (True, None)
+        scan.assert_not_called()
+        assert rm.check_consecutive_losses() == (1, False)
@@ -0,0 +1,165 @@
+"""
+メタラベリングのテスト
+
+- triple_barrier_labels() がバー単位ループ版（旧 scripts 実装）と全イベントで一致すること
+  （同じ足で両バリアに触れたら損切り優先、時間切れ、最終行付近のイベント）
+- build_meta_features() の列と値
+- FeatureCache がデータセットの版ごとにメモリ・ディスクから再利用すること
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.meta_labeling import (
+    META_FEATURE_COLUMNS,
+    FeatureCache,
+    build_meta_features,
+    dataset_version,
+    triple_barrier_labels,
+)
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+
+def _make_ohlcv(n: int = 2000, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=n, freq="h", tz="UTC")
+    close = 150.0 + np.cumsum(rng.normal(0, 0.08, n))
+    open_ = close + rng.normal(0, 0.02, n)
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.uniform(0, 0.1, n),
+        "low": np.minimum(open_, close) - rng.uniform(0, 0.1, n),
+        "close": close,
+        "tick_volume": rng.integers(1, 100, n).astype(float),
+    }, index=index)
+
+
+def _label_one(df, event_idx, side, atr_val, tp_mult=2.0, sl_mult=1.0, max_hold=24):
+    """バー単位ループの参照実装（ベクトル化前の実装）"""
+    if event_idx + 1 >= len(df):
+        return (0, 0, 0.0)
+    entry = df["open"].iloc[event_idx + 1]
+    if side == 1:
+        upper = entry + tp_mult * atr_val
+        lower = entry - sl_mult * atr_val
+    else:
+        upper = entry + sl_mult * atr_val
+        lower = entry - tp_mult * atr_val
+    end = min(event_idx + 1 + max_hold, len(df) - 1)
+    for j in range(event_idx + 1, end + 1):
+        hi = df["high"].iloc[j]
+        lo = df["low"].iloc[j]
+        if side == 1:
+            if lo <= lower:
+                return (0, j - event_idx, lower - entry)
+            if hi >= upper:
+                return (1, j - event_idx, upper - entry)
+        else:
+            if hi >= upper:
+                return (0, j - event_idx, entry - upper)
+            if lo <= lower:
+                return (1, j - event_idx, entry - lower)
+    exit_price = df["close"].iloc[end]
+    raw = (exit_price - entry) if side == 1 else (entry - exit_price)
+    return (1 if raw > 0 else 0, end - event_idx, raw)
+
+
+# ============================================================
+# triple_barrier_labels
+# ============================================================
+
+
+class TestTripleBarrier:
+    """ループ版との一致"""
+
+    @pytest.mark.parametrize("max_hold", [1, 24])
+    def test_matches_scalar_loop(self, max_hold: int) -> None:
+        df = _make_ohlcv()
+        rng = np.random.default_rng(0)
+        events = np.r_[rng.integers(0, len(df), 400), len(df) - 1, len(df) - 2, len(df) - 5]
+        sides = np.where(rng.random(len(events)) < 0.5, 1, -1)
+        atr = rng.uniform(0.05, 0.4, len(events))
+
+        result = triple_barrier_labels(df, events, sides, atr, max_hold=max_hold)
+
+        for k, (i, side, a) in enumerate(zip(events, sides, atr)):
+            expected = _label_one(df, int(i), int(side), float(a), max_hold=max_hold)
+            got = (result.label[k], result.exit_offset[k], result.raw_return[k])
+            assert got == expected
+        assert set(result.outcome) <= {"TP", "SL", "TIME"}
+
+    def test_stop_wins_when_both_touched(self) -> None:
+        df = pd.DataFrame({
+            "open": [100.0, 100.0, 100.0],
+            "high": [100.0, 103.0, 100.0],
+            "low": [100.0, 98.0, 100.0],
+            "close": [100.0, 100.0, 100.0],
+        })
+        result = triple_barrier_labels(df, [0, 0], [1, -1], [1.0, 1.0])
+
+        assert list(result.outcome) == ["SL", "SL"]
+        assert list(result.exit_price) == [99.0, 101.0]
+        assert list(result.label) == [0, 0]
+
+    def test_to_frame_uses_event_timestamps(self) -> None:
+        df = _make_ohlcv(n=50)
+        frame = triple_barrier_labels(df, [3, 10], [1, -1], [0.1, 0.1]).to_frame(df.index)
+
+        assert list(frame.index) == [df.index[3], df.index[10]]
+        assert {"label", "exit_offset", "raw_diff", "outcome", "window_end"} <= set(frame.columns)
+
+    def test_length_mismatch(self) -> None:
+        with pytest.raises(ValueError):
+            triple_barrier_labels(_make_ohlcv(n=10), [1, 2], [1], [0.1, 0.1])
+
+
+# ============================================================
+# 特徴量・キャッシュ
+# ============================================================
+
+
+class TestMetaFeatures:
+    """特徴量の列とキャッシュ"""
+
+    def test_columns(self) -> None:
+        df = _make_ohlcv(n=200)
+        features = build_meta_features(df)
+
+        assert set(META_FEATURE_COLUMNS) | {"atr"} <= set(features.columns)
+        assert list(features.columns[:len(df.columns)]) == list(df.columns)
+        assert features["ret_lag_1"].iloc[5] == pytest.approx(
+            df["close"].iloc[5] / df["close"].iloc[4] - 1.0
+        )
+        assert features["atr_over_price"].iloc[-1] == pytest.approx(
+            features["atr"].iloc[-1] / df["close"].iloc[-1]
+        )
+
+    def test_requires_datetime_index(self) -> None:
+        with pytest.raises(ValueError):
+            build_meta_features(_make_ohlcv(n=20).reset_index(drop=True))
+
+    def test_cache_reuses_by_dataset_version(self, tmp_path) -> None:
+        df = _make_ohlcv(n=300)
+        cache = FeatureCache(cache_dir=tmp_path)
+
+        first = cache.get_or_build(df)
+        first["scratch"] = 1.0   # 呼び出し側の変更はキャッシュに残らない
+        second = cache.get_or_build(df)
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert "scratch" not in second.columns
+
+        # 別インスタンス（次回実行）はディスクから読む
+        reloaded = FeatureCache(cache_dir=tmp_path).get_or_build(df)
+        pd.testing.assert_frame_equal(reloaded, second)
+
+        changed = df.copy()
+        changed.iloc[-1, changed.columns.get_loc("close")] += 0.01
+        assert dataset_version(changed) != dataset_version(df)
+        cache.get_or_build(changed)
+        cache.get_or_build(df, ma_short=10)
+        assert cache.misses == 3
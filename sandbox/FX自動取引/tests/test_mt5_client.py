@@ -4,6 +4,8 @@ MT5Client のユニットテスト
 MetaTrader5モジュール全体をモックしてテストする（MT5ターミナル不要）。
 """
 
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
 import numpy as np
@@ -281,6 +283,92 @@ class TestGetPrices:
         assert call_args[0][0] == "USDJPY-"
 
 
+_RATES_DTYPE = [
+    ("time", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("tick_volume", "i8"),
+    ("spread", "i4"),
+    ("real_volume", "i8"),
+]
+
+
+def _make_rates(start: int, n: int, step: int = 900) -> np.ndarray:
+    """start（UNIX秒）から step 秒間隔の n 本の rates を生成する。"""
+    times = start + step * np.arange(n)
+    close = 150.0 + 0.01 * np.arange(n)
+    return np.array(
+        [(t, c, c + 0.05, c - 0.05, c, 100 + i, 20, 0)
+         for i, (t, c) in enumerate(zip(times, close))],
+        dtype=_RATES_DTYPE,
+    )
+
+
+class TestGetPricesWithCandleStore:
+    """ローソク足ストア設定時の差分取得テスト"""
+
+    @pytest.fixture
+    def store_client(self, mt5_mock, tmp_path):
+        from src.candle_store import CandleStore
+        from src.mt5_client import Mt5Client
+
+        return Mt5Client(candle_store=CandleStore(tmp_path))
+
+    def _serve(self, mt5_mock, all_rates: np.ndarray) -> None:
+        """copy_rates_from_pos(…, 0, count) が最新 count 本を返すようにする。"""
+        mt5_mock.copy_rates_from_pos.side_effect = (
+            lambda symbol, tf, pos, count: all_rates[-count:]
+        )
+
+    def test_first_call_fetches_full_and_stores_closed_bars(
+        self, store_client, mt5_mock
+    ):
+        """初回は全量取得し、形成中の足以外を保存する"""
+        rates = _make_rates(1704067200, 100)
+        self._serve(mt5_mock, rates)
+
+        df = store_client.get_prices("USD_JPY", 100, "M15")
+
+        assert len(df) == 100
+        assert mt5_mock.copy_rates_from_pos.call_args[0][3] == 100
+        assert store_client._candle_store.row_count("USD_JPY", "M15") == 99
+
+    def test_second_call_fetches_only_delta(self, store_client, mt5_mock):
+        """2回目は CANDLE_DELTA_FETCH_BARS 本だけ取得し、結果は全量取得と一致する"""
+        from src.config import CANDLE_DELTA_FETCH_BARS
+
+        rates = _make_rates(1704067200, 110)
+        self._serve(mt5_mock, rates[:100])
+        store_client.get_prices("USD_JPY", 100, "M15")
+
+        self._serve(mt5_mock, rates)
+        df = store_client.get_prices("USD_JPY", 100, "M15")
+
+        assert mt5_mock.copy_rates_from_pos.call_args[0][3] == CANDLE_DELTA_FETCH_BARS
+        expected = store_client._rates_to_frame(rates[-100:])
+        assert len(df) == 100
+        np.testing.assert_array_equal(df.index, expected.index)
+        np.testing.assert_allclose(df.to_numpy(float), expected.to_numpy(float))
+
+    def test_gap_beyond_delta_falls_back_to_full_fetch(
+        self, store_client, mt5_mock
+    ):
+        """差分取得範囲が保存済みの最終足と重ならない場合は全量取得に戻る"""
+        rates = _make_rates(1704067200, 300)
+        self._serve(mt5_mock, rates[:100])
+        store_client.get_prices("USD_JPY", 100, "M15")
+
+        self._serve(mt5_mock, rates)
+        df = store_client.get_prices("USD_JPY", 100, "M15")
+
+        counts = [c[0][3] for c in mt5_mock.copy_rates_from_pos.call_args_list]
+        assert counts[-1] == 100
+        assert df.index[-1] == store_client._rates_to_frame(rates[-1:]).index[0]
+        assert len(df) == 100
+
+
 # ================================================================
 # market_order のテスト
 # ================================================================
@@ -652,6 +740,72 @@ class TestGetClosedDeal:
         """数値変換できないtrade_idはNone"""
         assert client.get_closed_deal("not-a-number") is None
 
+    def test_bulk_lookup_fetches_history_once(self, client, mt5_mock):
+        """複数ポジションの決済情報を1回の履歴取得で復元する"""
+        mt5_mock.DEAL_ENTRY_OUT = 1
+        mt5_mock.DEAL_ENTRY_INOUT = 2
+        a_out = self._make_deal(entry=1, profit=300.0, price=150.5, time_ts=2000, position_id=111)
+        b_out = self._make_deal(entry=1, profit=-120.0, price=149.8, time_ts=2500, position_id=222)
+        mt5_mock.history_deals_get.return_value = (a_out, b_out)
+
+        result = client.get_closed_deals(["111", "222", "333"])
+
+        assert mt5_mock.history_deals_get.call_count == 1
+        assert set(result) == {"111", "222"}
+        assert result["222"]["realized_pl"] == pytest.approx(-120.0)
+
+    def test_incremental_refresh_extends_cache(self, client, mt5_mock):
+        """2回目以降は前回取得以降の差分だけを取得し、重複dealは二重計上しない"""
+        mt5_mock.DEAL_ENTRY_OUT = 1
+        mt5_mock.DEAL_ENTRY_INOUT = 2
+        first = self._make_deal(entry=1, profit=100.0, price=150.5, time_ts=2000, position_id=111)
+        mt5_mock.history_deals_get.return_value = (first,)
+        client.get_closed_deals(["111"])
+        full_from, _ = mt5_mock.history_deals_get.call_args.args
+
+        later = self._make_deal(entry=1, profit=50.0, price=151.0, time_ts=3000, position_id=222)
+        mt5_mock.history_deals_get.return_value = (first, later)
+        result = client.get_closed_deals(["111", "222"])
+
+        incremental_from, _ = mt5_mock.history_deals_get.call_args.args
+        assert incremental_from > full_from
+        assert result["111"]["realized_pl"] == pytest.approx(100.0)
+        assert result["222"]["close_price"] == 151.0
+
+    def test_concurrent_lookups_share_one_index(self, client, mt5_mock):
+        """複数ペアからの同時照会でも履歴取得は直列化され、dealを取りこぼさない"""
+        mt5_mock.DEAL_ENTRY_OUT = 1
+        mt5_mock.DEAL_ENTRY_INOUT = 2
+        deals = tuple(
+            self._make_deal(entry=1, profit=10.0 * k, price=150.0, time_ts=1000 + k, position_id=k)
+            for k in range(1, 9)
+        )
+        active = []
+        overlaps = []
+
+        def slow_history(*args):
+            active.append(1)
+            overlaps.append(len(active))
+            time.sleep(0.02)
+            active.pop()
+            return deals
+
+        mt5_mock.history_deals_get.side_effect = slow_history
+        results: dict[str, dict] = {}
+
+        def lookup(trade_id: str) -> None:
+            results.update(client.get_closed_deals([trade_id]))
+
+        threads = [threading.Thread(target=lookup, args=(str(k),)) for k in range(1, 9)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert max(overlaps) == 1
+        assert set(results) == {str(k) for k in range(1, 9)}
+        assert results["8"]["realized_pl"] == pytest.approx(80.0)
+
 
 # ================================================================
 # get_account_summary のテスト
@@ -157,3 +157,112 @@ class TestFailureIsolation:
 
         mock1.notify_error.assert_called_once()
         mock2.notify_error.assert_called_once()
+
+
+# ============================================================
+# 4. 集約・レート制限テスト
+# ============================================================
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCoalescing:
+    """シグナル・エラー通知のバーストが通知先ごとに1通のまとめになることを検証"""
+
+    def _group(self, *notifiers, rate_per_sec=10.0, burst=5):
+        clock = _FakeClock()
+        group = NotifierGroup(
+            list(notifiers), coalesce_window_sec=5.0,
+            rate_per_sec=rate_per_sec, burst=burst, clock=clock,
+        )
+        return group, clock
+
+    def test_signal_burst_becomes_one_digest(self):
+        """1件目は即時、残りはウィンドウ終了時に1通のまとめで送られること"""
+        mock1 = _make_mock_notifier("Telegram")
+        mock2 = _make_mock_notifier("Slack")
+        group, clock = self._group(mock1, mock2)
+
+        for pair in ["USD_JPY", "EUR_USD", "GBP_JPY", "AUD_USD"]:
+            group.notify_signal(pair, "BUY", conviction_score=7)
+
+        mock1.notify_signal.assert_called_once_with("USD_JPY", "BUY", conviction_score=7)
+        assert group.pending_count == 6
+        mock1.notify.assert_not_called()
+
+        clock.now += 5.0
+        group._on_timer()
+
+        for mock in (mock1, mock2):
+            mock.notify.assert_called_once()
+            digest = mock.notify.call_args.args[0]
+            assert "3件" in digest
+            assert "EUR_USD BUY（確信度 7/10）" in digest
+            assert "AUD_USD" in digest
+        assert group.pending_count == 0
+        group.flush()
+
+    def test_repeated_errors_collapse(self):
+        """同じ内容のエラーは1行にまとまり、件数と最新の連続回数が出ること"""
+        mock1 = _make_mock_notifier()
+        group, clock = self._group(mock1)
+
+        for count in range(1, 5):
+            group.notify_error("接続エラー", count)
+        clock.now += 5.0
+        group._on_timer()
+
+        digest = mock1.notify.call_args.args[0]
+        assert "・エラー（連続4回）接続エラー ×3" in digest
+        group.flush()
+
+    def test_single_pending_keeps_original_format(self):
+        """ウィンドウ中に1件だけ溜まった場合は元のメソッドで送られること"""
+        mock1 = _make_mock_notifier()
+        group, clock = self._group(mock1)
+
+        group.notify_error("a", 1)
+        group.notify_error("b", 2)
+        clock.now += 5.0
+        group._on_timer()
+
+        assert mock1.notify_error.call_args_list == [call("a", 1), call("b", 2)]
+        mock1.notify.assert_not_called()
+
+    def test_rate_limit_defers_digest(self):
+        """トークンが無い間は送らずに溜め続けること"""
+        mock1 = _make_mock_notifier()
+        group, clock = self._group(mock1, rate_per_sec=0.01, burst=1)
+
+        group.notify_signal("USD_JPY", "BUY")
+        group.notify_signal("EUR_USD", "SELL")
+        group.notify_signal("GBP_JPY", "BUY")
+        clock.now += 5.0
+        group._on_timer()
+        mock1.notify.assert_not_called()
+
+        clock.now += 100.0
+        group._on_timer()
+        mock1.notify.assert_called_once()
+        assert "2件" in mock1.notify.call_args.args[0]
+        group.flush()
+
+    def test_kill_switch_is_immediate_and_flushes_pending(self):
+        """キルスイッチは即時送信され、溜まっていた通知が先に送られること"""
+        mock1 = _make_mock_notifier()
+        group, clock = self._group(mock1)
+
+        group.notify_signal("USD_JPY", "BUY")
+        group.notify_signal("EUR_USD", "SELL")
+        group.notify_signal("GBP_JPY", "BUY")
+        group.notify_kill_switch("daily_loss", True)
+
+        names = [c[0] for c in mock1.method_calls]
+        assert names == ["notify_signal", "notify", "notify_kill_switch"]
+        assert group.pending_count == 0
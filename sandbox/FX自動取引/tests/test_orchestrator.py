@@ -0,0 +1,214 @@
+"""
+マルチペア・オーケストレーターのテスト
+
+- TickSnapshotBroker: tick 内の口座・ポジション照会を1回にまとめ、発注で破棄すること
+- TradingOrchestrator: 全ペアを1本のスケジューラで回し、照会を tick 単位で共有すること
+- 停止したループの除外・stop() による停止
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.broker_client import BrokerClient
+from src.orchestrator import TickSnapshotBroker, TradingOrchestrator
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+
+def _make_mock_broker() -> MagicMock:
+    broker = MagicMock(spec=BrokerClient)
+    broker.get_account_summary.return_value = {"balance": 1_000_000}
+    broker.get_positions.return_value = [{"trade_id": "1", "instrument": "USD_JPY"}]
+    broker.market_order.return_value = {"order_id": "ORD-1"}
+    return broker
+
+
+class _FakeLoop:
+    """TradingLoop の begin/step/finish/is_running だけを持つ代役"""
+
+    def __init__(self, broker: BrokerClient, max_steps: int = 3, sleep_sec: float = 0.01,
+                 fail_after: int = 0) -> None:
+        self._broker = broker
+        self._max_steps = max_steps
+        self._sleep_sec = sleep_sec
+        self._fail_after = fail_after
+        self.steps = 0
+        self.is_running = False
+        self.finished = False
+
+    def begin(self) -> None:
+        self.is_running = True
+
+    def finish(self) -> None:
+        self.is_running = False
+        self.finished = True
+
+    def step(self) -> float:
+        self._broker.get_account_summary()
+        self._broker.get_positions()
+        self.steps += 1
+        if self.steps >= self._max_steps or self.steps == self._fail_after:
+            self.is_running = False
+        return self._sleep_sec
+
+
+# ============================================================
+# テストケース
+# ============================================================
+
+
+class TestTickSnapshotBroker:
+    """tick 単位のキャッシュ"""
+
+    def test_queries_once_per_tick(self) -> None:
+        """refresh() までは同じ結果を返し、ブローカーへは1回だけ問い合わせる"""
+        inner = _make_mock_broker()
+        broker = TickSnapshotBroker(inner)
+
+        for _ in range(5):
+            broker.get_positions()
+            broker.get_account_summary()
+        assert inner.get_positions.call_count == 1
+        assert inner.get_account_summary.call_count == 1
+
+        broker.refresh()
+        broker.get_positions()
+        assert inner.get_positions.call_count == 2
+
+    def test_order_invalidates_snapshot(self) -> None:
+        """発注・決済の後は再取得する"""
+        inner = _make_mock_broker()
+        broker = TickSnapshotBroker(inner)
+
+        broker.get_positions()
+        assert broker.market_order("USD_JPY", 1000, 149.0, 152.0) == {"order_id": "ORD-1"}
+        broker.get_positions()
+        broker.close_position("1")
+        broker.get_positions()
+
+        assert inner.get_positions.call_count == 3
+
+    def test_returns_copies(self) -> None:
+        """呼び出し側の変更がキャッシュに波及しない"""
+        broker = TickSnapshotBroker(_make_mock_broker())
+
+        broker.get_positions()[0]["unrealized_pl"] = 999
+        broker.get_account_summary()["balance"] = 0
+
+        assert "unrealized_pl" not in broker.get_positions()[0]
+        assert broker.get_account_summary()["balance"] == 1_000_000
+
+    def test_failed_fetch_is_not_cached(self) -> None:
+        """取得失敗は例外を伝播し、次の呼び出しで再試行する"""
+        inner = _make_mock_broker()
+        inner.get_positions.side_effect = [RuntimeError("MT5 down"), []]
+        broker = TickSnapshotBroker(inner)
+
+        with pytest.raises(RuntimeError):
+            broker.get_positions()
+        assert broker.get_positions() == []
+
+    def test_delegates_other_calls(self) -> None:
+        """価格取得やブローカー固有メソッドは委譲する"""
+        inner = _make_mock_broker()
+        inner.shutdown = MagicMock(return_value="done")
+        broker = TickSnapshotBroker(inner)
+
+        broker.get_prices("USD_JPY", 300, "M15")
+        inner.get_prices.assert_called_once_with("USD_JPY", 300, "M15")
+        assert broker.shutdown() == "done"
+
+
+class TestTradingOrchestrator:
+    """単一スケジューラでのマルチペア実行"""
+
+    def test_shares_queries_across_pairs(self) -> None:
+        """全ペアが同じ tick で動き、照会は tick ごとに1回"""
+        inner = _make_mock_broker()
+        broker = TickSnapshotBroker(inner)
+        loops = [_FakeLoop(broker) for _ in range(20)]
+
+        orchestrator = TradingOrchestrator(loops, broker=broker, max_workers=4)
+        orchestrator.start()
+
+        assert all(lp.steps == 3 and lp.finished for lp in loops)
+        assert orchestrator.tick_count == 3
+        assert inner.get_positions.call_count == 3
+        assert inner.get_account_summary.call_count == 3
+
+    def test_nearby_wakeups_are_coalesced(self) -> None:
+        """起床予定が僅かにずれたペアも同じ tick にまとめる"""
+        broker = TickSnapshotBroker(_make_mock_broker())
+        loops = [_FakeLoop(broker, sleep_sec=0.01), _FakeLoop(broker, sleep_sec=0.02)]
+
+        orchestrator = TradingOrchestrator(loops, broker=broker)
+        orchestrator.start()
+
+        assert orchestrator.tick_count == 3
+
+    def test_slow_loop_does_not_delay_others(self) -> None:
+        """step() が長引くペアがあっても、他のペアは終わり次第次の step() に進む"""
+        broker = TickSnapshotBroker(_make_mock_broker())
+        fast = _FakeLoop(broker, max_steps=5)
+        released = threading.Event()
+
+        class _SlowLoop(_FakeLoop):
+            released_in_time = False
+
+            def step(self) -> float:
+                # 速いペアが全 step を終えるまで戻らない（LLM 待ち等の代役）
+                self.released_in_time = released.wait(timeout=2)
+                return super().step()
+
+        slow = _SlowLoop(broker, max_steps=1)
+        original_step = fast.step
+
+        def fast_step() -> float:
+            sleep_sec = original_step()
+            if fast.steps == 5:
+                released.set()
+            return sleep_sec
+
+        fast.step = fast_step
+        TradingOrchestrator([slow, fast], broker=broker, max_workers=2).start()
+
+        assert slow.released_in_time and slow.steps == 1
+        assert fast.steps == 5
+
+    def test_stopped_loop_is_dropped(self) -> None:
+        """停止したループ（連続エラー上限など）は以降実行しない"""
+        broker = TickSnapshotBroker(_make_mock_broker())
+        failing = _FakeLoop(broker, max_steps=5, fail_after=1)
+        healthy = _FakeLoop(broker, max_steps=5)
+
+        TradingOrchestrator([failing, healthy], broker=broker).start()
+
+        assert failing.steps == 1
+        assert healthy.steps == 5
+
+    def test_stop(self) -> None:
+        """stop() で待機中のスケジューラが終了する"""
+        broker = TickSnapshotBroker(_make_mock_broker())
+        loop = _FakeLoop(broker, max_steps=10**6, sleep_sec=60)
+        orchestrator = TradingOrchestrator([loop], broker=broker)
+
+        thread = threading.Thread(target=orchestrator.start)
+        thread.start()
+        while loop.steps == 0:
+            pass
+        orchestrator.stop()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert loop.finished
+
+    def test_invalid_arguments(self) -> None:
+        with pytest.raises(ValueError):
+            TradingOrchestrator([])
+        with pytest.raises(ValueError):
+            TradingOrchestrator([_FakeLoop(_make_mock_broker())], max_workers=0)
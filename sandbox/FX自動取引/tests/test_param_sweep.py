@@ -0,0 +1,201 @@
+"""
+パラメータスイープのテスト
+
+- grid / one_at_a_time によるトライアル列挙
+- 特徴量は特徴量パラメータの組ごとに1回だけ計算されること
+- 並列実行が逐次実行と同じ結果テーブルを返すこと
+- チェックポイントから完了済みトライアルを再利用して再開できること（別の実行の結果は使わない）
+- StrategyEvaluator が BacktestEngine.run() と同じメトリクスを返すこと
+"""
+
+import warnings
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtester import BacktestEngine, RsiMaCrossoverBT
+from src.param_sweep import (
+    ParameterSweep,
+    StrategyEvaluator,
+    SweepError,
+    grid,
+    one_at_a_time,
+)
+
+
+# ============================================================
+# テスト用ヘルパー（ワーカーへ渡すためモジュールレベルで定義）
+# ============================================================
+
+FEATURE_CALLS: list[int] = []
+EVALUATE_CALLS: list[int] = []
+
+
+def _make_data(n: int = 200) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    return pd.DataFrame(
+        {"close": close}, index=pd.date_range("2024-01-01", periods=n, freq="h")
+    )
+
+
+def _features(data: pd.DataFrame, params: dict) -> pd.DataFrame:
+    FEATURE_CALLS.append(params["window"])
+    out = data.copy()
+    out["ma"] = out["close"].rolling(params["window"]).mean()
+    return out
+
+
+def _evaluate(data: pd.DataFrame, params: dict) -> dict:
+    EVALUATE_CALLS.append(1)
+    if params.get("fail"):
+        raise ValueError("boom")
+    signal = (data["close"] > data["ma"] * params["mult"]).astype(float)
+    return {"exposure": float(signal.mean()), "n": int(signal.sum())}
+
+
+def _evaluate_scaled(scale: float, data: pd.DataFrame, params: dict) -> dict:
+    return {"scaled": _evaluate(data, params)["exposure"] * scale}
+
+
+@pytest.fixture(autouse=True)
+def _reset_counters():
+    FEATURE_CALLS.clear()
+    EVALUATE_CALLS.clear()
+    yield
+
+
+# ============================================================
+# テストケース
+# ============================================================
+
+
+class TestTrials:
+    """トライアル列挙"""
+
+    def test_grid(self) -> None:
+        """直積と既定パラメータの合成"""
+        trials = grid({"a": [1, 2], "b": ["x", "y", "z"]}, base={"c": 0, "a": 9})
+        assert len(trials) == 6
+        assert trials[0] == {"c": 0, "a": 1, "b": "x"}
+        assert trials[-1] == {"c": 0, "a": 2, "b": "z"}
+
+    def test_one_at_a_time(self) -> None:
+        """1パラメータずつ変動させ、注記キーを付けること"""
+        trials = one_at_a_time({"a": 10.0, "b": 2.0}, ["a"], deltas_pct=(-20, 0, 20))
+        assert [t["a"] for t in trials] == pytest.approx([8.0, 10.0, 12.0])
+        assert all(t["b"] == 2.0 and t["_target"] == "a" for t in trials)
+
+
+class TestSweep:
+    """スイープ実行"""
+
+    def test_features_once_per_group(self) -> None:
+        """特徴量は window ごとに1回だけ計算される"""
+        trials = grid({"window": [5, 10], "mult": [0.99, 1.0, 1.01]})
+        sweep = ParameterSweep(_evaluate, features=_features, feature_keys=("window",))
+
+        table = sweep.run(_make_data(), trials)
+
+        assert sorted(FEATURE_CALLS) == [5, 10]
+        assert len(EVALUATE_CALLS) == 6
+        assert list(table.columns) == ["p_window", "p_mult", "exposure", "n"]
+        assert table["p_mult"].tolist() == [0.99, 1.0, 1.01, 0.99, 1.0, 1.01]
+
+    def test_parallel_matches_sequential(self) -> None:
+        """並列実行でもトライアル順・値が一致する"""
+        trials = grid({"window": [5, 10, 20], "mult": [0.99, 1.01]})
+        data = _make_data()
+
+        sequential = ParameterSweep(
+            _evaluate, features=_features, feature_keys=("window",)
+        ).run(data, trials)
+        parallel = ParameterSweep(
+            _evaluate, features=_features, feature_keys=("window",), n_workers=2
+        ).run(data, trials)
+
+        pd.testing.assert_frame_equal(parallel, sequential)
+
+    def test_failed_trial_is_recorded(self) -> None:
+        """評価関数の例外は error 列に記録され、他のトライアルは続行する"""
+        trials = grid({"window": [5], "mult": [1.0], "fail": [False, True]})
+        table = ParameterSweep(_evaluate, features=_features, feature_keys=("window",)).run(
+            _make_data(), trials
+        )
+
+        assert table["exposure"].notna().tolist() == [True, False]
+        assert table["error"].iloc[1] == "boom"
+
+    def test_resume_from_checkpoint(self, tmp_path) -> None:
+        """完了済みトライアルは再評価せず、壊れた末尾行は無視する"""
+        ckpt = tmp_path / "sweep.jsonl"
+        trials = grid({"window": [5, 10], "mult": [0.99, 1.01]})
+        data = _make_data()
+
+        first = ParameterSweep(
+            _evaluate, features=_features, feature_keys=("window",), checkpoint_path=ckpt
+        ).run(data, trials[:3])
+        with open(ckpt, "a", encoding="utf-8") as f:
+            f.write('{"key": "trunc')  # 書き込み途中の中断を再現
+        EVALUATE_CALLS.clear()
+
+        out = tmp_path / "results.csv"
+        resumed = ParameterSweep(
+            _evaluate, features=_features, feature_keys=("window",), checkpoint_path=ckpt
+        ).run(data, trials, results_path=out)
+
+        assert len(EVALUATE_CALLS) == 1
+        pd.testing.assert_frame_equal(resumed.iloc[:3], first)
+        assert len(pd.read_csv(out)) == 4
+
+    def test_checkpoint_is_not_reused_across_runs(self, tmp_path) -> None:
+        """データ・評価関数の固定引数が違う実行では完了済みトライアルを再利用しない"""
+        ckpt = tmp_path / "sweep.jsonl"
+        trials = grid({"window": [5], "mult": [0.99, 1.01]})
+        data = _make_data()
+
+        def sweep(evaluate=_evaluate) -> ParameterSweep:
+            return ParameterSweep(
+                evaluate, features=_features, feature_keys=("window",), checkpoint_path=ckpt
+            )
+
+        sweep().run(data, trials)
+        EVALUATE_CALLS.clear()
+
+        other = sweep().run(data * 1.1, trials)               # 別のデータ
+        assert len(EVALUATE_CALLS) == 2
+        assert other["n"].tolist() == sweep().run(data * 1.1, trials)["n"].tolist()
+        assert len(EVALUATE_CALLS) == 2                        # 同じ実行の再開は再利用する
+
+        sweep(partial(_evaluate_scaled, 2.0)).run(data, trials)
+        sweep(partial(_evaluate_scaled, 3.0)).run(data, trials)
+        assert len(EVALUATE_CALLS) == 6
+        # 別の実行の行は捨てて書き直す
+        assert len(ckpt.read_text(encoding="utf-8").splitlines()) == 2
+
+    def test_invalid_workers(self) -> None:
+        with pytest.raises(SweepError):
+            ParameterSweep(_evaluate, n_workers=0)
+
+
+class TestStrategyEvaluator:
+    """Backtesting.py 戦略のスイープ"""
+
+    def test_matches_engine_run(self) -> None:
+        """パラメータ上書きサブクラスでの engine.run() と一致する"""
+        from tests.test_backtester import _generate_prepared_data
+
+        data = _generate_prepared_data(n_bars=400)
+        params = {"ma_short": 10, "ma_long": 40}
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            table = ParameterSweep(StrategyEvaluator(RsiMaCrossoverBT)).run(data, [params])
+            with BacktestEngine(db_path=":memory:") as engine:
+                klass = type("P", (RsiMaCrossoverBT,), params)
+                expected = engine.run(data, klass)
+
+        assert table["total_trades"].iloc[0] == expected["total_trades"]
+        assert table["return_pct"].iloc[0] == pytest.approx(expected["return_pct"])
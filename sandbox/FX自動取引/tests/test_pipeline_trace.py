@@ -0,0 +1,217 @@
+"""
+構造化パイプライン trace のテスト
+
+- make_record() が trace の各ステージ判定・数値・所要時間を列へ割り当てること
+- 書き込み→読み出しの往復で値が切り詰められず、型が保たれること
+- レコード時刻の UTC 日付でファイルが分かれ、保持期間を過ぎたファイルが消えること
+- 書きかけの末尾ブロックを読み出しで無視し、次回の追記前に切り詰めること
+- 書き込みスレッドが件数・間隔でフラッシュし、close() が残りを書き切ること
+"""
+
+import math
+import time
+
+import pandas as pd
+import pytest
+
+from src.pipeline_trace import (
+    TRACE_COLUMNS,
+    PipelineTraceWriter,
+    load_traces,
+    make_record,
+    read_trace_file,
+    trace_files,
+)
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+
+_T0 = pd.Timestamp("2026-05-01 12:00", tz="UTC").timestamp()
+
+_EXECUTE_TRACE = {
+    "stages": [
+        ("session", "PASS", "London"),
+        ("regime", "PASS", "trending(conf=0.80,ADX=31.0)"),
+        ("strategy", "BUY", "MTFPullback"),
+        ("conviction", "PASS", "7/10 mult=1.0"),
+        ("ai", "CONFIRM", "mult=1.20"),
+        ("bear", "PASS", "sev=0.10"),
+    ],
+    "decision": "EXECUTE",
+    "final_mult": 1.2,
+    "values": {
+        "bar_time": pd.Timestamp("2026-05-01 11:00", tz="UTC"),
+        "session_label": "London",
+        "regime": "trending",
+        "regime_confidence": 0.8,
+        "adx": 31.0,
+        "exposure_mult": 1.0,
+        "strategy": "MTFPullback",
+        "pair_adx_threshold": None,
+        "conviction_score": 7,
+        "conviction_mult": 1.0,
+        "ai_direction": "bullish",
+        "ai_confidence": 0.7,
+        "ai_mult": 1.2,
+        "bear_severity": 0.1,
+        "bear_penalty": 1.0,
+    },
+    "latency_ms": {"prices": 3.5, "strategy": 0.25, "total": 12.0, "unknown_stage": 1.0},
+}
+
+
+def _write(directory, records: list[tuple]) -> None:
+    writer = PipelineTraceWriter(directory, flush_interval_sec=60)
+    for record in records:
+        writer.append(record)
+    writer.close()
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "タイムアウト"
+        time.sleep(0.01)
+
+
+def _hold_trace() -> dict:
+    return {
+        "stages": [("session", "PASS", "Tokyo"), ("strategy", "HOLD", "no signal")],
+        "decision": "HOLD",
+        "final_mult": None,
+        "values": {"bar_time": None, "strategy": "BollingerReversal"},
+    }
+
+
+# ============================================================
+# make_record
+# ============================================================
+
+
+class TestMakeRecord:
+    """trace → 列の割り当て"""
+
+    def test_execute_trace(self) -> None:
+        row = dict(zip(TRACE_COLUMNS, make_record("USD_JPY", 5, _EXECUTE_TRACE, now=_T0)))
+
+        assert row["ts"] == int(_T0 * 1000)
+        assert row["bar_time"] == int(_T0) - 3600
+        assert (row["instrument"], row["iteration"], row["decision"]) == ("USD_JPY", 5, "EXECUTE")
+        assert (row["strategy_status"], row["ai_status"], row["bear_status"]) == ("BUY", "CONFIRM", "PASS")
+        assert (row["conviction_score"], row["ai_mult"], row["final_mult"]) == (7, 1.2, 1.2)
+        assert (row["ms_prices"], row["ms_total"]) == (3.5, 12.0)
+        assert math.isnan(row["pair_adx_threshold"])     # None は既定値のまま
+        assert row["pair_adx_status"] == ""              # 到達しなかったステージ
+        assert math.isnan(row["ms_order"])
+
+    def test_missing_values_use_defaults(self) -> None:
+        row = dict(zip(TRACE_COLUMNS, make_record("EUR_USD", 1, {"decision": "SKIP"}, now=_T0)))
+        assert row["bar_time"] == -1
+        assert row["session_status"] == ""
+        assert math.isnan(row["final_mult"])
+
+
+# ============================================================
+# PipelineTraceWriter / load_traces
+# ============================================================
+
+
+class TestWriterRoundtrip:
+    """書き込み→読み出し"""
+
+    def test_roundtrip_keeps_full_strings(self, tmp_path) -> None:
+        writer = PipelineTraceWriter(tmp_path, flush_interval_sec=60)
+        long_name = "BollingerReversal条件未達" * 20
+        hold = _hold_trace()
+        hold["values"]["strategy"] = long_name
+        writer.append(make_record("USD_JPY", 1, _EXECUTE_TRACE, now=_T0))
+        writer.append(make_record("GBP_JPY", 1, hold, now=_T0 + 1))
+        assert writer.flush() == 2
+        writer.append(make_record("USD_JPY", 2, _hold_trace(), now=_T0 + 60))
+        writer.close()
+
+        frame = load_traces(tmp_path)
+        assert list(frame.columns) == list(TRACE_COLUMNS)
+        assert list(frame["instrument"]) == ["USD_JPY", "GBP_JPY", "USD_JPY"]
+        assert list(frame["decision"]) == ["EXECUTE", "HOLD", "HOLD"]
+        assert frame["bar_time"].iloc[0] == pd.Timestamp("2026-05-01 11:00", tz="UTC")
+        assert frame["bar_time"].iloc[1:].isna().all()
+        assert frame["ts"].iloc[2] == pd.Timestamp("2026-05-01 12:01", tz="UTC")
+        assert frame["iteration"].dtype == "int64"
+        assert frame["adx"].iloc[0] == 31.0
+        assert frame["strategy"].iloc[1] == long_name          # 1行サマリと違い切り詰めない
+        assert frame["strategy"].iloc[2] == "BollingerReversal"
+
+    def test_filters(self, tmp_path) -> None:
+        _write(tmp_path, [
+            make_record("USD_JPY" if k % 2 == 0 else "EUR_USD", k, _hold_trace(), now=_T0 + 600 * k)
+            for k in range(4)
+        ])
+
+        assert len(load_traces(tmp_path, instrument="EUR_USD")) == 2
+        assert len(load_traces(tmp_path, start="2026-05-01 12:10")) == 3
+        assert len(load_traces(tmp_path, start="2026-05-01 12:10", end="2026-05-01 12:20")) == 2
+        assert len(load_traces(tmp_path / "missing")) == 0
+
+    def test_day_rotation_and_retention(self, tmp_path) -> None:
+        old = tmp_path / "trace_20260101.ptc"
+        old.write_bytes(b"")
+        writer = PipelineTraceWriter(tmp_path, flush_interval_sec=60, retention_days=30)
+        writer.append(make_record("USD_JPY", 1, _hold_trace(), now=_T0))
+        writer.append(make_record("USD_JPY", 2, _hold_trace(), now=_T0 + 86400))
+        writer.close()
+
+        assert [p.name for p in trace_files(tmp_path)] == ["trace_20260501.ptc", "trace_20260502.ptc"]
+        assert len(read_trace_file(tmp_path / "trace_20260502.ptc")) == 1
+        assert len(load_traces(tmp_path, start="2026-05-02")) == 1
+
+    def test_truncated_tail_is_ignored_and_repaired(self, tmp_path) -> None:
+        _write(tmp_path, [make_record("USD_JPY", 1, _hold_trace(), now=_T0)])
+        path = tmp_path / "trace_20260501.ptc"
+        complete = path.stat().st_size
+        with open(path, "ab") as f:
+            f.write(path.read_bytes()[:complete // 2])       # 書き込み途中で停止
+
+        assert len(read_trace_file(path)) == 1
+
+        _write(tmp_path, [make_record("USD_JPY", 2, _hold_trace(), now=_T0 + 60)])
+        assert list(read_trace_file(path)["iteration"]) == [1, 2]
+        assert path.stat().st_size == 2 * complete
+
+
+class TestWriterThread:
+    """書き込みスレッドとライフサイクル"""
+
+    def test_flushes_when_rows_reach_threshold(self, tmp_path) -> None:
+        writer = PipelineTraceWriter(tmp_path, flush_interval_sec=60, flush_rows=2)
+        writer.append(make_record("USD_JPY", 1, _hold_trace(), now=_T0))
+        writer.append(make_record("USD_JPY", 2, _hold_trace(), now=_T0))
+        _wait_until(lambda: writer.pending == 0 and len(load_traces(tmp_path)) == 2)
+        writer.close()
+
+    def test_flushes_on_interval(self, tmp_path) -> None:
+        writer = PipelineTraceWriter(tmp_path, flush_interval_sec=0.05)
+        writer.write("USD_JPY", 1, _hold_trace())
+        _wait_until(lambda: len(load_traces(tmp_path)) == 1)
+        writer.close()
+
+    def test_close_flushes_and_later_appends_are_synchronous(self, tmp_path) -> None:
+        writer = PipelineTraceWriter(tmp_path, flush_interval_sec=60)
+        writer.append(make_record("USD_JPY", 1, _hold_trace(), now=_T0))
+        writer.close()
+        assert writer.closed
+        assert len(load_traces(tmp_path)) == 1
+
+        writer.append(make_record("USD_JPY", 2, _hold_trace(), now=_T0))
+        assert writer.pending == 0
+        assert len(load_traces(tmp_path)) == 2
+        writer.close()                                       # 2回目は何もしない
+
+    def test_invalid_args(self, tmp_path) -> None:
+        with pytest.raises(ValueError):
+            PipelineTraceWriter(tmp_path, flush_interval_sec=0)
+        with pytest.raises(ValueError):
+            PipelineTraceWriter(tmp_path, flush_rows=0)
@@ -12,6 +12,7 @@ import pandas as pd
 import pytest
 
 from src.broker_client import BrokerClient
+from src.db_writer import flush_all_writers
 from src.config import MAX_OPEN_POSITIONS
 from src.position_manager import PositionManager, PositionManagerError
 from src.risk_manager import KillSwitch, RiskManager
@@ -54,6 +55,10 @@ def _make_mock_broker() -> MagicMock:
     broker.get_account_summary.return_value = {"balance": 1_000_000}
     # デフォルト: 決済履歴は取得できない（pl_unknown経路をテスト可能にする）
     broker.get_closed_deal.return_value = None
+    # 一括取得は BrokerClient の既定実装（get_closed_deal の繰り返し）に委譲
+    broker.get_closed_deals.side_effect = (
+        lambda ids: BrokerClient.get_closed_deals(broker, ids)
+    )
     return broker
 
 
@@ -367,6 +372,21 @@ class TestClosePosition:
         assert isinstance(history[0]["opened_at"], datetime)
         assert isinstance(history[0]["close_time"], datetime)
 
+    def test_close_records_to_loss_ledger(self):
+        """決済は RiskManager の損失集計に反映され、判定は履歴を渡さない"""
+        broker = _make_mock_broker()
+        rm = _make_mock_risk_manager()
+        pm = _create_position_manager(broker=broker, risk_manager=rm)
+
+        pm.open_position("USD_JPY", Signal.BUY, _make_ohlcv_data(), _make_mock_strategy())
+        pm.close_position("TRD-001")
+
+        rm.record_trade_close.assert_called_once_with(
+            500.0, pm.trade_history[0]["close_time"]
+        )
+        rm.check_loss_limits.assert_called_once_with()
+        rm.check_consecutive_losses.assert_called_once_with()
+
     def test_close_nonexistent_trade_returns_none(self):
         """存在しないtrade_id → None"""
         pm = _create_position_manager()
@@ -605,6 +625,37 @@ class TestSyncWithBroker:
         assert pm.position_count == 0
         assert pm.trade_history[0]["pl_unknown"] is True
 
+    def test_sync_resolves_orphans_with_one_bulk_lookup(self):
+        """複数の決済済みポジションを1回の一括取得で復元する"""
+        broker = _make_mock_broker()
+        broker.market_order.side_effect = [
+            {"order_id": f"ORD-{i}", "trade_id": f"TRD-00{i}", "price": 150.0,
+             "units": 1000, "status": "filled"}
+            for i in (1, 2)
+        ]
+        pm = _create_position_manager(broker=broker)
+        strategy = _make_mock_strategy()
+        data = _make_ohlcv_data()
+        pm.open_position("USD_JPY", Signal.BUY, data, strategy)
+        pm.open_position("EUR_USD", Signal.BUY, data, strategy)
+
+        broker.get_positions.return_value = []
+        closed_at = datetime.now(timezone.utc)
+        broker.get_closed_deals.side_effect = None
+        broker.get_closed_deals.return_value = {
+            "TRD-002": {"close_price": 151.0, "realized_pl": -80.0, "closed_at": closed_at},
+        }
+
+        result = pm.sync_with_broker()
+
+        assert result["local_only"] == ["TRD-001", "TRD-002"]
+        broker.get_closed_deals.assert_called_once_with(["TRD-001", "TRD-002"])
+        broker.get_closed_deal.assert_not_called()
+        assert pm.position_count == 0
+        by_id = {t["trade_id"]: t for t in pm.trade_history}
+        assert by_id["TRD-001"]["pl_unknown"] is True
+        assert by_id["TRD-002"]["pl"] == -80.0
+
     def test_sync_broker_only(self):
         """ブローカーのみのポジション検出"""
         broker = _make_mock_broker()
@@ -716,6 +767,7 @@ class TestAIDecisionPersistence:
 
         pm.open_position("USD_JPY", Signal.BUY, data, strategy, ai_record=ai_record)
 
+        flush_all_writers()
         with _sqlite.connect(str(db_path)) as conn:
             row = conn.execute(
                 "SELECT ai_decision, ai_confidence, ai_direction FROM trades WHERE trade_id=?",
@@ -768,6 +820,7 @@ class TestAIDecisionPersistence:
         ]
         pm.sync_with_broker()
 
+        flush_all_writers()
         with _sqlite.connect(str(db_path)) as conn:
             row = conn.execute(
                 "SELECT ai_decision, ai_confidence FROM trades WHERE trade_id=?",
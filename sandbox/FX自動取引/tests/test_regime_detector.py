@@ -75,3 +75,43 @@ def test_regime_detector_returns_unknown_for_short_data():
 def test_global_thresholds_consistency():
     """REGIME_ADX_RANGING < REGIME_ADX_TRENDING（順序整合性）"""
     assert REGIME_ADX_RANGING < REGIME_ADX_TRENDING
+
+
+@pytest.mark.parametrize(
+    "pair_config",
+    [None, {"regime_adx_trending": 30.0, "regime_adx_ranging": 22.0,
+            "regime_bbw_squeeze_ratio": 0.9}],
+)
+def test_detect_series_matches_bar_by_bar_detect(pair_config):
+    """detect_series の各足が data.iloc[:i+1] への detect() と一致する"""
+    detector = RegimeDetector()
+    data = _make_synthetic_data(n=220, trend_strength=0.0)
+    # 後半にトレンドとボラティリティ急拡大を入れて全レジームを通す
+    data.loc[120:, ["high", "low", "close"]] += np.arange(100)[:, None] * 0.3
+    data.loc[170:189, ["high", "low"]] += np.array([[3.0, -3.0]])
+
+    series = detector.detect_series(data, pair_config=pair_config)
+
+    assert len(series) == len(data)
+    assert {RegimeType.UNKNOWN.value, RegimeType.VOLATILE.value} <= set(series.regime)
+    for i in range(len(data)):
+        info = detector.detect(data.iloc[: i + 1], pair_config=pair_config)
+        assert series.regime[i] == info.regime.value, i
+        assert series.confidence[i] == pytest.approx(info.confidence), i
+        assert series.exposure_multiplier[i] == info.exposure_multiplier, i
+        assert series.adx[i] == pytest.approx(info.adx), i
+        assert series.atr_ratio[i] == pytest.approx(info.atr_ratio), i
+
+
+def test_detect_series_mask_and_frame():
+    """mask() でレジーム別の bool 配列、to_frame() で元データと同じ index"""
+    detector = RegimeDetector()
+    data = _make_synthetic_data(n=120, trend_strength=0.05)
+    series = detector.detect_series(data)
+
+    unknown = series.mask(RegimeType.UNKNOWN)
+    assert unknown[: 39].all()  # min_rows=40 未満の足は判定不能
+    assert (series.exposure_multiplier[unknown] == 0.5).all()
+    frame = series.to_frame()
+    assert frame.index.equals(data.index)
+    assert list(frame.columns[:3]) == ["regime", "confidence", "exposure_multiplier"]
@@ -0,0 +1,204 @@
+"""
+ヒストリカル・リプレイのテスト
+
+- SimClock による datetime.now() の差し替えと復元
+- ReplayBroker: 形成中の足・次足始値での約定・SL/TP 判定・円換算
+- ReplayHarness: 足ごとに run_once() を実行し trace を記録すること、
+  事後分析（LLM）を呼ばないこと
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.position_manager as position_manager_module
+import src.session_filter as session_filter_module
+from src.replay import (
+    ReplayBroker,
+    ReplayError,
+    ReplayHarness,
+    SimClock,
+    simulated_clock,
+)
+from src.strategy.base import Signal, StrategyBase
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+
+def _make_history(n: int = 60, start_price: float = 150.0, seed: int = 0) -> pd.DataFrame:
+    """M15 のランダムウォーク OHLCV（UTC）"""
+    rng = np.random.default_rng(seed)
+    close = start_price + np.cumsum(rng.normal(0, 0.05, n))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) + 0.03,
+            "low": np.minimum(open_, close) - 0.03,
+            "close": close,
+            "volume": np.full(n, 100.0),
+        },
+        index=pd.date_range("2024-01-08 08:00", periods=n, freq="15min", tz="UTC"),
+    )
+
+
+def _make_bars(rows: list[tuple[float, float, float, float]]) -> pd.DataFrame:
+    return pd.DataFrame(
+        rows, columns=["open", "high", "low", "close"],
+        index=pd.date_range("2024-01-08 08:00", periods=len(rows), freq="15min", tz="UTC"),
+    ).assign(volume=100.0)
+
+
+def _broker_at(history: dict, bar: int, **kwargs) -> ReplayBroker:
+    clock = SimClock()
+    broker = ReplayBroker(history, clock, spread_pips={k: 0.0 for k in history}, **kwargs)
+    now = next(iter(history.values())).index[bar].to_pydatetime()
+    clock.set(now)
+    broker.advance_to(now)
+    return broker
+
+
+class _AlwaysBuy(StrategyBase):
+    """毎足 BUY を出す戦略（SL/TP は固定幅）"""
+
+    def generate_signal(self, data: pd.DataFrame, **kwargs) -> Signal:
+        return Signal.BUY
+
+    def calculate_stop_loss(self, entry_price: float, direction: str, data: pd.DataFrame) -> float:
+        return entry_price - 0.1 if direction == "BUY" else entry_price + 0.1
+
+    def calculate_take_profit(self, entry_price: float, direction: str, stop_loss: float) -> float:
+        return entry_price + 0.2 if direction == "BUY" else entry_price - 0.2
+
+
+# ============================================================
+# テストケース
+# ============================================================
+
+
+class TestSimulatedClock:
+    """datetime.now() の差し替え"""
+
+    def test_patches_and_restores(self) -> None:
+        clock = SimClock(datetime(2024, 1, 8, 9, 0, tzinfo=timezone.utc))
+        original = position_manager_module.datetime
+
+        with simulated_clock(clock):
+            now = position_manager_module.datetime.now(timezone.utc)
+            assert now == datetime(2024, 1, 8, 9, 0, tzinfo=timezone.utc)
+            # セッション判定も模擬時刻（JST 18:00）で行われる
+            assert session_filter_module.now_jst().hour == 18
+            assert position_manager_module.datetime.fromisoformat("2024-01-01") == datetime(2024, 1, 1)
+
+        assert position_manager_module.datetime is original
+
+
+class TestReplayBroker:
+    """インメモリ・ブローカー"""
+
+    def test_forming_bar(self) -> None:
+        """最後の足は形成中（始値のみ、出来高0）として返す"""
+        history = {"USD_JPY": _make_history()}
+        broker = _broker_at(history, 10)
+
+        df = broker.get_prices("USD_JPY", 5, "M15")
+
+        assert len(df) == 5
+        assert df.index[-1] == history["USD_JPY"].index[10]
+        last = df.iloc[-1]
+        assert last["high"] == last["low"] == last["close"] == history["USD_JPY"]["open"].iloc[10]
+        assert last["volume"] == 0
+        pd.testing.assert_frame_equal(df.iloc[:-1], history["USD_JPY"].iloc[6:10])
+
+    def test_fill_at_next_open_with_spread(self) -> None:
+        """成行買いは形成中の足の始値 + スプレッド（Ask）で約定する"""
+        history = {"USD_JPY": _make_history()}
+        clock = SimClock()
+        broker = ReplayBroker(history, clock, spread_pips={"USD_JPY": 1.0})
+        broker.advance_to(history["USD_JPY"].index[5].to_pydatetime())
+
+        result = broker.market_order("USD_JPY", 1000, 140.0, 160.0)
+
+        assert result["price"] == pytest.approx(history["USD_JPY"]["open"].iloc[5] + 0.01)
+        assert broker.get_positions()[0]["trade_id"] == result["trade_id"]
+
+    def test_take_profit_and_stop_loss(self) -> None:
+        """確定した足の高値・安値で判定し、同じ足で両方届けば SL を優先する"""
+        bars = _make_bars([
+            (100.0, 100.1, 99.9, 100.0),
+            (100.0, 100.6, 99.9, 100.5),   # 買いTP 100.5 到達
+            (100.5, 100.6, 99.0, 99.5),    # 売りのSL/TP 両方到達
+            (99.5, 99.6, 99.4, 99.5),
+        ])
+        broker = _broker_at({"USD_JPY": bars}, 1)
+        buy = broker.market_order("USD_JPY", 1000, 99.5, 100.5)
+
+        broker.advance_to(bars.index[2].to_pydatetime())
+        deal = broker.get_closed_deal(buy["trade_id"])
+        assert deal["close_price"] == 100.5
+        assert deal["realized_pl"] == pytest.approx(0.5 * 1000)
+
+        sell = broker.market_order("USD_JPY", -1000, 100.55, 99.5)
+        broker.advance_to(bars.index[3].to_pydatetime())
+        deal = broker.get_closed_deal(sell["trade_id"])
+        assert deal["close_price"] == 100.55
+        assert broker.balance == pytest.approx(1_000_000 + 500 - 50)
+        assert broker.get_positions() == []
+
+    def test_non_jpy_pnl_converted(self) -> None:
+        """決済通貨が円以外なら換算レートで円建て損益にする"""
+        bars = _make_bars([(1.1000, 1.1, 1.1, 1.1), (1.1000, 1.1, 1.1, 1.1), (1.1010, 1.1, 1.1, 1.1)])
+        broker = _broker_at({"EUR_USD": bars}, 1, quote_to_jpy={"USD": 150.0})
+        trade = broker.market_order("EUR_USD", 10_000, 1.0, 1.2)
+
+        broker.advance_to(bars.index[2].to_pydatetime())
+        result = broker.close_position(trade["trade_id"])
+
+        assert result["realized_pl"] == pytest.approx(0.001 * 10_000 * 150.0)
+
+    def test_limit_order_rejected(self) -> None:
+        broker = _broker_at({"USD_JPY": _make_history()}, 1)
+        with pytest.raises(ReplayError):
+            broker.limit_order("USD_JPY", 1000, 150.0, 149.0, 151.0)
+
+
+class TestReplayHarness:
+    """ライブの TradingLoop を使ったリプレイ"""
+
+    def test_runs_pipeline_per_bar(self, tmp_path) -> None:
+        """足ごとに run_once() を1回実行し、trace と約定を記録する"""
+        history = {"USD_JPY": _make_history(n=80)}
+        trace_path = tmp_path / "trace.csv"
+        fake_pair_cfg = {"allowed_sessions": [], "adx_threshold": 0}
+
+        with patch("src.trading_loop.get_pair_config", return_value=fake_pair_cfg), \
+             patch("src.trade_postmortem.TradePostMortem._enqueue") as enqueue:
+            result = ReplayHarness(
+                history, {"USD_JPY": _AlwaysBuy()}, granularity="M15",
+                warmup_bars=30, use_bear_researcher=False,
+            ).run(trace_path=trace_path)
+
+        # ウォームアップ後・最終足を除く足ごとに1回
+        assert result.bars == 80 - 30 - 1
+        assert len(result.trace) == result.bars
+        assert result.trace["bar_time"].iloc[0] == history["USD_JPY"].index[30]
+        assert len(pd.read_csv(trace_path)) == result.bars
+        assert result.bars_per_sec > 0
+        # 約定したトレードは trace の trade_id と対応し、すべて決済済み
+        opened = result.trace["trade_id"].dropna()
+        assert len(opened) > 0
+        assert set(result.trades["trade_id"]) == set(opened)
+        assert result.final_balance == pytest.approx(
+            1_000_000 + result.trades["realized_pl"].sum()
+        )
+        enqueue.assert_not_called()
+
+    def test_missing_history(self) -> None:
+        with pytest.raises(ReplayError):
+            ReplayHarness({"USD_JPY": _make_history()}, {"EUR_USD": _AlwaysBuy()})
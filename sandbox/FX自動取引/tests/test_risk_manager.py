@@ -842,6 +842,23 @@ class TestDynamicPipValue:
         pip_value = rm._get_pip_value("EUR_ZAR")
         assert pip_value == pytest.approx(15.6)
 
+    def test_cached_rate_is_logged_at_debug(self, caplog):
+        """キャッシュヒットは DEBUG、ブローカーからの取り直しだけ INFO で記録する"""
+        import logging
+
+        mock_broker = self._make_mock_broker(150.0)
+        rm = RiskManager(account_balance=1_000_000, broker_client=mock_broker)
+
+        with caplog.at_level(logging.INFO, logger="src.risk_manager"):
+            rm._get_pip_value("EUR_USD")
+            rm._get_pip_value("EUR_USD")
+            rm._get_pip_value("USD_JPY")
+
+        messages = [r.getMessage() for r in caplog.records if r.levelno >= logging.INFO]
+        assert len(messages) == 1
+        assert "ブローカー取得" in messages[0]
+        mock_broker.get_prices.assert_called_once()
+
     def test_calculate_position_size_uses_dynamic_pip_value(self):
         """calculate_position_sizeが動的pip_valueを使用することの確認"""
         from src.config import MAX_RISK_PER_TRADE
@@ -0,0 +1,170 @@
+"""
+セッションレンジ・ブレイクアウト一括シミュレータのテスト
+
+- 日ごとの iterrows による参照実装と全トレードが一致すること（SL/TP/強制決済/日末決済）
+- 同じ足で SL と TP に触れたら SL 優先
+- ニュースブラックアウトの近似カレンダー
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.session_breakout import news_blackout_mask, simulate_session_breakout
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+
+_PARAMS = dict(
+    range_start_h=0, range_end_h=8, break_start_h=8, break_end_h=10,
+    force_close_h=21, buffer=0.0002, entry_slippage=0.0002,
+    sl_atr_mult=1.5, tp_atr_mult=3.0,
+)
+
+
+def _make_h1(days: int = 120, seed: int = 3) -> pd.DataFrame:
+    """平日のみ・ランダム欠損ありの H1 OHLC"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=days * 24, freq="h", tz="UTC")
+    index = index[(index.dayofweek < 5) & (rng.random(len(index)) > 0.02)]
+    n = len(index)
+    close = 1.25 + np.cumsum(rng.normal(0, 0.0012, n))
+    open_ = close + rng.normal(0, 0.0003, n)
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.uniform(0, 0.002, n),
+        "low": np.minimum(open_, close) - rng.uniform(0, 0.002, n),
+        "close": close,
+    }, index=index)
+
+
+def _reference(df, atr, long_ok, short_ok, tradable, p) -> list[tuple]:
+    """日ごとの groupby + iterrows による参照実装（一括化前の実装）"""
+    frame = df.assign(atr=atr, long_ok=long_ok, short_ok=short_ok, tradable=tradable)
+    frame["hour"] = frame.index.hour
+    trades = []
+    for _, day in frame.groupby(frame.index.date):
+        if len(day) < 10:
+            continue
+        rng = day[(day["hour"] >= p["range_start_h"]) & (day["hour"] < p["range_end_h"])]
+        if len(rng) < 3:
+            continue
+        hi, lo = rng["high"].max(), rng["low"].min()
+        size = hi - lo
+        a0 = rng["atr"].iloc[-1]
+        if pd.isna(a0) or a0 <= 0 or size < 0.3 * a0 or size > 5.0 * a0:
+            continue
+        window = day[(day["hour"] >= p["break_start_h"]) & (day["hour"] < p["break_end_h"])]
+        entry = None
+        for ts, row in window.iterrows():
+            if not row["tradable"]:
+                continue
+            if row["high"] > hi + p["buffer"]:
+                if row["long_ok"]:
+                    price = hi + p["buffer"] + p["entry_slippage"]
+                    entry = (ts, 1, price, price - p["sl_atr_mult"] * row["atr"],
+                             price + p["tp_atr_mult"] * row["atr"])
+                    break
+            elif row["low"] < lo - p["buffer"]:
+                if row["short_ok"]:
+                    price = lo - p["buffer"] - p["entry_slippage"]
+                    entry = (ts, -1, price, price + p["sl_atr_mult"] * row["atr"],
+                             price - p["tp_atr_mult"] * row["atr"])
+                    break
+        if entry is None:
+            continue
+        ts0, side, price, sl, tp = entry
+        manage = day[(day.index > ts0) & (day["hour"] < p["force_close_h"])]
+        result = None
+        held = 0
+        for ts, row in manage.iterrows():
+            held += 1
+            stop = row["low"] <= sl if side == 1 else row["high"] >= sl
+            take = row["high"] >= tp if side == 1 else row["low"] <= tp
+            if stop:
+                result = (ts, sl, "SL")
+                break
+            if take:
+                result = (ts, tp, "TP")
+                break
+        if result is None:
+            after = day[day["hour"] >= p["force_close_h"]]
+            if len(after) > 0:
+                result = (after.index[0], after["open"].iloc[0], "FORCE_CLOSE")
+                held += 1
+            else:
+                result = (day.index[-1], day["close"].iloc[-1], "EOD_CLOSE")
+        trades.append((ts0, side, price, sl, tp, hi, lo, *result, held))
+    return trades
+
+
+# ============================================================
+# simulate_session_breakout
+# ============================================================
+
+
+class TestSimulateSessionBreakout:
+    """参照実装との一致"""
+
+    @pytest.mark.parametrize("force_close_h", [21, 12, 24])
+    def test_matches_reference(self, force_close_h: int) -> None:
+        df = _make_h1()
+        rng = np.random.default_rng(0)
+        n = len(df)
+        atr = np.r_[np.full(30, np.nan), rng.uniform(0.001, 0.004, n - 30)]
+        long_ok = rng.random(n) < 0.6
+        short_ok = rng.random(n) < 0.6
+        tradable = ~np.isnan(atr) & (rng.random(n) < 0.9)
+        params = dict(_PARAMS, force_close_h=force_close_h)
+
+        result = simulate_session_breakout(df, atr, long_ok, short_ok, tradable, **params)
+        expected = _reference(df, atr, long_ok, short_ok, tradable, params)
+
+        frame = result.to_frame(df.index)
+        got = list(zip(
+            frame["entry_time"], result.direction, result.entry_price, result.sl, result.tp,
+            result.range_high, result.range_low, frame["exit_time"], result.exit_price,
+            result.outcome, result.holding_bars,
+        ))
+        assert len(expected) > 20
+        assert got == expected
+
+    def test_stop_wins_when_both_touched(self) -> None:
+        index = pd.date_range("2024-01-02", periods=12, freq="h", tz="UTC")
+        df = pd.DataFrame({
+            "open": 1.0, "high": 1.01, "low": 0.99, "close": 1.0,
+        }, index=index)
+        df.loc[index[3], "high"] = 1.02      # ブレイク足（3時台）
+        df.loc[index[4], ["high", "low"]] = [1.2, 0.8]   # 同じ足で SL/TP 両方
+        params = dict(_PARAMS, range_end_h=3, break_start_h=3, break_end_h=4,
+                      buffer=0.0, entry_slippage=0.0)
+        ones = np.ones(len(df), dtype=bool)
+
+        result = simulate_session_breakout(df, np.full(len(df), 0.01), ones, ones, ones, **params)
+
+        assert list(result.outcome) == ["SL"]
+        assert result.direction[0] == 1
+        assert result.exit_price[0] == pytest.approx(1.01 - 0.015)
+        assert result.holding_bars[0] == 1
+
+    def test_length_mismatch(self) -> None:
+        df = _make_h1(days=3)
+        with pytest.raises(ValueError):
+            simulate_session_breakout(df, np.ones(3), np.ones(3), np.ones(3), np.ones(3), **_PARAMS)
+
+
+class TestNewsBlackoutMask:
+    """近似カレンダー"""
+
+    def test_known_events(self) -> None:
+        index = pd.DatetimeIndex([
+            "2024-03-01 13:00",   # 第1金曜 NFP
+            "2024-03-01 15:00",   # 同日・時間外
+            "2024-03-07 11:00",   # 第1木曜 ECB/BoE
+            "2024-03-20 18:00",   # 第3水曜 FOMC
+            "2024-03-13 18:00",   # 第2水曜
+        ], tz="UTC")
+        assert list(news_blackout_mask(index)) == [True, False, True, True, False]
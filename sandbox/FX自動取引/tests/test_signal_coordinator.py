@@ -36,3 +36,53 @@ def test_register_signal_single_signal_approved_in_window():
     # llm_enabled=False なので即時 True が返り、_evaluator_loop は走らない
     assert result is True
     assert elapsed < 1.0, f"想定外に長い待機: {elapsed:.2f}s"
+
+
+def test_window_closes_when_all_participants_reported(monkeypatch):
+    """全参加ペアが報告済みなら window_sec を待たずに単一シグナルを承認する"""
+    monkeypatch.setattr("src.signal_coordinator.ANTHROPIC_API_KEY", "test-key")
+    sc = SignalCoordinator(window_sec=5.0)
+    sc.register_participant("USD_JPY")
+    sc.register_participant("EUR_USD")
+    sc.report_iteration("EUR_USD")  # EUR_USD はシグナルなしで判定済み
+
+    start = time.time()
+    result = sc.register_signal("USD_JPY", "BUY", adx=25.0)
+
+    assert result is True
+    assert time.time() - start < 1.0
+
+
+def test_verdict_cache_skips_llm_for_same_setup(monkeypatch):
+    """同じ (ペア, 方向) の組み合わせは2回目以降LLMを呼ばずキャッシュ判定を使う"""
+    import threading
+
+    monkeypatch.setattr("src.signal_coordinator.ANTHROPIC_API_KEY", "test-key")
+    sc = SignalCoordinator(window_sec=5.0)
+    calls = []
+
+    def fake_evaluate(signals):
+        calls.append(len(signals))
+        return ["USD_JPY"]
+
+    monkeypatch.setattr(sc, "_evaluate_correlation", fake_evaluate)
+    sc.register_participant("USD_JPY")
+    sc.register_participant("EUR_USD")
+
+    for _ in range(2):
+        results = {}
+        threads = [
+            threading.Thread(
+                target=lambda inst=inst, sig=sig: results.__setitem__(
+                    inst, sc.register_signal(inst, sig, adx=20.0)
+                )
+            )
+            for inst, sig in (("USD_JPY", "BUY"), ("EUR_USD", "SELL"))
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+        assert results == {"USD_JPY": True, "EUR_USD": False}
+
+    assert calls == [2]
@@ -60,7 +60,7 @@ class TestSlackNotifierInit:
 class TestNotify:
     """notify()メソッドのテスト"""
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_notify_success(self, mock_post):
         """正常送信でTrueを返す"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -77,7 +77,7 @@ class TestNotify:
         assert payload["attachments"][0]["color"] == COLOR_GREEN
         assert payload["attachments"][0]["text"] == "テストメッセージ"
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_notify_custom_color(self, mock_post):
         """カスタム色指定が反映される"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -89,7 +89,7 @@ class TestNotify:
         payload = call_kwargs.kwargs.get("json") or call_kwargs[1].get("json")
         assert payload["attachments"][0]["color"] == COLOR_RED
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_notify_http_error_returns_false(self, mock_post):
         """HTTP 400等でFalseを返す（例外は投げない）"""
         mock_post.return_value = MagicMock(status_code=400, text="invalid_payload")
@@ -99,7 +99,7 @@ class TestNotify:
 
         assert result is False
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_notify_timeout_returns_false(self, mock_post):
         """タイムアウト時にFalseを返す（例外は投げない）"""
         mock_post.side_effect = requests.exceptions.Timeout("timeout")
@@ -109,7 +109,7 @@ class TestNotify:
 
         assert result is False
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_notify_connection_error_returns_false(self, mock_post):
         """接続エラー時にFalseを返す（例外は投げない）"""
         mock_post.side_effect = requests.exceptions.ConnectionError("refused")
@@ -128,7 +128,7 @@ class TestNotify:
 class TestNotifySignal:
     """notify_signal()メソッドのテスト"""
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_signal_buy(self, mock_post):
         """BUYシグナルのフォーマット確認"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -155,7 +155,7 @@ class TestNotifySignal:
         assert field_map["確信度"] == "7/10"
         assert field_map["レジーム"] == "TRENDING"
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_signal_without_optional_fields(self, mock_post):
         """オプションフィールド無しのシグナル通知"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -181,7 +181,7 @@ class TestNotifySignal:
 class TestNotifyTrade:
     """notify_trade()メソッドのテスト"""
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_trade_with_all_fields(self, mock_post):
         """全フィールド指定の取引通知"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -213,7 +213,7 @@ class TestNotifyTrade:
         assert field_map["AI評価"] == "AGREE"
         assert field_map["レジーム"] == "TRENDING"
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_trade_contradict_color(self, mock_post):
         """AI評価CONTRADICTは黄色"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -229,7 +229,7 @@ class TestNotifyTrade:
         payload = call_kwargs.kwargs.get("json") or call_kwargs[1].get("json")
         assert payload["attachments"][0]["color"] == COLOR_YELLOW
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_trade_reject_color(self, mock_post):
         """AI評価REJECTは赤色"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -254,7 +254,7 @@ class TestNotifyTrade:
 class TestNotifyKillSwitch:
     """notify_kill_switch()メソッドのテスト"""
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_kill_switch_activated(self, mock_post):
         """キルスイッチ発動通知"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -268,7 +268,7 @@ class TestNotifyKillSwitch:
         assert attachment["color"] == COLOR_RED
         assert "キルスイッチ発動" in attachment["title"]
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_kill_switch_deactivated(self, mock_post):
         """キルスイッチ解除通知"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -291,7 +291,7 @@ class TestNotifyKillSwitch:
 class TestNotifyError:
     """notify_error()メソッドのテスト"""
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_error_notification(self, mock_post):
         """エラー通知のフォーマット確認"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -316,7 +316,7 @@ class TestNotifyError:
 class TestNotifyBotStatus:
     """notify_bot_status()メソッドのテスト"""
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_bot_status_with_detail(self, mock_post):
         """ボットステータス通知（詳細付き）"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -331,7 +331,7 @@ class TestNotifyBotStatus:
         assert "ボット起動" in attachment["title"]
         assert attachment["text"] == "USD_JPY H4 60秒間隔"
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_bot_status_without_detail(self, mock_post):
         """ボットステータス通知（詳細なし）"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -355,7 +355,7 @@ class TestNotifyBotStatus:
 class TestUnexpectedErrors:
     """予期しない例外のハンドリング"""
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_unexpected_exception_returns_false(self, mock_post):
         """予期しない例外でもFalseを返し、例外は投げない"""
         mock_post.side_effect = RuntimeError("unexpected")
@@ -365,7 +365,7 @@ class TestUnexpectedErrors:
 
         assert result is False
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_webhook_url_passed_correctly(self, mock_post):
         """Webhook URLが正しく送信先に使われる"""
         mock_post.return_value = MagicMock(status_code=200)
@@ -376,7 +376,7 @@ class TestUnexpectedErrors:
         call_args = mock_post.call_args
         assert call_args[0][0] == DUMMY_WEBHOOK
 
-    @patch("src.slack_notifier.requests.post")
+    @patch("src.slack_notifier.requests.Session.post")
     def test_timeout_passed_correctly(self, mock_post):
         """カスタムタイムアウトが正しく設定される"""
         mock_post.return_value = MagicMock(status_code=200)
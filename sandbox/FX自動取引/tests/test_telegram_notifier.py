@@ -1,7 +1,7 @@
 """
 TelegramNotifier のユニットテスト。
 
-requests.post / requests.get をモックし、Telegram APIを実際には呼ばない。
+requests.Session.post / get をモックし、Telegram APIを実際には呼ばない。
 """
 
 import logging
@@ -16,6 +16,7 @@ from src.telegram_notifier import (
     TelegramNotifier,
     TelegramLogHandler,
     _API_BASE,
+    _MAX_MESSAGE_CHARS,
     _MAX_QUEUE_SIZE,
 )
 
@@ -37,8 +38,8 @@ def notifier():
 
 @pytest.fixture
 def mock_post():
-    """requests.post をモック。"""
-    with patch("src.telegram_notifier.requests.post") as m:
+    """requests.Session.post をモック。"""
+    with patch("src.telegram_notifier.requests.Session.post") as m:
         m.return_value.status_code = 200
         m.return_value.json.return_value = {"ok": True, "result": {}}
         yield m
@@ -46,8 +47,8 @@ def mock_post():
 
 @pytest.fixture
 def mock_get():
-    """requests.get をモック。"""
-    with patch("src.telegram_notifier.requests.get") as m:
+    """requests.Session.get をモック。"""
+    with patch("src.telegram_notifier.requests.Session.get") as m:
         m.return_value.status_code = 200
         m.return_value.json.return_value = {"ok": True, "result": []}
         yield m
@@ -110,6 +111,23 @@ class TestSendQueue:
         notifier.notify("2")
         assert notifier.pending_count == 2
 
+    def test_溜まったメッセージは1通に連結して送る(self, notifier, mock_post):
+        notifier.notify("1件目")
+        notifier.notify("2件目")
+        notifier.notify("Markdown", parse_mode="Markdown")
+        notifier.notify("x" * _MAX_MESSAGE_CHARS, parse_mode="Markdown")
+        notifier._send_queue.put_nowait(None)
+
+        notifier._sender_loop()
+
+        texts = [c.kwargs["json"]["text"] for c in mock_post.call_args_list]
+        modes = [c.kwargs["json"]["parse_mode"] for c in mock_post.call_args_list]
+        assert texts[0] == "1件目\n\n2件目"
+        assert texts[1] == "Markdown"
+        assert len(texts[2]) == _MAX_MESSAGE_CHARS
+        assert modes == ["HTML", "Markdown", "Markdown"]
+        assert notifier.pending_count == 0
+
 
 # ============================================================
 # 3. API呼び出しテスト
@@ -352,8 +370,8 @@ class TestCommandHandling:
 class TestThreadControl:
     """start()/stop() のライフサイクルテスト。"""
 
-    @patch("src.telegram_notifier.requests.post")
-    @patch("src.telegram_notifier.requests.get")
+    @patch("src.telegram_notifier.requests.Session.post")
+    @patch("src.telegram_notifier.requests.Session.get")
     def test_start_stop_ライフサイクル(self, mock_get, mock_post):
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {"ok": True, "result": {}}
@@ -389,8 +407,8 @@ class TestThreadControl:
 class TestErrorResilience:
     """Telegramダウン時のエラー耐性テスト。"""
 
-    @patch("src.telegram_notifier.requests.get")
-    @patch("src.telegram_notifier.requests.post")
+    @patch("src.telegram_notifier.requests.Session.get")
+    @patch("src.telegram_notifier.requests.Session.post")
     def test_Telegram障害でもメインループに影響なし(self, mock_post, mock_get):
         import requests as req
         mock_post.side_effect = req.exceptions.ConnectionError("Telegram down")
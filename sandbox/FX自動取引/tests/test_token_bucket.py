@@ -0,0 +1,54 @@
+"""
+トークンバケットのテスト
+
+- 容量までのバーストと補充レート
+- acquire() の待機と停止指示による打ち切り
+"""
+
+import threading
+
+import pytest
+
+from src.token_bucket import TokenBucket
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTokenBucket:
+    """補充と消費"""
+
+    def test_burst_then_refill(self) -> None:
+        clock = _FakeClock()
+        bucket = TokenBucket(rate_per_sec=2.0, capacity=3, clock=clock)
+
+        assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+        assert bucket.wait_time() == pytest.approx(0.5)
+
+        clock.now += 0.5
+        assert bucket.try_acquire()
+        clock.now += 100.0
+        assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+    def test_acquire_waits_and_honors_stop(self) -> None:
+        bucket = TokenBucket(rate_per_sec=50.0, capacity=1)
+        assert bucket.acquire(timeout=1.0)
+        assert bucket.acquire(timeout=1.0)  # 約20ms待って補充される
+
+        slow = TokenBucket(rate_per_sec=0.01, capacity=1)
+        slow.try_acquire()
+        assert not slow.acquire(timeout=0.05)
+        stop = threading.Event()
+        stop.set()
+        assert not slow.acquire(stop_event=stop)
+
+    def test_invalid_arguments(self) -> None:
+        with pytest.raises(ValueError):
+            TokenBucket(rate_per_sec=0, capacity=1)
+        with pytest.raises(ValueError):
+            TokenBucket(rate_per_sec=1.0, capacity=0)
@@ -1,11 +1,18 @@
-"""TradePostMortem の Claude API 呼び出しのテスト
+"""TradePostMortem の Claude API 呼び出しとワーカープールのテスト
 
 監査5/4: max_tokens=512 では日本語 JSON が確実に切れて
 JSONDecodeError("Unterminated string ...") が発生していたバグ修正の回帰防止。
 """
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
-from src.trade_postmortem import TradePostMortem
+import pytest
+
+from src.db_writer import flush_all_writers
+from src.trade_postmortem import PostMortemRateLimited, TradePostMortem
 
 
 def _mock_response(text: str, stop_reason: str = "end_turn") -> MagicMock:
@@ -118,3 +125,126 @@ def test_call_claude_returns_none_on_timeout():
         result = pm._call_claude("test")
     assert result is None
     assert mock_post.call_count == 1
+
+
+# ============================================================
+# ワーカープール・永続キュー
+# ============================================================
+
+_OPENED = datetime(2026, 5, 1, tzinfo=timezone.utc)
+
+
+def _trigger(pm: TradePostMortem, trade_id: str, pl: float = -100.0) -> None:
+    pm.trigger_analysis(
+        trade_id=trade_id, instrument="USD_JPY", units=1000,
+        open_price=150.0, close_price=149.9, pl=pl,
+        opened_at=_OPENED, closed_at=_OPENED + timedelta(hours=2),
+    )
+
+
+@pytest.fixture
+def api_key():
+    with patch("src.trade_postmortem.ANTHROPIC_API_KEY", "test-key"):
+        yield
+
+
+def test_burst_runs_on_bounded_workers(api_key):
+    """一括決済でもワーカー数を超えて同時にAPIを呼ばない"""
+    pm = TradePostMortem(db_path=None, workers=2)
+    lock = threading.Lock()
+    active = [0, 0]  # 現在数, 最大
+
+    def fake_call(prompt, scale=1):
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return {"outcome": "loss", "primary_cause": "x"}
+
+    with patch.object(pm, "_call_claude", side_effect=fake_call) as call:
+        for i in range(10):
+            _trigger(pm, f"T{i}")
+        assert pm.wait_idle(timeout=5)
+
+    assert call.call_count == 10
+    assert active[1] <= 2
+    assert len(pm._threads) == 2
+
+
+def test_pending_jobs_survive_restart(api_key, tmp_path):
+    """ワーカー起動前に終了しても、次回起動時に DB キューから再開する"""
+    db = tmp_path / "pm.db"
+    with patch.object(TradePostMortem, "_ensure_workers"):
+        first = TradePostMortem(db_path=db)
+        _trigger(first, "T-1")
+        _trigger(first, "T-2")
+    flush_all_writers()
+
+    with patch.object(
+        TradePostMortem, "_call_claude", return_value={"outcome": "loss", "primary_cause": "x"},
+    ):
+        second = TradePostMortem(db_path=db)
+        assert second.wait_idle(timeout=5)
+    flush_all_writers()
+
+    with sqlite3.connect(str(db)) as conn:
+        done = {r[0] for r in conn.execute("SELECT trade_id FROM trade_postmortems")}
+        remaining = conn.execute("SELECT COUNT(*) FROM postmortem_queue").fetchone()[0]
+    assert done == {"T-1", "T-2"}
+    assert remaining == 0
+
+
+def test_rate_limit_backs_off_and_retries(api_key):
+    """429 はワーカー共通で待機し、同じジョブを再試行する"""
+    pm = TradePostMortem(db_path=None, workers=1)
+    responses = [PostMortemRateLimited(retry_after=0.05), {"outcome": "win"}]
+    with patch.object(pm, "_call_claude", side_effect=responses) as call, \
+            patch.object(pm, "_save_analysis") as save:
+        _trigger(pm, "T-RL", pl=100.0)
+        assert pm.wait_idle(timeout=5)
+
+    assert call.call_count == 2
+    save.assert_called_once_with("T-RL", {"outcome": "win"})
+
+
+def test_http_429_raises_rate_limited():
+    """HTTP 429 は None ではなく PostMortemRateLimited（Retry-After 付き）"""
+    import requests
+
+    pm = TradePostMortem(db_path=None)
+    resp = MagicMock()
+    resp.status_code = 429
+    resp.headers = {"retry-after": "7"}
+    resp.raise_for_status.side_effect = requests.exceptions.HTTPError(response=resp)
+    with patch("src.trade_postmortem.requests.post", return_value=resp):
+        with pytest.raises(PostMortemRateLimited) as exc:
+            pm._call_claude("test")
+    assert exc.value.retry_after == 7.0
+
+
+def test_batch_packs_trades_into_one_request(api_key):
+    """batch_size > 1 なら溜まったジョブを1回のAPI呼び出しでまとめて分析する"""
+    pm = TradePostMortem(db_path=None, workers=1, batch_size=3)
+    gate = threading.Event()
+    saved = {}
+
+    def fake_call(prompt, scale=1):
+        gate.wait(5)
+        if scale == 1:
+            return {"outcome": "loss"}
+        return {"analyses": [
+            {"trade_id": tid, "outcome": "loss"}
+            for tid in ("B-2", "B-3", "B-4") if f"trade_id={tid}" in prompt
+        ]}
+
+    with patch.object(pm, "_call_claude", side_effect=fake_call) as call, \
+            patch.object(pm, "_save_analysis", side_effect=saved.__setitem__):
+        for i in range(1, 5):
+            _trigger(pm, f"B-{i}")  # B-1 処理中に B-2〜4 が溜まる
+        gate.set()
+        assert pm.wait_idle(timeout=5)
+
+    assert call.call_count == 2
+    assert set(saved) == {"B-1", "B-2", "B-3", "B-4"}
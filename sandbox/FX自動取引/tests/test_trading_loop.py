@@ -426,6 +426,21 @@ class TestLoopControl:
         # イテレーションが実行されたこと
         assert loop.iteration_count >= 2
 
+    def test_step_for_external_scheduler(self):
+        """begin() → step() → finish()（オーケストレーターからの駆動）"""
+        broker = _make_mock_broker()
+        broker.get_account_summary.side_effect = [RuntimeError("API error"), {"balance": 1_000_000}]
+        loop = _create_trading_loop(broker=broker, check_interval_sec=30, max_consecutive_errors=1)
+
+        loop.begin()
+        assert loop.is_running is True
+        assert loop.step() == 30          # エラーは計上して握りつぶす
+        assert loop.last_error == "API error"
+        assert loop.step() == 30
+        assert loop.iteration_count == 1
+        loop.finish()
+        assert loop.is_running is False
+
     def test_iteration_count(self):
         """run_once 3回で iteration_count == 3"""
         loop = _create_trading_loop()
@@ -830,3 +845,193 @@ class TestPipelineTraceLog:
         assert "sev=0.60" in line
         assert "pen=0.70" in line
         assert "DECISION=EXECUTE" in line
+
+    def test_trace_includes_stage_latency(self):
+        """trace にステージ別レイテンシが付き、ローリング分布にも積まれる。"""
+        strategy = _make_mock_strategy(signal=Signal.BUY)
+        loop = _create_trading_loop(strategy=strategy)
+
+        loop.run_once()
+        loop.run_once()
+
+        latency = loop.last_pipeline_trace["latency_ms"]
+        for stage in ("account", "prices", "indicators", "regime", "strategy", "order", "total"):
+            assert stage in latency
+        assert latency["total"] >= latency["prices"]
+        assert loop.latency.summary()["total"]["count"] == 2
+
+    def test_trace_writer_records_structured_values(self, tmp_path):
+        """trace_writer があれば足時刻・スコア・倍率・所要時間を切り詰めずに記録する。"""
+        from src.pipeline_trace import PipelineTraceWriter, load_traces
+
+        broker = _make_mock_broker()
+        data = _make_ohlcv_data()
+        data.index = pd.date_range("2026-05-01", periods=len(data), freq="h", tz="UTC")
+        broker.get_prices.return_value = data
+        loop = _create_trading_loop(broker=broker, strategy=_make_mock_strategy(Signal.BUY))
+        writer = PipelineTraceWriter(tmp_path, flush_interval_sec=60)
+        loop._trace_writer = writer
+
+        loop.run_once()
+        writer.close()
+
+        frame = load_traces(tmp_path)
+        assert len(frame) == 1
+        row = frame.iloc[0]
+        assert row["instrument"] == "USD_JPY"
+        assert row["iteration"] == 1
+        assert row["decision"] == "EXECUTE"
+        assert row["bar_time"] == data.index[-1]
+        assert row["session_label"] == "TEST"
+        assert row["strategy_status"] == "BUY"
+        assert row["conviction_score"] == loop.last_pipeline_trace["values"]["conviction_score"]
+        assert row["final_mult"] == pytest.approx(loop.last_pipeline_trace["final_mult"])
+        assert row["ms_total"] == loop.last_pipeline_trace["latency_ms"]["total"]
+
+    def test_trace_writer_failure_does_not_stop_trading(self):
+        """trace の記録に失敗しても run_once は注文結果を返す。"""
+        loop = _create_trading_loop(strategy=_make_mock_strategy(Signal.BUY))
+        loop._trace_writer = MagicMock()
+        loop._trace_writer.write.side_effect = RuntimeError("disk full")
+
+        assert loop.run_once() is not None
+        loop._trace_writer.write.assert_called_once()
+
+
+# ============================================================
+# 7. 指標ストリーミング（R1拡張）
+# ============================================================
+
+
+class TestIndicatorStreamIntegration:
+    """_fetch_and_compute が IndicatorStream 経由で指標を得ることのテスト"""
+
+    def test_fetch_and_compute_uses_stream(self):
+        """ストリーミング有効時は IndicatorStream.update の結果を返すこと"""
+        loop = _create_trading_loop()
+        fake_cache = {"current_atr": 0.5, "atr": None}
+        loop._indicator_stream = MagicMock()
+        loop._indicator_stream.update.return_value = fake_cache
+
+        data, indicators = loop._fetch_and_compute()
+
+        loop._indicator_stream.update.assert_called_once_with(data)
+        assert indicators is fake_cache
+        assert loop._last_atr == 0.5
+
+    def test_stream_disabled_falls_back_to_compute_indicators(self):
+        """INDICATOR_STREAM_ENABLED=False では毎回 compute_indicators を使うこと"""
+        with patch("src.trading_loop.INDICATOR_STREAM_ENABLED", False):
+            loop = _create_trading_loop()
+        assert loop._indicator_stream is None
+
+        with patch("src.trading_loop.compute_indicators",
+                   return_value={"current_atr": None}) as mock_compute:
+            loop._fetch_and_compute()
+        mock_compute.assert_called_once()
+
+
+# ============================================================
+# 8. 足確定駆動スケジューラ（bar_close モード）
+# ============================================================
+
+
+class TestBarCloseScheduler:
+    """scheduler_mode="bar_close" のテスト"""
+
+    @staticmethod
+    def _create_bar_close_loop(broker: MagicMock = None, pm: MagicMock = None,
+                               strategy: MagicMock = None) -> TradingLoop:
+        return TradingLoop(
+            broker_client=broker or _make_mock_broker(),
+            position_manager=pm or _make_mock_position_manager(),
+            risk_manager=_make_mock_risk_manager(),
+            strategy=strategy or _make_mock_strategy(signal=Signal.HOLD),
+            instrument="USD_JPY",
+            granularity="M15",
+            scheduler_mode="bar_close",
+        )
+
+    def test_invalid_scheduler_mode_raises(self):
+        with pytest.raises(ValueError):
+            TradingLoop(
+                broker_client=_make_mock_broker(),
+                position_manager=_make_mock_position_manager(),
+                risk_manager=_make_mock_risk_manager(),
+                strategy=_make_mock_strategy(),
+                scheduler_mode="cron",
+            )
+
+    def test_pipeline_runs_only_on_new_bar(self):
+        """同じ足のデータでは2回目以降シグナルパイプラインを実行しないこと"""
+        broker = _make_mock_broker()
+        strategy = _make_mock_strategy(signal=Signal.HOLD)
+        loop = self._create_bar_close_loop(broker=broker, strategy=strategy)
+
+        bars = pd.DataFrame({
+            "open": [150.0 + i * 0.01 for i in range(101)],
+            "high": [150.5 + i * 0.01 for i in range(101)],
+            "low": [149.5 + i * 0.01 for i in range(101)],
+            "close": [150.0 + i * 0.01 for i in range(101)],
+            "volume": [1000] * 101,
+        })
+        broker.get_prices.return_value = bars.iloc[:100]
+        loop.run_once()
+        loop.run_once()
+        assert strategy.generate_signal.call_count == 1
+
+        broker.get_prices.return_value = bars
+        loop.run_once()
+        assert strategy.generate_signal.call_count == 2
+
+    def test_interval_mode_runs_pipeline_every_time(self):
+        """interval モード（既定）では同じ足でも毎回パイプラインを実行すること"""
+        strategy = _make_mock_strategy(signal=Signal.HOLD)
+        loop = _create_trading_loop(strategy=strategy)
+        loop.run_once()
+        loop.run_once()
+        assert strategy.generate_signal.call_count == 2
+
+    def test_light_tick_between_bars(self):
+        """足確定前は同期とスプレッド更新のみで、価格取得しないこと"""
+        broker = _make_mock_broker()
+        broker.get_spread.return_value = 0.3
+        pm = _make_mock_position_manager()
+        loop = self._create_bar_close_loop(broker=broker, pm=pm)
+        loop._next_bar_close_ts = 1_000_900.0 + 1.0
+
+        with patch("src.trading_loop.time.time", return_value=1_000_000.0):
+            sleep_sec = loop._scheduled_step()
+
+        pm.sync_with_broker.assert_called_once()
+        broker.get_prices.assert_not_called()
+        assert loop._last_spread == 0.3
+        # 次の足確定まで 901秒あるが check_interval_sec(60) で上限
+        assert sleep_sec == 60
+
+    def test_scheduled_step_after_bar_close_runs_pipeline_and_reschedules(self):
+        """足確定後は全パイプラインを実行し、次の足確定時刻に再設定すること"""
+        broker = _make_mock_broker()
+        strategy = _make_mock_strategy(signal=Signal.HOLD)
+        loop = self._create_bar_close_loop(broker=broker, strategy=strategy)
+        now = 1_800_000_030.0  # 15分境界 (1_800_000_000) の30秒後
+
+        with patch("src.trading_loop.time.time", return_value=now):
+            sleep_sec = loop._scheduled_step()
+
+        strategy.generate_signal.assert_called_once()
+        assert loop._next_bar_close_ts == 1_800_000_900.0 + 1.0
+        assert sleep_sec == 60
+
+    def test_scheduled_step_retries_until_new_bar_appears(self):
+        """足確定後に新しい足が未反映なら短い間隔で再試行すること"""
+        broker = _make_mock_broker()
+        loop = self._create_bar_close_loop(broker=broker)
+        loop.run_once()  # 現在の足を記録
+        loop._next_bar_close_ts = 1_800_000_001.0
+
+        with patch("src.trading_loop.time.time", return_value=1_800_000_002.0):
+            sleep_sec = loop._scheduled_step()
+
+        assert sleep_sec == pytest.approx(1.0)
+        assert loop._next_bar_close_ts == 1_800_000_001.0
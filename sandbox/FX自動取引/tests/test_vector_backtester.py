@@ -0,0 +1,160 @@
+"""
+ベクトル化バックテストエンジンのテスト
+
+- 登録済み戦略で BacktestEngine（Backtesting.py）とメトリクスが一致すること
+- spread / 手数料 / 証拠金率を含めても一致すること
+- IS/OOS・WFA・fill_rate 補正がそのまま使えること
+- 未対応の戦略・ロジックを上書きしたサブクラスはエラーになること
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtester import BacktestEngine, BacktestError, RsiMaCrossoverBT
+from src.strategy.variants_bt import STRATEGIES, DonchianBreakoutBT
+from src.vector_backtester import VectorBacktestEngine, build_signals, simulate
+
+
+# ============================================================
+# テスト用ヘルパー
+# ============================================================
+
+
+def _make_prepared_data(n: int = 1500, seed: int = 2) -> pd.DataFrame:
+    """M15 のランダムウォーク OHLCV（大文字カラム名）を生成する。"""
+    rng = np.random.default_rng(seed)
+    close = 150 + np.cumsum(rng.normal(0, 0.05, n))
+    open_ = np.roll(close, 1) + rng.normal(0, 0.02, n)
+    open_[0] = close[0]
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) + rng.uniform(0, 0.05, n),
+        "Low": np.minimum(open_, close) - rng.uniform(0, 0.05, n),
+        "Close": close,
+        "Volume": rng.integers(100, 1000, n),
+    }, index=pd.date_range("2024-01-01", periods=n, freq="15min"))
+
+
+def _assert_metrics_equal(actual: dict, expected: dict) -> None:
+    assert set(actual) == set(expected)
+    for key, exp in expected.items():
+        if exp is None:
+            assert actual[key] is None, key
+        else:
+            assert actual[key] == pytest.approx(exp, rel=1e-7, abs=1e-9), key
+
+
+@pytest.fixture
+def engines():
+    with BacktestEngine(db_path=":memory:") as ref, \
+            VectorBacktestEngine(db_path=":memory:") as vec:
+        yield ref, vec
+
+
+@pytest.fixture(autouse=True)
+def _quiet_backtesting():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield
+
+
+ALL_STRATEGIES = {"RsiMaCrossover": RsiMaCrossoverBT, **STRATEGIES}
+
+
+# ============================================================
+# テストケース
+# ============================================================
+
+
+class TestParity:
+    """Backtesting.py とのメトリクス一致"""
+
+    @pytest.mark.parametrize("name", list(ALL_STRATEGIES))
+    def test_matches_backtesting_py(self, engines, name: str) -> None:
+        """登録済みの全戦略で run() の結果が一致すること"""
+        ref, vec = engines
+        data = _make_prepared_data()
+        strategy = ALL_STRATEGIES[name]
+
+        _assert_metrics_equal(
+            vec.run(data, strategy, spread=0.0001),
+            ref.run(data, strategy, spread=0.0001),
+        )
+
+    @pytest.mark.parametrize("kwargs", [
+        {"commission": 0.0001},
+        {"margin": 0.04, "spread": 0.0001},
+        {"instrument": "USD_JPY", "auto_spread": True, "fill_rate": 0.8},
+    ])
+    def test_costs_and_leverage(self, engines, kwargs: dict) -> None:
+        """手数料・レバレッジ・auto_spread・fill_rate を含めても一致すること"""
+        ref, vec = engines
+        data = _make_prepared_data(seed=5)
+
+        _assert_metrics_equal(
+            vec.run(data, RsiMaCrossoverBT, **kwargs),
+            ref.run(data, RsiMaCrossoverBT, **kwargs),
+        )
+
+    def test_parameter_subclass(self, engines) -> None:
+        """パラメータだけを上書きしたサブクラスも一致すること"""
+        ref, vec = engines
+        data = _make_prepared_data(seed=7)
+
+        class FastDonchian(DonchianBreakoutBT):
+            donchian_len = 10
+            rr = 1.5
+
+        _assert_metrics_equal(vec.run(data, FastDonchian), ref.run(data, FastDonchian))
+
+    def test_walk_forward(self, engines) -> None:
+        """run_walk_forward() もバックエンド差し替えのみで一致すること"""
+        ref, vec = engines
+        data = _make_prepared_data(n=1200, seed=3)
+
+        expected = ref.run_walk_forward(data, RsiMaCrossoverBT, n_windows=3)
+        actual = vec.run_walk_forward(data, RsiMaCrossoverBT, n_windows=3)
+        assert actual["wfe_mean"] == pytest.approx(expected["wfe_mean"], rel=1e-7)
+        for got, exp in zip(actual["windows"], expected["windows"]):
+            _assert_metrics_equal(got["out_of_sample"], exp["out_of_sample"])
+
+
+class TestSimulate:
+    """約定シミュレーションの基本動作"""
+
+    def test_equity_starts_at_cash_and_trades_are_consistent(self) -> None:
+        """エクイティは初期資金から始まり、決済損益の合計と整合すること"""
+        data = _make_prepared_data()
+        equity, trades = simulate(data, build_signals(data, RsiMaCrossoverBT), cash=500_000)
+
+        assert equity[0] == 500_000
+        assert len(equity) == len(data)
+        assert np.all(trades["entry_bar"] < trades["exit_bar"])
+        last_exit = trades["exit_bar"][-1]
+        assert equity[last_exit] == pytest.approx(500_000 + trades["pnl"].sum())
+
+
+class TestUnsupported:
+    """ベクトル化できない戦略"""
+
+    def test_unregistered_strategy_raises(self, engines) -> None:
+        """未登録の戦略は BacktestError"""
+        from src.strategy._bench_hlhb import HlhbBenchBT
+
+        _, vec = engines
+        with pytest.raises(BacktestError, match="未対応"):
+            vec.run(_make_prepared_data(), HlhbBenchBT)
+
+    def test_overridden_next_raises(self, engines) -> None:
+        """next() を上書きしたサブクラスは登録クラスとロジックが違うためエラー"""
+        _, vec = engines
+
+        class CustomNext(RsiMaCrossoverBT):
+            def next(self):
+                pass
+
+        with pytest.raises(BacktestError, match="未対応"):
+            vec.run(_make_prepared_data(), CustomNext)